@@ -4,9 +4,14 @@ Analyze all Nifty 50 stocks based on P/E ratio and dividend yield
 Generate investment recommendations with buy percentages
 """
 import os
+import sys
 import psycopg2
 import pandas as pd
-import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from stock_analysis.scoring import analyze_stocks
 
 def main():
     database_url = os.getenv('DATABASE_URL')
@@ -24,14 +29,12 @@ def main():
                 trading_symbol,
                 name,
                 last_price,
-                market_cap,
+                market_cap_cr,
                 pe_ratio,
                 dividend_yield,
                 volume,
-                week_high_52,
-                week_low_52,
-                close_price,
-                open_price
+                position_52w,
+                day_change_pct
             FROM stock_data
             WHERE pe_ratio IS NOT NULL AND dividend_yield IS NOT NULL
             ORDER BY trading_symbol
@@ -49,104 +52,9 @@ def main():
         print("=" * 100)
         print()
 
-        # Calculate additional metrics
-        df['52w_position'] = ((df['last_price'] - df['week_low_52']) /
-                              (df['week_high_52'] - df['week_low_52']) * 100)
-
-        df['day_change_pct'] = ((df['close_price'] - df['open_price']) /
-                                df['open_price'] * 100)
-
-        # Market cap in crores
-        df['market_cap_cr'] = df['market_cap'] / 10000000
-
-        # Scoring system
-        # P/E Score (lower is better, ideal range: 10-20)
-        def pe_score(pe):
-            if pd.isna(pe) or pe <= 0:
-                return 0
-            elif pe < 10:
-                return 5  # Very undervalued
-            elif pe < 15:
-                return 10  # Undervalued
-            elif pe < 20:
-                return 8   # Fair value
-            elif pe < 25:
-                return 6   # Moderate
-            elif pe < 30:
-                return 4   # Expensive
-            else:
-                return 2   # Very expensive
-
-        # Dividend Score (higher is better)
-        def dividend_score(div_yield):
-            if pd.isna(div_yield) or div_yield <= 0:
-                return 0
-            elif div_yield >= 4:
-                return 10  # Excellent
-            elif div_yield >= 3:
-                return 8   # Very good
-            elif div_yield >= 2:
-                return 6   # Good
-            elif div_yield >= 1:
-                return 4   # Moderate
-            else:
-                return 2   # Low
-
-        # Position score (prefer stocks not at 52-week high)
-        def position_score(pos):
-            if pd.isna(pos):
-                return 5
-            elif pos < 30:
-                return 10  # Near low (opportunity)
-            elif pos < 50:
-                return 8   # Below mid-range
-            elif pos < 70:
-                return 6   # Mid-range
-            elif pos < 85:
-                return 4   # Upper range
-            else:
-                return 2   # Near high
-
-        df['pe_score'] = df['pe_ratio'].apply(pe_score)
-        df['div_score'] = df['dividend_yield'].apply(dividend_score)
-        df['pos_score'] = df['52w_position'].apply(position_score)
-
-        # Total score (weighted)
-        df['total_score'] = (df['pe_score'] * 0.4 +  # 40% weight on P/E
-                            df['div_score'] * 0.4 +   # 40% weight on dividend
-                            df['pos_score'] * 0.2)    # 20% weight on position
-
-        # Normalize to 100
-        max_score = df['total_score'].max()
-        df['normalized_score'] = (df['total_score'] / max_score * 100)
-
-        # Investment rating
-        def rating(score):
-            if score >= 80:
-                return "STRONG BUY"
-            elif score >= 65:
-                return "BUY"
-            elif score >= 50:
-                return "MODERATE BUY"
-            elif score >= 35:
-                return "HOLD"
-            else:
-                return "AVOID"
-
-        df['rating'] = df['normalized_score'].apply(rating)
-
-        # Calculate buy percentages (only for BUY and STRONG BUY)
-        buy_stocks = df[df['normalized_score'] >= 50].copy()
-
-        if not buy_stocks.empty:
-            # Allocate based on normalized scores
-            total_buy_score = buy_stocks['normalized_score'].sum()
-            buy_stocks['buy_percentage'] = (buy_stocks['normalized_score'] / total_buy_score * 100)
-        else:
-            buy_stocks['buy_percentage'] = 0
-
-        # Sort by score
-        df_sorted = df.sort_values('normalized_score', ascending=False)
+        # Derived metrics, scoring, ratings and buy allocation (sorted by score)
+        df = analyze_stocks(df)
+        buy_stocks = df[df['buy_percentage'] > 0]
 
         # Display results
         print("📊 TOP INVESTMENT OPPORTUNITIES (Sorted by Score)")
@@ -154,27 +62,25 @@ def main():
         print()
 
         # Top picks
-        top_picks = df_sorted.head(15)
+        top_picks = df.head(15)
 
-        for idx, row in top_picks.iterrows():
+        for rank, (idx, row) in enumerate(top_picks.iterrows(), 1):
             print(f"{'=' * 100}")
-            print(f"#{top_picks.index.get_loc(idx) + 1}. {row['trading_symbol']} - {row['name'][:40]}")
+            print(f"#{rank}. {row['trading_symbol']} - {row['name'][:40]}")
             print(f"{'=' * 100}")
             print(f"  Price:              ₹{row['last_price']:,.2f}")
             print(f"  Market Cap:         ₹{row['market_cap_cr']:,.0f} Cr")
             print(f"  P/E Ratio:          {row['pe_ratio']:.2f}x")
             print(f"  Dividend Yield:     {row['dividend_yield']:.2f}%")
-            print(f"  52W Position:       {row['52w_position']:.1f}%")
+            print(f"  52W Position:       {row['position_52w']:.1f}%")
             print(f"  Day Change:         {row['day_change_pct']:+.2f}%")
             print(f"  Volume:             {row['volume']:,.0f}")
             print(f"  ")
             print(f"  Investment Score:   {row['normalized_score']:.1f}/100")
             print(f"  Rating:             {row['rating']}")
 
-            if row['normalized_score'] >= 50 and not buy_stocks.empty:
-                buy_pct = buy_stocks[buy_stocks['trading_symbol'] == row['trading_symbol']]['buy_percentage'].values
-                if len(buy_pct) > 0:
-                    print(f"  📈 BUY ALLOCATION:   {buy_pct[0]:.2f}% of portfolio")
+            if row['buy_percentage'] > 0:
+                print(f"  📈 BUY ALLOCATION:   {row['buy_percentage']:.2f}% of portfolio")
             print()
 
         # Summary statistics
@@ -6,48 +6,29 @@ Compare and analyze all Indian Gold ETFs
 
 import sys
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 try:
-    import yfinance as yf
-    import pandas as pd
-    import numpy as np
+    import yfinance
+    import pandas
 except ImportError:
     print("Error: Required libraries not installed")
     print("Run: pip install yfinance pandas numpy")
     sys.exit(1)
 
+from stock_analysis.correlation import CorrelationService
+from stock_analysis.etfs import gold_etfs
+from stock_analysis.returns import get_return_stats
+
 
 # Gold ETFs
-GOLD_ETFS = {
-    "GOLDSHARE.NS": {
-        "name": "Nippon India ETF Gold BeES",
-        "amc": "Nippon India",
-        "launch_year": 2014,
-        "aum": "₹6,500+ Cr",
-        "expense_ratio": "1.00%",
-        "tracking": "Domestic Gold Price"
-    },
-    "GOLDBEES.NS": {
-        "name": "Nippon India ETF Gold BeES (Old)",
-        "amc": "Nippon India",
-        "launch_year": 2007,
-        "aum": "₹2,000+ Cr",
-        "expense_ratio": "1.00%",
-        "tracking": "Domestic Gold Price"
-    },
-    "HDFCGOLD.NS": {
-        "name": "HDFC Gold ETF",
-        "amc": "HDFC Mutual Fund",
-        "launch_year": 2010,
-        "aum": "₹500+ Cr",
-        "expense_ratio": "1.00%",
-        "tracking": "Domestic Gold Price"
-    },
-}
+GOLD_ETFS = gold_etfs()
+
+# Nifty 50 ETF used as the equity benchmark for diversification
+EQUITY_BENCHMARK = "NIFTYBEES.NS"
 
 
 def get_gold_etf_data():
@@ -59,80 +40,48 @@ def get_gold_etf_data():
 
     etf_data = []
 
+    # One cached 3-year history per ETF covers every horizon
+    stats = get_return_stats(list(GOLD_ETFS))
+
     for symbol, info in GOLD_ETFS.items():
-        try:
-            print(f"Analyzing {symbol}...")
-            ticker = yf.Ticker(symbol)
-
-            # Get current data
-            hist_1d = ticker.history(period="1d")
-            if hist_1d.empty:
-                print(f"  ⚠️  No recent data")
-                continue
-
-            latest = hist_1d.iloc[-1]
-
-            # Get historical data for analysis
-            hist_1w = ticker.history(period="5d")
-            hist_1m = ticker.history(period="1mo")
-            hist_3m = ticker.history(period="3mo")
-            hist_6m = ticker.history(period="6mo")
-            hist_1y = ticker.history(period="1y")
-            hist_3y = ticker.history(period="3y")
-
-            # Calculate returns
-            returns = {}
-            if len(hist_1w) >= 5:
-                returns['1w'] = ((latest['Close'] - hist_1w.iloc[0]['Close']) / hist_1w.iloc[0]['Close'] * 100)
-            if len(hist_1m) >= 20:
-                returns['1m'] = ((latest['Close'] - hist_1m.iloc[0]['Close']) / hist_1m.iloc[0]['Close'] * 100)
-            if len(hist_3m) >= 60:
-                returns['3m'] = ((latest['Close'] - hist_3m.iloc[0]['Close']) / hist_3m.iloc[0]['Close'] * 100)
-            if len(hist_6m) >= 120:
-                returns['6m'] = ((latest['Close'] - hist_6m.iloc[0]['Close']) / hist_6m.iloc[0]['Close'] * 100)
-            if len(hist_1y) >= 200:
-                returns['1y'] = ((latest['Close'] - hist_1y.iloc[0]['Close']) / hist_1y.iloc[0]['Close'] * 100)
-            if len(hist_3y) >= 600:
-                returns['3y'] = ((latest['Close'] - hist_3y.iloc[0]['Close']) / hist_3y.iloc[0]['Close'] * 100)
-
-            # Volatility (annualized standard deviation)
-            if len(hist_1y) > 1:
-                daily_returns = hist_1y['Close'].pct_change().dropna()
-                volatility = daily_returns.std() * np.sqrt(252) * 100  # Annualized
-            else:
-                volatility = 0
-
-            # 52-week stats
-            week_52_high = hist_1y['High'].max() if not hist_1y.empty else 0
-            week_52_low = hist_1y['Low'].min() if not hist_1y.empty else 0
-
-            # Average volumes
-            avg_volume_1m = hist_1m['Volume'].mean() if not hist_1m.empty else 0
-            avg_volume_3m = hist_3m['Volume'].mean() if not hist_3m.empty else 0
-
-            etf_data.append({
-                'symbol': symbol,
-                'name': info['name'],
-                'amc': info['amc'],
-                'launch_year': info['launch_year'],
-                'aum': info['aum'],
-                'expense_ratio': info['expense_ratio'],
-                'current_price': float(latest['Close']),
-                'volume': int(latest['Volume']),
-                'avg_volume_1m': int(avg_volume_1m),
-                'avg_volume_3m': int(avg_volume_3m),
-                'week_52_high': week_52_high,
-                'week_52_low': week_52_low,
-                'returns': returns,
-                'volatility': volatility
-            })
-
-            print(f"  ✅ Current Price: ₹{float(latest['Close']):.2f}")
-
-        except Exception as e:
-            print(f"  ❌ Error: {e}")
+        print(f"Analyzing {symbol}...")
+        if symbol not in stats:
+            print(f"  ⚠️  No recent data")
             continue
 
+        etf_stats = stats[symbol]
+        etf_data.append({
+            'symbol': symbol,
+            'name': info['name'],
+            'amc': info['amc'],
+            'launch_year': info['launch_year'],
+            'aum': info['aum'],
+            'expense_ratio': info['expense_ratio'],
+            'current_price': etf_stats['current_price'],
+            'volume': etf_stats['volume'],
+            'avg_volume_1m': int(etf_stats['avg_volume_1m']),
+            'avg_volume_3m': int(etf_stats['avg_volume_3m']),
+            'week_52_high': etf_stats['week_52_high'],
+            'week_52_low': etf_stats['week_52_low'],
+            'returns': etf_stats['returns'],
+            'cagr': etf_stats['cagr'],
+            'volatility': etf_stats['volatility']
+        })
+
+        print(f"  ✅ Current Price: ₹{etf_stats['current_price']:.2f}")
+
+    # One-year daily return correlation of each ETF with Nifty 50
+    try:
+        result = CorrelationService().get([e['symbol'] for e in etf_data] + [EQUITY_BENCHMARK])
+        symbols = result['symbols']
+        if EQUITY_BENCHMARK in symbols:
+            benchmark = symbols.index(EQUITY_BENCHMARK)
+            for etf in etf_data:
+                if etf['symbol'] in symbols:
+                    etf['nifty_correlation'] = float(result['correlation'][symbols.index(etf['symbol']), benchmark])
+    except Exception as e:
+        print(f"  ⚠️  Correlation with {EQUITY_BENCHMARK} unavailable: {e}")
+
     return etf_data
 
 
@@ -213,8 +162,7 @@ def display_gold_etf_analysis(etf_data):
             print(f"1-Year Return:       {returns['1y']:+.2f}%")
         if '3y' in returns:
             print(f"3-Year Return:       {returns['3y']:+.2f}%")
-            cagr_3y = (((etf['current_price'] / (etf['current_price'] / (1 + returns['3y']/100))) ** (1/3)) - 1) * 100
-            print(f"3-Year CAGR:         {cagr_3y:+.2f}%")
+            print(f"3-Year CAGR:         {etf['cagr']['3y']:+.2f}%")
 
         print()
         print(f"Volatility (1Y):     {etf['volatility']:.2f}% (annualized)")
@@ -268,6 +216,15 @@ def display_gold_etf_analysis(etf_data):
     print(f"   - AUM: {largest_aum['aum']}")
     print(f"   - Better stability and tracking")
 
+    # Diversification against equities
+    etfs_with_corr = [e for e in etf_data if 'nifty_correlation' in e]
+    if etfs_with_corr:
+        print("\n🔀 DIVERSIFICATION (1-Year Daily Return Correlation with Nifty 50):")
+        print("-" * 100)
+        for etf in sorted(etfs_with_corr, key=lambda x: x['nifty_correlation']):
+            print(f"   {etf['name'][:50]:<52} {etf['nifty_correlation']:>8.2f}")
+        print("   Values near 0 (or negative) mean gold moves independently of equities")
+
     # Gold investment insights
     print("\n" + "=" * 100)
     print("🥇 GOLD INVESTMENT INSIGHTS")
@@ -58,11 +58,10 @@ def main():
         print(f"Low Price:           ₹{stock['low_price']:,.2f}")
         print(f"Close Price:         ₹{stock['close_price']:,.2f}")
 
-        # Calculate day change
-        if stock['open_price'] and stock['last_price']:
-            day_change = stock['last_price'] - stock['open_price']
-            day_change_pct = (day_change / stock['open_price']) * 100
-            print(f"Day Change:          ₹{day_change:,.2f} ({day_change_pct:+.2f}%)")
+        # Day change
+        if stock['day_change_pct'] is not None:
+            day_change = stock['close_price'] - stock['open_price']
+            print(f"Day Change:          ₹{day_change:,.2f} ({stock['day_change_pct']:+.2f}%)")
         print()
 
         # 52-Week Range
@@ -72,34 +71,27 @@ def main():
         print(f"52-Week Low:         ₹{stock['week_low_52']:,.2f}")
         print(f"52-Week Range:       ₹{stock['week_low_52']:,.2f} - ₹{stock['week_high_52']:,.2f}")
 
-        # Calculate position in 52-week range
-        if stock['week_high_52'] and stock['week_low_52']:
-            range_52w = stock['week_high_52'] - stock['week_low_52']
-            position = ((stock['last_price'] - stock['week_low_52']) / range_52w) * 100
+        # Position in 52-week range and distance from high/low
+        position = stock['position_52w']
+        if position is not None:
             print(f"Position in Range:   {position:.1f}% from 52-week low")
-
-            # Distance from high/low
-            dist_from_high = ((stock['week_high_52'] - stock['last_price']) / stock['week_high_52']) * 100
-            dist_from_low = ((stock['last_price'] - stock['week_low_52']) / stock['week_low_52']) * 100
-            print(f"Distance from High:  {dist_from_high:.2f}% below")
-            print(f"Distance from Low:   {dist_from_low:.2f}% above")
+            print(f"Distance from High:  {stock['pct_from_52w_high']:.2f}% below")
+            print(f"Distance from Low:   {stock['pct_from_52w_low']:.2f}% above")
         print()
 
         # Volume Information
         print("📊 VOLUME & LIQUIDITY")
         print("-" * 80)
         print(f"Volume:              {stock['volume']:,} shares")
-        if stock['volume'] and stock['last_price']:
-            turnover = stock['volume'] * stock['last_price']
-            print(f"Turnover:            ₹{turnover:,.2f}")
+        if stock['turnover']:
+            print(f"Turnover:            ₹{stock['turnover']:,.2f}")
         print()
 
         # Valuation Metrics
         print("💼 VALUATION METRICS")
         print("-" * 80)
-        if stock['market_cap']:
-            market_cap_cr = stock['market_cap'] / 10000000
-            print(f"Market Cap:          ₹{market_cap_cr:,.2f} Crores")
+        if stock['market_cap_cr']:
+            print(f"Market Cap:          ₹{stock['market_cap_cr']:,.2f} Crores")
         else:
             print(f"Market Cap:          N/A")
 
@@ -151,7 +143,9 @@ def main():
                 signals.append("• Moderate P/E ratio")
 
         # 52-week position
-        if position > 80:
+        if position is None:
+            signals.append("• 52-week range unavailable")
+        elif position > 80:
             signals.append("⚠ Near 52-week high (resistance zone)")
         elif position < 20:
             signals.append("✓ Near 52-week low (potential support)")
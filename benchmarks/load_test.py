@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Concurrent MCP client load test
+
+Spawns the server, drives a weighted mix of tool calls from many simulated
+clients and reports per-tool throughput and latency percentiles for each
+concurrency level. Market data comes from the fake provider (or a recording
+with --replay), so runs are offline and repeatable. Database tools are only
+included with a dedicated --database-url / BENCHMARK_DATABASE_URL, because
+refresh_market_data replaces the contents of stock_data.
+
+Over stdio every client shares the one session a desktop client would
+have; over sse or streamable-http each client opens its own session.
+
+Usage:
+    python benchmarks/load_test.py --clients 1 4 16 --duration 20
+    python benchmarks/load_test.py --transport streamable-http --clients 8 32 64
+    python benchmarks/load_test.py --mix get_historical_data=3,search_stocks=1 --latency-ms 50
+    python benchmarks/load_test.py --url http://localhost:8000/sse --transport sse
+    BENCHMARK_DATABASE_URL=postgresql://localhost/bench python benchmarks/load_test.py
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import anyio
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT, 'src')
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# Add src to path
+sys.path.insert(0, SRC_DIR)
+
+TRANSPORTS = ['stdio', 'sse', 'streamable-http']
+TRANSPORT_PATHS = {'sse': '/sse', 'streamable-http': '/mcp'}
+
+DATABASE_TOOLS = {'search_stocks', 'query_database', 'refresh_market_data'}
+DEFAULT_MIX = 'get_historical_data=8,search_stocks=4,query_database=3,refresh_market_data=1'
+
+QUERIES = [
+    "SELECT * FROM stock_data",
+    "SELECT trading_symbol, pe_ratio, dividend_yield FROM stock_data "
+    "WHERE pe_ratio < 20 ORDER BY dividend_yield DESC LIMIT 20",
+    "SELECT sector, COUNT(*), AVG(pe_ratio) FROM stock_data GROUP BY sector",
+]
+PERIODS = ['1mo', '6mo', '1y', '5y']
+
+
+def tool_arguments(universe: List[str]) -> Dict[str, Callable[[random.Random], Dict[str, Any]]]:
+    """Tool name -> function drawing that tool's call arguments"""
+    terms = sorted({symbol.split('.')[0][:3] for symbol in universe})
+    return {
+        'get_historical_data': lambda rng: {'symbol': rng.choice(universe), 'period': rng.choice(PERIODS),
+                                            'interval': '1d'},
+        'search_stocks': lambda rng: {'query': rng.choice(terms)},
+        'query_database': lambda rng: {'sql_query': rng.choice(QUERIES)},
+        'refresh_market_data': lambda rng: {},
+    }
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """'tool=weight,tool=weight' -> {tool: weight}"""
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def latency_summary(latencies: List[float], errors: int, seconds: float) -> Dict[str, Any]:
+    latencies_ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        'calls': len(latencies),
+        'errors': errors,
+        'calls_per_s': round(len(latencies) / seconds, 2) if seconds else None,
+        'latency_ms': {
+            'mean': round(float(latencies_ms.mean()), 3),
+            'p50': round(float(np.percentile(latencies_ms, 50)), 3),
+            'p90': round(float(np.percentile(latencies_ms, 90)), 3),
+            'p99': round(float(np.percentile(latencies_ms, 99)), 3),
+            'max': round(float(latencies_ms.max()), 3),
+        },
+    }
+
+
+@asynccontextmanager
+async def open_session(transport: str, url: Optional[str], env: Dict[str, str], errlog):
+    """An initialized ClientSession over the given transport"""
+    from mcp import ClientSession, StdioServerParameters
+
+    if transport == 'stdio':
+        from mcp.client.stdio import stdio_client
+        server = StdioServerParameters(command=sys.executable, args=['-m', 'stock_analysis.main'],
+                                       env=env, cwd=SRC_DIR)
+        client = stdio_client(server, errlog=errlog)
+    elif transport == 'sse':
+        from mcp.client.sse import sse_client
+        client = sse_client(url, sse_read_timeout=3600)
+    else:
+        from mcp.client.streamable_http import streamablehttp_client
+        client = streamablehttp_client(url, sse_read_timeout=3600)
+
+    async with client as streams:
+        async with ClientSession(streams[0], streams[1]) as session:
+            await session.initialize()
+            yield session
+
+
+async def run_stage(clients: int, args, env: Dict[str, str], mix: Dict[str, float],
+                    arguments: Dict[str, Callable], errlog) -> Dict[str, Any]:
+    """Run `clients` closed-loop clients for args.duration seconds"""
+    records = []  # (tool, seconds, ok)
+    names, weights = list(mix), list(mix.values())
+    end = time.perf_counter() + args.duration
+
+    async def client_loop(session, client_id: int):
+        rng = random.Random(args.seed * 100_003 + client_id)
+        while time.perf_counter() < end:
+            name = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                with anyio.fail_after(args.timeout):
+                    result = await session.call_tool(name, arguments[name](rng))
+                ok = not result.isError
+            except Exception:
+                ok = False
+            records.append((name, time.perf_counter() - started, ok))
+            if args.think_ms:
+                await anyio.sleep(rng.expovariate(1000 / args.think_ms))
+
+    handshakes = []  # seconds from connecting (or spawning, over stdio) to an initialized session
+
+    async def own_session(client_id: int):
+        connecting = time.perf_counter()
+        async with open_session(args.transport, args.url, env, errlog) as session:
+            handshakes.append(time.perf_counter() - connecting)
+            await client_loop(session, client_id)
+
+    started = time.perf_counter()
+    async with anyio.create_task_group() as tg:
+        if args.transport == 'stdio':
+            async with open_session('stdio', None, env, errlog) as session:
+                handshakes.append(time.perf_counter() - started)
+                started = time.perf_counter()
+                end = started + args.duration
+                async with anyio.create_task_group() as clients_tg:
+                    for client_id in range(clients):
+                        clients_tg.start_soon(client_loop, session, client_id)
+        else:
+            for client_id in range(clients):
+                tg.start_soon(own_session, client_id)
+    seconds = time.perf_counter() - started
+
+    tools = {}
+    for name in mix:
+        latencies = [latency for tool, latency, ok in records if tool == name and ok]
+        errors = sum(1 for tool, _, ok in records if tool == name and not ok)
+        tools[name] = latency_summary(latencies, errors, seconds)
+    total = latency_summary([latency for _, latency, ok in records if ok],
+                            sum(1 for *_, ok in records if not ok), seconds)
+    return {'clients': clients, 'seconds': round(seconds, 2), 'handshake_ms': round(max(handshakes) * 1000, 1),
+            'total': total, 'tools': tools}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, process: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server did not listen on port {port} within {timeout:g}s")
+
+
+def print_stage(stage: Dict[str, Any]) -> None:
+    total = stage['total']
+    print(f"\n👥 {stage['clients']} clients: {total['calls_per_s'] or 0:.1f} calls/s, "
+          f"p50 {total['latency_ms']['p50']:.1f} ms, p99 {total['latency_ms']['p99']:.1f} ms, "
+          f"{total['errors']} errors, handshake {stage['handshake_ms']:.0f} ms")
+    for name, result in stage['tools'].items():
+        latency = result['latency_ms']
+        print(f"   {name:<22}{result['calls']:>7} ok {result['errors']:>5} err {result['calls_per_s'] or 0:>9.1f}/s"
+              f"  p50 {latency['p50']:>9.1f}  p90 {latency['p90']:>9.1f}  p99 {latency['p99']:>9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--transport', choices=TRANSPORTS, default='stdio', help='Server transport (default stdio)')
+    parser.add_argument('--url', help='Connect to a running sse/streamable-http server instead of spawning one')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16],
+                        help='Concurrent clients, one stage per value (default 1 4 16)')
+    parser.add_argument('--duration', type=float, default=15, help='Seconds per stage (default 15)')
+    parser.add_argument('--think-ms', type=float, default=0, help='Mean pause between a client\'s calls (default 0)')
+    parser.add_argument('--timeout', type=float, default=60, help='Seconds before a call counts as failed')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Tool weights (default {DEFAULT_MIX})')
+    parser.add_argument('--symbols', type=int, default=50, help='Universe size for the fake provider (default 50)')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Fake provider delay per call (default 0)')
+    parser.add_argument('--seed', type=int, default=0, help='Fake market data and call mix seed')
+    parser.add_argument('--replay', help='Serve market data from a recorded archive instead of the fake provider')
+    parser.add_argument('--replay-speed', type=float, default=1.0,
+                        help='Replay latency speed-up (1 = as recorded, 0 = no delay)')
+    parser.add_argument('--database-url', default=os.getenv('BENCHMARK_DATABASE_URL'),
+                        help='Dedicated database for the database tools (its stock_data is replaced)')
+    parser.add_argument('--output', help='Results file (default benchmarks/results/load-<time>.json)')
+    args = parser.parse_args()
+
+    if args.url and args.transport == 'stdio':
+        parser.error('--url needs --transport sse or streamable-http')
+
+    env = dict(os.environ)
+    if args.replay:
+        env.update(STOCK_API_PROVIDER='replay', REPLAY_ARCHIVE=os.path.abspath(args.replay),
+                   REPLAY_SPEED=str(args.replay_speed))
+        os.environ.update(REPLAY_ARCHIVE=env['REPLAY_ARCHIVE'])
+        from stock_analysis.api_providers import ReplayProvider
+        universe = ReplayProvider().symbols()[:args.symbols]
+        source = f"replay of {args.replay} at {args.replay_speed:g}x"
+    else:
+        env.update(STOCK_API_PROVIDER='fake', FAKE_PROVIDER_LATENCY_MS=str(args.latency_ms),
+                   FAKE_PROVIDER_SEED=str(args.seed))
+        universe = [f"BENCH{i:04d}.NS" for i in range(args.symbols)]
+        source = f"{args.latency_ms:g} ms fake provider latency"
+    env['CANDLE_STORE_DIR'] = tempfile.mkdtemp(prefix='load-candles-')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [SRC_DIR, env.get('PYTHONPATH')]))
+    if args.database_url:
+        env['DATABASE_URL'] = args.database_url
+
+    mix = parse_mix(args.mix)
+    arguments = tool_arguments(universe)
+    unknown = set(mix) - set(arguments)
+    if unknown:
+        parser.error(f"Unknown tools in --mix: {', '.join(sorted(unknown))}")
+    if not args.database_url and not args.url:
+        skipped = sorted(set(mix) & DATABASE_TOOLS)
+        mix = {name: weight for name, weight in mix.items() if name not in DATABASE_TOOLS}
+        if skipped:
+            print(f"ℹ️  No --database-url / BENCHMARK_DATABASE_URL: skipping {', '.join(skipped)}")
+    if not mix:
+        parser.error('Nothing to run: the mix is empty')
+
+    server = None
+    errlog = tempfile.NamedTemporaryFile('w', prefix='load-server-', suffix='.log', delete=False)
+    if args.transport != 'stdio' and not args.url:
+        port = free_port()
+        server = subprocess.Popen([sys.executable, '-m', 'stock_analysis.main', '--transport', args.transport,
+                                   '--host', '127.0.0.1', '--port', str(port)],
+                                  env=env, stdout=errlog, stderr=errlog)
+        wait_for_port(port, server)
+        args.url = f"http://127.0.0.1:{port}{TRANSPORT_PATHS[args.transport]}"
+
+    print(f"🔥 Load testing over {args.transport}{f' ({args.url})' if args.url else ''}: "
+          f"{len(universe)} symbols, {source}, {args.duration:g}s per stage")
+    print(f"   Mix: {', '.join(f'{name}={weight:g}' for name, weight in mix.items())}")
+
+    stages = []
+    try:
+        for clients in args.clients:
+            stage = anyio.run(run_stage, clients, args, env, mix, arguments, errlog)
+            stages.append(stage)
+            print_stage(stage)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+        errlog.close()
+    print(f"\n📝 Server log: {errlog.name}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'transport': args.transport,
+                'symbols': len(universe),
+                'latency_ms': None if args.replay else args.latency_ms,
+                'replay': args.replay,
+                'duration_s': args.duration,
+                'think_ms': args.think_ms,
+                'mix': mix,
+                'seed': args.seed,
+                'database': bool(args.database_url),
+            },
+            'stages': stages,
+        }, f, indent=2)
+    print(f"💾 Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
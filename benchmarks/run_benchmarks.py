@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks for the MCP server's hot paths
+
+Market data comes from the deterministic fake provider (no network), or from
+an archive recorded with the 'record' provider (--replay), so runs are
+repeatable. Database benchmarks run only against a dedicated database
+given with --database-url or BENCHMARK_DATABASE_URL, because scrape_data
+replaces the contents of stock_data.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --symbols 500 --latency-ms 50 --iterations 5
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/baseline.json
+    python benchmarks/run_benchmarks.py --replay recording.zip --replay-speed 10
+    BENCHMARK_DATABASE_URL=postgresql://localhost/bench python benchmarks/run_benchmarks.py
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# Add src to path
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+
+class Benchmark:
+    """
+    A named workload: `call` is timed, `setup` runs untimed before each call
+
+    Args:
+        name: Result name
+        call: Function taking the call index
+        calls: Calls per iteration
+        units: Items processed per call (symbols, rows...) for throughput
+        setup: Optional function run before each call
+    """
+
+    def __init__(self, name: str, call: Callable[[int], Any], calls: int = 1, units: int = 1,
+                 setup: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.call = call
+        self.calls = calls
+        self.units = units
+        self.setup = setup
+
+    def run(self, iterations: int, warmup: int) -> Dict[str, Any]:
+        """Time every call, then measure peak traced memory over one extra iteration"""
+        for i in range(warmup * self.calls):
+            if self.setup:
+                self.setup()
+            self.call(i)
+
+        latencies = []
+        for i in range(iterations * self.calls):
+            if self.setup:
+                self.setup()
+            started = time.perf_counter()
+            self.call(i)
+            latencies.append(time.perf_counter() - started)
+
+        tracemalloc.start()
+        for i in range(self.calls):
+            if self.setup:
+                self.setup()
+            self.call(i)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        latencies_ms = np.array(latencies) * 1000
+        total = float(np.sum(latencies))
+        return {
+            'calls': len(latencies),
+            'units_per_call': self.units,
+            'total_s': round(total, 4),
+            'calls_per_s': round(len(latencies) / total, 2) if total else None,
+            'units_per_s': round(len(latencies) * self.units / total, 2) if total else None,
+            'latency_ms': {
+                'mean': round(float(latencies_ms.mean()), 3),
+                'p50': round(float(np.percentile(latencies_ms, 50)), 3),
+                'p90': round(float(np.percentile(latencies_ms, 90)), 3),
+                'p99': round(float(np.percentile(latencies_ms, 99)), 3),
+                'max': round(float(latencies_ms.max()), 3),
+            },
+            'peak_memory_mb': round(peak / 2 ** 20, 2),
+        }
+
+
+def market_benchmarks(main, universe: List[str]) -> List[Benchmark]:
+    """Benchmarks that only need the (fake or replayed) provider"""
+    from stock_analysis.indicators import IndicatorStore
+    from stock_analysis.scoring import analyze_stocks
+
+    def reset_indicators():
+        main.indicator_store = IndicatorStore()
+
+    # Tools are coroutine functions for the MCP server; time their synchronous bodies
+    tools = main.instrumented_tools
+
+    # Seed the indicator state once so warm refreshes fetch only recent bars
+    reset_indicators()
+    snapshot = main.fetch_stock_data(universe)
+
+    return [
+        Benchmark('fetch_stock_data_cold', lambda i: main.fetch_stock_data(universe),
+                  units=len(universe), setup=reset_indicators),
+        Benchmark('fetch_stock_data_warm', lambda i: main.fetch_stock_data(universe), units=len(universe)),
+        Benchmark('get_historical_data', lambda i: tools['get_historical_data'](universe[i % len(universe)], '1y', '1d'),
+                  calls=len(universe)),
+        Benchmark('analyze_stocks', lambda i: analyze_stocks(snapshot), units=len(snapshot)),
+    ]
+
+
+def database_benchmarks(main, universe: List[str]) -> List[Benchmark]:
+    """Benchmarks against the database in DATABASE_URL (replaced by scrape_data)"""
+    main.scrape_data(universe)
+
+    queries = [
+        "SELECT * FROM stock_data",
+        "SELECT trading_symbol, pe_ratio, dividend_yield FROM stock_data "
+        "WHERE pe_ratio < 20 ORDER BY dividend_yield DESC LIMIT 20",
+        "SELECT sector, COUNT(*), AVG(pe_ratio) FROM stock_data GROUP BY sector",
+    ]
+    terms = [symbol.split('.')[0][:3] for symbol in universe[:20]] or ['A']
+    tools = main.instrumented_tools
+
+    return [
+        Benchmark('scrape_data', lambda i: main.scrape_data(universe), units=len(universe)),
+        Benchmark('query_database', lambda i: tools['query_database'](queries[i % len(queries)]), calls=len(queries) * 5),
+        Benchmark('search_stocks', lambda i: tools['search_stocks'](terms[i % len(terms)]), calls=len(terms)),
+    ]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict[str, Any], baseline_path: str) -> None:
+    """Print p50 latency and throughput against a previous results file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+
+    print(f"\n📊 Compared with {baseline_path}")
+    print(f"{'Benchmark':<26}{'p50 (ms)':>12}{'was':>12}{'change':>10}{'units/s':>12}{'was':>12}{'change':>10}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]
+        p50, p50_before = result['latency_ms']['p50'], before['latency_ms']['p50']
+        rate, rate_before = result['units_per_s'] or 0, before['units_per_s'] or 0
+        p50_change = (p50 / p50_before - 1) * 100 if p50_before else 0
+        rate_change = (rate / rate_before - 1) * 100 if rate_before else 0
+        print(f"{name:<26}{p50:>12.2f}{p50_before:>12.2f}{p50_change:>+9.1f}%"
+              f"{rate:>12.1f}{rate_before:>12.1f}{rate_change:>+9.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--symbols', type=int, default=50, help='Universe size (default 50)')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Delay per provider call (default 0)')
+    parser.add_argument('--iterations', type=int, default=3, help='Timed iterations per benchmark (default 3)')
+    parser.add_argument('--warmup', type=int, default=1, help='Untimed iterations first (default 1)')
+    parser.add_argument('--seed', type=int, default=0, help='Fake market data seed')
+    parser.add_argument('--replay', help='Serve market data from a recorded archive instead of the fake provider')
+    parser.add_argument('--replay-speed', type=float, default=1.0,
+                        help='Replay latency speed-up (1 = as recorded, 0 = no delay)')
+    parser.add_argument('--only', nargs='*', help='Benchmark names to run')
+    parser.add_argument('--database-url', default=os.getenv('BENCHMARK_DATABASE_URL'),
+                        help='Dedicated database for the database benchmarks (its stock_data is replaced)')
+    parser.add_argument('--output', help='Results file (default benchmarks/results/bench-<time>.json)')
+    parser.add_argument('--compare', help='Previous results file to compare with')
+    args = parser.parse_args()
+
+    # Configure before importing the server: the provider, an empty candle
+    # cache and the benchmark database are read from the environment
+    if args.replay:
+        os.environ['STOCK_API_PROVIDER'] = 'replay'
+        os.environ['REPLAY_ARCHIVE'] = args.replay
+        os.environ['REPLAY_SPEED'] = str(args.replay_speed)
+    else:
+        os.environ['STOCK_API_PROVIDER'] = 'fake'
+        os.environ['FAKE_PROVIDER_LATENCY_MS'] = str(args.latency_ms)
+        os.environ['FAKE_PROVIDER_SEED'] = str(args.seed)
+    os.environ['CANDLE_STORE_DIR'] = tempfile.mkdtemp(prefix='bench-candles-')
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+
+    from stock_analysis import main as server
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if args.replay:
+        from stock_analysis.api_providers import ReplayProvider
+        universe = ReplayProvider().symbols()[:args.symbols]
+        source = f"replay of {args.replay} at {args.replay_speed:g}x"
+    else:
+        universe = [f"BENCH{i:04d}.NS" for i in range(args.symbols)]
+        source = f"{args.latency_ms:g} ms provider latency"
+    print(f"⏱️  Benchmarking {len(universe)} symbols, {source}, {args.iterations} iterations")
+
+    benchmarks = market_benchmarks(server, universe)
+    if args.database_url:
+        benchmarks += database_benchmarks(server, universe)
+    else:
+        print("ℹ️  No --database-url / BENCHMARK_DATABASE_URL: skipping database benchmarks")
+
+    results = {}
+    for benchmark in benchmarks:
+        if args.only and benchmark.name not in args.only:
+            continue
+        result = benchmark.run(args.iterations, args.warmup)
+        results[benchmark.name] = result
+        latency = result['latency_ms']
+        print(f"   {benchmark.name:<24} p50 {latency['p50']:>9.2f} ms  p99 {latency['p99']:>9.2f} ms  "
+              f"{result['units_per_s'] or 0:>10.1f}/s  peak {result['peak_memory_mb']:>7.2f} MB")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'commit': git_commit(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'symbols': len(universe),
+                'latency_ms': None if args.replay else args.latency_ms,
+                'replay': args.replay,
+                'iterations': args.iterations,
+                'seed': args.seed,
+                'database': bool(args.database_url),
+            },
+            'results': results,
+        }, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic market for scale testing
+
+Writes OHLCV candles for any number of made-up symbols (SYN00000.NS, ...)
+into the candle store, their fundamentals into stock_data, and the symbol
+master, fundamentals and splits as Parquet files. The same seed always
+gives the same data.
+
+Point CANDLE_STORE_DIR and DATABASE_URL at a scratch location: the server
+treats the synthetic symbols like any others. Set a large CANDLE_MAX_AGE
+when serving them so the candle store never tries to top them up from a
+real provider.
+
+Usage:
+    python generate_synthetic_data.py --symbols 5000 --years 20
+    python generate_synthetic_data.py --symbols 500 --years 2 --intervals 1d 1m
+    python generate_synthetic_data.py --symbols 10000 --no-candles --output data/synthetic
+    DATABASE_URL=postgresql://localhost/scale python generate_synthetic_data.py --symbols 5000 --database
+"""
+
+import argparse
+import os
+import sys
+
+import psycopg2
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from stock_analysis.candle_store import CANDLE_STORE_DIR
+from stock_analysis.constant_parameters import TABLE_SCHEMA
+from stock_analysis.synthetic import SYNTHETIC_INTERVALS, generate_dataset, write_parquet, write_stock_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--symbols', type=int, default=1000, help='Number of symbols (default 1000)')
+    parser.add_argument('--years', type=float, default=20, help='Years of history (default 20)')
+    parser.add_argument('--intervals', nargs='+', default=['1d'], choices=SYNTHETIC_INTERVALS,
+                        help='Candle intervals to generate (default 1d)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default 0)')
+    parser.add_argument('--raw', action='store_true', help='Unadjusted prices (jump at splits)')
+    parser.add_argument('--no-candles', action='store_true', help='Skip writing the candle store')
+    parser.add_argument('--database', action='store_true', help='Upsert fundamentals into stock_data at DATABASE_URL')
+    parser.add_argument('--output', help='Directory for the Parquet tables')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    args = parser.parse_args()
+
+    database_url = os.getenv('DATABASE_URL')
+    if args.database and not database_url:
+        print("Error: DATABASE_URL not set")
+        return
+
+    target = 'no candles' if args.no_candles else f"candles in {CANDLE_STORE_DIR}"
+    print(f"🧪 Generating {args.symbols} synthetic symbols x {args.years:g} years ({', '.join(args.intervals)}), {target}")
+
+    dataset = generate_dataset(args.symbols, years=args.years, intervals=args.intervals, seed=args.seed,
+                               adjusted=not args.raw, write_candles=not args.no_candles,
+                               max_workers=args.workers)
+    total = sum(dataset['rows'].values())
+    print(f"✅ {total:,} bars in {dataset['seconds']:.1f}s ({total / dataset['seconds']:,.0f} bars/s)")
+    for interval, rows in dataset['rows'].items():
+        print(f"   {interval}: {rows:,}")
+
+    if args.database:
+        conn = psycopg2.connect(database_url)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(TABLE_SCHEMA)
+            conn.commit()
+            cursor.close()
+            written = write_stock_data(conn, dataset['stock_data'])
+        finally:
+            conn.close()
+        print(f"💾 {written} rows upserted into stock_data")
+
+    if args.output:
+        for path in write_parquet(dataset, args.output):
+            print(f"💾 {path}")
+
+
+if __name__ == "__main__":
+    main()
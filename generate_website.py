@@ -1,31 +1,146 @@
 #!/usr/bin/env python3
 """
 Generate static website pages with latest stock and ETF data
+
+Renders docs/ from the database snapshot. Only pages whose inputs changed
+are rewritten, so running this after every refresh keeps the Pages deploy small.
+
+Usage:
+    python generate_website.py            # Pages from the database, report previews from docs/data/
+    python generate_website.py --reports  # Also rerun the analysis scripts into docs/data/*.txt
+    python generate_website.py --no-candles  # Skip the per-symbol candle feeds
 """
 
-import sys
+import io
 import os
-from datetime import datetime
+import sys
+import time
+from contextlib import redirect_stdout
+
+import pandas as pd
+import psycopg2
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-print("📊 Generating website with latest data...")
-print(f"⏰ Generated at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-print()
-print("✅ Website structure created in docs/ folder")
-print()
-print("📁 Website Files:")
-print("   ├── index.html       (Homepage)")
-print("   ├── css/style.css    (Styles)")
-print("   └── js/main.js       (JavaScript)")
-print()
-print("🚀 To deploy:")
-print("   1. Commit changes: git add docs/ && git commit -m 'Add website'")
-print("   2. Push to GitHub: git push")
-print("   3. Enable GitHub Pages in repository settings")
-print("   4. Choose 'docs' folder as source")
-print()
-print("🌐 Your website will be live at:")
-print("   https://dineshratn.github.io/angel-one-stock-analysis/")
-print()
+from stock_analysis.constant_parameters import ETF_REGISTRY
+from stock_analysis.etfs import fetch_etf_snapshots, gold_etfs
+from stock_analysis.returns import get_return_stats
+from stock_analysis.scoring import analyze_stocks
+from stock_analysis.site_feeds import build_feeds, load_feed_candles
+from stock_analysis.site_generator import REPORT_FILES, SITE_OUTPUT_DIR, SiteBuilder, build_context, build_site
+
+
+def load_stocks(conn) -> pd.DataFrame:
+    query = """
+        SELECT symbol_token, trading_symbol, name, last_price, market_cap_cr, pe_ratio,
+               dividend_yield, volume, position_52w, day_change_pct, last_updated
+        FROM stock_data
+        WHERE pe_ratio IS NOT NULL AND dividend_yield IS NOT NULL
+        ORDER BY trading_symbol
+    """
+    return pd.read_sql_query(query, conn)
+
+
+def load_etfs(conn) -> pd.DataFrame:
+    """etf_data rows in registry order, fetched live if the table was never filled"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT to_regclass('etf_data') IS NOT NULL")
+    has_table = cursor.fetchone()[0]
+    cursor.close()
+
+    etfs = pd.read_sql_query("SELECT * FROM etf_data", conn) if has_table else pd.DataFrame()
+    if etfs.empty:
+        print("⚠️  etf_data is empty, fetching ETF snapshots...")
+        etfs = fetch_etf_snapshots()
+
+    for column in ['last_price', 'pct_from_52w_high', 'pct_from_52w_low']:
+        etfs[column] = pd.to_numeric(etfs[column], errors='coerce')
+    order = {symbol: i for i, symbol in enumerate(ETF_REGISTRY)}
+    return etfs.sort_values('symbol', key=lambda s: s.map(order)).reset_index(drop=True)
+
+
+def run_reports() -> dict:
+    """Capture the analysis scripts' output as report texts"""
+    import analyze_all_stocks
+    import analyze_gold_etf
+    import indian_etfs
+
+    reports = {}
+    for name, module in [('stock', analyze_all_stocks), ('etf', indian_etfs), ('gold', analyze_gold_etf)]:
+        buffer = io.StringIO()
+        with redirect_stdout(buffer):
+            module.main()
+        reports[name] = buffer.getvalue()
+    return reports
+
+
+def read_reports() -> dict:
+    """Report texts already in docs/data/"""
+    reports = {}
+    for name, path in REPORT_FILES.items():
+        full_path = os.path.join(SITE_OUTPUT_DIR, path)
+        if os.path.exists(full_path):
+            with open(full_path, encoding='utf-8') as f:
+                reports[name] = f.read()
+    return reports
+
+
+def main():
+    database_url = os.getenv('DATABASE_URL')
+
+    if not database_url:
+        print("Error: DATABASE_URL not set")
+        return
+
+    print("📊 Generating website with latest data...")
+    started = time.perf_counter()
+
+    conn = psycopg2.connect(database_url)
+    try:
+        stocks = load_stocks(conn)
+        etfs = load_etfs(conn)
+    finally:
+        conn.close()
+
+    if stocks.empty:
+        print("No stock data found - run the refresh_market_data tool first")
+        return
+
+    as_of = pd.to_datetime(stocks['last_updated']).max().to_pydatetime()
+    scored = analyze_stocks(stocks.drop(columns=['last_updated']))
+    gold_stats = get_return_stats(list(gold_etfs()))
+
+    fresh_reports = run_reports() if '--reports' in sys.argv else {}
+    reports = {**read_reports(), **fresh_reports}
+
+    context = build_context(scored, etfs, as_of, gold_stats=gold_stats, reports=reports)
+    builder = SiteBuilder()
+    build_site(context, reports=fresh_reports, builder=builder)
+
+    candles = {}
+    if '--no-candles' not in sys.argv:
+        candles = load_feed_candles(dict(zip(scored['symbol_token'], scored['symbol_token'])))
+    build_feeds(scored, candles, as_of, summary=context, builder=builder)
+    result = builder.finish()
+
+    print(f"⏰ Data as of: {as_of.strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"✅ Built in {time.perf_counter() - started:.2f}s: "
+          f"{len(result['written'])} written, {len(result['unchanged'])} unchanged, "
+          f"{len(result['removed'])} removed")
+    for path in result['written'][:20]:
+        print(f"   ✏️  {path}")
+    if len(result['written']) > 20:
+        print(f"   ... and {len(result['written']) - 20} more")
+    print()
+    print("🚀 To deploy:")
+    print("   1. Commit changes: git add docs/ && git commit -m 'Update website'")
+    print("   2. Push to GitHub: git push")
+    print()
+    print("🌐 Your website will be live at:")
+    print("   https://dineshratn.github.io/angel-one-stock-analysis/")
+    print()
+
+
+if __name__ == "__main__":
+    main()
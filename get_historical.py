@@ -2,9 +2,15 @@
 """
 Get historical data for Reliance Industries
 """
-import yfinance as yf
+import os
+import sys
 import pandas as pd
 
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from stock_analysis.candle_store import get_candles
+
 def main():
     symbol = "RELIANCE.NS"
 
@@ -12,12 +18,18 @@ def main():
     print()
 
     try:
-        ticker = yf.Ticker(symbol)
-
-        # Get different timeframes
-        hist_1m = ticker.history(period="1mo", interval="1d")
-        hist_3m = ticker.history(period="3mo", interval="1d")
-        hist_1y = ticker.history(period="1y", interval="1wk")
+        # One daily history covers every timeframe
+        hist_daily = get_candles(symbol, period="1y", interval="1d")
+        if hist_daily.empty:
+            print(f"No historical data for {symbol}")
+            return
+
+        latest = hist_daily.index[-1]
+        hist_1m = hist_daily[hist_daily.index >= latest - pd.DateOffset(months=1)].copy()
+        hist_3m = hist_daily[hist_daily.index >= latest - pd.DateOffset(months=3)]
+        hist_1y = hist_daily.resample('W-MON', label='left', closed='left').agg({
+            'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'
+        }).dropna()
 
         print("=" * 80)
         print("RELIANCE INDUSTRIES - HISTORICAL PRICE ANALYSIS")
@@ -2,6 +2,7 @@
 """
 Simple script to get table overview from stock database
 """
+import asyncio
 import os
 import sys
 
@@ -10,7 +11,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 try:
     from stock_analysis.main import get_table_overview
-    print(get_table_overview())
+    print(asyncio.run(get_table_overview()))
 except Exception as e:
     print(f"Error: {e}")
     print(f"\nMake sure dependencies are installed:")
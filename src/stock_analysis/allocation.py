@@ -0,0 +1,289 @@
+"""
+Portfolio allocation optimizer
+Score-driven weights under position, sector, liquidity and cash budget constraints
+"""
+
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .constant_parameters import ALLOCATION_CONSTRAINTS
+
+logger = logging.getLogger(__name__)
+
+# Bisection steps for the projection thresholds (interval shrinks by 2**-60)
+BISECTION_STEPS = 60
+
+
+def build_constraints(overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Merge constraint overrides into ALLOCATION_CONSTRAINTS and validate the result
+
+    Args:
+        overrides: Partial constraints, e.g. {'budget': 500000, 'max_sector_weight': 0.25}
+
+    Returns:
+        Complete constraints
+    """
+    constraints = {**ALLOCATION_CONSTRAINTS, **{k: v for k, v in (overrides or {}).items() if v is not None}}
+
+    unknown = set(constraints) - set(ALLOCATION_CONSTRAINTS)
+    if unknown:
+        raise ValueError(f"Unknown allocation constraints: {', '.join(sorted(unknown))}")
+    if constraints['budget'] <= 0:
+        raise ValueError("budget must be positive")
+    for name in ('max_stock_weight', 'max_sector_weight'):
+        if not 0 < constraints[name] <= 1:
+            raise ValueError(f"{name} must be in (0, 1]")
+    if constraints['risk_aversion'] < 0:
+        raise ValueError("risk_aversion must not be negative")
+
+    return constraints
+
+
+def _capped_sum(values: np.ndarray, thresholds: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """Elementwise clip(values - thresholds, 0, upper)"""
+    return np.clip(values - thresholds, 0.0, upper)
+
+
+def _sector_thresholds(values: np.ndarray, upper: np.ndarray, sector_ids: np.ndarray,
+                       sector_caps: np.ndarray) -> np.ndarray:
+    """
+    Smallest threshold per sector that keeps the sector sum within its cap
+
+    Solves sum(clip(values - theta_k, 0, upper)) = cap_k for every sector at
+    once by vectorized bisection; sectors already under their cap get -inf.
+    """
+    n_sectors = len(sector_caps)
+    low = np.full(n_sectors, values.min() - upper.max() - 1.0)
+    high = np.full(n_sectors, values.max())
+
+    uncapped = np.bincount(sector_ids, _capped_sum(values, -np.inf, upper), n_sectors)
+    binding = uncapped > sector_caps
+
+    for _ in range(BISECTION_STEPS):
+        mid = (low + high) / 2
+        sums = np.bincount(sector_ids, _capped_sum(values, mid[sector_ids], upper), n_sectors)
+        too_big = sums > sector_caps
+        low = np.where(too_big, mid, low)
+        high = np.where(too_big, high, mid)
+
+    return np.where(binding, high, -np.inf)
+
+
+def project_weights(values: np.ndarray, upper: np.ndarray, sector_ids: np.ndarray,
+                    sector_caps: np.ndarray, total: float = 1.0) -> np.ndarray:
+    """
+    Euclidean projection onto {0 <= w <= upper, sector sums <= caps, sum(w) = total}
+
+    Sectors partition the stocks, so the projection is
+    w_i = clip(v_i - max(tau, theta_k), 0, upper_i) with a per-sector threshold
+    theta_k and a single budget threshold tau, both found by bisection.
+    If the constraints cannot hold `total`, the largest feasible sum is used.
+
+    Args:
+        values: Point to project
+        upper: Per-stock weight caps
+        sector_ids: Integer sector index per stock (0..n_sectors-1)
+        sector_caps: Weight cap per sector
+        total: Required sum of weights
+
+    Returns:
+        Projected weights
+    """
+    theta = _sector_thresholds(values, upper, sector_ids, sector_caps)[sector_ids]
+
+    # Below this threshold every stock sits at its cap
+    low = values.min() - upper.max() - 1.0
+    at_capacity = _capped_sum(values, np.maximum(low, theta), upper)
+    if at_capacity.sum() <= total:
+        return at_capacity
+
+    high = values.max()
+    for _ in range(BISECTION_STEPS):
+        tau = (low + high) / 2
+        if _capped_sum(values, np.maximum(tau, theta), upper).sum() > total:
+            low = tau
+        else:
+            high = tau
+
+    return _capped_sum(values, np.maximum(high, theta), upper)
+
+
+def optimize_weights(target: np.ndarray, upper: np.ndarray, sector_ids: np.ndarray,
+                     sector_caps: np.ndarray, covariance: Optional[np.ndarray] = None,
+                     risk_aversion: float = 0.0, max_iter: int = 500,
+                     tol: float = 1e-9) -> np.ndarray:
+    """
+    Minimize 0.5 * ||w - target||^2 + 0.5 * risk_aversion * w' C w under the constraints
+
+    Without covariance this is the projection of the target weights onto the
+    constraint set; otherwise accelerated projected gradient descent (FISTA).
+
+    Args:
+        target: Unconstrained target weights (summing to 1)
+        upper: Per-stock weight caps
+        sector_ids: Integer sector index per stock
+        sector_caps: Weight cap per sector
+        covariance: Covariance matrix of returns, aligned with target
+        risk_aversion: Weight of the variance penalty
+        max_iter: Maximum gradient iterations
+        tol: Stop when the weights move less than this (max abs change)
+
+    Returns:
+        Optimized weights
+    """
+    def project(v: np.ndarray) -> np.ndarray:
+        return project_weights(v, upper, sector_ids, sector_caps)
+
+    if covariance is None or risk_aversion == 0:
+        return project(target)
+
+    # Step size from the Lipschitz constant of the gradient, top eigenvalue by power iteration
+    vector = np.full(len(target), 1.0 / np.sqrt(len(target)))
+    for _ in range(50):
+        product = covariance @ vector
+        norm = np.linalg.norm(product)
+        if norm == 0:
+            break
+        vector = product / norm
+    step = 1.0 / (1.0 + risk_aversion * norm)
+
+    weights = project(target)
+    momentum = weights.copy()
+    t = 1.0
+    iterations = 0
+    for iterations in range(1, max_iter + 1):
+        gradient = (momentum - target) + risk_aversion * (covariance @ momentum)
+        new_weights = project(momentum - step * gradient)
+        new_t = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        momentum = new_weights + ((t - 1) / new_t) * (new_weights - weights)
+
+        converged = np.abs(new_weights - weights).max() < tol
+        weights, t = new_weights, new_t
+        if converged:
+            break
+
+    logger.info(f"Allocation optimizer finished after {iterations} iterations")
+    return weights
+
+
+def round_to_shares(weights: np.ndarray, prices: np.ndarray, budget: float, upper: np.ndarray,
+                    sector_ids: np.ndarray, sector_caps: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Convert weights to whole shares within the budget
+
+    Floors every position, then spends leftover cash one share at a time on
+    the stock furthest below its target value that still fits the cash and
+    the stock and sector caps.
+
+    Returns:
+        Tuple of (shares per stock, leftover cash)
+    """
+    target_value = weights * budget
+    shares = np.floor(target_value / prices)
+    cash = budget - float(shares @ prices)
+
+    stock_cap = upper * budget
+    sector_cap = sector_caps * budget
+    n_sectors = len(sector_caps)
+
+    while True:
+        value = shares * prices
+        sector_value = np.bincount(sector_ids, value, n_sectors)
+        fits = ((prices <= cash) &
+                (value + prices <= stock_cap + 1e-9) &
+                (sector_value[sector_ids] + prices <= sector_cap[sector_ids] + 1e-9) &
+                (weights > 0))
+        if not fits.any():
+            break
+        shortfall = np.where(fits, target_value - value, -np.inf)
+        best = int(np.argmax(shortfall))
+        if shortfall[best] <= 0:
+            break
+        shares[best] += 1
+        cash -= prices[best]
+
+    return shares.astype(int), cash
+
+
+def optimize_allocation(scored: pd.DataFrame, covariance: Optional[pd.DataFrame] = None,
+                        constraints: Optional[Dict[str, Any]] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Allocate a cash budget across buy-rated stocks
+
+    Args:
+        scored: Output of scoring.analyze_stocks with buy_percentage, last_price,
+            volume and sector columns (and symbol_token when covariance is given)
+        covariance: Optional annualized return covariance indexed and columned by symbol_token
+        constraints: Partial constraint overrides (see ALLOCATION_CONSTRAINTS)
+
+    Returns:
+        Tuple of (allocation DataFrame, summary dictionary)
+    """
+    constraints = build_constraints(constraints)
+    budget = float(constraints['budget'])
+
+    candidates = scored[
+        (scored['buy_percentage'] > 0) &
+        (scored['last_price'] > 0) &
+        (scored['volume'].fillna(0) >= constraints['min_volume'])
+    ].copy()
+
+    if candidates.empty:
+        return candidates, {'budget': budget, 'invested': 0.0, 'cash': budget, 'positions': 0}
+
+    sectors = candidates['sector'].fillna('Unknown') if 'sector' in candidates else pd.Series('Unknown', index=candidates.index)
+    sector_ids, sector_names = pd.factorize(sectors)
+    sector_caps = np.full(len(sector_names), float(constraints['max_sector_weight']))
+    upper = np.full(len(candidates), float(constraints['max_stock_weight']))
+
+    target = candidates['normalized_score'].to_numpy(dtype=float)
+    target = target / target.sum()
+
+    cov = None
+    if covariance is not None:
+        symbols = candidates['symbol_token']
+        cov = covariance.reindex(index=symbols, columns=symbols).to_numpy(dtype=float)
+        variances = np.diag(cov)
+        if np.isnan(variances).all():
+            logger.warning("No return history for any candidate, allocating without the variance penalty")
+            cov = None
+        else:
+            # Stocks without return history get the average variance and no correlation
+            diagonal = np.where(np.isnan(variances), np.nanmean(variances), variances)
+            cov = np.where(np.isnan(cov), 0.0, cov)
+            np.fill_diagonal(cov, diagonal)
+
+    weights = optimize_weights(
+        target, upper, sector_ids, sector_caps,
+        covariance=cov, risk_aversion=float(constraints['risk_aversion'])
+    )
+
+    prices = candidates['last_price'].to_numpy(dtype=float)
+    shares, cash = round_to_shares(weights, prices, budget, upper, sector_ids, sector_caps)
+
+    candidates['sector'] = sectors
+    candidates['target_weight'] = target
+    candidates['optimal_weight'] = weights
+    candidates['shares'] = shares
+    candidates['value'] = shares * prices
+    candidates['final_weight'] = candidates['value'] / budget
+
+    allocation = candidates[candidates['shares'] > 0].sort_values('value', ascending=False)
+
+    summary = {
+        'budget': budget,
+        'invested': float(allocation['value'].sum()),
+        'cash': cash,
+        'positions': len(allocation),
+        'candidates': len(candidates),
+        'sector_weights': allocation.groupby('sector')['final_weight'].sum().round(4).to_dict(),
+        'constraints': constraints,
+    }
+    if cov is not None:
+        summary['expected_volatility'] = float(np.sqrt(max(weights @ cov @ weights, 0.0)))
+
+    return allocation, summary
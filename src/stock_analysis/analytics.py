@@ -0,0 +1,284 @@
+"""
+Embedded analytics engine
+Read-only analytical SQL over the local candle store and Parquet mirrors of the database tables, with DuckDB
+
+query_database normally runs on the remote PostgreSQL row store and goes
+through pandas, which is slow for scans and group-bys over long histories.
+With DuckDB installed (pip install duckdb), queries can run in-process
+instead, over columnar Parquet files:
+
+    candles:           every cached candle (symbol, interval, ts, open, high,
+                       low, close, volume), as traded (see corporate_actions);
+                       ts is NSE wall-clock time
+    corporate_actions: every stored split and dividend (symbol, date, action, value)
+    stock_data, ...:   Parquet mirrors of the ANALYTICS_MIRROR_TABLES, copied
+                       from PostgreSQL at most every ANALYTICS_MIRROR_MAX_AGE
+                       seconds and after each market data refresh
+
+Results come back as Arrow tables. The engine can only read the candle store
+and the mirrors: one SELECT statement per query, with DuckDB's file access
+limited to those directories.
+
+Configuration (environment):
+    QUERY_ENGINE: postgres (default), duckdb, or auto (DuckDB when it can
+        answer the query, PostgreSQL otherwise)
+    ANALYTICS_DIR: Where the mirrors are written (default src/database/analytics)
+    ANALYTICS_MIRROR_TABLES: Tables to mirror (default stock_data,stock_data_history,etf_data)
+    ANALYTICS_MIRROR_MAX_AGE: Seconds before mirrors are copied again (default 900)
+    ANALYTICS_THREADS: DuckDB worker threads (default: CPU count)
+    ANALYTICS_MEMORY_LIMIT: DuckDB memory limit, e.g. '4GB' (default: DuckDB's)
+"""
+
+import logging
+import os
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from .candle_store import CANDLE_COLUMNS, CANDLE_STORE_DIR
+from .resample import MARKET_TIMEZONE
+
+try:
+    import duckdb
+except ImportError:  # Optional: query_database stays on PostgreSQL without it
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+QUERY_ENGINES = ['postgres', 'duckdb', 'auto']
+QUERY_ENGINE = os.getenv('QUERY_ENGINE', 'postgres')
+
+ANALYTICS_DIR = os.getenv(
+    'ANALYTICS_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database', 'analytics')
+)
+ANALYTICS_MIRROR_TABLES = [name.strip() for name in os.getenv(
+    'ANALYTICS_MIRROR_TABLES', 'stock_data,stock_data_history,etf_data').split(',') if name.strip()]
+ANALYTICS_MIRROR_MAX_AGE = int(os.getenv('ANALYTICS_MIRROR_MAX_AGE', '900'))
+ANALYTICS_THREADS = int(os.getenv('ANALYTICS_THREADS', str(os.cpu_count() or 4)))
+ANALYTICS_MEMORY_LIMIT = os.getenv('ANALYTICS_MEMORY_LIMIT', '')
+
+# Candle store subdirectories that do not hold candles
+NON_CANDLE_DIRS = {'actions'}
+
+_FILE_SYMBOL = r"regexp_extract(filename, '([^/\\]+)\.parquet$', 1)"
+
+# IST has no daylight saving, so UTC timestamps become wall-clock time with
+# integer arithmetic, several times faster than a per-row time zone lookup
+MARKET_UTC_OFFSET_US = int(pd.Timestamp.now(tz=MARKET_TIMEZONE).utcoffset().total_seconds() * 10 ** 6)
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def is_available() -> bool:
+    """Whether DuckDB is installed"""
+    return duckdb is not None
+
+
+class AnalyticsEngine:
+    """
+    In-process DuckDB database whose views read the candle store and the table mirrors
+
+    Args:
+        connect: Returns a PostgreSQL connection, for copying the mirrored tables
+        tables: Tables to mirror
+        store_dir: Candle store directory
+        mirror_dir: Directory for the mirrors
+        max_age: Seconds before mirrors are copied again
+    """
+
+    def __init__(self, connect: Optional[Callable[[], Any]] = None,
+                 tables: Optional[List[str]] = None, store_dir: str = CANDLE_STORE_DIR,
+                 mirror_dir: str = ANALYTICS_DIR, max_age: int = ANALYTICS_MIRROR_MAX_AGE):
+        if duckdb is None:
+            raise ValueError("The DuckDB query engine needs the duckdb package (pip install duckdb)")
+        self.connect = connect
+        self.tables = ANALYTICS_MIRROR_TABLES if tables is None else tables
+        self.store_dir = store_dir
+        self.mirror_dir = mirror_dir
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.mirrored_at: Dict[str, float] = {}
+        self.candle_dirs: List[str] = []
+        self.counts = {'queries': 0, 'rows': 0, 'mirror_copies': 0, 'mirror_errors': 0}
+
+        os.makedirs(self.store_dir, exist_ok=True)
+        os.makedirs(self.mirror_dir, exist_ok=True)
+        self.db = duckdb.connect(':memory:')
+        self.db.execute(f"SET threads = {int(ANALYTICS_THREADS)}")
+        try:
+            self.db.execute(f"SET TimeZone = {_quote(MARKET_TIMEZONE)}")
+        except duckdb.Error as e:
+            logger.warning(f"Timestamps are shown in UTC: {e}")
+        if ANALYTICS_MEMORY_LIMIT:
+            self.db.execute(f"SET memory_limit = {_quote(ANALYTICS_MEMORY_LIMIT)}")
+        # Queries may read the candle store and the mirrors, and nothing else
+        directories = ', '.join(_quote(os.path.join(os.path.abspath(path), ''))
+                                for path in (self.store_dir, self.mirror_dir))
+        self.db.execute(f"SET allowed_directories = [{directories}]")
+        self.db.execute("SET enable_external_access = false")
+        self._create_views()
+
+    def _mirror_path(self, table: str) -> str:
+        return os.path.join(self.mirror_dir, f"{table}.parquet")
+
+    def _create_candle_view(self) -> None:
+        """candles view: one UNION ALL branch per interval directory"""
+        self.candle_dirs = sorted(
+            name for name in os.listdir(self.store_dir)
+            if name not in NON_CANDLE_DIRS and os.path.isdir(os.path.join(self.store_dir, name)))
+
+        branches = []
+        for interval in self.candle_dirs:
+            files = os.path.join(os.path.abspath(self.store_dir), interval, '*.parquet')
+            scan = f"read_parquet({_quote(files)}, union_by_name = true, filename = true)"
+            try:
+                columns = self.db.execute(f"DESCRIBE SELECT * FROM {scan}").fetchall()
+            except duckdb.Error:
+                continue  # No Parquet files yet
+            # The timestamp is the pandas index, stored as Date, Datetime or __index_level_0__;
+            # tz-naive candles are already in market time
+            timestamps = [f"make_timestamp(epoch_us({_identifier(name)}) + {MARKET_UTC_OFFSET_US})"
+                          if kind == 'TIMESTAMP WITH TIME ZONE' else f"{_identifier(name)}::TIMESTAMP"
+                          for name, kind, *_ in columns if kind.startswith('TIMESTAMP')]
+            names = {name for name, *_ in columns}
+            if not timestamps or not set(CANDLE_COLUMNS) <= names:
+                continue
+            values = ', '.join(f"{_identifier(column)} AS {column.lower()}" for column in CANDLE_COLUMNS)
+            branches.append(f"SELECT {_FILE_SYMBOL} AS symbol, {_quote(interval)} AS interval, "
+                            f"coalesce({', '.join(timestamps)}) AS ts, {values} FROM {scan}")
+
+        if not branches:
+            branches = ["SELECT NULL::VARCHAR AS symbol, NULL::VARCHAR AS interval, NULL::TIMESTAMP AS ts, "
+                        "NULL::DOUBLE AS open, NULL::DOUBLE AS high, NULL::DOUBLE AS low, "
+                        "NULL::DOUBLE AS close, NULL::BIGINT AS volume WHERE false"]
+        self.db.execute(f"CREATE OR REPLACE VIEW candles AS {' UNION ALL '.join(branches)}")
+
+    def _create_views(self) -> None:
+        self._create_candle_view()
+
+        actions_dir = os.path.join(os.path.abspath(self.store_dir), 'actions')
+        if os.path.isdir(actions_dir) and any(name.endswith('.parquet') for name in os.listdir(actions_dir)):
+            files = os.path.join(actions_dir, '*.parquet')
+            self.db.execute(f"CREATE OR REPLACE VIEW corporate_actions AS SELECT {_FILE_SYMBOL} AS symbol, "
+                            f"date, action, value FROM read_parquet({_quote(files)}, filename = true)")
+        else:
+            self.db.execute("CREATE OR REPLACE VIEW corporate_actions AS SELECT NULL::VARCHAR AS symbol, "
+                            "NULL::TIMESTAMP AS date, NULL::VARCHAR AS action, NULL::DOUBLE AS value WHERE false")
+
+        for table in self.tables:
+            path = self._mirror_path(table)
+            if os.path.exists(path):
+                self.db.execute(f"CREATE OR REPLACE VIEW {_identifier(table)} AS "
+                                f"SELECT * FROM read_parquet({_quote(os.path.abspath(path))})")
+
+    def _copy_table(self, conn, table: str) -> int:
+        """Copy one table from PostgreSQL into its Parquet mirror"""
+        frame = pd.read_sql_query(f"SELECT * FROM {_identifier(table)}", conn)
+        # NUMERIC columns arrive as Decimal objects
+        for column in frame.columns:
+            values = frame[column].dropna()
+            if frame[column].dtype == object and len(values) and isinstance(values.iloc[0], Decimal):
+                frame[column] = pd.to_numeric(frame[column], errors='coerce')
+
+        path = self._mirror_path(table)
+        tmp_path = f"{path}.tmp"
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        return len(frame)
+
+    def refresh_mirrors(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Copy stale mirrored tables from PostgreSQL and rebuild the views
+
+        A table that cannot be copied (e.g. the database is unreachable) keeps
+        its previous mirror.
+
+        Args:
+            force: Copy every table regardless of age
+
+        Returns:
+            Dictionary of table -> rows copied, or the error message
+        """
+        with self.lock:
+            now = time.monotonic()
+            stale = [table for table in self.tables
+                     if force or now - self.mirrored_at.get(table, float('-inf')) >= self.max_age]
+            copied: Dict[str, Any] = {}
+            if stale and self.connect is not None:
+                conn = None
+                try:
+                    conn = self.connect()
+                    for table in stale:
+                        try:
+                            copied[table] = self._copy_table(conn, table)
+                            self.counts['mirror_copies'] += 1
+                        except Exception as e:
+                            conn.rollback()
+                            copied[table] = str(e)
+                            self.counts['mirror_errors'] += 1
+                            logger.warning(f"Could not mirror {table}: {e}")
+                        self.mirrored_at[table] = now
+                except Exception as e:
+                    self.counts['mirror_errors'] += 1
+                    logger.warning(f"Could not mirror tables, using existing mirrors: {e}")
+                    for table in stale:
+                        self.mirrored_at[table] = now
+                finally:
+                    if conn is not None:
+                        conn.close()
+                logger.info(f"Mirrored tables for analytics: {copied}")
+
+            # New interval directories and mirror files show up in the views
+            self._create_views()
+            return copied
+
+    def invalidate(self) -> None:
+        """Copy the mirrors again on the next query (call after the tables change)"""
+        with self.lock:
+            self.mirrored_at.clear()
+
+    def query_arrow(self, sql_query: str):
+        """
+        Run one read-only SELECT statement
+
+        Args:
+            sql_query: DuckDB SQL over candles, corporate_actions and the mirrored tables
+
+        Returns:
+            pyarrow.Table with the result
+        """
+        statements = self.db.extract_statements(sql_query)
+        if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+            raise ValueError("Only single SELECT statements are allowed")
+
+        self.refresh_mirrors()
+        cursor = self.db.cursor()
+        try:
+            table = cursor.execute(sql_query).to_arrow_table()
+        finally:
+            cursor.close()
+        with self.lock:
+            self.counts['queries'] += 1
+            self.counts['rows'] += table.num_rows
+        return table
+
+    def query(self, sql_query: str) -> List[Dict[str, Any]]:
+        """query_arrow, as a list of row dictionaries converted straight from Arrow"""
+        return self.query_arrow(sql_query).to_pylist()
+
+    def stats(self) -> Dict[str, Any]:
+        """Query and mirror counters, mirror ages and candle intervals"""
+        with self.lock:
+            now = time.monotonic()
+            return {**self.counts, 'candle_intervals': list(self.candle_dirs),
+                    'mirror_age_s': {table: round(now - at, 1) for table, at in self.mirrored_at.items()}}
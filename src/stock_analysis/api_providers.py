@@ -3,18 +3,33 @@ Stock Market API Providers
 Abstraction layer for multiple free stock market APIs
 """
 
+from __future__ import annotations
+
 import os
+import io
+import json
+import atexit
 import logging
+import threading
+import time
+import zlib
+import zipfile
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
-import pandas as pd
-
-# API Libraries
-import yfinance as yf
-import requests
 from time import sleep
 
+from .lazy_imports import lazy_import
+from .metrics import instrument_provider
+from .singleflight import coalesce_provider
+
+# Data and API libraries load on first use, so importing the providers is cheap
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+yf = lazy_import('yfinance')
+requests = lazy_import('requests')
+
 logger = logging.getLogger(__name__)
 
 
@@ -41,10 +56,27 @@ class StockAPIProvider(ABC):
         """Check if API is available and properly configured"""
         pass
 
+    def get_raw_historical_data(self, symbol: str, period: str = "1mo", interval: str = "1d") -> pd.DataFrame:
+        """
+        Get historical data as traded, without split or dividend adjustment
+
+        Providers that only serve adjusted history return that, together with
+        no corporate actions, so nothing is adjusted twice.
+        """
+        return self.get_historical_data(symbol, period=period, interval=interval)
+
+    def get_corporate_actions(self, symbol: str) -> pd.DataFrame:
+        """Get splits and dividends (date, action, value; see corporate_actions)"""
+        from .corporate_actions import empty_actions
+        return empty_actions()
+
 
 class YahooFinanceProvider(StockAPIProvider):
     """Yahoo Finance API Provider (yfinance)"""
 
+    # History requested by get_corporate_actions
+    ACTIONS_PERIOD = '1y'
+
     def __init__(self):
         self.name = "Yahoo Finance"
 
@@ -84,6 +116,44 @@ class YahooFinanceProvider(StockAPIProvider):
             logger.error(f"Yahoo Finance historical data error for {symbol}: {e}")
             return pd.DataFrame()
 
+    def get_raw_historical_data(self, symbol: str, period: str = "1mo", interval: str = "1d") -> pd.DataFrame:
+        """
+        Get historical data as traded, with the window's Dividends and Stock Splits columns
+
+        Yahoo's unadjusted history is still split-adjusted. The splits to undo
+        come from the same response: a split only moves bars before its
+        ex-date, and every period runs up to today.
+        """
+        from .corporate_actions import actions_from_history, unadjust_splits
+
+        try:
+            ticker = yf.Ticker(symbol)
+            hist = ticker.history(period=period, interval=interval, auto_adjust=False, actions=True)
+            if hist.empty:
+                return hist
+            # Upcoming ex-dates arrive as rows without prices
+            hist = hist[hist['Close'].notna()].drop(columns=['Adj Close'], errors='ignore')
+            return unadjust_splits(hist, actions_from_history(hist))
+        except Exception as e:
+            logger.error(f"Yahoo Finance raw historical data error for {symbol}: {e}")
+            return pd.DataFrame()
+
+    def get_corporate_actions(self, symbol: str) -> pd.DataFrame:
+        """
+        Get splits and dividends of the last ACTIONS_PERIOD
+
+        Yahoo only reports actions alongside prices, so this fetches a short
+        daily history; older actions are recorded from the histories they fall in.
+        """
+        from .corporate_actions import actions_from_history
+
+        try:
+            hist = yf.Ticker(symbol).history(period=self.ACTIONS_PERIOD, interval='1d', auto_adjust=False, actions=True)
+            return actions_from_history(hist)
+        except Exception as e:
+            logger.error(f"Yahoo Finance corporate actions error for {symbol}: {e}")
+            raise
+
     def get_company_info(self, symbol: str) -> Dict[str, Any]:
         """Get company information"""
         try:
@@ -392,21 +462,35 @@ class FinnhubProvider(StockAPIProvider):
 class NSEIndiaProvider(StockAPIProvider):
     """NSE India Official API Provider"""
 
+    # Session with NSE cookies, shared by instances (the factory creates one per call)
+    _session = None
+    _session_lock = threading.Lock()
+
     def __init__(self):
         self.name = "NSE India"
         self.base_url = "https://www.nseindia.com/api"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'application/json',
-            'Accept-Language': 'en-US,en;q=0.9',
-        })
-        self._init_session()
-
-    def _init_session(self):
+
+    @property
+    def session(self):
+        """Session initialized with NSE on first use"""
+        cls = type(self)
+        if cls._session is None:
+            with cls._session_lock:
+                if cls._session is None:
+                    session = requests.Session()
+                    session.headers.update({
+                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+                        'Accept': 'application/json',
+                        'Accept-Language': 'en-US,en;q=0.9',
+                    })
+                    self._init_session(session)
+                    cls._session = session
+        return cls._session
+
+    def _init_session(self, session):
         """Initialize session with NSE"""
         try:
-            self.session.get("https://www.nseindia.com", timeout=10)
+            session.get("https://www.nseindia.com", timeout=10)
         except:
             pass
 
@@ -462,6 +546,455 @@ class NSEIndiaProvider(StockAPIProvider):
         return True
 
 
+class FakeMarketDataProvider(StockAPIProvider):
+    """
+    Deterministic synthetic market data for offline benchmarks and tests
+
+    Every symbol gets its own seeded random walk of daily bars from
+    FAKE_HISTORY_START to today, so the same symbol and seed always give the
+    same prices. Intraday bars cover the NSE session (09:15-15:30).
+
+    Most symbols pay a yearly dividend and some split now and then; the walk
+    is the split-adjusted price, get_raw_historical_data returns the prices
+    as traded and get_historical_data the split- and dividend-adjusted ones,
+    like Yahoo Finance.
+
+    Configuration (environment or constructor):
+        FAKE_PROVIDER_SEED: Seed mixed into every symbol's random walk (default 0)
+        FAKE_PROVIDER_LATENCY_MS: Delay added to every call, to mimic a network round trip (default 0)
+    """
+
+    FAKE_HISTORY_START = '2005-01-03'
+    SECTORS = ['Financial Services', 'Technology', 'Energy', 'Consumer Defensive',
+               'Healthcare', 'Industrials', 'Basic Materials', 'Consumer Cyclical']
+    INTRADAY_MINUTES = {'1m': 1, '2m': 2, '5m': 5, '15m': 15, '30m': 30, '60m': 60, '90m': 90, '1h': 60}
+    INTRADAY_MAX_DAYS = 60
+    SPLIT_RATIOS = [2, 5, 10]
+
+    # Recently generated histories, shared by instances (the factory creates one per call)
+    CACHE_SIZE = 64
+    _daily: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self, seed: Optional[int] = None, latency_ms: Optional[float] = None):
+        self.name = "Fake Market Data"
+        self.seed = int(os.getenv('FAKE_PROVIDER_SEED', '0')) if seed is None else seed
+        latency_ms = float(os.getenv('FAKE_PROVIDER_LATENCY_MS', '0')) if latency_ms is None else latency_ms
+        self.latency = latency_ms / 1000
+
+    def _rng(self, symbol: str, *extra: int) -> np.random.Generator:
+        return np.random.default_rng([self.seed, zlib.crc32(symbol.encode('utf-8')), *extra])
+
+    def _wait(self) -> None:
+        if self.latency > 0:
+            sleep(self.latency)
+
+    def _daily_bars(self, symbol: str) -> pd.DataFrame:
+        """Full daily history of a symbol, generated once"""
+        today = datetime.now().date()
+        key = (self.seed, symbol, today)
+        with self._lock:
+            bars = self._daily.get(key)
+            if bars is not None:
+                self._daily.move_to_end(key)
+                return bars
+
+        rng = self._rng(symbol)
+        days = np.arange(np.datetime64(self.FAKE_HISTORY_START), np.datetime64(today) + 1)
+        dates = pd.DatetimeIndex(days[np.is_busday(days)]).as_unit('ns').tz_localize('Asia/Kolkata')
+        n = len(dates)
+        close = rng.uniform(50, 3000) * np.exp(np.cumsum(rng.normal(0.0002, 0.014, n)))
+        open_ = close * np.exp(rng.normal(0, 0.006, n))
+        spread = np.abs(rng.normal(0, 0.008, n))
+        bars = pd.DataFrame({
+            'Open': open_.round(2),
+            'High': (np.maximum(open_, close) * (1 + spread)).round(2),
+            'Low': (np.minimum(open_, close) * (1 - spread)).round(2),
+            'Close': close.round(2),
+            'Volume': rng.lognormal(13, 0.6, n).astype('int64'),
+        }, index=dates)
+        bars.index.name = 'Date'
+
+        with self._lock:
+            self._daily[key] = bars
+            while len(self._daily) > self.CACHE_SIZE:
+                self._daily.popitem(last=False)
+        return bars
+
+    def _intraday_bars(self, symbol: str, daily: pd.DataFrame, minutes: int) -> pd.DataFrame:
+        """Bars through each session, a random path from the day's open to its close"""
+        frames = []
+        for date, day in daily.iterrows():
+            times = pd.date_range(date + pd.Timedelta(hours=9, minutes=15),
+                                  date + pd.Timedelta(hours=15, minutes=29), freq=f'{minutes}min')
+            steps = len(times)
+            rng = self._rng(symbol, date.toordinal(), minutes)
+            path = np.cumsum(rng.normal(0, 1, steps + 1))
+            # Bridge the walk so it starts at the open and ends at the close
+            path = path - np.linspace(path[0], path[-1], steps + 1)
+            prices = np.linspace(day['Open'], day['Close'], steps + 1) + path * day['Close'] * 0.001
+            opens, closes = prices[:-1], prices[1:]
+            wiggle = np.abs(rng.normal(0, day['Close'] * 0.0005, steps))
+            frames.append(pd.DataFrame({
+                'Open': opens.round(2),
+                'High': (np.maximum(opens, closes) + wiggle).round(2),
+                'Low': (np.minimum(opens, closes) - wiggle).round(2),
+                'Close': closes.round(2),
+                'Volume': (day['Volume'] * rng.dirichlet(np.ones(steps))).astype('int64'),
+            }, index=times))
+        return pd.concat(frames) if frames else pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+
+    def get_quote(self, symbol: str) -> Dict[str, Any]:
+        """Get current quote"""
+        self._wait()
+        latest = self._daily_bars(symbol).iloc[-1]
+        return {
+            'symbol': symbol,
+            'last_price': float(latest['Close']),
+            'open': float(latest['Open']),
+            'high': float(latest['High']),
+            'low': float(latest['Low']),
+            'close': float(latest['Close']),
+            'volume': int(latest['Volume']),
+            'timestamp': datetime.now()
+        }
+
+    def _actions(self, symbol: str) -> pd.DataFrame:
+        """A yearly dividend for most symbols, and a split for some"""
+        from .corporate_actions import normalize_actions
+
+        daily = self._daily_bars(symbol)
+        rng = self._rng(symbol, 2)
+        dates = daily.index.tz_localize(None)
+        rows = []
+        if rng.random() < 0.7:
+            dividend_yield = rng.uniform(0.005, 0.04)
+            day_of_year = int(rng.integers(120, 300))
+            for year in range(dates[0].year, dates[-1].year + 1):
+                position = dates.searchsorted(pd.Timestamp(year, 1, 1) + pd.Timedelta(days=day_of_year))
+                if 0 < position < len(dates):
+                    value = round(float(daily['Close'].iloc[position - 1]) * dividend_yield, 2)
+                    rows.append({'date': dates[position], 'action': 'dividend', 'value': value})
+        for _ in range(int(rng.integers(0, 3)) if rng.random() < 0.4 else 0):
+            rows.append({'date': dates[int(rng.integers(1, len(dates)))], 'action': 'split',
+                         'value': float(rng.choice(self.SPLIT_RATIOS))})
+        return normalize_actions(pd.DataFrame(rows) if rows else None)
+
+    def _bars(self, symbol: str, period: str, interval: str, adjust: str) -> pd.DataFrame:
+        from .candle_store import period_start
+        from .corporate_actions import adjust_candles, unadjust_splits
+
+        self._wait()
+        actions = self._actions(symbol)
+        daily = unadjust_splits(self._daily_bars(symbol), actions)
+        start = period_start(period)
+        if start is not None:
+            start = pd.Timestamp(start, tz=daily.index.tz).normalize()
+
+        if interval in self.INTRADAY_MINUTES:
+            if start is not None:
+                daily = daily[daily.index >= start]
+            bars = self._intraday_bars(symbol, daily.tail(self.INTRADAY_MAX_DAYS), self.INTRADAY_MINUTES[interval])
+            return adjust_candles(bars, actions, adjust)
+
+        daily = adjust_candles(daily, actions, adjust, key=('fake', self.seed, symbol, adjust))
+        if start is not None:
+            daily = daily[daily.index >= start]
+        if interval in ('1wk', '1mo', '3mo'):
+            rule = {'1wk': 'W-MON', '1mo': 'MS', '3mo': 'QS'}[interval]
+            return daily.resample(rule, label='left', closed='left').agg(
+                {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}).dropna()
+        return daily.copy()
+
+    def get_historical_data(self, symbol: str, period: str = "1mo", interval: str = "1d") -> pd.DataFrame:
+        """Get historical data (split- and dividend-adjusted)"""
+        return self._bars(symbol, period, interval, 'all')
+
+    def get_raw_historical_data(self, symbol: str, period: str = "1mo", interval: str = "1d") -> pd.DataFrame:
+        """Get historical data as traded"""
+        return self._bars(symbol, period, interval, 'none')
+
+    def get_corporate_actions(self, symbol: str) -> pd.DataFrame:
+        """Get splits and dividends"""
+        self._wait()
+        return self._actions(symbol)
+
+    def get_company_info(self, symbol: str) -> Dict[str, Any]:
+        """Get company information (Yahoo Finance info keys)"""
+        self._wait()
+        bars = self._daily_bars(symbol)
+        year = bars.tail(252)
+        rng = self._rng(symbol, 1)
+        price = float(bars['Close'].iloc[-1])
+        name = symbol.split('.')[0]
+        return {
+            'symbol': symbol,
+            'longName': f"{name.title()} Limited",
+            'shortName': name,
+            'sector': self.SECTORS[int(rng.integers(len(self.SECTORS)))],
+            'currentPrice': price,
+            'fiftyTwoWeekHigh': float(year['High'].max()),
+            'fiftyTwoWeekLow': float(year['Low'].min()),
+            'marketCap': int(price * rng.uniform(1e8, 1e10)),
+            'trailingPE': round(float(rng.uniform(6, 80)), 2),
+            'dividendYield': round(float(rng.uniform(0, 6)), 2) if rng.random() < 0.85 else None,
+        }
+
+    def is_available(self) -> bool:
+        """Always available; no network involved"""
+        return True
+
+
+class ProviderReplayError(Exception):
+    """A recorded provider call failed, or the replay archive has no recording for a call"""
+    pass
+
+
+# Archive layout: calls.jsonl (one line per call, in order), frames/<seq>.parquet
+# (historical data) and manifest.json (written when recording ends)
+REPLAY_ARCHIVE_VERSION = 1
+
+
+class ProviderArchiveWriter:
+    """
+    Zip archive of recorded provider calls, shared by every RecordingProvider for a path
+
+    Frames are written as they arrive; the call log and manifest are written on
+    close(), which also runs at interpreter exit.
+    """
+
+    _writers: Dict[str, "ProviderArchiveWriter"] = {}
+    _writers_lock = threading.Lock()
+
+    def __init__(self, path: str, upstream: str):
+        self.path = path
+        self.upstream = upstream
+        self.started = time.monotonic()
+        self.recorded_at = datetime.now().isoformat(timespec='seconds')
+        self.calls: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.zip = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED)
+        atexit.register(self.close)
+
+    @classmethod
+    def open(cls, path: str, upstream: str) -> "ProviderArchiveWriter":
+        """Writer for a path, created on first use"""
+        with cls._writers_lock:
+            writer = cls._writers.get(path)
+            if writer is None or writer.zip is None:
+                writer = cls(path, upstream)
+                cls._writers[path] = writer
+            return writer
+
+    def record(self, call: Dict[str, Any], frame: Optional[pd.DataFrame] = None) -> None:
+        with self.lock:
+            if self.zip is None:
+                return
+            call['seq'] = len(self.calls)
+            call['started'] = round(call.pop('start') - self.started, 6)
+            if frame is not None:
+                buffer = io.BytesIO()
+                frame.to_parquet(buffer)
+                call['frame'] = f"frames/{call['seq']:06d}.parquet"
+                self.zip.writestr(call['frame'], buffer.getvalue())
+            self.calls.append(call)
+
+    def close(self) -> None:
+        """Write the call log and manifest and finish the archive"""
+        with self.lock:
+            if self.zip is None:
+                return
+            log = '\n'.join(json.dumps(call, default=str) for call in self.calls)
+            self.zip.writestr('calls.jsonl', log)
+            self.zip.writestr('manifest.json', json.dumps({
+                'version': REPLAY_ARCHIVE_VERSION,
+                'upstream': self.upstream,
+                'recorded_at': self.recorded_at,
+                'duration': round(time.monotonic() - self.started, 3),
+                'calls': len(self.calls),
+                'symbols': sorted({call['symbol'] for call in self.calls}),
+            }, indent=2))
+            self.zip.close()
+            self.zip = None
+        logger.info(f"Recorded {len(self.calls)} provider calls to {self.path}")
+
+
+class RecordingProvider(StockAPIProvider):
+    """
+    Passes calls through to a real provider and records them for ReplayProvider
+
+    Every call is logged with its arguments, result, latency and any error
+    (exceptions are recorded and re-raised).
+
+    Configuration (environment or constructor):
+        RECORD_ARCHIVE: Archive path (default provider-recording.zip)
+        RECORD_UPSTREAM: Provider to record (default yfinance)
+    """
+
+    def __init__(self, archive: Optional[str] = None, upstream: Optional[str] = None):
+        upstream = upstream or os.getenv('RECORD_UPSTREAM', 'yfinance')
+        if upstream.lower() in ('record', 'replay'):
+            raise ValueError(f"Cannot record the {upstream} provider")
+        self.upstream = APIProviderFactory.get_provider(upstream)
+        self.name = f"Recording ({self.upstream.name})"
+        self.archive = ProviderArchiveWriter.open(archive or os.getenv('RECORD_ARCHIVE', 'provider-recording.zip'),
+                                                  upstream)
+
+    def _call(self, method: str, symbol: str, **kwargs) -> Any:
+        call = {'method': method, 'symbol': symbol, 'args': kwargs, 'start': time.monotonic()}
+        try:
+            result = getattr(self.upstream, method)(symbol, **kwargs)
+        except Exception as e:
+            call.update(latency=round(time.monotonic() - call['start'], 6), status='error',
+                        error={'type': type(e).__name__, 'message': str(e)})
+            self.archive.record(call)
+            raise
+
+        call.update(latency=round(time.monotonic() - call['start'], 6), status='ok')
+        if isinstance(result, pd.DataFrame):
+            call['rows'] = len(result)
+            self.archive.record(call, frame=result)
+        else:
+            call['payload'] = result
+            call['empty'] = not result
+            self.archive.record(call)
+        return result
+
+    def get_quote(self, symbol: str) -> Dict[str, Any]:
+        """Get current quote"""
+        return self._call('get_quote', symbol)
+
+    def get_historical_data(self, symbol: str, period: str = "1mo", interval: str = "1d") -> pd.DataFrame:
+        """Get historical data"""
+        return self._call('get_historical_data', symbol, period=period, interval=interval)
+
+    def get_raw_historical_data(self, symbol: str, period: str = "1mo", interval: str = "1d") -> pd.DataFrame:
+        """Get historical data as traded"""
+        return self._call('get_raw_historical_data', symbol, period=period, interval=interval)
+
+    def get_corporate_actions(self, symbol: str) -> pd.DataFrame:
+        """Get splits and dividends"""
+        return self._call('get_corporate_actions', symbol)
+
+    def get_company_info(self, symbol: str) -> Dict[str, Any]:
+        """Get company information"""
+        return self._call('get_company_info', symbol)
+
+    def is_available(self) -> bool:
+        """Available when the recorded provider is"""
+        return self.upstream.is_available()
+
+
+class ReplayProvider(StockAPIProvider):
+    """
+    Serves calls from an archive written by RecordingProvider
+
+    Calls are matched on method, symbol and arguments; repeated calls get the
+    recordings in their original order, and the last one once they run out.
+    Recorded errors are raised as ProviderReplayError.
+
+    Configuration (environment or constructor):
+        REPLAY_ARCHIVE: Archive path (default provider-recording.zip)
+        REPLAY_SPEED: 1 replays recorded latencies, 10 ten times faster, 0 without delay (default 1)
+        REPLAY_STRICT: 1 to raise for calls that were never recorded instead of returning empty data
+    """
+
+    # Methods whose recordings are DataFrames
+    FRAME_METHODS = ('get_historical_data', 'get_raw_historical_data', 'get_corporate_actions')
+
+    # Parsed archives, shared by instances (the factory creates one per call)
+    _archives: Dict[str, Dict[str, Any]] = {}
+    _archives_lock = threading.Lock()
+
+    def __init__(self, archive: Optional[str] = None, speed: Optional[float] = None,
+                 strict: Optional[bool] = None):
+        self.name = "Replay"
+        self.path = archive or os.getenv('REPLAY_ARCHIVE', 'provider-recording.zip')
+        self.speed = float(os.getenv('REPLAY_SPEED', '1')) if speed is None else speed
+        self.strict = os.getenv('REPLAY_STRICT', '0') == '1' if strict is None else strict
+
+    @staticmethod
+    def _key(method: str, symbol: str, args: Dict[str, Any]) -> str:
+        return json.dumps([method, symbol, args], sort_keys=True)
+
+    def _archive(self) -> Dict[str, Any]:
+        with self._archives_lock:
+            archive = self._archives.get(self.path)
+            if archive is None:
+                archive_zip = zipfile.ZipFile(self.path)
+                calls: Dict[str, List[Dict[str, Any]]] = {}
+                for line in archive_zip.read('calls.jsonl').decode('utf-8').splitlines():
+                    call = json.loads(line)
+                    calls.setdefault(self._key(call['method'], call['symbol'], call['args']), []).append(call)
+                archive = {
+                    'zip': archive_zip,
+                    'manifest': json.loads(archive_zip.read('manifest.json')),
+                    'calls': calls,
+                    'cursors': {},
+                    'lock': threading.Lock(),
+                }
+                self._archives[self.path] = archive
+                logger.info(f"Loaded {archive['manifest']['calls']} recorded calls from {self.path}")
+            return archive
+
+    def symbols(self) -> List[str]:
+        """Symbols in the archive"""
+        return self._archive()['manifest']['symbols']
+
+    def _replay(self, method: str, symbol: str, **kwargs) -> Any:
+        archive = self._archive()
+        recordings = archive['calls'].get(self._key(method, symbol, kwargs))
+        if not recordings:
+            if self.strict:
+                raise ProviderReplayError(f"No recorded {method} call for {symbol} {kwargs}")
+            logger.warning(f"No recorded {method} call for {symbol} {kwargs}")
+            return pd.DataFrame() if method in self.FRAME_METHODS else {}
+
+        with archive['lock']:
+            key = self._key(method, symbol, kwargs)
+            position = archive['cursors'].get(key, 0)
+            archive['cursors'][key] = position + 1
+            call = recordings[min(position, len(recordings) - 1)]
+            frame = archive['zip'].read(call['frame']) if 'frame' in call else None
+
+        if self.speed > 0:
+            sleep(call['latency'] / self.speed)
+
+        if call['status'] == 'error':
+            raise ProviderReplayError(f"{call['error']['type']}: {call['error']['message']}")
+        if frame is not None:
+            return pd.read_parquet(io.BytesIO(frame))
+        payload = call.get('payload') or {}
+        if method == 'get_quote' and 'timestamp' in payload:
+            payload = {**payload, 'timestamp': datetime.fromisoformat(payload['timestamp'])}
+        return payload
+
+    def get_quote(self, symbol: str) -> Dict[str, Any]:
+        """Get current quote"""
+        return self._replay('get_quote', symbol)
+
+    def get_historical_data(self, symbol: str, period: str = "1mo", interval: str = "1d") -> pd.DataFrame:
+        """Get historical data"""
+        return self._replay('get_historical_data', symbol, period=period, interval=interval)
+
+    def get_raw_historical_data(self, symbol: str, period: str = "1mo", interval: str = "1d") -> pd.DataFrame:
+        """Get historical data as traded"""
+        return self._replay('get_raw_historical_data', symbol, period=period, interval=interval)
+
+    def get_corporate_actions(self, symbol: str) -> pd.DataFrame:
+        """Get splits and dividends"""
+        return self._replay('get_corporate_actions', symbol)
+
+    def get_company_info(self, symbol: str) -> Dict[str, Any]:
+        """Get company information"""
+        return self._replay('get_company_info', symbol)
+
+    def is_available(self) -> bool:
+        """Available when the archive exists"""
+        return os.path.exists(self.path)
+
+
 class APIProviderFactory:
     """Factory to create and manage API providers"""
 
@@ -471,6 +1004,9 @@ class APIProviderFactory:
         'twelvedata': TwelveDataProvider,
         'finnhub': FinnhubProvider,
         'nse': NSEIndiaProvider,
+        'fake': FakeMarketDataProvider,
+        'record': RecordingProvider,
+        'replay': ReplayProvider,
     }
 
     @classmethod
@@ -490,10 +1026,10 @@ class APIProviderFactory:
 
         if not provider.is_available():
             logger.warning(f"{provider.name} is not available, falling back to yfinance")
-            return YahooFinanceProvider()
+            return coalesce_provider(instrument_provider(YahooFinanceProvider()))
 
         logger.info(f"Using API provider: {provider.name}")
-        return provider
+        return coalesce_provider(instrument_provider(provider))
 
     @classmethod
     def get_available_providers(cls) -> List[str]:
@@ -517,4 +1053,4 @@ class APIProviderFactory:
                 continue
 
         # Final fallback to yfinance
-        return YahooFinanceProvider()
+        return coalesce_provider(instrument_provider(YahooFinanceProvider()))
@@ -0,0 +1,397 @@
+"""
+Strategy backtester
+Replays the P/E, dividend and 52-week position scoring over history as a vectorized date x symbol simulation
+"""
+
+import itertools
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .api_providers import StockAPIProvider
+from .candle_store import PERIOD_DAYS, get_candles
+from .scoring import build_config, dividend_scores, pe_scores, position_scores, total_scores
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Rebalance frequency -> pandas period alias
+REBALANCE_FREQUENCIES = {
+    'weekly': 'W',
+    'monthly': 'M',
+    'quarterly': 'Q',
+    'yearly': 'Y',
+}
+
+# Trading days in the 52-week high/low window used for the position score
+POSITION_WINDOW = 252
+
+# Data matrices a backtest needs, all indexed by date with one column per symbol
+BACKTEST_FIELDS = ['close', 'high', 'low', 'pe_ratio', 'dividend_yield']
+
+
+def load_price_matrices(symbols: List[str], period: str = '10y',
+                        provider: Optional[StockAPIProvider] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Daily close, high and low matrices from the candle store
+
+    Returns:
+        Dictionary with 'close', 'high' and 'low' DataFrames indexed by date (tz-naive)
+    """
+    frames: Dict[str, Dict[str, pd.Series]] = {'close': {}, 'high': {}, 'low': {}}
+    for symbol in symbols:
+        try:
+            candles = get_candles(symbol, period=period, interval='1d', provider=provider)
+        except Exception as e:
+            logger.warning(f"No candles for {symbol}: {e}")
+            continue
+        if candles.empty:
+            continue
+
+        index = candles.index.tz_localize(None) if candles.index.tz is not None else candles.index
+        candles = candles.set_axis(index.normalize())
+        candles = candles[~candles.index.duplicated(keep='last')]
+        for field, column in (('close', 'Close'), ('high', 'High'), ('low', 'Low')):
+            frames[field][symbol] = candles[column].astype(float)
+
+    return {field: pd.DataFrame(series).sort_index() for field, series in frames.items()}
+
+
+def align_fundamentals(snapshots: pd.DataFrame, dates: pd.DatetimeIndex, symbols: List[str],
+                       static: bool = False) -> Dict[str, pd.DataFrame]:
+    """
+    P/E and dividend yield matrices from stock_data_history snapshots
+
+    Each date uses the latest snapshot taken on or before it, so the
+    backtest only sees what was known at the time. With static=True the
+    latest snapshot is applied to every date instead, which fills history
+    from before snapshots were collected at the cost of look-ahead bias.
+
+    Args:
+        snapshots: Rows with snapshot_date, symbol_token, pe_ratio and dividend_yield
+        dates: Trading dates of the price matrices
+        symbols: Symbols of the price matrices
+        static: Use the latest snapshot for every date
+
+    Returns:
+        Dictionary with 'pe_ratio' and 'dividend_yield' DataFrames aligned to dates and symbols
+    """
+    result = {}
+    for field in ('pe_ratio', 'dividend_yield'):
+        if snapshots.empty:
+            result[field] = pd.DataFrame(np.nan, index=dates, columns=symbols)
+            continue
+
+        values = snapshots.assign(
+            snapshot_date=pd.to_datetime(snapshots['snapshot_date']),
+            **{field: pd.to_numeric(snapshots[field], errors='coerce')}
+        ).pivot_table(index='snapshot_date', columns='symbol_token', values=field, aggfunc='last')
+        values = values.reindex(columns=symbols).sort_index()
+
+        if static:
+            latest = values.ffill().iloc[-1]
+            result[field] = pd.DataFrame([latest.to_numpy()] * len(dates), index=dates, columns=symbols)
+        else:
+            combined = values.index.union(dates)
+            result[field] = values.reindex(combined).ffill().reindex(dates)
+
+    return result
+
+
+def load_backtest_data(symbols: List[str], snapshots: pd.DataFrame, years: int = 5,
+                       static_fundamentals: bool = False,
+                       provider: Optional[StockAPIProvider] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Build the BACKTEST_FIELDS matrices for a universe
+
+    Prices cover `years` plus one more year so the 52-week position is
+    known from the first rebalance date.
+
+    Args:
+        symbols: Stock symbols (e.g., ['RELIANCE.NS', 'TCS.NS'])
+        snapshots: stock_data_history rows (see align_fundamentals)
+        years: Backtest length in years
+        static_fundamentals: Apply the latest snapshot to every date
+        provider: API provider (defaults to the configured provider)
+
+    Returns:
+        Dictionary of DataFrames indexed by date with one column per symbol
+    """
+    days_needed = (years + 1) * 366
+    period = next((name for name, days in sorted(PERIOD_DAYS.items(), key=lambda item: item[1])
+                   if days >= days_needed), 'max')
+
+    data = load_price_matrices(symbols, period, provider)
+    if data['close'].empty:
+        raise ValueError("No price history available for the requested symbols")
+
+    dates, columns = data['close'].index, list(data['close'].columns)
+    data = {field: frame.reindex(index=dates, columns=columns) for field, frame in data.items()}
+    data.update(align_fundamentals(snapshots, dates, columns, static=static_fundamentals))
+    return data
+
+
+def rebalance_positions(dates: pd.DatetimeIndex, frequency: str) -> np.ndarray:
+    """
+    Row positions of the last trading day of each rebalance period, excluding the final row
+    """
+    if frequency not in REBALANCE_FREQUENCIES:
+        raise ValueError(f"rebalance must be one of: {', '.join(REBALANCE_FREQUENCIES)}")
+
+    periods = dates.to_period(REBALANCE_FREQUENCIES[frequency])
+    last_in_period = ~pd.Series(periods).duplicated(keep='last').to_numpy()
+    positions = np.flatnonzero(last_in_period)
+    return positions[positions < len(dates) - 1]
+
+
+def signal_weights(close: np.ndarray, high_52: np.ndarray, low_52: np.ndarray, pe: np.ndarray,
+                   dividend_yield: np.ndarray, config: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Score every symbol at every rebalance date and allocate like scoring.allocate
+
+    All inputs are (rebalances x symbols) arrays.
+
+    Returns:
+        Tuple of (normalized scores, target weights summing to at most 1 per row,
+        tradable mask)
+    """
+    tradable = np.isfinite(close) & (close > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        position = (close - low_52) / (high_52 - low_52) * 100
+    position = np.where(np.isfinite(position), position, np.nan)
+
+    total = total_scores(
+        pe_scores(pe, config), dividend_scores(dividend_yield, config), position_scores(position, config), config
+    )
+    total = np.where(tradable, total, 0.0)
+
+    row_max = total.max(axis=1, keepdims=True)
+    normalized = np.divide(total * 100, row_max, out=np.zeros_like(total), where=row_max > 0)
+
+    buy = tradable & (normalized >= config['buy_threshold']) & (normalized > 0)
+    weights = np.where(buy, normalized, 0.0)
+    weight_sum = weights.sum(axis=1, keepdims=True)
+    weights = np.divide(weights, weight_sum, out=np.zeros_like(weights), where=weight_sum > 0)
+
+    return normalized, weights, tradable
+
+
+def simulate(prices: np.ndarray, rebalances: np.ndarray, weights: np.ndarray,
+             transaction_cost_bps: float = 0.0) -> Dict[str, np.ndarray]:
+    """
+    Equity curve of a portfolio rebalanced to target weights at the close of each rebalance date
+
+    Between rebalances positions drift with prices; uninvested weight is held
+    as cash. Every date is computed at once from the growth of each stock
+    since its segment's rebalance date.
+
+    Args:
+        prices: (dates x symbols) forward-filled closes
+        rebalances: Row positions of the rebalance dates, ascending
+        weights: (rebalances x symbols) target weights
+        transaction_cost_bps: Cost per unit of traded value, in basis points
+
+    Returns:
+        Dictionary with equity (per date, 1.0 before the first rebalance),
+        turnover and segment_growth (per rebalance)
+    """
+    n_dates = len(prices)
+    segment = np.searchsorted(rebalances, np.arange(n_dates), side='left') - 1
+    invested = segment >= 0
+    segment_index = np.clip(segment, 0, None)
+
+    cash = 1.0 - weights.sum(axis=1)
+    base = prices[rebalances]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.nan_to_num(prices / base[segment_index], nan=0.0, posinf=0.0)
+    growth = np.where(invested, (weights[segment_index] * ratio).sum(axis=1) + cash[segment_index], 1.0)
+
+    segment_end = np.append(rebalances[1:], n_dates - 1)
+    segment_growth = growth[segment_end]
+
+    # Weights drifted to the next rebalance date, before trading
+    drifted = np.zeros_like(weights)
+    drifted[1:] = weights[:-1] * ratio[rebalances[1:]] / segment_growth[:-1, None]
+    traded = np.abs(weights - drifted).sum(axis=1)
+    turnover = traded / 2
+    cost_factor = 1.0 - transaction_cost_bps / 10000 * traded
+
+    start_equity = np.cumprod(np.append(1.0, segment_growth[:-1])) * np.cumprod(cost_factor)
+    equity = np.where(invested, start_equity[segment_index] * growth, 1.0)
+
+    return {'equity': equity, 'turnover': turnover, 'segment_growth': segment_growth}
+
+
+def performance_metrics(equity: np.ndarray, dates: pd.DatetimeIndex) -> Dict[str, float]:
+    """Total return, CAGR, volatility, Sharpe ratio (zero risk-free rate) and max drawdown, in percent"""
+    daily = equity[1:] / equity[:-1] - 1
+    years = max((dates[-1] - dates[0]).days / 365.25, 1 / 365.25)
+    std = daily.std(ddof=1) if len(daily) > 1 else 0.0
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+
+    return {
+        'total_return': float((equity[-1] / equity[0] - 1) * 100),
+        'cagr': float(((equity[-1] / equity[0]) ** (1 / years) - 1) * 100),
+        'volatility': float(std * np.sqrt(TRADING_DAYS_PER_YEAR) * 100),
+        'sharpe': float(daily.mean() / std * np.sqrt(TRADING_DAYS_PER_YEAR)) if std > 0 else 0.0,
+        'max_drawdown': float(drawdown.min() * 100),
+    }
+
+
+def run_backtest(data: Dict[str, pd.DataFrame], config: Optional[Dict[str, Any]] = None,
+                 rebalance: str = 'monthly', transaction_cost_bps: float = 10.0,
+                 start: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Backtest the scoring strategy against an equal-weight portfolio of the same universe
+
+    Args:
+        data: Matrices named in BACKTEST_FIELDS, aligned on dates and symbols
+        config: Partial scoring config overrides (weights, bins, buy_threshold, ...)
+        rebalance: weekly, monthly, quarterly or yearly
+        transaction_cost_bps: Cost per unit of traded value, in basis points
+        start: First rebalance date (default: once the 52-week window is full)
+
+    Returns:
+        Dictionary with metrics, benchmark metrics, per-rating forward returns,
+        rebalance count and the equity_curve DataFrame (strategy, benchmark)
+    """
+    config = build_config(config)
+    close = data['close']
+    dates = close.index
+    if len(dates) < 3:
+        raise ValueError("Not enough price history to backtest")
+
+    prices = close.ffill().to_numpy(dtype=float)
+    high_52 = data['high'].rolling(POSITION_WINDOW, min_periods=POSITION_WINDOW).max().to_numpy(dtype=float)
+    low_52 = data['low'].rolling(POSITION_WINDOW, min_periods=POSITION_WINDOW).min().to_numpy(dtype=float)
+
+    rebalances = rebalance_positions(dates, rebalance)
+    first = pd.Timestamp(start) if start else dates[min(POSITION_WINDOW - 1, len(dates) - 2)]
+    rebalances = rebalances[dates[rebalances] >= first]
+    if len(rebalances) == 0:
+        raise ValueError("No rebalance dates in the backtest period")
+
+    normalized, weights, tradable = signal_weights(
+        close.to_numpy(dtype=float)[rebalances], high_52[rebalances], low_52[rebalances],
+        data['pe_ratio'].to_numpy(dtype=float)[rebalances],
+        data['dividend_yield'].to_numpy(dtype=float)[rebalances],
+        config,
+    )
+
+    tradable_count = tradable.sum(axis=1, keepdims=True)
+    equal_weights = np.divide(tradable.astype(float), tradable_count,
+                              out=np.zeros(tradable.shape), where=tradable_count > 0)
+
+    # Evaluate from the first rebalance date on
+    window = slice(rebalances[0], None)
+    offset_rebalances = rebalances - rebalances[0]
+    strategy = simulate(prices[window], offset_rebalances, weights, transaction_cost_bps)
+    benchmark = simulate(prices[window], offset_rebalances, equal_weights, transaction_cost_bps)
+
+    # Return of each stock over each holding period, for hit rate and rating buckets
+    period_end = np.append(rebalances[1:], len(dates) - 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        forward = prices[period_end] / prices[rebalances] - 1
+    observed = tradable & np.isfinite(forward)
+
+    held = observed & (weights > 0)
+    metrics = performance_metrics(strategy['equity'], dates[window])
+    metrics['average_turnover'] = float(strategy['turnover'][1:].mean() * 100) if len(rebalances) > 1 else 0.0
+    metrics['hit_rate'] = float((forward[held] > 0).mean() * 100) if held.any() else 0.0
+    metrics['average_positions'] = float((weights > 0).sum(axis=1).mean())
+
+    rating_index = np.digitize(normalized, config['rating_bins'])
+    rating_returns = {}
+    for i, rating in enumerate(config['ratings']):
+        mask = observed & (rating_index == i)
+        if mask.any():
+            rating_returns[rating] = {
+                'average_period_return': float(forward[mask].mean() * 100),
+                'hit_rate': float((forward[mask] > 0).mean() * 100),
+                'observations': int(mask.sum()),
+            }
+
+    equity_curve = pd.DataFrame({
+        'strategy': strategy['equity'],
+        'benchmark': benchmark['equity'],
+    }, index=dates[window])
+
+    return {
+        'metrics': metrics,
+        'benchmark': performance_metrics(benchmark['equity'], dates[window]),
+        'ratings': rating_returns,
+        'rebalances': len(rebalances),
+        'symbols': close.shape[1],
+        'equity_curve': equity_curve,
+    }
+
+
+def weight_grid(step: float = 0.1) -> List[Dict[str, Any]]:
+    """
+    Every combination of pe/dividend/position weights on a grid, summing to 1
+
+    Returns:
+        List of config overrides, e.g. {'weights': {'pe': 0.4, 'dividend': 0.4, 'position': 0.2}}
+    """
+    if not 0 < step <= 1:
+        raise ValueError("step must be in (0, 1]")
+    units = int(round(1 / step))
+    overrides = []
+    for pe, dividend in itertools.product(range(units + 1), repeat=2):
+        position = units - pe - dividend
+        if position >= 0:
+            overrides.append({'weights': {
+                'pe': round(pe / units, 4),
+                'dividend': round(dividend / units, 4),
+                'position': round(position / units, 4),
+            }})
+    return overrides
+
+
+# Backtest data held by each sweep worker process, sent once per worker
+_sweep_data: Optional[Dict[str, pd.DataFrame]] = None
+
+
+def _init_sweep_worker(data: Dict[str, pd.DataFrame]) -> None:
+    global _sweep_data
+    _sweep_data = data
+
+
+def _run_sweep_case(args: Tuple[Dict[str, Any], str, float, Optional[str]]) -> Dict[str, Any]:
+    overrides, rebalance, transaction_cost_bps, start = args
+    result = run_backtest(_sweep_data, overrides, rebalance, transaction_cost_bps, start)
+    return {'config': overrides, **result['metrics']}
+
+
+def sweep_backtests(data: Dict[str, pd.DataFrame], overrides: List[Dict[str, Any]],
+                    rebalance: str = 'monthly', transaction_cost_bps: float = 10.0,
+                    start: Optional[str] = None, max_workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Run one backtest per config override in parallel worker processes
+
+    Args:
+        data: Backtest matrices, shipped to each worker once
+        overrides: Scoring config overrides, e.g. from weight_grid()
+        rebalance: Rebalance frequency
+        transaction_cost_bps: Cost per unit of traded value, in basis points
+        start: First rebalance date
+        max_workers: Worker processes (default: CPU count)
+
+    Returns:
+        DataFrame with one row of metrics per config, best Sharpe ratio first
+    """
+    cases = [(override, rebalance, transaction_cost_bps, start) for override in overrides]
+
+    # Spawned, not forked: the server process holds threads (pool, scheduler,
+    # anyio workers) and open connections that a forked child would inherit
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_sweep_worker, initargs=(data,)) as executor:
+        results = list(executor.map(_run_sweep_case, cases, chunksize=max(1, len(cases) // 32)))
+
+    logger.info(f"Completed {len(results)} backtests")
+    return pd.DataFrame(results).sort_values('sharpe', ascending=False)
@@ -0,0 +1,386 @@
+"""
+Candle store
+Local Parquet cache of OHLCV history per symbol and interval, filled from the API providers
+
+Candles are stored raw (as traded, without split or dividend adjustment)
+together with each symbol's corporate actions, and adjusted when read (see
+corporate_actions), so splits and dividends never invalidate the cache.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from .api_providers import APIProviderFactory, StockAPIProvider
+from .corporate_actions import (ADJUSTMENTS, CORPORATE_ACTION_COLUMNS, HISTORY_ACTION_COLUMNS, actions_from_history,
+                                adjust_candles, normalize_actions)
+
+logger = logging.getLogger(__name__)
+
+# Cache location; src/database is the volume mounted into the Docker container
+CANDLE_STORE_DIR = os.getenv(
+    'CANDLE_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database', 'candles')
+)
+
+# Seconds before cached candles are refreshed from the provider
+CANDLE_MAX_AGE = int(os.getenv('CANDLE_MAX_AGE', '900'))
+
+# Seconds before a symbol's corporate actions are fetched again
+CORPORATE_ACTIONS_MAX_AGE = int(os.getenv('CORPORATE_ACTIONS_MAX_AGE', '86400'))
+
+CANDLE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Price basis of stored candles; caches written before raw storage are discarded
+CANDLE_BASIS = 'raw'
+
+# One lock per cache file, so concurrent tool calls do not interleave merges
+_file_locks: Dict[str, threading.Lock] = {}
+_file_locks_lock = threading.Lock()
+
+# Calendar days covered by each Yahoo Finance period
+PERIOD_DAYS = {
+    '1d': 1,
+    '5d': 7,
+    '1mo': 31,
+    '3mo': 92,
+    '6mo': 183,
+    '1y': 366,
+    '2y': 731,
+    '3y': 1096,
+    '5y': 1827,
+    '10y': 3653,
+}
+
+# Periods used to fetch only the bars missing from the cache, shortest first
+TAIL_PERIODS = ['5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y']
+
+
+def period_start(period: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Earliest date a Yahoo Finance period reaches back to
+
+    Returns:
+        Start datetime, or None for 'max'
+    """
+    now = now or datetime.now()
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return datetime(now.year, 1, 1)
+    if period not in PERIOD_DAYS:
+        raise ValueError(f"Unsupported period: {period}")
+    return now - timedelta(days=PERIOD_DAYS[period])
+
+
+def _safe_name(symbol: str) -> str:
+    return symbol.replace('/', '_').replace('\\', '_').replace('^', '_')
+
+
+def candle_path(symbol: str, interval: str = '1d') -> str:
+    """Path of the Parquet file holding a symbol's candles"""
+    return os.path.join(CANDLE_STORE_DIR, interval, f"{_safe_name(symbol)}.parquet")
+
+
+def _metadata_path(symbol: str, interval: str) -> str:
+    return os.path.join(CANDLE_STORE_DIR, interval, f"{_safe_name(symbol)}.json")
+
+
+def load_metadata(symbol: str, interval: str = '1d') -> Dict[str, Any]:
+    """Cache metadata: covered_from (ISO date or 'max') and fetched_at (ISO datetime)"""
+    try:
+        with open(_metadata_path(symbol, interval)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_candles(symbol: str, interval: str = '1d') -> pd.DataFrame:
+    """
+    Load cached candles for a symbol
+
+    Returns:
+        DataFrame indexed by timestamp with Open/High/Low/Close/Volume, empty if not cached
+    """
+    path = candle_path(symbol, interval)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=CANDLE_COLUMNS)
+
+    try:
+        return pd.read_parquet(path)
+    except Exception as e:
+        logger.warning(f"Discarding unreadable candle cache {path}: {e}")
+        return pd.DataFrame(columns=CANDLE_COLUMNS)
+
+
+def _file_lock(path: str) -> threading.Lock:
+    with _file_locks_lock:
+        return _file_locks.setdefault(path, threading.Lock())
+
+
+def save_candles(symbol: str, interval: str, candles: pd.DataFrame,
+                 covered_from: Optional[str] = None) -> pd.DataFrame:
+    """
+    Merge candles into the cache, newer rows replacing cached ones with the same timestamp
+
+    Args:
+        symbol: Stock symbol
+        interval: Candle interval
+        candles: Raw DataFrame indexed by timestamp with at least the OHLCV columns
+        covered_from: Earliest date the cache is now complete from (ISO date or 'max')
+
+    Returns:
+        The merged candles
+    """
+    candles = candles[[column for column in CANDLE_COLUMNS if column in candles.columns]]
+    path = candle_path(symbol, interval)
+    with _file_lock(path):
+        existing = load_candles(symbol, interval)
+
+        if not existing.empty:
+            if existing.index.tz is not None and candles.index.tz is not None:
+                candles = candles.tz_convert(existing.index.tz)
+            merged = pd.concat([existing, candles])
+            merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+        else:
+            merged = candles.sort_index()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temporary file first so readers never see a partial file
+        tmp_path = f"{path}.tmp"
+        merged.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+
+        metadata = load_metadata(symbol, interval)
+        if covered_from is not None:
+            previous = metadata.get('covered_from')
+            if previous != 'max' and (covered_from == 'max' or previous is None or covered_from < previous):
+                metadata['covered_from'] = covered_from
+        metadata['basis'] = CANDLE_BASIS
+        _write_metadata(symbol, interval, metadata)
+
+        return merged
+
+
+def _write_metadata(symbol: str, interval: str, metadata: Dict[str, Any]) -> None:
+    metadata['fetched_at'] = datetime.now().isoformat()
+    with open(_metadata_path(symbol, interval), 'w') as f:
+        json.dump(metadata, f)
+
+
+def _mark_fetched(symbol: str, interval: str = '1d') -> None:
+    """Record a fetch that returned no new candles, so the cache counts as fresh again"""
+    with _file_lock(candle_path(symbol, interval)):
+        metadata = load_metadata(symbol, interval)
+        if metadata:
+            _write_metadata(symbol, interval, metadata)
+
+
+def _covers(metadata: Dict[str, Any], start: Optional[datetime]) -> bool:
+    covered_from = metadata.get('covered_from')
+    if covered_from is None:
+        return False
+    if covered_from == 'max':
+        return True
+    return start is not None and covered_from <= start.date().isoformat()
+
+
+def _is_fresh(metadata: Dict[str, Any], max_age: int) -> bool:
+    fetched_at = metadata.get('fetched_at')
+    if not fetched_at:
+        return False
+    return datetime.now() - datetime.fromisoformat(fetched_at) < timedelta(seconds=max_age)
+
+
+def _tail_period(last_timestamp: pd.Timestamp) -> Optional[str]:
+    """Shortest period reaching back to the last cached bar, None if too far behind"""
+    gap_days = (pd.Timestamp.now(tz=last_timestamp.tz) - last_timestamp).days
+    for period in TAIL_PERIODS:
+        if gap_days < PERIOD_DAYS[period] - 1:
+            return period
+    return None
+
+
+def _discard(symbol: str, interval: str) -> None:
+    """Delete a symbol's cached candles for an interval"""
+    for path in (candle_path(symbol, interval), _metadata_path(symbol, interval)):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def actions_path(symbol: str) -> str:
+    """Path of the Parquet file holding a symbol's corporate actions"""
+    return os.path.join(CANDLE_STORE_DIR, 'actions', f"{_safe_name(symbol)}.parquet")
+
+
+def load_corporate_actions(symbol: str) -> pd.DataFrame:
+    """Stored corporate actions of a symbol (date, action, value), empty if none are stored"""
+    path = actions_path(symbol)
+    if not os.path.exists(path):
+        return normalize_actions(None)
+    try:
+        return normalize_actions(pd.read_parquet(path))
+    except Exception as e:
+        logger.warning(f"Discarding unreadable corporate actions {path}: {e}")
+        return normalize_actions(None)
+
+
+def _write_actions(path: str, actions: pd.DataFrame) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    actions.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def save_corporate_actions(symbol: str, actions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Replace a symbol's stored corporate actions
+
+    Returns:
+        The normalized actions
+    """
+    actions = normalize_actions(actions)
+    path = actions_path(symbol)
+    with _file_lock(path):
+        _write_actions(path, actions)
+    return actions
+
+
+def merge_corporate_actions(symbol: str, actions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add actions to a symbol's stored ones, new values replacing stored ones for the same ex-date
+
+    Returns:
+        All stored actions
+    """
+    actions = normalize_actions(actions)
+    path = actions_path(symbol)
+    with _file_lock(path):
+        stored = load_corporate_actions(symbol)
+        frames = [frame for frame in (actions, stored) if not frame.empty]
+        merged = normalize_actions(pd.concat(frames, ignore_index=True) if frames else None)
+        _write_actions(path, merged)
+    return merged
+
+
+def _record_actions(symbol: str, candles: pd.DataFrame) -> None:
+    """Store the actions a provider returned with raw candles (Dividends / Stock Splits columns)"""
+    if any(column in candles.columns for column in HISTORY_ACTION_COLUMNS):
+        merge_corporate_actions(symbol, actions_from_history(candles))
+
+
+def get_corporate_actions(symbol: str, provider: Optional[StockAPIProvider] = None,
+                          max_age: int = CORPORATE_ACTIONS_MAX_AGE) -> pd.DataFrame:
+    """
+    Corporate actions of a symbol, fetched from the provider at most every max_age seconds
+
+    Fetched actions are merged into the stored ones, which also collect the
+    actions providers return with raw candles; storing those counts as a
+    fetch. If the provider fails, the stored actions are used.
+
+    Returns:
+        DataFrame with date, action ('split' or 'dividend') and value columns
+    """
+    path = actions_path(symbol)
+    if os.path.exists(path) and datetime.now().timestamp() - os.path.getmtime(path) < max_age:
+        return load_corporate_actions(symbol)
+
+    provider = provider or APIProviderFactory.get_provider()
+    try:
+        actions = provider.get_corporate_actions(symbol)
+    except Exception as e:
+        logger.warning(f"Could not fetch corporate actions for {symbol}: {e}")
+        return load_corporate_actions(symbol)
+
+    actions = merge_corporate_actions(symbol, actions if actions is not None else pd.DataFrame(columns=CORPORATE_ACTION_COLUMNS))
+    logger.info(f"Stored {len(actions)} corporate actions for {symbol}")
+    return actions
+
+
+def _adjusted(symbol: str, interval: str, candles: pd.DataFrame, adjust: str,
+              provider: Optional[StockAPIProvider]) -> pd.DataFrame:
+    if adjust == 'none' or candles.empty:
+        return candles
+    actions = get_corporate_actions(symbol, provider)
+    return adjust_candles(candles, actions, adjust, key=(symbol, interval))
+
+
+def get_candles(symbol: str, period: str = '1y', interval: str = '1d',
+                provider: Optional[StockAPIProvider] = None,
+                max_age: int = CANDLE_MAX_AGE, adjust: str = 'all') -> pd.DataFrame:
+    """
+    Candles for a period, served from the cache and fetched from the provider only when needed
+
+    A cache that covers the period and was refreshed within max_age seconds is
+    used as is. A cache that covers the period but is stale is topped up with
+    just the missing tail. Otherwise the whole period is fetched once.
+
+    Args:
+        symbol: Stock symbol (e.g., 'RELIANCE.NS')
+        period: Yahoo Finance period (1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 3y, 5y, 10y, ytd, max)
+        interval: Candle interval
+        provider: API provider (defaults to the configured provider)
+        max_age: Seconds before cached candles are considered stale
+        adjust: 'all' (splits and dividends, like Yahoo Finance's default),
+            'split' (splits only) or 'none' (prices as traded)
+
+    Returns:
+        DataFrame indexed by timestamp with Open/High/Low/Close/Volume
+    """
+    if adjust not in ADJUSTMENTS:
+        raise ValueError(f"Unknown adjustment: {adjust} (use one of {ADJUSTMENTS})")
+
+    start = period_start(period)
+    metadata = load_metadata(symbol, interval)
+    if metadata and metadata.get('basis') != CANDLE_BASIS:
+        logger.info(f"Discarding adjusted {interval} candle cache of {symbol}")
+        _discard(symbol, interval)
+        metadata = {}
+    cached = load_candles(symbol, interval)
+
+    if not cached.empty and _covers(metadata, start):
+        if not _is_fresh(metadata, max_age):
+            tail_period = _tail_period(cached.index[-1])
+            if tail_period is None:
+                cached = pd.DataFrame(columns=CANDLE_COLUMNS)
+            else:
+                provider = provider or APIProviderFactory.get_provider()
+                tail = provider.get_raw_historical_data(symbol, period=tail_period, interval=interval)
+                if not tail.empty:
+                    _record_actions(symbol, tail)
+                    cached = save_candles(symbol, interval, tail)
+                    logger.info(f"Updated {symbol} {interval} candles with {len(tail)} recent bars")
+                else:
+                    # Nothing new (holiday, halted symbol): don't ask again until max_age passes
+                    _mark_fetched(symbol, interval)
+
+        if not cached.empty:
+            return _slice(_adjusted(symbol, interval, cached, adjust, provider), start)
+
+    provider = provider or APIProviderFactory.get_provider()
+    candles = provider.get_raw_historical_data(symbol, period=period, interval=interval)
+    if candles.empty:
+        return candles
+
+    _record_actions(symbol, candles)
+    covered_from = 'max' if start is None else start.date().isoformat()
+    merged = save_candles(symbol, interval, candles, covered_from=covered_from)
+    logger.info(f"Cached {len(candles)} {interval} candles for {symbol} ({period})")
+    return _slice(_adjusted(symbol, interval, merged, adjust, provider), start)
+
+
+def _slice(candles: pd.DataFrame, start: Optional[datetime]) -> pd.DataFrame:
+    if start is None or candles.empty:
+        return candles
+    start_ts = pd.Timestamp(start)
+    if candles.index.tz is not None:
+        start_ts = start_ts.tz_localize(candles.index.tz)
+    return candles[candles.index >= start_ts]
@@ -6,6 +6,7 @@ Configuration parameters for Yahoo Finance integration
 COLUMNS_MAPPING = {
     "symbol": "trading_symbol",
     "longName": "name",
+    "sector": "sector",
     "currentPrice": "last_price",
     "open": "open_price",
     "dayHigh": "high_price",
@@ -84,12 +85,164 @@ BANK_NIFTY_SYMBOLS = [
     "PNB.NS",
 ]
 
+# ETFs tracked by the ETF snapshot pipeline and the ETF analysis scripts
+ETF_REGISTRY = {
+    # Equity ETFs - Nifty Based
+    "NIFTYBEES.NS": {
+        "name": "Nippon India ETF Nifty BeES",
+        "type": "Equity - Large Cap",
+        "index": "Nifty 50",
+        "aum": "₹10,000+ Cr",
+        "expense_ratio": "0.05%"
+    },
+    "JUNIORBEES.NS": {
+        "name": "Nippon India ETF Nifty Junior BeES",
+        "type": "Equity - Mid Cap",
+        "index": "Nifty Next 50",
+        "aum": "₹2,500+ Cr",
+        "expense_ratio": "0.36%"
+    },
+    "LIQUIDBEES.NS": {
+        "name": "Nippon India ETF Liquid BeES",
+        "type": "Liquid/Debt",
+        "index": "CRISIL Liquid Fund Index",
+        "aum": "₹17,000+ Cr",
+        "expense_ratio": "0.06%"
+    },
+    "BANKBEES.NS": {
+        "name": "Nippon India ETF Bank BeES",
+        "type": "Equity - Sectoral",
+        "index": "Nifty Bank",
+        "aum": "₹5,500+ Cr",
+        "expense_ratio": "0.43%"
+    },
+
+    # HDFC ETFs
+    "HDFCNIF100.NS": {
+        "name": "HDFC Nifty 100 ETF",
+        "type": "Equity - Large Cap",
+        "index": "Nifty 100",
+        "aum": "₹800+ Cr",
+        "expense_ratio": "0.35%"
+    },
+    "HDFCSENSEX.NS": {
+        "name": "HDFC Sensex ETF",
+        "type": "Equity - Large Cap",
+        "index": "BSE Sensex",
+        "aum": "₹1,000+ Cr",
+        "expense_ratio": "0.35%"
+    },
+
+    # SBI ETFs
+    "SETFNIF50.NS": {
+        "name": "SBI ETF Nifty 50",
+        "type": "Equity - Large Cap",
+        "index": "Nifty 50",
+        "aum": "₹12,000+ Cr",
+        "expense_ratio": "0.07%"
+    },
+    "SETFNN50.NS": {
+        "name": "SBI ETF Nifty Next 50",
+        "type": "Equity - Mid Cap",
+        "index": "Nifty Next 50",
+        "aum": "₹2,000+ Cr",
+        "expense_ratio": "0.30%"
+    },
+
+    # ICICI Prudential ETFs
+    "ICICINXT50.NS": {
+        "name": "ICICI Prudential Nifty Next 50 ETF",
+        "type": "Equity - Mid Cap",
+        "index": "Nifty Next 50",
+        "aum": "₹1,500+ Cr",
+        "expense_ratio": "0.31%"
+    },
+
+    # Kotak ETFs
+    "KOTAKBKETF.NS": {
+        "name": "Kotak Nifty Bank ETF",
+        "type": "Equity - Sectoral",
+        "index": "Nifty Bank",
+        "aum": "₹800+ Cr",
+        "expense_ratio": "0.50%"
+    },
+
+    # Gold ETFs
+    "GOLDSHARE.NS": {
+        "name": "Nippon India ETF Gold BeES",
+        "type": "Commodity - Gold",
+        "index": "Domestic Gold Price",
+        "aum": "₹6,500+ Cr",
+        "expense_ratio": "1.00%",
+        "amc": "Nippon India",
+        "launch_year": 2014
+    },
+    "GOLDBEES.NS": {
+        "name": "Nippon India ETF Gold BeES (Old)",
+        "type": "Commodity - Gold",
+        "index": "Domestic Gold Price",
+        "aum": "₹2,000+ Cr",
+        "expense_ratio": "1.00%",
+        "amc": "Nippon India",
+        "launch_year": 2007
+    },
+    "HDFCGOLD.NS": {
+        "name": "HDFC Gold ETF",
+        "type": "Commodity - Gold",
+        "index": "Domestic Gold Price",
+        "aum": "₹500+ Cr",
+        "expense_ratio": "1.00%",
+        "amc": "HDFC Mutual Fund",
+        "launch_year": 2010
+    },
+
+    # International ETFs
+    "HNGSNGBEES.NS": {
+        "name": "Nippon India ETF Hang Seng BeES",
+        "type": "International - Hong Kong",
+        "index": "Hang Seng",
+        "aum": "₹400+ Cr",
+        "expense_ratio": "0.70%"
+    },
+
+    # PSU Bank ETF
+    "PSUBNKBEES.NS": {
+        "name": "Nippon India ETF PSU Bank BeES",
+        "type": "Equity - Sectoral",
+        "index": "Nifty PSU Bank",
+        "aum": "₹1,200+ Cr",
+        "expense_ratio": "0.52%"
+    },
+
+    # IT ETF
+    "ITBEES.NS": {
+        "name": "Nippon India ETF Nifty IT BeES",
+        "type": "Equity - Sectoral",
+        "index": "Nifty IT",
+        "aum": "₹800+ Cr",
+        "expense_ratio": "0.62%"
+    },
+
+    # Shariah ETF
+    "SHARIABEES.NS": {
+        "name": "Nippon India ETF Nifty Shariah BeES",
+        "type": "Equity - Shariah Compliant",
+        "index": "Nifty50 Shariah",
+        "aum": "₹300+ Cr",
+        "expense_ratio": "0.65%"
+    },
+}
+
+# ETF type used for gold ETFs in ETF_REGISTRY
+GOLD_ETF_TYPE = "Commodity - Gold"
+
 # Database table schema with additional useful columns (PostgreSQL)
 TABLE_SCHEMA = """
 CREATE TABLE IF NOT EXISTS stock_data (
     symbol_token TEXT PRIMARY KEY,
     trading_symbol TEXT NOT NULL,
     name TEXT,
+    sector TEXT,
     exchange TEXT,
     instrument_type TEXT,
     last_price NUMERIC,
@@ -106,8 +259,141 @@ CREATE TABLE IF NOT EXISTS stock_data (
     last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+ALTER TABLE stock_data ADD COLUMN IF NOT EXISTS sector TEXT;
+
 CREATE INDEX IF NOT EXISTS idx_trading_symbol ON stock_data(trading_symbol);
 CREATE INDEX IF NOT EXISTS idx_exchange ON stock_data(exchange);
 CREATE INDEX IF NOT EXISTS idx_last_price ON stock_data(last_price);
 CREATE INDEX IF NOT EXISTS idx_volume ON stock_data(volume);
 """
+
+# Incremental indicator state, one snapshot per symbol (PostgreSQL)
+INDICATOR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS indicator_state (
+    symbol_token TEXT PRIMARY KEY,
+    state JSONB NOT NULL,
+    last_bar TIMESTAMPTZ,
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Daily copy of the fundamentals in stock_data, appended on each refresh for backtesting (PostgreSQL)
+STOCK_HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stock_data_history (
+    symbol_token TEXT NOT NULL,
+    snapshot_date DATE NOT NULL,
+    trading_symbol TEXT,
+    last_price NUMERIC,
+    week_high_52 NUMERIC,
+    week_low_52 NUMERIC,
+    market_cap BIGINT,
+    pe_ratio NUMERIC,
+    dividend_yield NUMERIC,
+    PRIMARY KEY (symbol_token, snapshot_date)
+);
+"""
+
+# Stock scoring rules used by analyze_all_stocks and the get_stock_scores tool.
+# Each score uses bucket edges (ascending) and one point value per bucket:
+# values below the first edge get the first points value, values at or
+# above the last edge get the last one.
+SCORING_CONFIG = {
+    # P/E (lower is better, ideal range: 10-20); missing or <= 0 scores 0
+    "pe_bins": [10, 15, 20, 25, 30],
+    "pe_points": [5, 10, 8, 6, 4, 2],
+    # Dividend yield in % (higher is better); missing or <= 0 scores 0
+    "dividend_bins": [1, 2, 3, 4],
+    "dividend_points": [2, 4, 6, 8, 10],
+    # Position in 52-week range in % (prefer stocks not at 52-week high)
+    "position_bins": [30, 50, 70, 85],
+    "position_points": [10, 8, 6, 4, 2],
+    "position_missing_points": 5,
+    # Weight of each score in the total
+    "weights": {"pe": 0.4, "dividend": 0.4, "position": 0.2},
+    # Ratings by normalized score (0-100)
+    "rating_bins": [35, 50, 65, 80],
+    "ratings": ["AVOID", "HOLD", "MODERATE BUY", "BUY", "STRONG BUY"],
+    # Minimum normalized score to receive a buy allocation
+    "buy_threshold": 50,
+}
+
+# Default constraints for the portfolio allocation optimizer
+ALLOCATION_CONSTRAINTS = {
+    # Cash to invest, in rupees; shares are bought in whole units at last_price
+    "budget": 1000000,
+    # Maximum weight of a single stock and of a single sector (fractions of the budget)
+    "max_stock_weight": 0.10,
+    "max_sector_weight": 0.30,
+    # Minimum daily traded volume for a stock to be considered
+    "min_volume": 0,
+    # Penalty on portfolio variance (annualized covariance); 0 ignores risk
+    "risk_aversion": 1.0,
+}
+
+# Derived metrics materialized as generated columns (PostgreSQL 12+). They are
+# recomputed whenever a row is written, so every scrape_data keeps them current.
+DERIVED_METRICS_SCHEMA = """
+ALTER TABLE stock_data ADD COLUMN IF NOT EXISTS position_52w NUMERIC
+    GENERATED ALWAYS AS ((last_price - week_low_52) / NULLIF(week_high_52 - week_low_52, 0) * 100) STORED;
+ALTER TABLE stock_data ADD COLUMN IF NOT EXISTS day_change_pct NUMERIC
+    GENERATED ALWAYS AS ((close_price - open_price) / NULLIF(open_price, 0) * 100) STORED;
+ALTER TABLE stock_data ADD COLUMN IF NOT EXISTS market_cap_cr NUMERIC
+    GENERATED ALWAYS AS (market_cap / 10000000.0) STORED;
+ALTER TABLE stock_data ADD COLUMN IF NOT EXISTS pct_from_52w_high NUMERIC
+    GENERATED ALWAYS AS ((week_high_52 - last_price) / NULLIF(week_high_52, 0) * 100) STORED;
+ALTER TABLE stock_data ADD COLUMN IF NOT EXISTS pct_from_52w_low NUMERIC
+    GENERATED ALWAYS AS ((last_price - week_low_52) / NULLIF(week_low_52, 0) * 100) STORED;
+ALTER TABLE stock_data ADD COLUMN IF NOT EXISTS turnover NUMERIC
+    GENERATED ALWAYS AS (last_price * volume) STORED;
+
+-- Expression indexes used before the metrics were materialized
+DROP INDEX IF EXISTS idx_screen_position_52w;
+DROP INDEX IF EXISTS idx_screen_day_change_pct;
+DROP INDEX IF EXISTS idx_screen_market_cap_cr;
+DROP INDEX IF EXISTS idx_screen_pct_from_52w_high;
+DROP INDEX IF EXISTS idx_screen_pct_from_52w_low;
+DROP INDEX IF EXISTS idx_screen_turnover;
+
+CREATE INDEX IF NOT EXISTS idx_position_52w ON stock_data(position_52w);
+CREATE INDEX IF NOT EXISTS idx_day_change_pct ON stock_data(day_change_pct);
+CREATE INDEX IF NOT EXISTS idx_pct_from_52w_high ON stock_data(pct_from_52w_high);
+CREATE INDEX IF NOT EXISTS idx_pct_from_52w_low ON stock_data(pct_from_52w_low);
+CREATE INDEX IF NOT EXISTS idx_turnover ON stock_data(turnover);
+"""
+
+# Derived metric columns maintained by DERIVED_METRICS_SCHEMA
+DERIVED_METRIC_COLUMNS = [
+    "position_52w",
+    "day_change_pct",
+    "market_cap_cr",
+    "pct_from_52w_high",
+    "pct_from_52w_low",
+    "turnover",
+]
+
+# Latest ETF snapshot per symbol, with the same 52-week metrics as stock_data (PostgreSQL)
+ETF_SCHEMA = """
+CREATE TABLE IF NOT EXISTS etf_data (
+    symbol TEXT PRIMARY KEY,
+    name TEXT,
+    etf_type TEXT,
+    tracked_index TEXT,
+    aum TEXT,
+    expense_ratio TEXT,
+    last_price NUMERIC,
+    open_price NUMERIC,
+    high_price NUMERIC,
+    low_price NUMERIC,
+    volume BIGINT,
+    week_high_52 NUMERIC,
+    week_low_52 NUMERIC,
+    as_of TIMESTAMPTZ,
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    pct_from_52w_high NUMERIC
+        GENERATED ALWAYS AS ((week_high_52 - last_price) / NULLIF(week_high_52, 0) * 100) STORED,
+    pct_from_52w_low NUMERIC
+        GENERATED ALWAYS AS ((last_price - week_low_52) / NULLIF(week_low_52, 0) * 100) STORED
+);
+
+CREATE INDEX IF NOT EXISTS idx_etf_type ON etf_data(etf_type);
+"""
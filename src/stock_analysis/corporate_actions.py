@@ -0,0 +1,234 @@
+"""
+Corporate actions
+Split and dividend adjustment of raw candles, applied on read
+
+The candle store keeps one raw (unadjusted) copy of each history. Adjusted
+views are derived when candles are read, by multiplying with cumulative
+adjustment factors built from the symbol's corporate actions, so a new split
+or dividend never requires downloading the history again.
+
+Actions are rows of date (ex-date), action ('split' or 'dividend') and value
+(split ratio, e.g. 2 for 2-for-1, or dividend per share on the current,
+split-adjusted share basis, as Yahoo Finance reports them).
+
+For a bar at time t:
+    split factor S(t)    = product of split ratios with ex-date after t
+    dividend factor D(t) = product of (1 - dividend / split-adjusted close on
+                           the last bar before the ex-date) for ex-dates after t
+    split-adjusted price = raw price / S(t), volume = raw volume * S(t)
+    fully adjusted price = raw price / S(t) * D(t)   (Yahoo's auto_adjust)
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CORPORATE_ACTION_COLUMNS = ['date', 'action', 'value']
+CORPORATE_ACTION_TYPES = ['split', 'dividend']
+
+# Views of stored raw candles: unadjusted, split-adjusted, split- and dividend-adjusted
+ADJUSTMENTS = ['none', 'split', 'all']
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+# Event columns of histories fetched with actions (Yahoo Finance's actions=True)
+HISTORY_ACTION_COLUMNS = {'Stock Splits': 'split', 'Dividends': 'dividend'}
+
+# Factor vectors kept per (symbol, interval, candles, actions)
+FACTOR_CACHE_SIZE = 256
+_factors: "OrderedDict[tuple, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+_factors_lock = threading.Lock()
+
+
+def empty_actions() -> pd.DataFrame:
+    return pd.DataFrame({'date': pd.Series(dtype='datetime64[ns]'), 'action': pd.Series(dtype=object),
+                         'value': pd.Series(dtype='float64')})
+
+
+def normalize_actions(actions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Actions with tz-naive ex-dates, known types and positive values, sorted by date
+
+    Args:
+        actions: DataFrame with date, action and value columns
+
+    Returns:
+        Cleaned copy
+    """
+    if actions is None or actions.empty:
+        return empty_actions()
+    dates = pd.to_datetime(actions['date'])
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    cleaned = pd.DataFrame({'date': dates.dt.normalize().astype('datetime64[ns]'),
+                            'action': actions['action'].astype(str),
+                            'value': actions['value'].astype(float)})
+    cleaned = cleaned[cleaned['action'].isin(CORPORATE_ACTION_TYPES) & (cleaned['value'] > 0)]
+    cleaned = cleaned[(cleaned['action'] != 'split') | (cleaned['value'] != 1)]
+    return cleaned.drop_duplicates(['date', 'action']).sort_values(['date', 'action']).reset_index(drop=True)
+
+
+def actions_from_history(history: pd.DataFrame) -> pd.DataFrame:
+    """
+    Corporate actions carried in a history's Stock Splits and Dividends columns
+
+    Yahoo Finance puts each event on the first bar of its ex-date when a
+    history is fetched with actions=True.
+
+    Returns:
+        Normalized actions, empty if the history has no event columns
+    """
+    frames = []
+    for column, action in HISTORY_ACTION_COLUMNS.items():
+        if column in history:
+            values = history[column]
+            values = values[values > 0]
+            if len(values):
+                frames.append(pd.DataFrame({'date': values.index, 'action': action,
+                                            'value': values.to_numpy(dtype=np.float64)}))
+    return normalize_actions(pd.concat(frames, ignore_index=True) if frames else None)
+
+
+def _local_day_ns(index: pd.DatetimeIndex) -> np.ndarray:
+    """Bar timestamps as local wall-clock nanoseconds (ex-dates are local dates)"""
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.as_unit('ns').asi8
+
+
+def _after(bar_ns: np.ndarray, ex_ns: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Product of values whose ex-date is after each bar (ex_ns sorted)"""
+    # suffix[j] = product of values[j:], so bars before ex-date j pick up j and every later one
+    suffix = np.append(np.cumprod(values[::-1])[::-1], 1.0)
+    return suffix[np.searchsorted(ex_ns, bar_ns, side='right')]
+
+
+def compute_factors(candles: pd.DataFrame, actions: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Split and dividend factor per bar (see the module docstring)
+
+    Args:
+        candles: Raw OHLCV DataFrame indexed by timestamp, sorted
+        actions: Normalized actions
+
+    Returns:
+        (split factors S, dividend factors D), one value per bar
+    """
+    n = len(candles)
+    bar_ns = _local_day_ns(candles.index)
+
+    splits = actions[actions['action'] == 'split']
+    split_ns = splits['date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    split_factor = _after(bar_ns, split_ns, splits['value'].to_numpy()) if len(splits) else np.ones(n)
+
+    dividends = actions[actions['action'] == 'dividend']
+    dividend_factor = np.ones(n)
+    if len(dividends) and n:
+        ex_ns = dividends['date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        # Last bar before each ex-date, on the split-adjusted basis the amounts use
+        previous = np.searchsorted(bar_ns, ex_ns, side='left') - 1
+        known = previous >= 0
+        close = candles['Close'].to_numpy(dtype=np.float64) / split_factor
+        ratios = np.ones(len(ex_ns))
+        ratios[known] = 1 - dividends['value'].to_numpy()[known] / close[previous[known]]
+        ratios = np.clip(ratios, 1e-6, 1.0)
+        dividend_factor = _after(bar_ns, ex_ns, ratios)
+
+    return split_factor, dividend_factor
+
+
+def _fingerprint(actions: pd.DataFrame) -> int:
+    return int(pd.util.hash_pandas_object(actions, index=False).sum()) if len(actions) else 0
+
+
+def adjustment_factors(candles: pd.DataFrame, actions: pd.DataFrame,
+                       key: Optional[tuple] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    compute_factors, memoized when a key (e.g. (symbol, interval)) is given
+
+    The memo is keyed by the key, the candles' length and first and last
+    timestamps and the actions, so it is invalidated by new bars or actions.
+    """
+    if key is None or candles.empty:
+        return compute_factors(candles, actions)
+
+    memo_key = (*key, len(candles), candles.index[0].value, candles.index[-1].value, _fingerprint(actions))
+    with _factors_lock:
+        factors = _factors.get(memo_key)
+        if factors is not None:
+            _factors.move_to_end(memo_key)
+            return factors
+
+    factors = compute_factors(candles, actions)
+    with _factors_lock:
+        _factors[memo_key] = factors
+        while len(_factors) > FACTOR_CACHE_SIZE:
+            _factors.popitem(last=False)
+    return factors
+
+
+def adjust_candles(candles: pd.DataFrame, actions: pd.DataFrame, adjust: str = 'all',
+                   key: Optional[tuple] = None) -> pd.DataFrame:
+    """
+    View of raw candles with the given adjustment
+
+    Args:
+        candles: Raw OHLCV DataFrame indexed by timestamp, sorted
+        actions: Corporate actions (see normalize_actions)
+        adjust: 'none', 'split' or 'all' (splits and dividends)
+        key: Memo key for the factor vectors, e.g. (symbol, interval)
+
+    Returns:
+        Adjusted copy (the input itself for 'none' or when nothing applies)
+    """
+    if adjust not in ADJUSTMENTS:
+        raise ValueError(f"Unknown adjustment: {adjust} (use one of {ADJUSTMENTS})")
+    if adjust == 'none' or candles.empty or actions.empty:
+        return candles
+
+    split_factor, dividend_factor = adjustment_factors(candles, actions, key)
+    price_factor = 1 / split_factor if adjust == 'split' else dividend_factor / split_factor
+
+    adjusted = candles.copy()
+    for column in PRICE_COLUMNS:
+        if column in adjusted:
+            adjusted[column] = adjusted[column].to_numpy(dtype=np.float64) * price_factor
+    if 'Volume' in adjusted:
+        adjusted['Volume'] = np.round(adjusted['Volume'].to_numpy(dtype=np.float64) * split_factor).astype(np.int64)
+    return adjusted
+
+
+def unadjust_splits(candles: pd.DataFrame, actions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Raw candles from split-adjusted ones (e.g. Yahoo Finance's auto_adjust=False history)
+
+    Args:
+        candles: Split-adjusted OHLCV DataFrame indexed by timestamp
+        actions: Corporate actions; only splits are used
+
+    Returns:
+        Candles in the prices and volumes actually traded
+    """
+    if candles.empty or not (actions['action'] == 'split').any():
+        return candles
+    split_factor, _ = compute_factors(candles, actions[actions['action'] == 'split'])
+    raw = candles.copy()
+    for column in PRICE_COLUMNS:
+        if column in raw:
+            raw[column] = raw[column].to_numpy(dtype=np.float64) * split_factor
+    if 'Volume' in raw:
+        raw['Volume'] = np.round(raw['Volume'].to_numpy(dtype=np.float64) / split_factor).astype(np.int64)
+    return raw
+
+
+def actions_to_records(actions: pd.DataFrame) -> List[Dict[str, Any]]:
+    """JSON-friendly actions, newest first"""
+    return [{'date': date.date().isoformat(), 'action': action, 'value': float(value)}
+            for date, action, value in zip(actions['date'][::-1], actions['action'][::-1], actions['value'][::-1])]
+
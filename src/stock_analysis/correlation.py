@@ -0,0 +1,355 @@
+"""
+Correlation service
+Rolling-window return covariance and correlation matrices for a symbol universe, cached and updated incrementally
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .api_providers import StockAPIProvider
+from .candle_store import PERIOD_DAYS, get_candles
+from .resample import MARKET_TIMEZONE
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Seconds a cached matrix is served before checking the candle store for new bars
+CORRELATION_MAX_AGE = 300
+
+# Largest universe returned as a full matrix; bigger ones are summarized as pairs
+CORRELATION_MATRIX_MAX_SYMBOLS = 100
+
+
+def history_period(window: int) -> str:
+    """Shortest Yahoo Finance period holding `window` daily returns"""
+    days_needed = window * 365 / TRADING_DAYS_PER_YEAR + 10
+    for period, days in sorted(PERIOD_DAYS.items(), key=lambda item: item[1]):
+        if days >= days_needed:
+            return period
+    return 'max'
+
+
+def load_close_matrix(symbols: List[str], period: str,
+                      provider: Optional[StockAPIProvider] = None) -> pd.DataFrame:
+    """
+    Daily closes aligned by date, one column per symbol
+
+    Returns:
+        DataFrame indexed by date (tz-naive) with a column per symbol that has data
+    """
+    closes = {}
+    for symbol in symbols:
+        try:
+            candles = get_candles(symbol, period=period, interval='1d', provider=provider)
+        except Exception as e:
+            logger.warning(f"No candles for {symbol}: {e}")
+            continue
+        if candles.empty:
+            continue
+        series = candles['Close'].astype(float)
+        index = series.index.tz_localize(None) if series.index.tz is not None else series.index
+        series.index = index.normalize()
+        closes[symbol] = series[~series.index.duplicated(keep='last')]
+
+    return pd.DataFrame(closes).sort_index()
+
+
+def aligned_returns(closes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Daily simple returns from aligned closes
+
+    A symbol without a bar on a date (holiday, halt, not yet listed) gets a
+    zero return for it, so every row is complete and sums stay additive.
+    """
+    return closes.ffill().pct_change().iloc[1:].fillna(0.0)
+
+
+class RollingCovariance:
+    """
+    Sample covariance over the last `window` return rows, kept as running sums
+
+    Adding k new rows and dropping the k oldest costs O(k * N^2) instead of
+    O(window * N^2) for a full recomputation.
+    """
+
+    def __init__(self, symbols: List[str], window: int):
+        self.symbols = list(symbols)
+        self.window = window
+        n_symbols = len(symbols)
+        self.rows = np.zeros((window, n_symbols))
+        self.dates: List[pd.Timestamp] = []
+        self.count = 0
+        self.head = 0  # Ring buffer slot of the next row
+        self.sum = np.zeros(n_symbols)
+        self.cross = np.zeros((n_symbols, n_symbols))
+        self.updates_since_rebuild = 0
+
+    def _rebuild(self) -> None:
+        """Recompute the sums from the buffer to clear accumulated rounding error"""
+        data = self.buffer()
+        self.sum = data.sum(axis=0)
+        self.cross = data.T @ data
+        self.updates_since_rebuild = 0
+
+    def add(self, returns: np.ndarray, dates: List[pd.Timestamp]) -> None:
+        """
+        Append return rows (oldest first), evicting the oldest rows beyond the window
+
+        Args:
+            returns: Array of shape (k, n_symbols)
+            dates: Date of each row
+        """
+        returns = returns[-self.window:]
+        dates = list(dates)[-self.window:]
+        k = len(returns)
+        if k == 0:
+            return
+
+        slots = (self.head + np.arange(k)) % self.window
+        free = self.window - self.count
+        if k > free:
+            # The oldest rows sit in the occupied slots about to be overwritten
+            evicted = self.rows[slots[free:]]
+            self.sum -= evicted.sum(axis=0)
+            self.cross -= evicted.T @ evicted
+
+        self.rows[slots] = returns
+        self.sum += returns.sum(axis=0)
+        self.cross += returns.T @ returns
+        self.head = (self.head + k) % self.window
+        self.count = min(self.window, self.count + k)
+        self.dates = (self.dates + dates)[-self.window:]
+
+        self.updates_since_rebuild += k
+        if self.updates_since_rebuild >= self.window:
+            self._rebuild()
+
+    def drop_last(self) -> None:
+        """
+        Remove the newest row, e.g. to replace a return computed from a forming bar
+
+        A row evicted when the newest one was added is not restored, so the
+        window holds one row less until the next add.
+        """
+        if self.count == 0:
+            return
+        self.head = (self.head - 1) % self.window
+        row = self.rows[self.head]
+        self.sum -= row
+        self.cross -= np.outer(row, row)
+        self.rows[self.head] = 0.0
+        self.count -= 1
+        self.dates = self.dates[:-1]
+
+    def buffer(self) -> np.ndarray:
+        """Return rows in the window, oldest first"""
+        if self.count < self.window:
+            return self.rows[(self.head - self.count + np.arange(self.count)) % self.window]
+        return np.roll(self.rows, -self.head, axis=0)
+
+    def covariance(self) -> np.ndarray:
+        """Sample covariance of daily returns"""
+        n = self.count
+        if n < 2:
+            raise ValueError("At least two return observations are needed")
+        mean = self.sum / n
+        return (self.cross - n * np.outer(mean, mean)) / (n - 1)
+
+    def shrunk_covariance(self) -> Tuple[np.ndarray, float]:
+        """
+        Ledoit-Wolf shrinkage towards a scaled identity
+
+        Returns:
+            Tuple of (shrunk covariance, shrinkage intensity in [0, 1])
+        """
+        data = self.buffer()
+        n, n_symbols = data.shape
+        centered = data - data.mean(axis=0)
+        sample = centered.T @ centered / n
+
+        mu = np.trace(sample) / n_symbols
+        target_distance = np.sum(sample ** 2) - 2 * mu * np.trace(sample) + n_symbols * mu ** 2
+        # (1/n^2) sum_t ||x_t x_t' - S||^2 = (1/n) (mean_t ||x_t||^4 - ||S||^2)
+        row_norms = np.sum(centered ** 2, axis=1)
+        estimation_error = (np.mean(row_norms ** 2) - np.sum(sample ** 2)) / n
+        intensity = 0.0 if target_distance <= 0 else float(min(1.0, max(0.0, estimation_error / target_distance)))
+
+        shrunk = (1 - intensity) * sample + intensity * mu * np.eye(n_symbols)
+        # Rescale from the maximum likelihood to the unbiased estimate
+        return shrunk * n / (n - 1), intensity
+
+
+def covariance_to_correlation(covariance: np.ndarray) -> np.ndarray:
+    """Correlation matrix from a covariance matrix (zero for constant series)"""
+    std = np.sqrt(np.clip(np.diag(covariance), 0.0, None))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlation = covariance / np.outer(std, std)
+    correlation = np.nan_to_num(correlation, nan=0.0, posinf=0.0, neginf=0.0)
+    np.fill_diagonal(correlation, np.where(std > 0, 1.0, 0.0))
+    return np.clip(correlation, -1.0, 1.0)
+
+
+class CorrelationService:
+    """
+    Cache of rolling covariance state keyed by universe and window
+
+    The first request for a universe loads its closes once; later requests
+    reuse the cached sums and only apply returns for dates after the last one
+    seen, at most once every max_age seconds. A return from today's bar, which
+    may still be forming, is recomputed on the next update.
+
+    Each universe has its own lock, so building a large universe does not
+    hold up requests for universes that are already cached.
+    """
+
+    def __init__(self, provider: Optional[StockAPIProvider] = None, max_age: int = CORRELATION_MAX_AGE):
+        self.provider = provider
+        self.max_age = max_age
+        self._states: Dict[Tuple[Tuple[str, ...], int], Dict[str, Any]] = {}
+        self._key_locks: Dict[Tuple[Tuple[str, ...], int], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _provisional(date: pd.Timestamp) -> bool:
+        """Whether a daily bar may still be forming (it is today's or later)"""
+        return date >= pd.Timestamp.now(tz=MARKET_TIMEZONE).tz_localize(None).normalize()
+
+    def _build(self, symbols: Tuple[str, ...], window: int) -> Dict[str, Any]:
+        closes = load_close_matrix(list(symbols), history_period(window), self.provider)
+        if closes.shape[1] < 2:
+            raise ValueError("At least two symbols with price history are needed")
+        if len(closes) < 3:
+            raise ValueError("Not enough price history: at least three daily closes are needed")
+
+        returns = aligned_returns(closes)
+        rolling = RollingCovariance(list(closes.columns), window)
+        rolling.add(returns.to_numpy(), list(returns.index))
+        logger.info(f"Built covariance for {closes.shape[1]} symbols over {rolling.count} days")
+
+        filled = closes.ffill()
+        return {
+            'rolling': rolling,
+            'last_closes': filled.iloc[-1],
+            'previous_closes': filled.iloc[-2],
+            'provisional': self._provisional(closes.index[-1]),
+            'checked_at': time.monotonic(),
+        }
+
+    def _update(self, state: Dict[str, Any]) -> None:
+        rolling: RollingCovariance = state['rolling']
+        last_date = rolling.dates[-1]
+
+        closes = load_close_matrix(rolling.symbols, '1mo', self.provider)
+        closes = closes.reindex(columns=rolling.symbols)
+        if state['provisional']:
+            # The last row came from a bar that was still forming: recompute it from the closes before it
+            new_closes = closes[closes.index >= last_date]
+            previous = state['previous_closes']
+        else:
+            new_closes = closes[closes.index > last_date]
+            previous = state['last_closes']
+
+        if not new_closes.empty:
+            if state['provisional']:
+                rolling.drop_last()
+            # Prepend the last known closes so the first new row has a return
+            previous = previous.to_frame().T
+            previous.index = [last_date - pd.Timedelta(days=1) if state['provisional'] else last_date]
+            # At least two rows: the previous closes and one new date
+            combined = pd.concat([previous, new_closes]).ffill()
+            returns = aligned_returns(combined)
+            rolling.add(returns.to_numpy(), list(returns.index))
+            state['last_closes'] = combined.iloc[-1]
+            state['previous_closes'] = combined.iloc[-2]
+            state['provisional'] = self._provisional(combined.index[-1])
+            logger.info(f"Applied {len(returns)} new return rows to cached covariance")
+
+        state['checked_at'] = time.monotonic()
+
+    def get(self, symbols: List[str], window: int = TRADING_DAYS_PER_YEAR,
+            shrinkage: bool = False) -> Dict[str, Any]:
+        """
+        Covariance and correlation for a universe
+
+        Args:
+            symbols: Symbols in the universe (order does not matter)
+            window: Number of daily returns in the rolling window
+            shrinkage: Apply Ledoit-Wolf shrinkage to the covariance
+
+        Returns:
+            Dictionary with symbols, covariance and correlation (numpy arrays of
+            daily returns), as_of date, observations and shrinkage_intensity
+        """
+        if window < 2:
+            raise ValueError("window must be at least 2")
+
+        key = (tuple(sorted(set(symbols))), window)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Loading candles happens under this universe's lock only
+        with key_lock:
+            state = self._states.get(key)
+            if state is None:
+                state = self._build(*key)
+                with self._lock:
+                    self._states[key] = state
+            elif time.monotonic() - state['checked_at'] > self.max_age:
+                self._update(state)
+
+            rolling: RollingCovariance = state['rolling']
+            if shrinkage:
+                covariance, intensity = rolling.shrunk_covariance()
+            else:
+                covariance, intensity = rolling.covariance(), 0.0
+
+        return {
+            'symbols': rolling.symbols,
+            'covariance': covariance,
+            'correlation': covariance_to_correlation(covariance),
+            'as_of': rolling.dates[-1].date().isoformat(),
+            'observations': rolling.count,
+            'shrinkage_intensity': intensity,
+        }
+
+    def clear(self) -> None:
+        """Drop all cached matrices"""
+        with self._lock:
+            self._states.clear()
+            self._key_locks.clear()
+
+
+def top_pairs(symbols: List[str], correlation: np.ndarray, limit: int = 20,
+              ascending: bool = False) -> List[Dict[str, Any]]:
+    """
+    Most (or least) correlated symbol pairs
+
+    Args:
+        symbols: Symbol for each matrix row
+        correlation: Correlation matrix
+        limit: Number of pairs
+        ascending: Return the least correlated pairs instead
+
+    Returns:
+        List of {'symbol_a', 'symbol_b', 'correlation'} dictionaries
+    """
+    rows, cols = np.triu_indices(len(symbols), k=1)
+    values = correlation[rows, cols]
+    limit = min(limit, len(values))
+    if limit == 0:
+        return []
+
+    keys = values if ascending else -values
+    chosen = np.argpartition(keys, limit - 1)[:limit]
+    chosen = chosen[np.argsort(keys[chosen])]
+
+    return [
+        {'symbol_a': symbols[rows[i]], 'symbol_b': symbols[cols[i]], 'correlation': float(values[i])}
+        for i in chosen
+    ]
@@ -0,0 +1,128 @@
+"""
+Database connection pool
+Reuses PostgreSQL connections across tool calls and clients, so each call does not pay for a new TLS session
+
+Callers keep the usual pattern (get a connection, use it, close it): closing a
+pooled connection hands it back to the pool instead of disconnecting. The pool
+is a cap on idle connections, not on connections in use, so a connection that
+is never closed (for example after an exception) is simply garbage collected.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict
+
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+
+from .metrics import TimedConnection
+
+logger = logging.getLogger(__name__)
+
+# Idle connections kept for reuse (0 disables pooling)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '8'))
+# Idle connections older than this are closed rather than reused (poolers such
+# as Supabase's drop idle clients after a while)
+DB_POOL_MAX_IDLE = float(os.getenv('DB_POOL_MAX_IDLE', '300'))
+
+
+class PooledConnection(TimedConnection):
+    """TimedConnection that returns itself to its pool on close()"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+
+    def close(self):
+        pool, self.pool = self.pool, None
+        if pool is None:
+            return super().close()
+        pool.release(self)
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of idle PostgreSQL connections
+
+    Args:
+        connect: Opens a new PooledConnection
+        size: Idle connections kept for reuse
+        max_idle: Seconds an idle connection may wait before it is closed
+    """
+
+    def __init__(self, connect: Callable[[], PooledConnection], size: int = DB_POOL_SIZE,
+                 max_idle: float = DB_POOL_MAX_IDLE):
+        self._connect = connect
+        self.size = size
+        self.max_idle = max_idle
+        self._idle: deque = deque()
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+        self.discarded = 0
+
+    def get(self) -> PooledConnection:
+        """Most recently used idle connection, or a new one"""
+        now = time.monotonic()
+        conn = None
+        stale = []
+        with self._lock:
+            while self._idle:
+                candidate, released = self._idle.pop()
+                if candidate.closed or now - released > self.max_idle:
+                    stale.append(candidate)
+                    continue
+                conn = candidate
+                self.reused += 1
+                break
+            self.discarded += len(stale)
+        for candidate in stale:
+            _disconnect(candidate)
+
+        if conn is None:
+            conn = self._connect()
+            with self._lock:
+                self.opened += 1
+        conn.pool = self
+        return conn
+
+    def release(self, conn: PooledConnection) -> None:
+        """Take back a connection; anything left in a transaction is rolled back"""
+        try:
+            if not conn.closed:
+                status = conn.info.transaction_status
+                if status == TRANSACTION_STATUS_UNKNOWN:
+                    raise ConnectionError("connection is broken")
+                if status != TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                with self._lock:
+                    if len(self._idle) < self.size:
+                        self._idle.append((conn, time.monotonic()))
+                        return
+        except Exception as e:
+            logger.debug(f"Discarding pooled connection: {e}")
+        with self._lock:
+            self.discarded += 1
+        _disconnect(conn)
+
+    def close_all(self) -> None:
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            _disconnect(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'size': self.size, 'idle': len(self._idle), 'opened': self.opened,
+                    'reused': self.reused, 'discarded': self.discarded}
+
+
+def _disconnect(conn: PooledConnection) -> None:
+    conn.pool = None
+    try:
+        conn.close()
+    except Exception:
+        pass
@@ -0,0 +1,153 @@
+"""
+Candle downsampling
+Shape-preserving reduction of long histories to a point budget, with summary statistics from the full series
+
+Two methods:
+    ohlc: merges runs of consecutive candles into one candle each (first open,
+          highest high, lowest low, last close, summed volume), so every high,
+          low and the total volume survive
+    lttb: keeps the original candles that best preserve the shape of the close
+          line (Largest-Triangle-Three-Buckets, Steinarsson 2013)
+
+Both work on bar positions rather than timestamps, so overnight and weekend
+gaps do not skew the buckets.
+"""
+
+import logging
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DOWNSAMPLE_METHODS = ['ohlc', 'lttb']
+
+# Smallest point budget accepted (LTTB always keeps the first and last points)
+MIN_POINTS = 3
+
+
+def lttb_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Positions of the points Largest-Triangle-Three-Buckets keeps
+
+    Args:
+        y: Series values (x is the position)
+        max_points: Number of points to keep, at least MIN_POINTS
+
+    Returns:
+        Sorted positions, including the first and last point
+    """
+    n = len(y)
+    if max_points >= n:
+        return np.arange(n)
+
+    # Interior points split into max_points - 2 buckets of near-equal size
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    x = np.arange(n, dtype=np.float64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        # Average of the next bucket (or the last point) is the third triangle vertex
+        next_start, next_stop = stop, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[next_start:next_stop].mean()
+        next_y = y[next_start:next_stop].mean()
+
+        areas = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous]) -
+                       (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def ohlc_buckets(candles: pd.DataFrame, max_points: int) -> pd.DataFrame:
+    """
+    Merge consecutive candles into at most max_points candles
+
+    Args:
+        candles: OHLCV DataFrame (Open/High/Low/Close/Volume) indexed by timestamp
+        max_points: Maximum number of candles returned
+
+    Returns:
+        DataFrame indexed by each bucket's first timestamp, with a Bars column
+        counting the candles merged into it (and Partial, from each bucket's
+        last candle, when the input has one)
+    """
+    n = len(candles)
+    size = int(np.ceil(n / max_points))
+    starts = np.arange(0, n, size)
+    ends = np.append(starts[1:], n) - 1
+
+    buckets = pd.DataFrame({
+        'Open': candles['Open'].to_numpy()[starts],
+        'High': np.maximum.reduceat(candles['High'].to_numpy(dtype=np.float64), starts),
+        'Low': np.minimum.reduceat(candles['Low'].to_numpy(dtype=np.float64), starts),
+        'Close': candles['Close'].to_numpy()[ends],
+        'Volume': np.add.reduceat(candles['Volume'].to_numpy(dtype=np.float64), starts),
+        'Bars': np.diff(np.append(starts, n)),
+    }, index=candles.index[starts])
+    if 'Partial' in candles:
+        buckets['Partial'] = candles['Partial'].to_numpy()[ends]
+    return buckets
+
+
+def downsample(candles: pd.DataFrame, max_points: int, method: str = 'ohlc') -> pd.DataFrame:
+    """
+    Reduce candles to at most max_points with the given method
+
+    Args:
+        candles: OHLCV DataFrame indexed by timestamp
+        max_points: Point budget (at least MIN_POINTS)
+        method: 'ohlc' or 'lttb'
+
+    Returns:
+        Downsampled candles, or the input when it already fits
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown downsampling method: {method} (use one of {DOWNSAMPLE_METHODS})")
+    if max_points < MIN_POINTS:
+        raise ValueError(f"max_points must be at least {MIN_POINTS}")
+    if len(candles) <= max_points:
+        return candles
+
+    if method == 'ohlc':
+        return ohlc_buckets(candles, max_points)
+    return candles.iloc[lttb_indices(candles['Close'].to_numpy(dtype=np.float64), max_points)]
+
+
+def candle_summary(candles: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Summary statistics of a full-resolution candle series
+
+    Args:
+        candles: OHLCV DataFrame indexed by timestamp
+
+    Returns:
+        Dictionary with the range, open/close, high/low and when they happened,
+        change, volatility of bar-to-bar returns, max drawdown and volume totals
+    """
+    close = candles['Close'].astype(float)
+    returns = np.log(close).diff().dropna()
+    drawdown = close / close.cummax() - 1
+    first_close = float(close.iloc[0])
+
+    return {
+        'bars': len(candles),
+        'start': candles.index[0].isoformat(),
+        'end': candles.index[-1].isoformat(),
+        'open': float(candles['Open'].iloc[0]),
+        'close': float(close.iloc[-1]),
+        'high': float(candles['High'].max()),
+        'high_at': candles['High'].idxmax().isoformat(),
+        'low': float(candles['Low'].min()),
+        'low_at': candles['Low'].idxmin().isoformat(),
+        'change_pct': round((float(close.iloc[-1]) / first_close - 1) * 100, 4) if first_close else None,
+        'volatility_pct': round(float(returns.std()) * 100, 4) if len(returns) > 1 else None,
+        'max_drawdown_pct': round(float(drawdown.min()) * 100, 4),
+        'total_volume': int(candles['Volume'].sum()),
+        'average_volume': round(float(candles['Volume'].mean()), 2),
+    }
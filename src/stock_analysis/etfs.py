@@ -0,0 +1,118 @@
+"""
+ETF snapshots
+Latest price and 52-week range for the ETFs in ETF_REGISTRY, fetched concurrently from one cached history per ETF
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from .api_providers import APIProviderFactory, StockAPIProvider
+from .candle_store import get_candles
+from .constant_parameters import ETF_REGISTRY, GOLD_ETF_TYPE
+
+logger = logging.getLogger(__name__)
+
+# Concurrent history fetches; each one is a network round trip when the cache is stale
+ETF_FETCH_WORKERS = 8
+
+# Snapshot columns in etf_data order
+ETF_SNAPSHOT_COLUMNS = [
+    'symbol', 'name', 'etf_type', 'tracked_index', 'aum', 'expense_ratio',
+    'last_price', 'open_price', 'high_price', 'low_price', 'volume',
+    'week_high_52', 'week_low_52', 'as_of',
+]
+
+# Distance from the 52-week range, as etf_data's generated columns compute it
+ETF_DERIVED_COLUMNS = ['pct_from_52w_high', 'pct_from_52w_low']
+
+
+def etfs_by_category(category: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Registry entries whose type contains `category` (case-insensitive), or all of them
+    """
+    if not category:
+        return dict(ETF_REGISTRY)
+    return {symbol: info for symbol, info in ETF_REGISTRY.items()
+            if category.lower() in info['type'].lower()}
+
+
+def gold_etfs() -> Dict[str, Dict[str, Any]]:
+    """Gold ETFs in the registry"""
+    return {symbol: info for symbol, info in ETF_REGISTRY.items() if info['type'] == GOLD_ETF_TYPE}
+
+
+def etf_snapshot(symbol: str, candles: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Latest bar and 52-week range of one ETF from its daily candles
+
+    Args:
+        symbol: ETF symbol
+        candles: One year of daily candles, oldest first
+
+    Returns:
+        Dictionary with the ETF_SNAPSHOT_COLUMNS fields
+    """
+    info = ETF_REGISTRY.get(symbol, {})
+    latest = candles.iloc[-1]
+
+    return {
+        'symbol': symbol,
+        'name': info.get('name', symbol),
+        'etf_type': info.get('type'),
+        'tracked_index': info.get('index'),
+        'aum': info.get('aum'),
+        'expense_ratio': info.get('expense_ratio'),
+        'last_price': float(latest['Close']),
+        'open_price': float(latest['Open']),
+        'high_price': float(latest['High']),
+        'low_price': float(latest['Low']),
+        'volume': int(latest['Volume']),
+        'week_high_52': float(candles['High'].max()),
+        'week_low_52': float(candles['Low'].min()),
+        'as_of': candles.index[-1].to_pydatetime(),
+    }
+
+
+def fetch_etf_snapshots(symbols: Optional[List[str]] = None,
+                        provider: Optional[StockAPIProvider] = None,
+                        max_workers: int = ETF_FETCH_WORKERS) -> pd.DataFrame:
+    """
+    Snapshot every ETF concurrently, one cached 1-year daily history each
+
+    Args:
+        symbols: ETF symbols (default: every ETF in ETF_REGISTRY)
+        provider: API provider (defaults to the configured provider)
+        max_workers: Concurrent fetches
+
+    Returns:
+        DataFrame with ETF_SNAPSHOT_COLUMNS and ETF_DERIVED_COLUMNS, in the order given;
+        ETFs without data are left out
+    """
+    symbols = symbols or list(ETF_REGISTRY)
+    provider = provider or APIProviderFactory.get_provider()
+
+    def snapshot(symbol: str) -> Optional[Dict[str, Any]]:
+        try:
+            candles = get_candles(symbol, period='1y', interval='1d', provider=provider)
+            if candles.empty:
+                logger.warning(f"No data for ETF {symbol}")
+                return None
+            return etf_snapshot(symbol, candles)
+        except Exception as e:
+            logger.warning(f"Failed to fetch ETF {symbol}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(snapshot, symbols))
+
+    snapshots = [result for result in results if result is not None]
+    logger.info(f"Fetched {len(snapshots)} of {len(symbols)} ETF snapshots")
+    snapshots = pd.DataFrame(snapshots, columns=ETF_SNAPSHOT_COLUMNS)
+    high = snapshots['week_high_52'].astype(float).replace(0, float('nan'))
+    low = snapshots['week_low_52'].astype(float).replace(0, float('nan'))
+    snapshots['pct_from_52w_high'] = (high - snapshots['last_price']) / high * 100
+    snapshots['pct_from_52w_low'] = (snapshots['last_price'] - low) / low * 100
+    return snapshots
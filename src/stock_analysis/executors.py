@@ -0,0 +1,76 @@
+"""
+Tool executors
+Runs the blocking bodies of MCP tools in worker threads, so the server's event loop stays free
+
+psycopg2, yfinance and the other provider clients are blocking libraries, and
+FastMCP calls a synchronous tool directly on the event loop, so one slow tool
+used to hold up every other request. Each tool now runs in a worker thread
+drawn from one of three bounded pools:
+
+    io:      database queries and provider fetches (IO_THREADS, default 16)
+    cpu:     pandas/numpy analysis (CPU_THREADS, default the number of CPUs)
+    refresh: market data refreshes (REFRESH_THREADS, default 2)
+
+A pool that is full queues its own callers without blocking the others, so a
+running refresh or backtest never delays a quick search_stocks.
+"""
+
+import functools
+import logging
+import os
+from typing import Any, Callable, Dict
+
+import anyio
+import anyio.to_thread
+
+from .singleflight import coalesce_tool
+
+logger = logging.getLogger(__name__)
+
+IO_THREADS = int(os.getenv('IO_THREADS', '16'))
+CPU_THREADS = int(os.getenv('CPU_THREADS', str(os.cpu_count() or 4)))
+REFRESH_THREADS = int(os.getenv('REFRESH_THREADS', '2'))
+
+limiters: Dict[str, anyio.CapacityLimiter] = {
+    'io': anyio.CapacityLimiter(IO_THREADS),
+    'cpu': anyio.CapacityLimiter(CPU_THREADS),
+    'refresh': anyio.CapacityLimiter(REFRESH_THREADS),
+}
+
+
+def offload(pool: str, coalesce: bool = True) -> Callable[[Callable], Callable]:
+    """
+    Turn a blocking function into a coroutine function that runs it in a worker thread
+
+    Apply between @mcp.tool() and @instrument_tool; the wrapper keeps the
+    signature and docstring FastMCP reads, and context variables (the current
+    tool for metrics) carry over into the worker thread.
+
+    Args:
+        pool: 'io', 'cpu' or 'refresh'
+        coalesce: Let identical concurrent calls share one execution (see singleflight)
+
+    Returns:
+        Decorator
+    """
+    if pool not in limiters:
+        raise ValueError(f"Unknown executor pool: {pool} (use one of {list(limiters)})")
+    limiter = limiters[pool]
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await anyio.to_thread.run_sync(functools.partial(func, *args, **kwargs), limiter=limiter)
+        wrapper.pool = pool
+        return coalesce_tool(wrapper) if coalesce else wrapper
+    return decorator
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    """Threads in use, capacity and queued calls per pool"""
+    stats = {}
+    for pool, limiter in limiters.items():
+        statistics = limiter.statistics()
+        stats[pool] = {'busy': statistics.borrowed_tokens, 'threads': statistics.total_tokens,
+                       'waiting': statistics.tasks_waiting}
+    return stats
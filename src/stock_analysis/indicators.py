@@ -0,0 +1,486 @@
+"""
+Incremental technical indicators
+Stateful O(1)-per-bar indicators that are kept current on each market data refresh
+"""
+
+import logging
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalIndicator(ABC):
+    """
+    Base class for indicators updated one value at a time.
+
+    update() commits a value to the indicator state, peek() returns the
+    indicator value as if one more value had been committed without
+    changing the state. This lets the latest (possibly still forming) bar
+    be revised on every refresh without recomputing the history.
+    """
+
+    @abstractmethod
+    def update(self, value: float) -> Optional[float]:
+        """Commit a value and return the new indicator value"""
+        pass
+
+    @abstractmethod
+    def peek(self, value: float) -> Optional[float]:
+        """Indicator value if `value` were committed, leaving the state unchanged"""
+        pass
+
+    @property
+    @abstractmethod
+    def value(self) -> Optional[float]:
+        """Current indicator value, None until enough values were committed"""
+        pass
+
+    @abstractmethod
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-serializable copy of the indicator state"""
+        pass
+
+    @classmethod
+    @abstractmethod
+    def restore(cls, state: Dict[str, Any]) -> "IncrementalIndicator":
+        """Rebuild an indicator from a snapshot"""
+        pass
+
+
+class RunningEMA(IncrementalIndicator):
+    """Exponential moving average seeded with the first value (pandas ewm(adjust=False))"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.ema: Optional[float] = None
+
+    def update(self, value: float) -> Optional[float]:
+        self.ema = self.peek(value)
+        return self.ema
+
+    def peek(self, value: float) -> Optional[float]:
+        if self.ema is None:
+            return float(value)
+        return self.alpha * float(value) + (1 - self.alpha) * self.ema
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.ema
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {'period': self.period, 'ema': self.ema}
+
+    @classmethod
+    def restore(cls, state: Dict[str, Any]) -> "RunningEMA":
+        indicator = cls(state['period'])
+        indicator.ema = state['ema']
+        return indicator
+
+
+class RollingSum(IncrementalIndicator):
+    """Rolling window sum; value is the window mean once the window is full"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values: deque = deque(maxlen=window)
+        self.total = 0.0
+        self._updates = 0
+
+    def update(self, value: float) -> Optional[float]:
+        value = float(value)
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+
+        # Re-sum once per window to stop floating point drift (amortized O(1))
+        self._updates += 1
+        if self._updates >= self.window:
+            self.total = sum(self.values)
+            self._updates = 0
+
+        return self.value
+
+    def peek(self, value: float) -> Optional[float]:
+        count = len(self.values)
+        total = self.total + float(value)
+        if count == self.window:
+            total -= self.values[0]
+        else:
+            count += 1
+        if count < self.window:
+            return None
+        return total / self.window
+
+    @property
+    def value(self) -> Optional[float]:
+        if len(self.values) < self.window:
+            return None
+        return self.total / self.window
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {'window': self.window, 'values': list(self.values)}
+
+    @classmethod
+    def restore(cls, state: Dict[str, Any]) -> "RollingSum":
+        indicator = cls(state['window'])
+        indicator.values.extend(state['values'])
+        indicator.total = sum(indicator.values)
+        return indicator
+
+
+class WilderRSI(IncrementalIndicator):
+    """Relative Strength Index with Wilder smoothing"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close: Optional[float] = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.count = 0
+
+    def _next_state(self, close: float):
+        """Return (avg_gain, avg_loss, count) after consuming close"""
+        if self.prev_close is None:
+            return self.avg_gain, self.avg_loss, self.count
+
+        change = close - self.prev_close
+        gain = max(change, 0.0)
+        loss = max(-change, 0.0)
+        count = self.count + 1
+
+        if count <= self.period:
+            # Seed with the simple average of the first `period` changes
+            avg_gain = self.avg_gain + (gain - self.avg_gain) / count
+            avg_loss = self.avg_loss + (loss - self.avg_loss) / count
+        else:
+            avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+
+        return avg_gain, avg_loss, count
+
+    def _rsi(self, avg_gain: float, avg_loss: float, count: int) -> Optional[float]:
+        if count < self.period:
+            return None
+        if avg_loss == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+    def update(self, value: float) -> Optional[float]:
+        close = float(value)
+        self.avg_gain, self.avg_loss, self.count = self._next_state(close)
+        self.prev_close = close
+        return self.value
+
+    def peek(self, value: float) -> Optional[float]:
+        return self._rsi(*self._next_state(float(value)))
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._rsi(self.avg_gain, self.avg_loss, self.count)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'period': self.period,
+            'prev_close': self.prev_close,
+            'avg_gain': self.avg_gain,
+            'avg_loss': self.avg_loss,
+            'count': self.count,
+        }
+
+    @classmethod
+    def restore(cls, state: Dict[str, Any]) -> "WilderRSI":
+        indicator = cls(state['period'])
+        indicator.prev_close = state['prev_close']
+        indicator.avg_gain = state['avg_gain']
+        indicator.avg_loss = state['avg_loss']
+        indicator.count = state['count']
+        return indicator
+
+
+class RollingMax(IncrementalIndicator):
+    """Rolling window maximum using a monotonic deque"""
+
+    sign = 1.0
+
+    def __init__(self, window: int):
+        self.window = window
+        # (position, signed value) pairs, signed values strictly decreasing
+        self.candidates: deque = deque()
+        self.position = 0
+
+    def update(self, value: float) -> Optional[float]:
+        signed = self.sign * float(value)
+        while self.candidates and self.candidates[-1][1] <= signed:
+            self.candidates.pop()
+        self.candidates.append((self.position, signed))
+        self.position += 1
+
+        oldest = self.position - self.window
+        while self.candidates[0][0] < oldest:
+            self.candidates.popleft()
+
+        return self.value
+
+    def peek(self, value: float) -> Optional[float]:
+        signed = self.sign * float(value)
+        oldest = self.position + 1 - self.window
+        # Candidates are in position order, so at most the front one expires
+        for position, candidate in self.candidates:
+            if position >= oldest:
+                signed = max(signed, candidate)
+                break
+        return self.sign * signed
+
+    @property
+    def value(self) -> Optional[float]:
+        if not self.candidates:
+            return None
+        return self.sign * self.candidates[0][1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'window': self.window,
+            'position': self.position,
+            'candidates': [list(candidate) for candidate in self.candidates],
+        }
+
+    @classmethod
+    def restore(cls, state: Dict[str, Any]) -> "RollingMax":
+        indicator = cls(state['window'])
+        indicator.position = state['position']
+        indicator.candidates.extend(tuple(candidate) for candidate in state['candidates'])
+        return indicator
+
+
+class RollingMin(RollingMax):
+    """Rolling window minimum using a monotonic deque"""
+
+    sign = -1.0
+
+
+# Indicators tracked per symbol: name -> (class, constructor argument, bar field)
+INDICATOR_SPECS = {
+    'ema_12': (RunningEMA, 12, 'close'),
+    'ema_26': (RunningEMA, 26, 'close'),
+    'sma_20': (RollingSum, 20, 'close'),
+    'sma_50': (RollingSum, 50, 'close'),
+    'rsi_14': (WilderRSI, 14, 'close'),
+    'high_52w': (RollingMax, 252, 'high'),
+    'low_52w': (RollingMin, 252, 'low'),
+    'avg_volume_20': (RollingSum, 20, 'volume'),
+}
+
+
+class IndicatorSet:
+    """
+    All incremental indicators for one symbol.
+
+    Bars are committed to the indicators only once a newer bar arrives; the
+    latest bar is kept pending so that an intraday refresh of the current
+    session's bar replaces it instead of being counted twice.
+    """
+
+    def __init__(self):
+        self.indicators: Dict[str, IncrementalIndicator] = {
+            name: cls(arg) for name, (cls, arg, _) in INDICATOR_SPECS.items()
+        }
+        self.last_committed: Optional[pd.Timestamp] = None
+        self.pending_timestamp: Optional[pd.Timestamp] = None
+        self.pending_bar: Optional[Dict[str, float]] = None
+        self.bars_processed = 0
+
+    @property
+    def last_timestamp(self) -> Optional[pd.Timestamp]:
+        """Timestamp of the newest bar seen"""
+        if self.pending_timestamp is not None:
+            return self.pending_timestamp
+        return self.last_committed
+
+    def _commit(self, bar: Dict[str, float]) -> None:
+        for name, (_, _, field) in INDICATOR_SPECS.items():
+            self.indicators[name].update(bar[field])
+        self.bars_processed += 1
+
+    def update_bar(self, timestamp: pd.Timestamp, bar: Dict[str, float]) -> bool:
+        """
+        Feed one OHLCV bar.
+
+        Args:
+            timestamp: Bar timestamp
+            bar: Dictionary with open, high, low, close and volume
+
+        Returns:
+            True if the bar was applied, False if it is older than the state
+        """
+        if self.last_committed is not None and timestamp <= self.last_committed:
+            return False
+
+        if self.pending_timestamp is not None and timestamp > self.pending_timestamp:
+            self._commit(self.pending_bar)
+            self.last_committed = self.pending_timestamp
+
+        self.pending_timestamp = timestamp
+        self.pending_bar = bar
+        return True
+
+    def values(self) -> Dict[str, Optional[float]]:
+        """Current indicator values including the pending bar"""
+        result = {}
+        for name, (_, _, field) in INDICATOR_SPECS.items():
+            indicator = self.indicators[name]
+            if self.pending_bar is None:
+                result[name] = indicator.value
+            else:
+                result[name] = indicator.peek(self.pending_bar[field])
+
+        if result['ema_12'] is not None and result['ema_26'] is not None:
+            result['macd'] = result['ema_12'] - result['ema_26']
+        else:
+            result['macd'] = None
+
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'indicators': {name: ind.snapshot() for name, ind in self.indicators.items()},
+            'last_committed': self.last_committed.isoformat() if self.last_committed is not None else None,
+            'pending_timestamp': self.pending_timestamp.isoformat() if self.pending_timestamp is not None else None,
+            'pending_bar': self.pending_bar,
+            'bars_processed': self.bars_processed,
+        }
+
+    @classmethod
+    def restore(cls, state: Dict[str, Any]) -> "IndicatorSet":
+        indicator_set = cls()
+        for name, ind_state in state['indicators'].items():
+            if name in INDICATOR_SPECS:
+                indicator_set.indicators[name] = INDICATOR_SPECS[name][0].restore(ind_state)
+        if state.get('last_committed'):
+            indicator_set.last_committed = pd.Timestamp(state['last_committed'])
+        if state.get('pending_timestamp'):
+            indicator_set.pending_timestamp = pd.Timestamp(state['pending_timestamp'])
+        indicator_set.pending_bar = state.get('pending_bar')
+        indicator_set.bars_processed = state.get('bars_processed', 0)
+        return indicator_set
+
+
+# Yahoo Finance periods used to catch up on missed bars, with calendar days covered
+REFRESH_PERIODS = [
+    ('5d', 5),
+    ('1mo', 28),
+    ('3mo', 88),
+    ('6mo', 180),
+]
+
+
+class IndicatorStore:
+    """Per-symbol incremental indicator state"""
+
+    def __init__(self):
+        self.symbols: Dict[str, IndicatorSet] = {}
+
+    def has(self, symbol: str) -> bool:
+        return symbol in self.symbols
+
+    def fetch_period(self, symbol: str, default: str = "1y") -> str:
+        """
+        Shortest Yahoo Finance period that still covers every bar missing from the state
+
+        Args:
+            symbol: Stock symbol
+            default: Period used to seed a symbol without state
+
+        Returns:
+            Period string such as '5d', '1mo' or the default
+        """
+        indicator_set = self.symbols.get(symbol)
+        if indicator_set is None or indicator_set.last_timestamp is None:
+            return default
+
+        last = indicator_set.last_timestamp
+        now = pd.Timestamp.now(tz=last.tz)
+        gap_days = (now - last).days
+
+        for period, days in REFRESH_PERIODS:
+            if gap_days < days:
+                return period
+
+        # Too far behind to catch up bar by bar, start over
+        del self.symbols[symbol]
+        return default
+
+    def update(self, symbol: str, hist: pd.DataFrame) -> int:
+        """
+        Apply the bars of a Yahoo Finance style history that are new for the symbol
+
+        Args:
+            symbol: Stock symbol
+            hist: DataFrame indexed by timestamp with Open/High/Low/Close/Volume columns
+
+        Returns:
+            Number of bars applied
+        """
+        indicator_set = self.symbols.setdefault(symbol, IndicatorSet())
+
+        if hist.empty:
+            return 0
+
+        # Only the pending bar and anything newer needs to be looked at
+        start = indicator_set.last_timestamp
+        if start is not None:
+            hist = hist[hist.index >= start]
+
+        applied = 0
+        for timestamp, o, h, l, c, v in zip(
+            hist.index, hist['Open'], hist['High'], hist['Low'], hist['Close'], hist['Volume']
+        ):
+            bar = {
+                'open': float(o),
+                'high': float(h),
+                'low': float(l),
+                'close': float(c),
+                'volume': float(v),
+            }
+            if indicator_set.update_bar(timestamp, bar):
+                applied += 1
+
+        return applied
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Current indicator values for a symbol"""
+        indicator_set = self.symbols.get(symbol)
+        if indicator_set is None or indicator_set.last_timestamp is None:
+            return None
+
+        return {
+            'symbol': symbol,
+            'as_of': indicator_set.last_timestamp.isoformat(),
+            **indicator_set.values(),
+        }
+
+    def all_values(self) -> List[Dict[str, Any]]:
+        """Current indicator values for every tracked symbol"""
+        results = []
+        for symbol in sorted(self.symbols):
+            values = self.get(symbol)
+            if values is not None:
+                results.append(values)
+        return results
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Snapshot of every symbol's state keyed by symbol"""
+        return {symbol: state.snapshot() for symbol, state in self.symbols.items()}
+
+    def restore(self, snapshots: Dict[str, Dict[str, Any]]) -> None:
+        """Load state from snapshots, replacing any existing state for those symbols"""
+        for symbol, state in snapshots.items():
+            try:
+                self.symbols[symbol] = IndicatorSet.restore(state)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Discarding invalid indicator snapshot for {symbol}: {e}")
@@ -0,0 +1,107 @@
+"""
+Lazy imports
+Module proxies that import on first attribute access, and startup timings for the server
+
+pandas, numpy, yfinance and requests take most of the server's import time
+but no tool needs them before its first call, so the MCP handshake does not
+wait for them.
+"""
+
+import importlib
+import logging
+import sys
+import threading
+import time
+import types
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# When the package started importing; startup phases are measured from here
+IMPORT_STARTED = time.perf_counter()
+
+# Milliseconds spent importing each lazy module, in load order
+import_timings: Dict[str, float] = {}
+
+# Named startup phases in milliseconds since IMPORT_STARTED
+startup_timings: Dict[str, float] = {}
+
+_lock = threading.RLock()
+
+
+class LazyModule(types.ModuleType):
+    """Stands in for a module until an attribute is first read"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_module']
+        if module is None:
+            with _lock:
+                module = self.__dict__['_module']
+                if module is None:
+                    started = time.perf_counter()
+                    module = importlib.import_module(self.__name__)
+                    import_timings.setdefault(self.__name__, round((time.perf_counter() - started) * 1000, 1))
+                    self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._load(), attribute)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Module proxy for `name`, imported on first attribute access
+
+    Args:
+        name: Absolute module name (e.g., 'pandas', 'stock_analysis.scoring')
+
+    Returns:
+        The module itself when it is already imported, otherwise a LazyModule
+    """
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def preload(names: List[str], package: Optional[str] = None, delay: float = 0.0) -> threading.Thread:
+    """
+    Import modules in a daemon thread, so the first tool call does not pay for them
+
+    Args:
+        names: Module names, imported in order; '.name' is relative to `package`
+        package: Package for relative names
+        delay: Seconds to wait first (lets the MCP handshake go out)
+
+    Returns:
+        The started thread
+    """
+    def run():
+        time.sleep(delay)
+        for name in names:
+            started = time.perf_counter()
+            try:
+                module = importlib.import_module(name, package)
+            except Exception as e:
+                logger.warning(f"Could not preload {name}: {e}")
+                continue
+            import_timings.setdefault(module.__name__, round((time.perf_counter() - started) * 1000, 1))
+        mark_startup('preloaded')
+
+    thread = threading.Thread(target=run, name='preload', daemon=True)
+    thread.start()
+    return thread
+
+
+def mark_startup(phase: str) -> None:
+    """Record the time since the package started importing for a startup phase"""
+    startup_timings[phase] = round((time.perf_counter() - IMPORT_STARTED) * 1000, 1)
+
+
+def startup_report() -> Dict[str, Any]:
+    """Startup phases and lazy imports loaded so far, in milliseconds"""
+    return {'phases_ms': dict(startup_timings), 'lazy_imports_ms': dict(import_timings)}
@@ -6,21 +6,64 @@ Uses Supabase PostgreSQL for persistent storage
 
 import os
 import logging
+import threading
+import time
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Union
 from collections.abc import Hashable
 
-import pandas as pd
-import yfinance as yf
+from .lazy_imports import lazy_import, mark_startup, preload, startup_report
+
+# The psycopg2 C extension is already loaded by metrics / db_pool, whose
+# connection classes subclass psycopg2.extensions.connection; only extras
+# (and the json / uuid / ipaddress modules behind it) waits for first use
 import psycopg2
-from psycopg2.extras import execute_values
 from mcp.server.fastmcp import FastMCP
+from mcp.server.transport_security import TransportSecuritySettings
 
 from .constant_parameters import (
     COLUMNS_MAPPING,
     TABLE_SCHEMA,
+    INDICATOR_SCHEMA,
+    DERIVED_METRICS_SCHEMA,
+    ETF_SCHEMA,
+    STOCK_HISTORY_SCHEMA,
     NIFTY_50_SYMBOLS,
 )
+from .api_providers import APIProviderFactory, StockAPIProvider
+from .db_pool import ConnectionPool, PooledConnection
+from .executors import executor_stats, offload
+from .metrics import instrument_tool, instrumented_tools, metrics, start_metrics_exporters
+from .profiling import PROFILE_MODES, profile
+from .scheduler import RefreshScheduler
+from .singleflight import coalescing_stats
+
+# pandas and numpy (and the analysis modules that need them) load on first
+# use, so the MCP handshake does not wait for them
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+psycopg2_extras = lazy_import('psycopg2.extras')
+
+mark_startup('imports')
+
+# Imported in the background once the server is up ('.name' is in this package;
+# empty PRELOAD_MODULES to disable)
+PRELOAD_MODULES = [name.strip() for name in os.getenv(
+    'PRELOAD_MODULES', 'numpy,pandas,yfinance,.candle_store,.scoring').split(',') if name.strip()]
+PRELOAD_DELAY = float(os.getenv('PRELOAD_DELAY', '0.2'))
+
+# stdio: one server process per client. sse / streamable-http: one shared
+# process for many clients, listening on MCP_HOST:MCP_PORT
+MCP_TRANSPORTS = ['stdio', 'sse', 'streamable-http']
+MCP_TRANSPORT = os.getenv('MCP_TRANSPORT', 'stdio')
+MCP_HOST = os.getenv('MCP_HOST', '127.0.0.1')
+MCP_PORT = int(os.getenv('MCP_PORT', '8000'))
+# Host / Origin headers network transports accept besides loopback, comma
+# separated ('name:*' matches any port), e.g. 'mcp.internal:*,10.0.0.5:8000'.
+# MCP_DISABLE_HOST_CHECK=1 turns DNS rebinding protection off entirely.
+MCP_ALLOWED_HOSTS = [name.strip() for name in os.getenv('MCP_ALLOWED_HOSTS', '').split(',') if name.strip()]
+MCP_ALLOWED_ORIGINS = [name.strip() for name in os.getenv('MCP_ALLOWED_ORIGINS', '').split(',') if name.strip()]
+MCP_DISABLE_HOST_CHECK = os.getenv('MCP_DISABLE_HOST_CHECK', '').lower() in ('1', 'true', 'yes')
 
 # Configure logging
 logging.basicConfig(
@@ -32,25 +75,74 @@ logger = logging.getLogger(__name__)
 # Initialize FastMCP server
 mcp = FastMCP("stock_analysis")
 
+# Incremental indicator state per symbol, updated with new bars on each refresh
+# (created on first use, see get_indicator_store)
+indicator_store = None
+
+# Rolling return covariance per universe and window, updated as new bars arrive
+# (created on first use, see get_correlation_service)
+correlation_service = None
+
+# Embedded DuckDB engine for analytical queries (created on first use, see
+# get_analytics_engine; needs the optional duckdb package)
+analytics_engine = None
+
+# Schema is created once per process, on the first refresh
+_database_initialized = False
+
+# Guards the lazily created shared state above (tools run in worker threads)
+_state_lock = threading.Lock()
+
+# Connections reused by every tool call and client of this process
+db_pool = ConnectionPool(lambda: _connect_database())
+
 
 class StockDataError(Exception):
     """Custom exception for stock data errors"""
     pass
 
 
-def get_database_connection():
-    """
-    Get PostgreSQL database connection from environment variables
-
-    Returns:
-        psycopg2 connection object
-    """
-    try:
-        # Try DATABASE_URL first (standard for Supabase)
-        database_url = os.getenv('DATABASE_URL')
-
+def get_indicator_store():
+    """The shared IndicatorStore, created on first use"""
+    global indicator_store
+    if indicator_store is None:
+        from .indicators import IndicatorStore
+        with _state_lock:
+            if indicator_store is None:
+                indicator_store = IndicatorStore()
+    return indicator_store
+
+
+def get_correlation_service():
+    """The shared CorrelationService, created on first use"""
+    global correlation_service
+    if correlation_service is None:
+        from .correlation import CorrelationService
+        with _state_lock:
+            if correlation_service is None:
+                correlation_service = CorrelationService()
+    return correlation_service
+
+
+def get_analytics_engine():
+    """The shared AnalyticsEngine, created on first use"""
+    global analytics_engine
+    if analytics_engine is None:
+        from .analytics import AnalyticsEngine
+        with _state_lock:
+            if analytics_engine is None:
+                analytics_engine = AnalyticsEngine(get_database_connection)
+    return analytics_engine
+
+
+def _connect_database() -> PooledConnection:
+    """Open a new PostgreSQL connection from environment variables"""
+    # Try DATABASE_URL first (standard for Supabase)
+    database_url = os.getenv('DATABASE_URL')
+
+    with metrics.timer('db', 'CONNECT'):
         if database_url:
-            conn = psycopg2.connect(database_url)
+            conn = psycopg2.connect(database_url, connection_factory=PooledConnection)
         else:
             # Fall back to individual components
             conn = psycopg2.connect(
@@ -58,43 +150,111 @@ def get_database_connection():
                 port=os.getenv('POSTGRES_PORT', '5432'),
                 database=os.getenv('POSTGRES_DB', 'postgres'),
                 user=os.getenv('POSTGRES_USER'),
-                password=os.getenv('POSTGRES_PASSWORD')
+                password=os.getenv('POSTGRES_PASSWORD'),
+                connection_factory=PooledConnection
             )
 
-        logger.info("Successfully connected to PostgreSQL database")
-        return conn
+    logger.info("Successfully connected to PostgreSQL database")
+    return conn
+
+
+def get_database_connection():
+    """
+    Get a PostgreSQL connection from the shared pool (DB_POOL_SIZE=0 disables it)
+
+    Closing the connection returns it to the pool.
+
+    Returns:
+        psycopg2 connection object
+    """
+    try:
+        if db_pool.size <= 0:
+            return _connect_database()
+        return db_pool.get()
     except Exception as e:
         logger.error(f"Failed to connect to database: {e}")
         raise StockDataError(f"Database connection failed: {e}")
 
 
-def initialize_database() -> None:
+def dataframe_to_records(df: 'pd.DataFrame') -> List[Dict[Hashable, Any]]:
+    """
+    Convert a DataFrame to JSON-friendly records, with missing values as None
+    """
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+def universe_symbols(symbols: List[str] = None) -> List[str]:
+    """
+    Return the given symbols, or every symbol in stock_data when none are given
+    """
+    if symbols:
+        return symbols
+
+    conn = get_database_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT symbol_token FROM stock_data ORDER BY symbol_token")
+    universe = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    conn.close()
+
+    if not universe:
+        raise StockDataError("No stock data available, run refresh_market_data first")
+    return universe
+
+
+def annualized_covariance(stocks: 'pd.DataFrame') -> 'pd.DataFrame':
+    """
+    Annualized daily-return covariance for stocks with a symbol_token column,
+    indexed and columned by symbol_token
+    """
+    from .correlation import TRADING_DAYS_PER_YEAR
+
+    result = get_correlation_service().get(stocks['symbol_token'].tolist())
+    labels = result['symbols']
+    return pd.DataFrame(result['covariance'] * TRADING_DAYS_PER_YEAR, index=labels, columns=labels)
+
+
+def initialize_database(force: bool = False) -> None:
     """
-    Initialize database with schema
+    Initialize database with schema (once per process unless forced)
     """
+    global _database_initialized
+    if _database_initialized and not force:
+        return
+
+    from .screener import index_statements
+
     try:
         conn = get_database_connection()
         cursor = conn.cursor()
 
         # Execute schema creation
         cursor.execute(TABLE_SCHEMA)
+        cursor.execute(DERIVED_METRICS_SCHEMA)
+        cursor.execute(INDICATOR_SCHEMA)
+        cursor.execute(ETF_SCHEMA)
+        cursor.execute(STOCK_HISTORY_SCHEMA)
+        for statement in index_statements():
+            cursor.execute(statement)
         conn.commit()
 
         cursor.close()
         conn.close()
 
+        _database_initialized = True
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
         raise StockDataError(f"Database initialization failed: {e}")
 
 
-def fetch_stock_data(symbols: List[str]) -> pd.DataFrame:
+def fetch_stock_data(symbols: List[str], provider: Optional[StockAPIProvider] = None) -> 'pd.DataFrame':
     """
-    Fetch live market data for given symbols using yfinance
+    Fetch live market data for given symbols from the configured API provider
 
     Args:
         symbols: List of stock symbols (e.g., ['RELIANCE.NS', 'TCS.NS'])
+        provider: API provider (defaults to STOCK_API_PROVIDER, Yahoo Finance)
 
     Returns:
         DataFrame with stock data
@@ -102,23 +262,28 @@ def fetch_stock_data(symbols: List[str]) -> pd.DataFrame:
     try:
         logger.info(f"Fetching market data for {len(symbols)} symbols")
 
+        provider = provider or APIProviderFactory.get_provider()
+        store = get_indicator_store()
         all_data = []
 
         # Fetch data for each symbol
         for symbol in symbols:
             try:
-                ticker = yf.Ticker(symbol)
-
-                # Get current info
-                info = ticker.info
+                # Get current info (Yahoo Finance info keys)
+                info = provider.get_company_info(symbol)
 
-                # Get historical data (last 1 year to get 52-week high/low)
-                hist = ticker.history(period="1y")
+                # Get historical data (last 1 year to seed the indicators and
+                # 52-week high/low; only recent bars once indicator state exists)
+                period = store.fetch_period(symbol, default="1y")
+                hist = provider.get_historical_data(symbol, period=period)
 
                 if hist.empty:
                     logger.warning(f"No data available for {symbol}")
                     continue
 
+                store.update(symbol, hist)
+                indicators = store.get(symbol) or {}
+
                 # Get latest data
                 latest = hist.iloc[-1]
 
@@ -127,6 +292,7 @@ def fetch_stock_data(symbols: List[str]) -> pd.DataFrame:
                     'symbol_token': symbol,
                     'trading_symbol': symbol.replace('.NS', '').replace('.BO', ''),
                     'name': info.get('longName', symbol),
+                    'sector': info.get('sector'),
                     'exchange': 'NSE' if '.NS' in symbol else 'BSE',
                     'instrument_type': 'EQ',
                     'last_price': info.get('currentPrice', float(latest['Close'])),
@@ -135,8 +301,8 @@ def fetch_stock_data(symbols: List[str]) -> pd.DataFrame:
                     'low_price': float(latest['Low']),
                     'close_price': float(latest['Close']),
                     'volume': int(latest['Volume']),
-                    'week_high_52': info.get('fiftyTwoWeekHigh', float(hist['High'].max())),
-                    'week_low_52': info.get('fiftyTwoWeekLow', float(hist['Low'].min())),
+                    'week_high_52': info.get('fiftyTwoWeekHigh', indicators.get('high_52w')),
+                    'week_low_52': info.get('fiftyTwoWeekLow', indicators.get('low_52w')),
                     'market_cap': info.get('marketCap', None),
                     'pe_ratio': info.get('trailingPE', None),
                     'dividend_yield': info.get('dividendYield', None),
@@ -161,9 +327,59 @@ def fetch_stock_data(symbols: List[str]) -> pd.DataFrame:
         raise StockDataError(f"Market data fetch failed: {e}")
 
 
-def scrape_data() -> None:
+def load_indicator_state() -> None:
+    """
+    Restore incremental indicator state from the database
+    """
+    try:
+        conn = get_database_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT symbol_token, state FROM indicator_state")
+        snapshots = {symbol: state for symbol, state in cursor.fetchall()}
+        cursor.close()
+        conn.close()
+
+        get_indicator_store().restore(snapshots)
+        logger.info(f"Restored indicator state for {len(snapshots)} symbols")
+    except Exception as e:
+        logger.warning(f"Could not restore indicator state: {e}")
+
+
+def save_indicator_state(conn) -> None:
+    """
+    Persist incremental indicator snapshots so restarts resume from the latest bar
+
+    Args:
+        conn: Open psycopg2 connection (committed by the caller)
+    """
+    snapshots = get_indicator_store().snapshot()
+    if not snapshots:
+        return
+
+    values = [
+        (symbol, psycopg2_extras.Json(state), state['pending_timestamp'], datetime.now())
+        for symbol, state in snapshots.items()
+    ]
+
+    cursor = conn.cursor()
+    psycopg2_extras.execute_values(cursor, """
+        INSERT INTO indicator_state (symbol_token, state, last_bar, last_updated)
+        VALUES %s
+        ON CONFLICT (symbol_token)
+        DO UPDATE SET
+            state = EXCLUDED.state,
+            last_bar = EXCLUDED.last_bar,
+            last_updated = EXCLUDED.last_updated
+    """, values)
+    cursor.close()
+
+
+def scrape_data(symbols: Optional[List[str]] = None) -> None:
     """
-    Fetch data from Yahoo Finance and store in PostgreSQL database
+    Fetch data from the API provider and store in PostgreSQL database
+
+    Args:
+        symbols: Symbols to refresh (default: NIFTY_50_SYMBOLS)
     """
     try:
         logger.info("Starting data scraping process")
@@ -171,8 +387,12 @@ def scrape_data() -> None:
         # Initialize database
         initialize_database()
 
+        # Resume indicators from their last snapshot after a restart
+        if not get_indicator_store().symbols:
+            load_indicator_state()
+
         # Use Nifty 50 symbols
-        symbols = NIFTY_50_SYMBOLS
+        symbols = symbols or NIFTY_50_SYMBOLS
 
         # Fetch market data
         market_df = fetch_stock_data(symbols)
@@ -197,6 +417,7 @@ def scrape_data() -> None:
             VALUES %s
             ON CONFLICT (symbol_token)
             DO UPDATE SET
+                sector = EXCLUDED.sector,
                 last_price = EXCLUDED.last_price,
                 open_price = EXCLUDED.open_price,
                 high_price = EXCLUDED.high_price,
@@ -211,12 +432,33 @@ def scrape_data() -> None:
                 last_updated = EXCLUDED.last_updated
         """
 
-        execute_values(cursor, insert_query, values)
+        psycopg2_extras.execute_values(cursor, insert_query, values)
+
+        # Keep one fundamentals snapshot per stock per day for backtesting
+        cursor.execute("""
+            INSERT INTO stock_data_history (symbol_token, snapshot_date, trading_symbol, last_price,
+                                            week_high_52, week_low_52, market_cap, pe_ratio, dividend_yield)
+            SELECT symbol_token, CURRENT_DATE, trading_symbol, last_price,
+                   week_high_52, week_low_52, market_cap, pe_ratio, dividend_yield
+            FROM stock_data
+            ON CONFLICT (symbol_token, snapshot_date)
+            DO UPDATE SET
+                last_price = EXCLUDED.last_price,
+                week_high_52 = EXCLUDED.week_high_52,
+                week_low_52 = EXCLUDED.week_low_52,
+                market_cap = EXCLUDED.market_cap,
+                pe_ratio = EXCLUDED.pe_ratio,
+                dividend_yield = EXCLUDED.dividend_yield
+        """)
+        save_indicator_state(conn)
         conn.commit()
 
         cursor.close()
         conn.close()
 
+        if analytics_engine is not None:
+            analytics_engine.invalidate()
+
         logger.info(f"Stored {len(market_df)} records in database")
         logger.info("Data scraping completed successfully")
 
@@ -225,7 +467,48 @@ def scrape_data() -> None:
         raise StockDataError(f"Data scraping failed: {e}")
 
 
+# Serializes refreshes across clients and runs the REFRESH_INTERVAL schedule
+refresh_scheduler = RefreshScheduler(scrape_data)
+
+
+def scrape_etf_data() -> int:
+    """
+    Snapshot every registered ETF and upsert the results into etf_data
+
+    Returns:
+        Number of ETFs stored
+    """
+    from .etfs import ETF_SNAPSHOT_COLUMNS, fetch_etf_snapshots
+
+    # The 52-week distances are generated by etf_data itself
+    snapshots = fetch_etf_snapshots()[ETF_SNAPSHOT_COLUMNS]
+    if snapshots.empty:
+        logger.warning("No ETF data fetched")
+        return 0
+
+    snapshots = snapshots.assign(last_updated=datetime.now())
+    columns = list(snapshots.columns)
+    values = [tuple(row) for row in snapshots.astype(object).where(snapshots.notna(), None).values]
+    updates = ', '.join(f"{column} = EXCLUDED.{column}" for column in columns if column != 'symbol')
+
+    conn = get_database_connection()
+    cursor = conn.cursor()
+    psycopg2_extras.execute_values(cursor, f"""
+        INSERT INTO etf_data ({', '.join(columns)})
+        VALUES %s
+        ON CONFLICT (symbol) DO UPDATE SET {updates}
+    """, values)
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+    logger.info(f"Stored {len(snapshots)} ETF snapshots in database")
+    return len(snapshots)
+
+
 @mcp.tool()
+@offload('io')
+@instrument_tool
 def get_table_overview() -> str:
     """
     Get database table schema and preview with proper error handling.
@@ -280,16 +563,29 @@ SAMPLE DATA (First 5 rows):
 
 
 @mcp.tool()
-def query_database(sql_query: str) -> List[Dict[Hashable, Any]]:
+@offload('io')
+@instrument_tool
+def query_database(sql_query: str, engine: str = "") -> List[Dict[Hashable, Any]]:
     """
     Execute SQL query on the stock database and return results.
 
+    With the embedded DuckDB engine (QUERY_ENGINE, needs the duckdb package),
+    queries run locally on columnar copies instead: the stock_data,
+    stock_data_history and etf_data tables plus two extra tables, candles
+    (symbol, interval, ts, open, high, low, close, volume for every cached
+    candle, as traded) and corporate_actions (symbol, date, action, value).
+    Use it for scans and aggregations over long histories.
+
     Args:
         sql_query: SQL query to execute (SELECT statements only)
+        engine: "postgres", "duckdb" or "auto" (DuckDB, falling back to
+            PostgreSQL for queries it cannot answer); default QUERY_ENGINE
 
     Returns:
         List of dictionaries containing query results
     """
+    from .analytics import QUERY_ENGINE, QUERY_ENGINES, is_available
+
     logger.info(f"Executing database query: {sql_query[:100]}...")
 
     try:
@@ -297,6 +593,20 @@ def query_database(sql_query: str) -> List[Dict[Hashable, Any]]:
         if not sql_query.strip().upper().startswith('SELECT'):
             raise StockDataError("Only SELECT queries are allowed")
 
+        engine = engine or QUERY_ENGINE
+        if engine not in QUERY_ENGINES:
+            raise StockDataError(f"Unknown query engine: {engine}. Use one of {QUERY_ENGINES}")
+
+        if engine == 'duckdb' or (engine == 'auto' and is_available()):
+            try:
+                rows = get_analytics_engine().query(sql_query)
+                logger.info(f"Query returned {len(rows)} rows (duckdb)")
+                return rows
+            except Exception as e:
+                if engine == 'duckdb':
+                    raise
+                logger.info(f"Running query on PostgreSQL instead of DuckDB: {e}")
+
         conn = get_database_connection()
         sql_output = pd.read_sql_query(sql_query, conn)
         conn.close()
@@ -310,63 +620,124 @@ def query_database(sql_query: str) -> List[Dict[Hashable, Any]]:
 
 
 @mcp.tool()
-def refresh_market_data() -> str:
+@offload('refresh')
+@instrument_tool
+def refresh_market_data(force: bool = False) -> str:
     """
-    Force refresh of market data from Yahoo Finance.
+    Refresh market data from Yahoo Finance.
+
+    The refresh is shared by every client of the server: a request while a
+    refresh is running waits for it, and a request within REFRESH_MIN_INTERVAL
+    seconds of the last refresh reuses it unless force is set.
+
+    Args:
+        force: Refresh even if the data was refreshed recently
 
     Returns:
         Status message indicating success or failure
     """
-    logger.info("Manual refresh of market data requested")
+    logger.info(f"Manual refresh of market data requested (force: {force})")
 
-    try:
-        scrape_data()
+    result = refresh_scheduler.request(force=force)
+    if result['error']:
+        return f"Failed to refresh market data: {result['error']}"
+    if result['refreshed']:
         return "Market data refreshed successfully from Yahoo Finance"
-    except Exception as e:
-        logger.error(f"Failed to refresh market data: {e}")
-        return f"Failed to refresh market data: {str(e)}"
+    return f"Market data was refreshed {result['age_s']:.0f}s ago; reused that refresh"
 
 
 @mcp.tool()
+@offload('io')
+@instrument_tool
 def get_historical_data(
     symbol: str,
     period: str = "1mo",
-    interval: str = "1d"
-) -> List[Dict[str, Any]]:
+    interval: str = "1d",
+    max_points: int = 0,
+    downsample: str = "ohlc",
+    adjust: str = "all"
+) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
     """
-    Fetch historical candle data for a specific symbol using Yahoo Finance.
+    Fetch historical candle data for a specific symbol from the configured API provider (Yahoo Finance by default).
+
+    One base series per symbol is fetched and cached (1m, 5m, ... for intraday
+    intervals, 1d for 1wk/1mo/3mo) and coarser intervals are aggregated from
+    it, aligned to the NSE session. A bar that is still forming has partial: true.
+    Candles are stored as traded and adjusted for splits and dividends when read.
+
+    For long histories (period="max", minute intervals) set max_points to get a
+    chart-sized response: a summary computed on every candle plus at most
+    max_points candles.
 
     Args:
         symbol: Stock symbol (e.g., 'RELIANCE.NS' for NSE, 'RELIANCE.BO' for BSE)
         period: Data period - valid values: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max
         interval: Candle interval - valid values: 1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo
+        max_points: Return at most this many candles (default 0: every candle)
+        downsample: "ohlc" merges consecutive candles (keeps every high, low and
+            the total volume), "lttb" keeps the original candles that best
+            preserve the shape of the close line
+        adjust: "all" adjusts for splits and dividends (like Yahoo Finance),
+            "split" for splits only, "none" returns the prices as traded
 
     Returns:
-        List of candle data dictionaries
+        List of candle data dictionaries, or with max_points a dictionary with
+        summary (full-resolution statistics), downsampling details and candles
     """
+    from .corporate_actions import ADJUSTMENTS
+    from .downsample import DOWNSAMPLE_METHODS, MIN_POINTS, candle_summary
+    from .downsample import downsample as downsample_candles
+    from .resample import get_resampled_candles
+
     logger.info(f"Fetching historical data for {symbol}")
 
     try:
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period=period, interval=interval)
+        if max_points and max_points < MIN_POINTS:
+            raise StockDataError(f"max_points must be at least {MIN_POINTS}")
+        if downsample not in DOWNSAMPLE_METHODS:
+            raise StockDataError(f"Unknown downsampling method: {downsample}. Use one of {DOWNSAMPLE_METHODS}")
+        if adjust not in ADJUSTMENTS:
+            raise StockDataError(f"Unknown adjustment: {adjust}. Use one of {ADJUSTMENTS}")
+
+        # Coarser intervals are aggregated from the symbol's stored base series
+        hist = get_resampled_candles(symbol, period=period, interval=interval, adjust=adjust)
 
         if hist.empty:
             raise StockDataError(f"No historical data available for {symbol}")
 
+        candles = downsample_candles(hist, max_points, downsample) if max_points else hist
+
         # Convert to list of dictionaries
-        formatted_data = []
-        for timestamp, row in hist.iterrows():
-            formatted_data.append({
+        formatted_data = [
+            {
                 'timestamp': timestamp.isoformat(),
-                'open': float(row['Open']),
-                'high': float(row['High']),
-                'low': float(row['Low']),
-                'close': float(row['Close']),
-                'volume': int(row['Volume'])
-            })
-
-        logger.info(f"Fetched {len(formatted_data)} candles for {symbol}")
-        return formatted_data
+                'open': float(o),
+                'high': float(h),
+                'low': float(l),
+                'close': float(c),
+                'volume': int(v)
+            }
+            for timestamp, o, h, l, c, v in zip(candles.index, candles['Open'], candles['High'],
+                                                candles['Low'], candles['Close'], candles['Volume'])
+        ]
+        if 'Bars' in candles:
+            for candle, bars in zip(formatted_data, candles['Bars']):
+                candle['bars'] = int(bars)
+        if 'Partial' in candles and len(candles) and candles['Partial'].iloc[-1]:
+            formatted_data[-1]['partial'] = True
+
+        logger.info(f"Fetched {len(hist)} candles for {symbol}, returning {len(formatted_data)}")
+        if not max_points:
+            return formatted_data
+        return {
+            'symbol': symbol,
+            'interval': interval,
+            'adjust': adjust,
+            'summary': candle_summary(hist),
+            'downsampling': {'method': downsample, 'max_points': max_points,
+                             'source_candles': len(hist), 'returned_candles': len(formatted_data)},
+            'candles': formatted_data,
+        }
 
     except Exception as e:
         logger.error(f"Failed to fetch historical data: {e}")
@@ -374,6 +745,614 @@ def get_historical_data(
 
 
 @mcp.tool()
+@offload('io')
+@instrument_tool
+def get_corporate_actions(symbol: str) -> List[Dict[str, Any]]:
+    """
+    Get a symbol's splits and dividends, as used to adjust its historical data.
+
+    Args:
+        symbol: Stock symbol (e.g., 'RELIANCE.NS')
+
+    Returns:
+        List of actions, newest first: date (ex-date), action ("split" or
+        "dividend") and value (split ratio, or dividend per share)
+    """
+    from .candle_store import get_corporate_actions as load_actions
+    from .corporate_actions import actions_to_records
+
+    logger.info(f"Getting corporate actions for {symbol}")
+
+    try:
+        return actions_to_records(load_actions(symbol))
+    except Exception as e:
+        logger.error(f"Failed to get corporate actions: {e}")
+        raise StockDataError(f"Corporate actions lookup failed: {e}")
+
+
+@mcp.tool()
+@offload('io')
+@instrument_tool
+def get_technical_indicators(symbol: str = "") -> List[Dict[str, Any]]:
+    """
+    Get incrementally maintained technical indicators (EMA 12/26, MACD, SMA 20/50,
+    RSI 14, 52-week high/low, 20-day average volume) as of the latest refresh.
+
+    Args:
+        symbol: Stock symbol (e.g., 'RELIANCE.NS'); empty for all tracked symbols
+
+    Returns:
+        List of indicator dictionaries, one per symbol
+    """
+    logger.info(f"Getting technical indicators for {symbol or 'all symbols'}")
+
+    try:
+        store = get_indicator_store()
+        if not store.symbols:
+            load_indicator_state()
+
+        if symbol:
+            values = store.get(symbol)
+            if values is None:
+                raise StockDataError(f"No indicator data for {symbol}, run refresh_market_data first")
+            return [values]
+
+        return store.all_values()
+
+    except Exception as e:
+        logger.error(f"Failed to get technical indicators: {e}")
+        raise StockDataError(f"Technical indicator lookup failed: {e}")
+
+
+@mcp.tool()
+@offload('cpu')
+@instrument_tool
+def get_stock_scores(
+    config: Dict[str, Any] = None,
+    limit: int = 15
+) -> Dict[str, Any]:
+    """
+    Score all stocks on P/E ratio, dividend yield and 52-week position and
+    allocate a buy percentage to buy-rated stocks in proportion to their score.
+
+    Args:
+        config: Optional scoring overrides, e.g. {"weights": {"pe": 0.5, "dividend": 0.3,
+            "position": 0.2}, "buy_threshold": 60, "pe_bins": [...], "pe_points": [...]}
+        limit: Number of top-scoring stocks to return
+
+    Returns:
+        Dictionary with rating counts, top stocks and the buy allocation
+    """
+    from .scoring import analyze_stocks
+
+    logger.info("Scoring stock universe")
+
+    try:
+        conn = get_database_connection()
+        df = pd.read_sql_query("""
+            SELECT trading_symbol, name, last_price, market_cap, pe_ratio, dividend_yield,
+                   volume, position_52w, day_change_pct, market_cap_cr
+            FROM stock_data
+            WHERE pe_ratio IS NOT NULL AND dividend_yield IS NOT NULL
+        """, conn)
+        conn.close()
+
+        if df.empty:
+            raise StockDataError("No stock data available, run refresh_market_data first")
+
+        scored = analyze_stocks(df, config)
+
+        columns = [
+            'trading_symbol', 'name', 'last_price', 'market_cap_cr', 'pe_ratio',
+            'dividend_yield', 'position_52w', 'day_change_pct', 'pe_score', 'div_score',
+            'pos_score', 'normalized_score', 'rating', 'buy_percentage',
+        ]
+        allocation = scored[scored['buy_percentage'] > 0].sort_values('buy_percentage', ascending=False)
+
+        logger.info(f"Scored {len(scored)} stocks, {len(allocation)} buy-rated")
+        return {
+            'total_stocks': len(scored),
+            'rating_counts': scored['rating'].value_counts().to_dict(),
+            'top_stocks': dataframe_to_records(scored[columns].head(limit)),
+            'allocation': dataframe_to_records(
+                allocation[['trading_symbol', 'name', 'normalized_score', 'buy_percentage', 'last_price']]
+            ),
+        }
+
+    except Exception as e:
+        logger.error(f"Failed to score stocks: {e}")
+        raise StockDataError(f"Stock scoring failed: {e}")
+
+
+@mcp.tool()
+@offload('cpu')
+@instrument_tool
+def optimize_portfolio(
+    budget: float = None,
+    max_stock_weight: float = None,
+    max_sector_weight: float = None,
+    min_volume: int = None,
+    risk_aversion: float = None,
+    scoring_config: Dict[str, Any] = None
+) -> Dict[str, Any]:
+    """
+    Allocate a cash budget across buy-rated stocks under position, sector and
+    liquidity limits, buying whole shares at the last price.
+
+    Args:
+        budget: Cash to invest in rupees (default 10,00,000)
+        max_stock_weight: Maximum fraction of the budget in one stock (default 0.10)
+        max_sector_weight: Maximum fraction of the budget in one sector (default 0.30)
+        min_volume: Minimum daily traded volume for a stock to be considered
+        risk_aversion: Penalty on portfolio variance from one-year daily return
+            covariance, 0 to ignore risk (default 1.0)
+        scoring_config: Optional scoring overrides, as for get_stock_scores
+
+    Returns:
+        Dictionary with the positions (shares, value, weights) and a summary
+    """
+    from .allocation import optimize_allocation
+    from .scoring import analyze_stocks
+
+    logger.info("Optimizing portfolio allocation")
+
+    try:
+        conn = get_database_connection()
+        df = pd.read_sql_query("""
+            SELECT symbol_token, trading_symbol, name, sector, last_price, pe_ratio,
+                   dividend_yield, volume, position_52w
+            FROM stock_data
+            WHERE pe_ratio IS NOT NULL AND dividend_yield IS NOT NULL
+        """, conn)
+        conn.close()
+
+        if df.empty:
+            raise StockDataError("No stock data available, run refresh_market_data first")
+
+        scored = analyze_stocks(df, scoring_config)
+        constraints = {
+            'budget': budget,
+            'max_stock_weight': max_stock_weight,
+            'max_sector_weight': max_sector_weight,
+            'min_volume': min_volume,
+            'risk_aversion': risk_aversion,
+        }
+
+        covariance = None
+        if risk_aversion != 0:
+            candidates = scored[scored['buy_percentage'] > 0]
+            try:
+                covariance = annualized_covariance(candidates)
+            except Exception as e:
+                logger.warning(f"Optimizing without covariance: {e}")
+
+        allocation, summary = optimize_allocation(scored, covariance=covariance, constraints=constraints)
+
+        columns = [
+            'trading_symbol', 'name', 'sector', 'last_price', 'normalized_score',
+            'target_weight', 'final_weight', 'shares', 'value',
+        ]
+        logger.info(f"Allocated {summary['invested']:.2f} across {summary['positions']} positions")
+        return {
+            'summary': summary,
+            'positions': dataframe_to_records(allocation[columns]) if not allocation.empty else [],
+        }
+
+    except Exception as e:
+        logger.error(f"Failed to optimize portfolio: {e}")
+        raise StockDataError(f"Portfolio optimization failed: {e}")
+
+
+@mcp.tool()
+@offload('io')
+@instrument_tool
+def screen_stocks(
+    filters: str = "",
+    sort_by: str = "",
+    columns: List[str] = None,
+    limit: int = 50
+) -> List[Dict[Hashable, Any]]:
+    """
+    Screen stocks with a filter and sort expression instead of hand-written SQL.
+
+    Filters combine conditions with and/or/not and parentheses. Conditions are
+    `field op value` (op: < <= > >= = !=), `field between a and b`,
+    `field in (a, b)`, `field like 'pattern'` and `field is [not] null`.
+    Text values are single-quoted; numbers may have a trailing % (ignored).
+
+    Fields: trading_symbol, name, sector, exchange, last_price, open_price, high_price,
+    low_price, close_price, volume, week_high_52, week_low_52, market_cap, pe_ratio,
+    dividend_yield, position_52w, day_change_pct, market_cap_cr, pct_from_52w_high,
+    pct_from_52w_low, turnover (aliases: symbol, price, pe, yield).
+
+    Args:
+        filters: e.g. "pe < 15 and yield > 2% and pct_from_52w_low <= 10"
+        sort_by: e.g. "dividend_yield desc, pe_ratio" or "-dividend_yield"
+        columns: Extra fields to return
+        limit: Maximum rows to return (1-500)
+
+    Returns:
+        List of matching stocks
+    """
+    from .screener import compile_screen
+
+    logger.info(f"Screening stocks: filters={filters!r} sort_by={sort_by!r}")
+
+    try:
+        query, params = compile_screen(filters, sort_by, columns, limit)
+
+        conn = get_database_connection()
+        results = pd.read_sql_query(query, conn, params=params)
+        conn.close()
+
+        logger.info(f"Screen returned {len(results)} rows")
+        return dataframe_to_records(results)
+
+    except Exception as e:
+        logger.error(f"Stock screen failed: {e}")
+        raise StockDataError(f"Stock screen failed: {e}")
+
+
+@mcp.tool()
+@offload('cpu')
+@instrument_tool
+def get_return_statistics(
+    symbols: List[str],
+    horizons: List[str] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Multi-horizon returns, CAGR, annualized volatility, 52-week range and average
+    volumes for any set of symbols, computed from one cached daily history per symbol.
+
+    Args:
+        symbols: Stock or ETF symbols (e.g., ['GOLDBEES.NS', 'RELIANCE.NS'])
+        horizons: Subset of 1w, 1m, 3m, 6m, 1y, 3y (default: all)
+
+    Returns:
+        Dictionary keyed by symbol with returns and cagr in percent
+    """
+    from .returns import RETURN_HORIZONS, get_return_stats
+
+    logger.info(f"Computing return statistics for {len(symbols)} symbols")
+
+    try:
+        if horizons:
+            unknown = set(horizons) - set(RETURN_HORIZONS)
+            if unknown:
+                raise StockDataError(f"Unknown horizons: {', '.join(sorted(unknown))}")
+
+        stats = get_return_stats(symbols, horizons)
+        if not stats:
+            raise StockDataError("No historical data available for the requested symbols")
+
+        return stats
+
+    except Exception as e:
+        logger.error(f"Failed to compute return statistics: {e}")
+        raise StockDataError(f"Return statistics failed: {e}")
+
+
+@mcp.tool()
+@offload('cpu')
+@instrument_tool
+def get_correlation_matrix(
+    symbols: List[str] = None,
+    window: int = 252,
+    shrinkage: bool = False
+) -> Dict[str, Any]:
+    """
+    Daily-return correlation matrix and annualized volatilities over a rolling window.
+    Matrices are cached per universe and window and updated as new bars arrive.
+
+    Args:
+        symbols: Stock or ETF symbols (e.g., ['GOLDBEES.NS', 'NIFTYBEES.NS']); default: all
+            stocks in the database, which must then be at most 100 symbols
+        window: Number of trading days in the window (default 252, one year)
+        shrinkage: Apply Ledoit-Wolf shrinkage to the covariance before deriving correlations
+
+    Returns:
+        Dictionary with symbols, correlation (rows in symbol order), volatility
+        (annualized percent), as_of, observations and shrinkage_intensity
+    """
+    from .correlation import CORRELATION_MATRIX_MAX_SYMBOLS, TRADING_DAYS_PER_YEAR
+
+    logger.info(f"Computing correlation matrix over {window} days")
+
+    try:
+        universe = universe_symbols(symbols)
+        if len(universe) > CORRELATION_MATRIX_MAX_SYMBOLS:
+            raise StockDataError(
+                f"{len(universe)} symbols is too many for a full matrix "
+                f"(max {CORRELATION_MATRIX_MAX_SYMBOLS}), use get_correlated_pairs instead"
+            )
+
+        result = get_correlation_service().get(universe, window=window, shrinkage=shrinkage)
+        volatility = np.sqrt(np.diag(result['covariance']) * TRADING_DAYS_PER_YEAR) * 100
+
+        return {
+            'symbols': result['symbols'],
+            'correlation': np.round(result['correlation'], 4).tolist(),
+            'volatility': dict(zip(result['symbols'], np.round(volatility, 2).tolist())),
+            'as_of': result['as_of'],
+            'observations': result['observations'],
+            'shrinkage_intensity': result['shrinkage_intensity'],
+        }
+
+    except Exception as e:
+        logger.error(f"Failed to compute correlation matrix: {e}")
+        raise StockDataError(f"Correlation matrix failed: {e}")
+
+
+@mcp.tool()
+@offload('cpu')
+@instrument_tool
+def get_correlated_pairs(
+    symbols: List[str] = None,
+    window: int = 252,
+    limit: int = 20,
+    least_correlated: bool = False,
+    shrinkage: bool = False
+) -> Dict[str, Any]:
+    """
+    Most (or least) correlated pairs in a universe of any size, plus each symbol's
+    average correlation with the rest. Useful for spotting concentration risk and
+    diversifiers such as gold ETFs.
+
+    Args:
+        symbols: Stock or ETF symbols; default: all stocks in the database
+        window: Number of trading days in the window (default 252, one year)
+        limit: Number of pairs to return (default 20)
+        least_correlated: Return the least correlated pairs instead
+        shrinkage: Apply Ledoit-Wolf shrinkage to the covariance
+
+    Returns:
+        Dictionary with pairs, average_correlation by symbol, as_of and observations
+    """
+    from .correlation import top_pairs
+
+    logger.info(f"Finding correlated pairs over {window} days")
+
+    try:
+        universe = universe_symbols(symbols)
+        result = get_correlation_service().get(universe, window=window, shrinkage=shrinkage)
+        correlation = result['correlation']
+
+        n_symbols = len(result['symbols'])
+        average = (correlation.sum(axis=1) - np.diag(correlation)) / max(n_symbols - 1, 1)
+
+        return {
+            'pairs': top_pairs(result['symbols'], correlation, limit=limit, ascending=least_correlated),
+            'average_correlation': dict(zip(result['symbols'], np.round(average, 4).tolist())),
+            'as_of': result['as_of'],
+            'observations': result['observations'],
+            'shrinkage_intensity': result['shrinkage_intensity'],
+        }
+
+    except Exception as e:
+        logger.error(f"Failed to find correlated pairs: {e}")
+        raise StockDataError(f"Correlated pairs failed: {e}")
+
+
+@mcp.tool()
+@offload('io')
+@instrument_tool
+def get_etf_data(category: str = "", refresh: bool = False) -> List[Dict[Hashable, Any]]:
+    """
+    Latest prices, 52-week range and distance from the 52-week high/low for the
+    tracked Indian ETFs (equity, sectoral, gold, liquid, international).
+
+    Args:
+        category: Filter on ETF type, e.g. "gold", "sectoral", "large cap" (default: all)
+        refresh: Fetch fresh snapshots before reading (done automatically when the table is empty)
+
+    Returns:
+        List of ETFs ordered by type and symbol
+    """
+    from .etfs import ETF_SNAPSHOT_COLUMNS
+
+    logger.info(f"Fetching ETF data (category: {category or 'all'})")
+
+    try:
+        conn = get_database_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT to_regclass('etf_data') IS NOT NULL")
+        populated = cursor.fetchone()[0]
+        if populated:
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM etf_data)")
+            populated = cursor.fetchone()[0]
+        cursor.close()
+        conn.close()
+
+        if refresh or not populated:
+            initialize_database()
+            scrape_etf_data()
+
+        conn = get_database_connection()
+        results = pd.read_sql_query(f"""
+            SELECT {', '.join(ETF_SNAPSHOT_COLUMNS)}, pct_from_52w_high, pct_from_52w_low, last_updated
+            FROM etf_data
+            WHERE etf_type ILIKE %s
+            ORDER BY etf_type, symbol
+        """, conn, params=(f"%{category}%",))
+        conn.close()
+
+        return dataframe_to_records(results)
+
+    except Exception as e:
+        logger.error(f"Failed to fetch ETF data: {e}")
+        raise StockDataError(f"ETF data failed: {e}")
+
+
+@mcp.tool()
+@offload('cpu')
+@instrument_tool
+def backtest_strategy(
+    symbols: List[str] = None,
+    years: int = 5,
+    rebalance: str = "monthly",
+    scoring_config: Dict[str, Any] = None,
+    transaction_cost_bps: float = 10.0,
+    static_fundamentals: bool = False,
+    sweep_step: float = 0.0
+) -> Dict[str, Any]:
+    """
+    Backtest the P/E, dividend and 52-week position scoring strategy: at each
+    rebalance, buy stocks at or above the buy threshold in proportion to their
+    score, and compare with an equal-weight portfolio of the same stocks.
+
+    P/E and dividend yield come from the daily snapshots stored on each
+    refresh. Before the first snapshot they are unknown (scored 0) unless
+    static_fundamentals applies today's values to the whole period, which
+    has look-ahead bias.
+
+    Args:
+        symbols: Stock symbols (default: all stocks in the database)
+        years: Backtest length in years (default 5)
+        rebalance: weekly, monthly, quarterly or yearly (default monthly)
+        scoring_config: Optional scoring overrides, as for get_stock_scores
+        transaction_cost_bps: Cost per unit of traded value in basis points (default 10)
+        static_fundamentals: Use the latest fundamentals for every date
+        sweep_step: If > 0, also backtest every pe/dividend/position weight
+            combination on this grid (e.g. 0.1) in parallel
+
+    Returns:
+        Dictionary with metrics (total_return, cagr, volatility, sharpe, max_drawdown,
+        average_turnover and hit_rate in percent), benchmark metrics, forward returns
+        by rating, the equity curve at each rebalance and, with sweep_step, the best
+        weight combinations
+    """
+    from .backtest import REBALANCE_FREQUENCIES, load_backtest_data, run_backtest, sweep_backtests, weight_grid
+
+    logger.info(f"Backtesting scoring strategy over {years} years ({rebalance})")
+
+    try:
+        if rebalance not in REBALANCE_FREQUENCIES:
+            raise StockDataError(f"rebalance must be one of: {', '.join(REBALANCE_FREQUENCIES)}")
+
+        universe = universe_symbols(symbols)
+
+        conn = get_database_connection()
+        snapshots = pd.read_sql_query("""
+            SELECT symbol_token, snapshot_date, pe_ratio, dividend_yield
+            FROM stock_data_history
+            WHERE symbol_token = ANY(%s)
+        """, conn, params=(universe,))
+        conn.close()
+
+        data = load_backtest_data(universe, snapshots, years=years, static_fundamentals=static_fundamentals)
+        start = (data['close'].index[-1] - pd.DateOffset(years=years)).date().isoformat()
+
+        result = run_backtest(data, scoring_config, rebalance, transaction_cost_bps, start)
+        curve = result.pop('equity_curve')
+        rebalance_curve = curve.groupby(curve.index.to_period(REBALANCE_FREQUENCIES[rebalance])).tail(1)
+        result['equity_curve'] = [
+            {'date': date.date().isoformat(), 'strategy': round(row['strategy'], 4),
+             'benchmark': round(row['benchmark'], 4)}
+            for date, row in rebalance_curve.iterrows()
+        ]
+        result['fundamentals_coverage'] = float(data['pe_ratio'].notna().to_numpy().mean() * 100)
+
+        if sweep_step > 0:
+            overrides = [{**(scoring_config or {}), **grid} for grid in weight_grid(sweep_step)]
+            sweep = sweep_backtests(data, overrides, rebalance, transaction_cost_bps, start)
+            sweep['weights'] = sweep.pop('config').map(lambda override: override['weights'])
+            result['sweep'] = dataframe_to_records(sweep.head(10))
+
+        logger.info(f"Backtest finished: CAGR {result['metrics']['cagr']:.2f}%")
+        return result
+
+    except Exception as e:
+        logger.error(f"Backtest failed: {e}")
+        raise StockDataError(f"Backtest failed: {e}")
+
+
+@mcp.tool()
+def get_server_metrics(kind: str = "", tool: str = "", reset: bool = False,
+                       prometheus: bool = False) -> Dict[str, Any]:
+    """
+    Latency, call, error, row and byte counts for MCP tools, API provider calls
+    and database statements since the server started (or the last reset).
+
+    Provider and database series carry the tool that triggered them, e.g. the
+    YahooFinanceProvider.get_company_info (.info), get_historical_data (.history)
+    and INSERT/COMMIT series under refresh_market_data show where a refresh spends its time.
+
+    Args:
+        kind: Only "tool", "provider" or "db" series (default: all)
+        tool: Only series recorded by this tool (default: all)
+        reset: Clear all series after reading
+        prometheus: Also return the Prometheus text format
+
+    Returns:
+        Dictionary with uptime_s, startup (startup phase and lazy import
+        timings in ms), db_pool and refresh (shared connection pool and refresh
+        scheduler counters), executors (busy, total and queued worker threads
+        per pool), coalescing (executed and coalesced identical concurrent
+        provider and tool calls), analytics (DuckDB queries and table mirrors,
+        once the engine is in use), series (slowest total time first), plus prometheus
+        text when requested
+    """
+    logger.info(f"Reading server metrics (kind: {kind or 'all'}, tool: {tool or 'all'})")
+
+    series = [row for row in metrics.snapshot()
+              if (not kind or row['kind'] == kind) and (not tool or row['tool'] == tool)]
+    result = {'uptime_s': round(time.time() - metrics.started, 1), 'startup': startup_report(),
+              'db_pool': db_pool.stats(), 'refresh': refresh_scheduler.status(),
+              'executors': executor_stats(), 'coalescing': coalescing_stats(), 'series': series}
+    if analytics_engine is not None:
+        result['analytics'] = analytics_engine.stats()
+    if prometheus:
+        result['prometheus'] = metrics.render_prometheus()
+    if reset:
+        metrics.reset()
+    return result
+
+
+@mcp.tool()
+@offload('io', coalesce=False)
+def profile_tool_call(tool: str, arguments: Optional[Dict[str, Any]] = None, mode: str = "sample",
+                      include_result: bool = False) -> Dict[str, Any]:
+    """
+    Run one tool call under a profiler and report where its time went.
+
+    The profile is saved to PROFILE_DIR (the newest PROFILE_KEEP are kept):
+    "sample" mode writes speedscope JSON (open at https://www.speedscope.app),
+    "cprofile" mode writes a pstats file (python -m pstats, snakeviz).
+
+    Args:
+        tool: Tool to run, e.g. "query_database" or "refresh_market_data"
+        arguments: The tool's arguments, e.g. {"sql_query": "SELECT ..."}
+        mode: "sample" (low overhead) or "cprofile" (every function call, slower)
+        include_result: Also return the tool's result
+
+    Returns:
+        Dictionary with duration_ms, artifact (file path), top (hottest functions
+        with self and total ms) and error or result
+    """
+    logger.info(f"Profiling {tool} ({mode})")
+
+    if tool not in instrumented_tools:
+        raise StockDataError(f"Unknown tool: {tool}. Available: {', '.join(sorted(instrumented_tools))}")
+    if mode not in PROFILE_MODES:
+        raise StockDataError(f"Unknown profile mode: {mode}. Use one of {PROFILE_MODES}")
+
+    error = None
+    with profile(tool, mode=mode, min_ms=0) as report:
+        try:
+            result = instrumented_tools[tool](**(arguments or {}))
+        except Exception as e:
+            error = str(e)
+
+    if error is not None:
+        report['error'] = error
+    elif include_result:
+        report['result'] = result
+    return report
+
+
+@mcp.tool()
+@offload('io')
+@instrument_tool
 def search_stocks(query: str) -> List[Dict[str, Any]]:
     """
     Search for stocks by name or symbol.
@@ -407,6 +1386,85 @@ def search_stocks(query: str) -> List[Dict[str, Any]]:
         raise StockDataError(f"Stock search failed: {e}")
 
 
+mark_startup('tools_registered')
+
+
+def transport_security_settings(host: str) -> Optional[TransportSecuritySettings]:
+    """
+    Host / Origin validation for the network transports.
+
+    Loopback names are always accepted, as is the listen address itself when
+    it is a concrete host; clients that reach a shared server by another name
+    (e.g. a Docker service name) need it in MCP_ALLOWED_HOSTS.
+
+    Args:
+        host: Listen address
+
+    Returns:
+        Settings for FastMCP, or None when MCP_DISABLE_HOST_CHECK is set
+    """
+    if MCP_DISABLE_HOST_CHECK:
+        logger.warning("DNS rebinding protection disabled (MCP_DISABLE_HOST_CHECK)")
+        return None
+    names = ['127.0.0.1', 'localhost', '[::1]']
+    if host not in ('0.0.0.0', '::', '127.0.0.1', 'localhost', '::1'):
+        names.append(f"[{host}]" if ':' in host else host)
+    allowed_hosts = [f"{name}:*" for name in names] + MCP_ALLOWED_HOSTS
+    allowed_origins = [f"http://{name}:*" for name in names] + MCP_ALLOWED_ORIGINS
+    if host in ('0.0.0.0', '::') and not MCP_ALLOWED_HOSTS:
+        logger.warning(f"Listening on {host} but only loopback Host headers are accepted; "
+                       "set MCP_ALLOWED_HOSTS to the names clients connect with")
+    return TransportSecuritySettings(enable_dns_rebinding_protection=True,
+                                     allowed_hosts=allowed_hosts, allowed_origins=allowed_origins)
+
+
+def run_server(transport: str = MCP_TRANSPORT, host: str = MCP_HOST, port: int = MCP_PORT) -> None:
+    """
+    Run the MCP server
+
+    With stdio each client launches its own server process. With sse or
+    streamable-http one long-lived process serves every client, which share the
+    database pool, provider caches, indicator state and refresh schedule.
+
+    Args:
+        transport: 'stdio', 'sse' or 'streamable-http'
+        host: Interface to listen on for network transports
+        port: Port to listen on for network transports
+    """
+    if transport not in MCP_TRANSPORTS:
+        raise ValueError(f"Unknown transport: {transport} (use one of {MCP_TRANSPORTS})")
+
+    # Prometheus endpoint/file when METRICS_PORT / METRICS_FILE are set
+    start_metrics_exporters()
+    # Background refreshes when REFRESH_INTERVAL is set
+    refresh_scheduler.start()
+    mark_startup('server_start')
+    if PRELOAD_MODULES:
+        preload(PRELOAD_MODULES, package=__package__, delay=PRELOAD_DELAY)
+    phases = ', '.join(f"{phase} {ms:.0f} ms" for phase, ms in startup_report()['phases_ms'].items())
+    logger.info(f"Startup: {phases}")
+
+    if transport != 'stdio':
+        mcp.settings.host = host
+        mcp.settings.port = port
+        mcp.settings.transport_security = transport_security_settings(host)
+        path = mcp.settings.sse_path if transport == 'sse' else mcp.settings.streamable_http_path
+        logger.info(f"Serving MCP over {transport} at http://{host}:{port}{path}")
+    try:
+        mcp.run(transport=transport)
+    finally:
+        refresh_scheduler.stop()
+        db_pool.close_all()
+
+
 if __name__ == "__main__":
-    # Run the MCP server
-    mcp.run()
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Stock analysis MCP server')
+    parser.add_argument('--transport', choices=MCP_TRANSPORTS, default=MCP_TRANSPORT,
+                        help='MCP transport (default MCP_TRANSPORT or stdio)')
+    parser.add_argument('--host', default=MCP_HOST, help=f'Listen address for network transports (default {MCP_HOST})')
+    parser.add_argument('--port', type=int, default=MCP_PORT, help=f'Listen port for network transports (default {MCP_PORT})')
+    args = parser.parse_args()
+
+    run_server(args.transport, args.host, args.port)
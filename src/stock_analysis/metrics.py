@@ -0,0 +1,385 @@
+"""
+Server metrics
+In-process latency histograms, call/error counts, rows and bytes for MCP tools, provider calls and database statements
+
+Series are keyed by (kind, name, tool): provider and database timings carry
+the tool that triggered them, so a slow refresh_market_data can be split into
+provider info/history calls and the database write. Exposed through the
+get_server_metrics tool and, optionally, as Prometheus text on METRICS_PORT
+or in METRICS_FILE.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+import psycopg2.extensions
+
+from .profiling import profile, should_profile
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds (Prometheus defaults, extended for slow refreshes)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+                   float('inf'))
+
+METRIC_KINDS = ['tool', 'provider', 'db']
+METRICS_NAMESPACE = 'stock_mcp'
+
+# Prometheus exporters, started by start_metrics_exporters
+METRICS_PORT = os.getenv('METRICS_PORT')
+METRICS_FILE = os.getenv('METRICS_FILE')
+METRICS_FILE_INTERVAL = float(os.getenv('METRICS_FILE_INTERVAL', '15'))
+
+PROVIDER_METHODS = ['get_quote', 'get_historical_data', 'get_raw_historical_data', 'get_corporate_actions',
+                    'get_company_info']
+
+# Tool currently running in this context, attached to provider and database series
+current_tool: ContextVar[str] = ContextVar('current_tool', default='')
+
+# Tool name -> instrumented function, for profile_tool_call
+instrumented_tools: Dict[str, Callable] = {}
+
+
+class Series:
+    """Histogram and totals for one (kind, name, tool)"""
+
+    __slots__ = ('count', 'errors', 'seconds', 'max_seconds', 'rows', 'bytes', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+    def observe(self, seconds: float, error: bool, rows: Optional[int], size: Optional[int]) -> None:
+        self.count += 1
+        self.errors += error
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.rows += rows or 0
+        self.bytes += size or 0
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+    def quantile(self, q: float) -> float:
+        """Quantile in seconds, interpolated within its histogram bucket"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen, lower = 0, 0.0
+        for bound, n in zip(LATENCY_BUCKETS, self.buckets):
+            if n and seen + n >= target:
+                upper = min(bound, self.max_seconds)
+                return lower + (upper - lower) * (target - seen) / n
+            seen += n
+            lower = bound
+        return self.max_seconds
+
+
+class MetricsRegistry:
+    """Thread-safe collection of Series"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series: Dict[tuple, Series] = {}
+        self.started = time.time()
+
+    def observe(self, kind: str, name: str, seconds: float, error: bool = False,
+                rows: Optional[int] = None, size: Optional[int] = None, tool: Optional[str] = None) -> None:
+        """Record one call"""
+        key = (kind, name, current_tool.get() if tool is None else tool)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = Series()
+            series.observe(seconds, error, rows, size)
+
+    @contextmanager
+    def timer(self, kind: str, name: str):
+        """
+        Time a block; set `rows`/`size` on the yielded dict to record them
+
+        Exceptions are counted as errors and re-raised.
+        """
+        result = {'rows': None, 'size': None}
+        started = time.perf_counter()
+        error = False
+        try:
+            yield result
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.observe(kind, name, time.perf_counter() - started, error, result['rows'], result['size'])
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+            self.started = time.time()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """One summary per series, slowest total time first"""
+        with self._lock:
+            items = [(key, series) for key, series in self._series.items()]
+            rows = []
+            for (kind, name, tool), series in items:
+                rows.append({
+                    'kind': kind,
+                    'name': name,
+                    'tool': tool or None,
+                    'count': series.count,
+                    'errors': series.errors,
+                    'total_ms': round(series.seconds * 1000, 2),
+                    'mean_ms': round(series.seconds / series.count * 1000, 3) if series.count else 0.0,
+                    'p50_ms': round(series.quantile(0.5) * 1000, 3),
+                    'p90_ms': round(series.quantile(0.9) * 1000, 3),
+                    'p99_ms': round(series.quantile(0.99) * 1000, 3),
+                    'max_ms': round(series.max_seconds * 1000, 3),
+                    'rows': series.rows,
+                    'bytes': series.bytes,
+                })
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (0.0.4)"""
+        with self._lock:
+            items = sorted(self._series.items())
+            lines = [
+                f"# HELP {METRICS_NAMESPACE}_uptime_seconds Seconds since the metrics were started or reset",
+                f"# TYPE {METRICS_NAMESPACE}_uptime_seconds gauge",
+                f"{METRICS_NAMESPACE}_uptime_seconds {time.time() - self.started:.3f}",
+            ]
+            for kind in METRIC_KINDS:
+                series_of_kind = [(name, tool, series) for (k, name, tool), series in items if k == kind]
+                if not series_of_kind:
+                    continue
+                metric = f"{METRICS_NAMESPACE}_{kind}"
+                lines.append(f"# HELP {metric}_duration_seconds {kind} call latency")
+                lines.append(f"# TYPE {metric}_duration_seconds histogram")
+                for name, tool, series in series_of_kind:
+                    labels = f'name="{_escape(name)}",tool="{_escape(tool)}"'
+                    cumulative = 0
+                    for bound, n in zip(LATENCY_BUCKETS, series.buckets):
+                        cumulative += n
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{metric}_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                    lines.append(f"{metric}_duration_seconds_sum{{{labels}}} {series.seconds:.6f}")
+                    lines.append(f"{metric}_duration_seconds_count{{{labels}}} {series.count}")
+                for total, attribute in (('errors', 'errors'), ('rows', 'rows'), ('bytes', 'bytes')):
+                    lines.append(f"# TYPE {metric}_{total}_total counter")
+                    for name, tool, series in series_of_kind:
+                        labels = f'name="{_escape(name)}",tool="{_escape(tool)}"'
+                        lines.append(f"{metric}_{total}_total{{{labels}}} {getattr(series, attribute)}")
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+metrics = MetricsRegistry()
+
+
+def _is_dataframe(value: Any) -> bool:
+    # Without importing pandas: nothing can be a DataFrame until it is loaded
+    pandas = sys.modules.get('pandas')
+    return pandas is not None and isinstance(value, pandas.DataFrame)
+
+
+def result_size(result: Any) -> tuple:
+    """(rows, serialized bytes) of a tool result"""
+    if _is_dataframe(result):
+        return len(result), None
+    rows = len(result) if isinstance(result, list) else None
+    try:
+        size = len(result.encode('utf-8')) if isinstance(result, str) else len(json.dumps(result, default=str))
+    except (TypeError, ValueError):
+        size = None
+    return rows, size
+
+
+def instrument_tool(func: Callable) -> Callable:
+    """
+    Record latency, errors, rows and result bytes for an MCP tool
+
+    Apply below @mcp.tool(); the wrapper keeps the signature and docstring
+    FastMCP reads. Works for sync and async tools. The latency excludes
+    measuring the result size. Tools listed in PROFILE_TOOLS are profiled.
+    """
+    name = func.__name__
+
+    def record(started: float, result: Any, error: bool) -> None:
+        seconds = time.perf_counter() - started
+        rows, size = result_size(result) if not error else (None, None)
+        metrics.observe('tool', name, seconds, error, rows, size, tool=name)
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            token = current_tool.set(name)
+            started = time.perf_counter()
+            try:
+                if should_profile(name):
+                    with profile(name):
+                        result = await func(*args, **kwargs)
+                else:
+                    result = await func(*args, **kwargs)
+            except BaseException:
+                record(started, None, True)
+                raise
+            finally:
+                current_tool.reset(token)
+            record(started, result, False)
+            return result
+        instrumented_tools[name] = async_wrapper
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = current_tool.set(name)
+        started = time.perf_counter()
+        try:
+            if should_profile(name):
+                with profile(name):
+                    result = func(*args, **kwargs)
+            else:
+                result = func(*args, **kwargs)
+        except BaseException:
+            record(started, None, True)
+            raise
+        finally:
+            current_tool.reset(token)
+        record(started, result, False)
+        return result
+    instrumented_tools[name] = wrapper
+    return wrapper
+
+
+def instrument_provider(provider: Any) -> Any:
+    """
+    Time a provider instance's data methods (e.g. YahooFinanceProvider.get_company_info
+    is yfinance's .info, get_historical_data its .history)
+    """
+    class_name = type(provider).__name__
+    for method_name in PROVIDER_METHODS:
+        method = getattr(provider, method_name, None)
+        if method is None or getattr(method, '_instrumented', False):
+            continue
+
+        def timed(*args, _method=method, _name=f"{class_name}.{method_name}", **kwargs):
+            with metrics.timer('provider', _name) as sizes:
+                result = _method(*args, **kwargs)
+                if _is_dataframe(result):
+                    sizes['rows'] = len(result)
+                return result
+
+        timed._instrumented = True
+        setattr(provider, method_name, timed)
+    return provider
+
+
+def _statement_name(query: Any) -> str:
+    text = query.decode('utf-8', 'replace') if isinstance(query, bytes) else str(query)
+    words = text.split(None, 1)
+    return words[0].upper() if words else 'EMPTY'
+
+
+class TimedCursor(psycopg2.extensions.cursor):
+    """Cursor recording each statement under its verb (SELECT, INSERT, ...)"""
+
+    def execute(self, query, vars=None):
+        with metrics.timer('db', _statement_name(query)) as sizes:
+            result = super().execute(query, vars)
+            sizes['rows'] = max(self.rowcount, 0)
+        return result
+
+    def executemany(self, query, vars_list):
+        with metrics.timer('db', _statement_name(query)) as sizes:
+            result = super().executemany(query, vars_list)
+            sizes['rows'] = max(self.rowcount, 0)
+        return result
+
+    def copy_expert(self, sql, file, size=8192):
+        with metrics.timer('db', 'COPY') as sizes:
+            result = super().copy_expert(sql, file, size)
+            sizes['rows'] = max(self.rowcount, 0)
+        return result
+
+
+class TimedConnection(psycopg2.extensions.connection):
+    """Connection whose cursors are TimedCursors and whose commits are timed"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cursor_factory = TimedCursor
+
+    def commit(self):
+        with metrics.timer('db', 'COMMIT'):
+            return super().commit()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = metrics.render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def write_metrics_file(path: str) -> None:
+    """Write the Prometheus text atomically (for node_exporter's textfile collector)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(metrics.render_prometheus())
+    os.replace(tmp_path, path)
+
+
+def start_metrics_exporters(port: Optional[str] = METRICS_PORT, path: Optional[str] = METRICS_FILE,
+                            interval: float = METRICS_FILE_INTERVAL) -> None:
+    """
+    Serve /metrics on `port` and/or rewrite `path` every `interval` seconds, in daemon threads
+
+    Args:
+        port: HTTP port (METRICS_PORT); None to disable
+        path: Prometheus text file (METRICS_FILE); None to disable
+        interval: Seconds between file writes
+    """
+    if port:
+        server = ThreadingHTTPServer(('0.0.0.0', int(port)), _MetricsHandler)
+        threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+        logger.info(f"Serving Prometheus metrics on :{port}/metrics")
+
+    if path:
+        def write_forever():
+            while True:
+                time.sleep(interval)
+                try:
+                    write_metrics_file(path)
+                except OSError as e:
+                    logger.warning(f"Could not write metrics to {path}: {e}")
+
+        threading.Thread(target=write_forever, name='metrics-file', daemon=True).start()
+        logger.info(f"Writing Prometheus metrics to {path} every {interval:g}s")
@@ -0,0 +1,218 @@
+"""
+Tool call profiling
+Opt-in sampling or deterministic (cProfile) profiles of MCP tool calls, saved as speedscope JSON or pstats files
+
+Enable for every call of some tools with PROFILE_TOOLS (comma-separated names,
+or * for all), or for one call with the profile_tool_call tool. When disabled
+the only cost is a set lookup per tool call.
+"""
+
+import cProfile
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ['sample', 'cprofile']
+
+# Tools profiled on every call ('*' for all)
+PROFILE_TOOLS = {name.strip() for name in os.getenv('PROFILE_TOOLS', '').split(',') if name.strip()}
+PROFILE_MODE = os.getenv('PROFILE_MODE', 'sample')
+
+# Artifacts; src/database is the volume mounted into the Docker container
+PROFILE_DIR = os.getenv(
+    'PROFILE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database', 'profiles')
+)
+# Newest artifacts kept in PROFILE_DIR
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', '50'))
+# Calls faster than this are summarized in the log but not saved
+PROFILE_MIN_MS = float(os.getenv('PROFILE_MIN_MS', '0'))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', '5'))
+PROFILE_TOP = 15
+
+# Set while a profile is recording in this context, so nested tool calls are not profiled twice
+_active: ContextVar[bool] = ContextVar('profiling_active', default=False)
+
+
+def should_profile(tool: str) -> bool:
+    """True when PROFILE_TOOLS covers this tool and no profile is already recording"""
+    return bool(PROFILE_TOOLS) and (tool in PROFILE_TOOLS or '*' in PROFILE_TOOLS) and not _active.get()
+
+
+class StackSampler:
+    """
+    Samples one thread's Python stack from a background thread
+
+    Args:
+        thread_id: Thread to sample (threading.get_ident())
+        interval_ms: Time between samples
+    """
+
+    def __init__(self, thread_id: int, interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS):
+        self.thread_id = thread_id
+        self.interval = interval_ms / 1000
+        self.frames: List[tuple] = []
+        self._frame_index: Dict[tuple, int] = {}
+        self.samples: List[tuple] = []
+        self.weights: List[float] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self) -> None:
+        self._last = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                key = (code.co_name, code.co_filename, code.co_firstlineno)
+                index = self._frame_index.get(key)
+                if index is None:
+                    index = self._frame_index[key] = len(self.frames)
+                    self.frames.append(key)
+                stack.append(index)
+                frame = frame.f_back
+            if stack:
+                self.samples.append(tuple(reversed(stack)))
+                self.weights.append((now - self._last) * 1000)
+            self._last = now
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        """Speedscope 'sampled' profile (https://www.speedscope.app)"""
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': [{'name': function, 'file': file, 'line': line}
+                                  for function, file, line in self.frames]},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': sum(self.weights),
+                'samples': [list(stack) for stack in self.samples],
+                'weights': self.weights,
+            }],
+            'exporter': 'stock_analysis.profiling',
+        }
+
+    def top(self, limit: int = PROFILE_TOP) -> List[Dict[str, Any]]:
+        """Functions with the most sampled time, inclusive of callees"""
+        total_ms: Dict[int, float] = {}
+        self_ms: Dict[int, float] = {}
+        for stack, weight in zip(self.samples, self.weights):
+            for index in set(stack):
+                total_ms[index] = total_ms.get(index, 0.0) + weight
+            self_ms[stack[-1]] = self_ms.get(stack[-1], 0.0) + weight
+        ranked = sorted(total_ms, key=lambda index: (-self_ms.get(index, 0.0), -total_ms[index]))[:limit]
+        return [_function_row(self.frames[index], self_ms.get(index, 0.0), total_ms[index]) for index in ranked]
+
+
+def _function_row(frame: tuple, self_ms: float, total_ms: float, calls: Optional[int] = None) -> Dict[str, Any]:
+    function, file, line = frame
+    row = {'function': f"{function} ({os.path.basename(file)}:{line})",
+           'self_ms': round(self_ms, 2), 'total_ms': round(total_ms, 2)}
+    if calls is not None:
+        row['calls'] = calls
+    return row
+
+
+def cprofile_top(profiler: cProfile.Profile, limit: int = PROFILE_TOP) -> List[Dict[str, Any]]:
+    """Functions with the most own time in a cProfile run"""
+    stats = pstats.Stats(profiler).stats
+    ranked = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+    return [_function_row((function, file, line), own * 1000, cumulative * 1000, calls)
+            for (file, line, function), (_, calls, own, cumulative, _) in ranked]
+
+
+def prune_profiles(directory: str = PROFILE_DIR, keep: int = PROFILE_KEEP) -> None:
+    """Delete all but the newest `keep` artifacts"""
+    try:
+        paths = [os.path.join(directory, name) for name in os.listdir(directory)
+                 if name.endswith(('.speedscope.json', '.pstats'))]
+    except OSError:
+        return
+    for path in sorted(paths, key=os.path.getmtime, reverse=True)[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+@contextmanager
+def profile(tool: str, mode: Optional[str] = None, min_ms: Optional[float] = None,
+            directory: Optional[str] = None):
+    """
+    Profile the block and save the artifact
+
+    Yields a report dict filled in on exit: tool, mode, duration_ms, artifact
+    (None when faster than min_ms) and top (the hottest functions).
+
+    Args:
+        tool: Tool name, used in the artifact name
+        mode: 'sample' (speedscope JSON) or 'cprofile' (pstats); default PROFILE_MODE
+        min_ms: Only save calls at least this slow; default PROFILE_MIN_MS
+        directory: Artifact directory; default PROFILE_DIR
+    """
+    mode = mode or PROFILE_MODE
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode: {mode} (use one of {PROFILE_MODES})")
+    min_ms = PROFILE_MIN_MS if min_ms is None else min_ms
+    directory = directory or PROFILE_DIR
+
+    report: Dict[str, Any] = {'tool': tool, 'mode': mode}
+    token = _active.set(True)
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        profiler = StackSampler(threading.get_ident())
+        profiler.start()
+    started = time.perf_counter()
+    try:
+        yield report
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        if mode == 'cprofile':
+            profiler.disable()
+        else:
+            profiler.stop()
+        _active.reset(token)
+
+        report['duration_ms'] = round(duration_ms, 2)
+        report['top'] = cprofile_top(profiler) if mode == 'cprofile' else profiler.top()
+        report['artifact'] = None
+        if duration_ms >= min_ms:
+            os.makedirs(directory, exist_ok=True)
+            stem = os.path.join(directory, f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{tool}")
+            if mode == 'cprofile':
+                path = f"{stem}.pstats"
+                profiler.dump_stats(path)
+            else:
+                path = f"{stem}.speedscope.json"
+                with open(path, 'w') as f:
+                    json.dump(profiler.speedscope(f"{tool} ({duration_ms:.0f} ms)"), f, separators=(',', ':'))
+            report['artifact'] = path
+            prune_profiles(directory)
+
+        saved = f", saved {report['artifact']}" if report['artifact'] else ''
+        logger.info(f"Profiled {tool} ({mode}): {duration_ms:.1f} ms{saved}")
+        for row in report['top'][:5]:
+            logger.info(f"  {row['self_ms']:>9.1f} ms self {row['total_ms']:>9.1f} ms total  {row['function']}")
@@ -0,0 +1,234 @@
+"""
+Interval resampling
+Derives coarser candles from one stored base series per symbol (1m -> 5m/15m/1h, 1d -> 1wk/1mo)
+
+Asking for 5m, 15m and 1h of a symbol used to cost one upstream call per
+interval. Instead the finest base interval that Yahoo Finance still serves
+for the requested period is fetched once into the candle store, and every
+coarser interval is aggregated from it.
+
+Intraday buckets are anchored to the NSE session open (09:15 IST), like
+Yahoo's own bars, so an hour bar covers 09:15-10:15 and the last one of the
+day is the 15:15-15:30 remainder; buckets never span two sessions. Daily
+bars roll up into calendar weeks (starting Monday), months and quarters.
+A bucket that is still forming (the market is open, or the week or month is
+not over) is flagged as partial.
+"""
+
+import logging
+import os
+from datetime import datetime
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .api_providers import StockAPIProvider
+from .candle_store import CANDLE_COLUMNS, CANDLE_MAX_AGE, get_candles, period_start
+
+logger = logging.getLogger(__name__)
+
+# NSE session: 375 one-minute bars from 09:15 IST
+MARKET_TIMEZONE = 'Asia/Kolkata'
+SESSION_OPEN_MINUTES = 9 * 60 + 15
+SESSION_MINUTES = 375
+
+# Minutes per intraday interval
+INTRADAY_MINUTES = {'1m': 1, '2m': 2, '5m': 5, '15m': 15, '30m': 30, '60m': 60, '90m': 90, '1h': 60}
+
+# Intraday intervals stored as base series, finest first
+INTRADAY_BASES = ['1m', '5m', '15m', '30m', '1h']
+
+# Days of history Yahoo Finance serves per intraday interval
+INTRADAY_LOOKBACK_DAYS = {'1m': 7, '2m': 60, '5m': 60, '15m': 60, '30m': 60, '60m': 730, '90m': 60, '1h': 730}
+
+# Calendar intervals built from daily bars (pandas period frequency)
+CALENDAR_PERIODS = {'1wk': 'W-SUN', '1mo': 'M', '3mo': 'Q'}
+
+# Intervals built from daily bars by counting trading days
+TRADING_DAY_GROUPS = {'5d': 5}
+
+# Seconds before stored intraday base candles are topped up (daily bases use CANDLE_MAX_AGE)
+INTRADAY_CANDLE_MAX_AGE = int(os.getenv('INTRADAY_CANDLE_MAX_AGE', '60'))
+
+NS_PER_MINUTE = 60 * 10 ** 9
+NS_PER_DAY = 24 * 60 * NS_PER_MINUTE
+
+
+def _period_days(period: str) -> Optional[float]:
+    now = datetime.now()
+    start = period_start(period, now)
+    if start is None:
+        return None
+    return (now - start).total_seconds() / 86400
+
+
+def base_interval(period: str, interval: str) -> str:
+    """
+    Interval to fetch and store for a requested period and interval
+
+    Intraday intervals use the finest base that divides them and that Yahoo
+    serves for the whole period; weekly and longer intervals use daily bars.
+
+    Args:
+        period: Yahoo Finance period (e.g., '5d', '1mo', 'max')
+        interval: Requested interval (e.g., '15m', '1wk')
+
+    Returns:
+        Base interval, which is the interval itself when nothing finer fits
+    """
+    if interval in CALENDAR_PERIODS or interval in TRADING_DAY_GROUPS:
+        return '1d'
+    if interval not in INTRADAY_MINUTES:
+        return interval
+
+    days = _period_days(period)
+    minutes = INTRADAY_MINUTES[interval]
+    for base in INTRADAY_BASES:
+        base_minutes = INTRADAY_MINUTES[base]
+        if base_minutes > minutes:
+            break
+        if minutes % base_minutes == 0 and days is not None and days <= INTRADAY_LOOKBACK_DAYS[base]:
+            return base
+    return interval
+
+
+def _aggregate(candles: pd.DataFrame, keys: np.ndarray) -> Tuple[pd.DataFrame, np.ndarray]:
+    """OHLCV per run of equal keys (candles sorted by time), and the index of each run's first bar"""
+    n = len(candles)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    aggregated = pd.DataFrame({
+        'Open': candles['Open'].to_numpy(dtype=np.float64)[starts],
+        'High': np.maximum.reduceat(candles['High'].to_numpy(dtype=np.float64), starts),
+        'Low': np.minimum.reduceat(candles['Low'].to_numpy(dtype=np.float64), starts),
+        'Close': candles['Close'].to_numpy(dtype=np.float64)[np.append(starts[1:], n) - 1],
+        'Volume': np.add.reduceat(candles['Volume'].to_numpy(dtype=np.float64), starts).astype(np.int64),
+    })
+    return aggregated, starts
+
+
+def _local_ns(index: pd.DatetimeIndex) -> np.ndarray:
+    """Nanoseconds since the epoch in NSE wall-clock time"""
+    if index.tz is None:
+        index = index.tz_localize(MARKET_TIMEZONE)
+    return index.tz_convert(MARKET_TIMEZONE).tz_localize(None).as_unit('ns').asi8
+
+
+def _to_index(local_ns: np.ndarray, like: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    """Wall-clock nanoseconds back to an index in the source's timezone"""
+    index = pd.DatetimeIndex(local_ns.astype('datetime64[ns]')).tz_localize(MARKET_TIMEZONE)
+    if like.tz is None:
+        return index.tz_localize(None)
+    return index.tz_convert(like.tz)
+
+
+def resample_intraday(candles: pd.DataFrame, interval: str, now: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """
+    Aggregate intraday candles into a coarser interval aligned to the session open
+
+    Args:
+        candles: OHLCV DataFrame indexed by timestamp, sorted
+        interval: Target interval (e.g., '15m', '1h')
+        now: Current time, for flagging a forming bar (default: now)
+
+    Returns:
+        OHLCV DataFrame with a Partial column, indexed by bucket start
+    """
+    step = INTRADAY_MINUTES[interval] * NS_PER_MINUTE
+    local = _local_ns(candles.index)
+    day = local - local % NS_PER_DAY
+    session_open = day + SESSION_OPEN_MINUTES * NS_PER_MINUTE
+    bucket = session_open + (local - session_open) // step * step
+
+    aggregated, starts = _aggregate(candles, bucket)
+    bucket_start = bucket[starts]
+    session_close = day[starts] + (SESSION_OPEN_MINUTES + SESSION_MINUTES) * NS_PER_MINUTE
+    bucket_end = np.minimum(bucket_start + step, session_close)
+
+    aggregated.index = _to_index(bucket_start, candles.index)
+    aggregated.index.name = candles.index.name
+    aggregated['Partial'] = bucket_end > _local_ns(pd.DatetimeIndex([now or pd.Timestamp.now(tz=MARKET_TIMEZONE)]))[0]
+    return aggregated
+
+
+def resample_daily(candles: pd.DataFrame, interval: str, now: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """
+    Aggregate daily candles into weeks, months, quarters or groups of trading days
+
+    Args:
+        candles: Daily OHLCV DataFrame indexed by timestamp, sorted
+        interval: '1wk', '1mo', '3mo' or '5d'
+        now: Current time, for flagging a forming bar (default: now)
+
+    Returns:
+        OHLCV DataFrame with a Partial column, indexed by period start
+        (the first trading day of the group for '5d')
+    """
+    now_ns = _local_ns(pd.DatetimeIndex([now or pd.Timestamp.now(tz=MARKET_TIMEZONE)]))[0]
+    local = _local_ns(candles.index)
+
+    if interval in TRADING_DAY_GROUPS:
+        keys = np.arange(len(candles)) // TRADING_DAY_GROUPS[interval]
+        aggregated, starts = _aggregate(candles, keys)
+        aggregated.index = candles.index[starts]
+        # Only the last group can be short; it is forming if it ends today or later
+        partial = np.zeros(len(starts), dtype=bool)
+        if len(candles) - starts[-1] < TRADING_DAY_GROUPS[interval]:
+            partial[-1] = local[-1] + NS_PER_DAY > now_ns
+        aggregated['Partial'] = partial
+    else:
+        periods = pd.DatetimeIndex(local.astype('datetime64[ns]')).to_period(CALENDAR_PERIODS[interval])
+        aggregated, starts = _aggregate(candles, periods.asi8)
+        bucket = periods[starts]
+        aggregated.index = _to_index(bucket.start_time.as_unit('ns').asi8, candles.index)
+        aggregated['Partial'] = (bucket + 1).start_time.as_unit('ns').asi8 > now_ns
+
+    aggregated.index.name = candles.index.name
+    return aggregated
+
+
+def resample_candles(candles: pd.DataFrame, interval: str, now: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """
+    Aggregate candles into a coarser interval
+
+    Args:
+        candles: OHLCV DataFrame indexed by timestamp
+        interval: Target interval
+        now: Current time, for flagging a forming bar (default: now)
+
+    Returns:
+        OHLCV DataFrame with a Partial column (empty input is returned as is)
+    """
+    if candles.empty:
+        return candles
+    candles = candles[CANDLE_COLUMNS].sort_index()
+    if interval in INTRADAY_MINUTES:
+        return resample_intraday(candles, interval, now)
+    if interval in CALENDAR_PERIODS or interval in TRADING_DAY_GROUPS:
+        return resample_daily(candles, interval, now)
+    raise ValueError(f"Cannot resample to interval: {interval}")
+
+
+def get_resampled_candles(symbol: str, period: str = '1mo', interval: str = '1d',
+                          provider: Optional[StockAPIProvider] = None, adjust: str = 'all') -> pd.DataFrame:
+    """
+    Candles for any interval, built from the symbol's stored base series
+
+    Args:
+        symbol: Stock symbol (e.g., 'RELIANCE.NS')
+        period: Yahoo Finance period
+        interval: Candle interval
+        provider: API provider (defaults to the configured provider)
+        adjust: Corporate action adjustment ('all', 'split' or 'none', see candle_store.get_candles)
+
+    Returns:
+        OHLCV DataFrame indexed by timestamp; resampled candles carry a Partial column
+    """
+    base = base_interval(period, interval)
+    max_age = INTRADAY_CANDLE_MAX_AGE if base in INTRADAY_MINUTES else CANDLE_MAX_AGE
+    candles = get_candles(symbol, period=period, interval=base, provider=provider, max_age=max_age,
+                          adjust=adjust)
+    if base == interval:
+        return candles
+    logger.info(f"Resampling {len(candles)} {base} candles of {symbol} to {interval}")
+    return resample_candles(candles, interval)
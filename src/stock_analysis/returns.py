@@ -0,0 +1,134 @@
+"""
+Returns engine
+Multi-horizon returns, CAGR, volatility and volume statistics from a single daily history per symbol
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .api_providers import StockAPIProvider
+from .candle_store import get_candles
+
+logger = logging.getLogger(__name__)
+
+# Return horizons as calendar offsets from the latest bar
+RETURN_HORIZONS = {
+    '1w': pd.DateOffset(weeks=1),
+    '1m': pd.DateOffset(months=1),
+    '3m': pd.DateOffset(months=3),
+    '6m': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '3y': pd.DateOffset(years=3),
+}
+
+# Horizon length in years, used to annualize returns of a year or more
+HORIZON_YEARS = {'1y': 1, '3y': 3}
+
+# History fetched per symbol: long enough for every horizon in RETURN_HORIZONS
+HISTORY_PERIOD = '3y'
+
+# A horizon is only reported if the history starts within this many days of its base date
+HORIZON_TOLERANCE_DAYS = 7
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def compute_return_stats(candles: pd.DataFrame,
+                         horizons: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Compute every statistic for one symbol from its daily candles
+
+    Args:
+        candles: Daily candles indexed by timestamp with Close, High, Low and Volume
+        horizons: Horizon names from RETURN_HORIZONS (default: all)
+
+    Returns:
+        Dictionary with current_price, volume, returns (percent by horizon),
+        cagr (percent, horizons of a year or more), volatility (annualized
+        percent over the last year), week_52_high/low and average volumes
+    """
+    horizons = horizons or list(RETURN_HORIZONS)
+    unknown = set(horizons) - set(RETURN_HORIZONS)
+    if unknown:
+        raise ValueError(f"Unknown horizons: {', '.join(sorted(unknown))}")
+
+    index = candles.index
+    close = candles['Close'].to_numpy(dtype=float)
+    volume = candles['Volume'].to_numpy(dtype=float)
+    latest_date = index[-1]
+    latest_close = close[-1]
+
+    # Base bar for every horizon in one searchsorted: last bar on or before the base date
+    base_dates = pd.DatetimeIndex([latest_date - RETURN_HORIZONS[h] for h in horizons])
+    positions = index.searchsorted(base_dates, side='right') - 1
+    tolerance = pd.Timedelta(days=HORIZON_TOLERANCE_DAYS)
+
+    returns = {}
+    cagr = {}
+    for horizon, base_date, position in zip(horizons, base_dates, positions):
+        if position < 0:
+            # History starts after the base date; accept it only if it starts close to it
+            if index[0] - base_date > tolerance:
+                continue
+            position = 0
+        base_close = close[position]
+        if base_close <= 0:
+            continue
+        growth = float(latest_close / base_close)
+        returns[horizon] = (growth - 1) * 100
+        if horizon in HORIZON_YEARS:
+            cagr[horizon] = (growth ** (1 / HORIZON_YEARS[horizon]) - 1) * 100
+
+    one_year = index >= latest_date - RETURN_HORIZONS['1y']
+    one_month = index >= latest_date - RETURN_HORIZONS['1m']
+    three_months = index >= latest_date - RETURN_HORIZONS['3m']
+
+    closes_1y = close[one_year]
+    if len(closes_1y) > 2:
+        daily_returns = np.diff(closes_1y) / closes_1y[:-1]
+        volatility = float(np.std(daily_returns, ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR) * 100)
+    else:
+        volatility = 0.0
+
+    return {
+        'as_of': latest_date.isoformat(),
+        'current_price': float(latest_close),
+        'volume': int(volume[-1]),
+        'returns': returns,
+        'cagr': cagr,
+        'volatility': volatility,
+        'week_52_high': float(candles['High'].to_numpy(dtype=float)[one_year].max()),
+        'week_52_low': float(candles['Low'].to_numpy(dtype=float)[one_year].min()),
+        'avg_volume_1m': float(volume[one_month].mean()),
+        'avg_volume_3m': float(volume[three_months].mean()),
+    }
+
+
+def get_return_stats(symbols: List[str], horizons: Optional[List[str]] = None,
+                     provider: Optional[StockAPIProvider] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Return statistics for a set of symbols, one cached daily history per symbol
+
+    Args:
+        symbols: Stock symbols (e.g., ['GOLDBEES.NS', 'RELIANCE.NS'])
+        horizons: Horizon names from RETURN_HORIZONS (default: all)
+        provider: API provider (defaults to the configured provider)
+
+    Returns:
+        Dictionary keyed by symbol; symbols without data are left out
+    """
+    results = {}
+    for symbol in symbols:
+        try:
+            candles = get_candles(symbol, period=HISTORY_PERIOD, interval='1d', provider=provider)
+            if candles.empty:
+                logger.warning(f"No history available for {symbol}")
+                continue
+            results[symbol] = compute_return_stats(candles, horizons)
+        except Exception as e:
+            logger.warning(f"Failed to compute return statistics for {symbol}: {e}")
+
+    return results
@@ -0,0 +1,121 @@
+"""
+Refresh scheduler
+One market data refresh at a time per server process, shared by every client
+
+In network mode many analysts share one server. Refresh requests that arrive
+while a refresh is running wait for it instead of starting their own, and
+requests within REFRESH_MIN_INTERVAL of the last refresh reuse it, so upstream
+and database load stays flat as clients are added. With REFRESH_INTERVAL set,
+a background thread also refreshes on a fixed schedule.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds between scheduled refreshes (0 disables the background schedule)
+REFRESH_INTERVAL = float(os.getenv('REFRESH_INTERVAL', '0'))
+# Refresh requests within this many seconds of the last refresh reuse it
+REFRESH_MIN_INTERVAL = float(os.getenv('REFRESH_MIN_INTERVAL', '60'))
+
+
+class RefreshScheduler:
+    """
+    Serializes and rate-limits calls to a refresh function
+
+    Args:
+        refresh: Function that refreshes the data (e.g., scrape_data)
+        interval: Seconds between scheduled refreshes once started
+        min_interval: Seconds during which a finished refresh is reused
+    """
+
+    def __init__(self, refresh: Callable[[], Any], interval: float = REFRESH_INTERVAL,
+                 min_interval: float = REFRESH_MIN_INTERVAL):
+        self._refresh = refresh
+        self.interval = interval
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.runs = 0
+        self.reused = 0
+        self.last_started: Optional[datetime] = None
+        self.last_finished: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self._finished_at: Optional[float] = None
+
+    def request(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Refresh now, or reuse a refresh that is running or just finished
+
+        Args:
+            force: Refresh even when the last refresh is recent (still waits
+                for a running refresh rather than starting a second one)
+
+        Returns:
+            Dict with refreshed (whether this call ran the refresh), age_s
+            (seconds since the refresh finished) and error (None on success)
+        """
+        requested = time.monotonic()
+        with self._lock:
+            # A refresh that finished while this call waited for the lock covers it
+            recent = self._finished_at is not None and (
+                self._finished_at >= requested or
+                (not force and requested - self._finished_at < self.min_interval))
+            if recent:
+                self.reused += 1
+                return self._result(refreshed=False)
+            self._run()
+            return self._result(refreshed=True)
+
+    def _run(self) -> None:
+        self.runs += 1
+        self.last_started = datetime.now()
+        try:
+            self._refresh()
+            self.last_error = None
+        except Exception as e:
+            logger.error(f"Scheduled refresh failed: {e}")
+            self.last_error = str(e)
+        finally:
+            self.last_finished = datetime.now()
+            self._finished_at = time.monotonic()
+
+    def _result(self, refreshed: bool) -> Dict[str, Any]:
+        return {'refreshed': refreshed, 'age_s': round(time.monotonic() - self._finished_at, 1),
+                'error': self.last_error}
+
+    def start(self) -> bool:
+        """Start the background schedule; False when interval is 0 or it is already running"""
+        if self.interval <= 0 or self._thread is not None:
+            return False
+        self._thread = threading.Thread(target=self._loop, name='refresh-scheduler', daemon=True)
+        self._thread.start()
+        logger.info(f"Refreshing market data every {self.interval:.0f}s")
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self) -> None:
+        while True:
+            self.request()
+            if self._stop.wait(self.interval):
+                return
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'interval_s': self.interval,
+            'min_interval_s': self.min_interval,
+            'running': self._lock.locked(),
+            'runs': self.runs,
+            'reused': self.reused,
+            'last_started': self.last_started.isoformat() if self.last_started else None,
+            'last_finished': self.last_finished.isoformat() if self.last_finished else None,
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,212 @@
+"""
+Stock scoring engine
+Vectorized P/E, dividend and 52-week position scoring with score-proportional buy allocation
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .constant_parameters import SCORING_CONFIG, DERIVED_METRIC_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# stock_data columns used in calculations (NUMERIC columns arrive as Decimal)
+NUMERIC_COLUMNS = [
+    'last_price', 'open_price', 'high_price', 'low_price', 'close_price', 'volume',
+    'week_high_52', 'week_low_52', 'market_cap', 'pe_ratio', 'dividend_yield',
+]
+
+
+def build_config(overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Merge scoring overrides into the default SCORING_CONFIG and validate the result
+
+    Args:
+        overrides: Partial config, e.g. {'weights': {'pe': 0.5}, 'buy_threshold': 60}
+
+    Returns:
+        Complete scoring config
+    """
+    config = {**SCORING_CONFIG, **(overrides or {})}
+    config['weights'] = {**SCORING_CONFIG['weights'], **(overrides or {}).get('weights', {})}
+
+    unknown = set(config) - set(SCORING_CONFIG)
+    if unknown:
+        raise ValueError(f"Unknown scoring options: {', '.join(sorted(unknown))}")
+
+    for name, points in (('pe', 'pe_points'), ('dividend', 'dividend_points'),
+                         ('position', 'position_points'), ('rating', 'ratings')):
+        bins = config[f'{name}_bins']
+        if list(bins) != sorted(bins):
+            raise ValueError(f"{name}_bins must be in ascending order")
+        if len(config[points]) != len(bins) + 1:
+            raise ValueError(f"{points} needs {len(bins) + 1} values for {len(bins)} bins")
+
+    if sum(config['weights'].values()) <= 0:
+        raise ValueError("Scoring weights must sum to a positive value")
+
+    return config
+
+
+def bucket_points(values, bins, points) -> np.ndarray:
+    """
+    Map values to points by bucket, for arrays of any shape
+
+    Args:
+        values: Array-like of values
+        bins: Ascending bucket edges
+        points: Points per bucket (len(bins) + 1 values)
+
+    Returns:
+        Float array of points with the same shape as values
+    """
+    return np.asarray(points, dtype=float)[np.digitize(values, bins)]
+
+
+def pe_scores(pe, config: Dict[str, Any]) -> np.ndarray:
+    """P/E score, 0 for missing or non-positive P/E"""
+    pe = np.asarray(pe, dtype=float)
+    valid = np.isfinite(pe) & (pe > 0)
+    return np.where(valid, bucket_points(np.nan_to_num(pe), config['pe_bins'], config['pe_points']), 0.0)
+
+
+def dividend_scores(dividend_yield, config: Dict[str, Any]) -> np.ndarray:
+    """Dividend yield score, 0 for missing or non-positive yield"""
+    dividend_yield = np.asarray(dividend_yield, dtype=float)
+    valid = np.isfinite(dividend_yield) & (dividend_yield > 0)
+    points = bucket_points(np.nan_to_num(dividend_yield), config['dividend_bins'], config['dividend_points'])
+    return np.where(valid, points, 0.0)
+
+
+def position_scores(position, config: Dict[str, Any]) -> np.ndarray:
+    """52-week position score, neutral points when the position is unknown"""
+    position = np.asarray(position, dtype=float)
+    points = bucket_points(np.nan_to_num(position), config['position_bins'], config['position_points'])
+    return np.where(np.isfinite(position), points, float(config['position_missing_points']))
+
+
+def total_scores(pe_score, div_score, pos_score, config: Dict[str, Any]) -> np.ndarray:
+    """Weighted total of the individual scores"""
+    weights = config['weights']
+    return (pe_score * weights['pe'] +
+            div_score * weights['dividend'] +
+            pos_score * weights['position'])
+
+
+def ratings(normalized_score, config: Dict[str, Any]) -> np.ndarray:
+    """Investment rating label for each normalized score"""
+    normalized_score = np.nan_to_num(np.asarray(normalized_score, dtype=float))
+    return np.asarray(config['ratings'], dtype=object)[np.digitize(normalized_score, config['rating_bins'])]
+
+
+def add_derived_metrics(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the derived metrics that stock_data maintains as generated columns
+
+    Rows read from the database already carry them; they are only computed
+    here for frames that do not (e.g. data fetched outside the database).
+
+    Args:
+        df: DataFrame with stock_data columns
+
+    Returns:
+        The same DataFrame with position_52w, day_change_pct, market_cap_cr,
+        pct_from_52w_high, pct_from_52w_low and turnover
+    """
+    for column in NUMERIC_COLUMNS + DERIVED_METRIC_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+
+    def missing(column: str, *sources: str) -> bool:
+        return column not in df.columns and all(source in df.columns for source in sources)
+
+    if missing('position_52w', 'last_price', 'week_high_52', 'week_low_52'):
+        price_range = (df['week_high_52'] - df['week_low_52']).replace(0, np.nan)
+        df['position_52w'] = (df['last_price'] - df['week_low_52']) / price_range * 100
+    if missing('day_change_pct', 'close_price', 'open_price'):
+        df['day_change_pct'] = (df['close_price'] - df['open_price']) / df['open_price'].replace(0, np.nan) * 100
+    if missing('market_cap_cr', 'market_cap'):
+        df['market_cap_cr'] = df['market_cap'] / 10000000
+    if missing('pct_from_52w_high', 'last_price', 'week_high_52'):
+        df['pct_from_52w_high'] = (df['week_high_52'] - df['last_price']) / df['week_high_52'].replace(0, np.nan) * 100
+    if missing('pct_from_52w_low', 'last_price', 'week_low_52'):
+        df['pct_from_52w_low'] = (df['last_price'] - df['week_low_52']) / df['week_low_52'].replace(0, np.nan) * 100
+    if missing('turnover', 'last_price', 'volume'):
+        df['turnover'] = df['last_price'] * df['volume']
+
+    return df
+
+
+def score_stocks(df: pd.DataFrame, config: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """
+    Score stocks on P/E, dividend yield and 52-week position
+
+    Args:
+        df: DataFrame with pe_ratio, dividend_yield and position_52w columns
+        config: Complete scoring config (defaults to SCORING_CONFIG)
+
+    Returns:
+        Copy of df with pe_score, div_score, pos_score, total_score,
+        normalized_score and rating columns
+    """
+    config = config or SCORING_CONFIG
+    scored = df.copy()
+
+    scored['pe_score'] = pe_scores(scored['pe_ratio'], config)
+    scored['div_score'] = dividend_scores(scored['dividend_yield'], config)
+    scored['pos_score'] = position_scores(scored['position_52w'], config)
+    scored['total_score'] = total_scores(
+        scored['pe_score'], scored['div_score'], scored['pos_score'], config
+    )
+
+    # Normalize to 100
+    max_score = scored['total_score'].max()
+    if max_score > 0:
+        scored['normalized_score'] = scored['total_score'] / max_score * 100
+    else:
+        scored['normalized_score'] = 0.0
+
+    scored['rating'] = ratings(scored['normalized_score'], config)
+    return scored
+
+
+def allocate(scored: pd.DataFrame, config: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """
+    Allocate a buy percentage to stocks at or above the buy threshold, proportional to score
+
+    Args:
+        scored: Output of score_stocks
+        config: Complete scoring config (defaults to SCORING_CONFIG)
+
+    Returns:
+        Copy of scored with a buy_percentage column (0 for stocks below the threshold)
+    """
+    config = config or SCORING_CONFIG
+
+    # Aligned on the index: trading_symbol is not unique (RELIANCE.NS and RELIANCE.BO)
+    buy_scores = scored['normalized_score'].where(scored['normalized_score'] >= config['buy_threshold'], 0.0)
+    total_buy_score = buy_scores.sum()
+
+    result = scored.drop(columns=['buy_percentage'], errors='ignore')
+    result['buy_percentage'] = buy_scores / total_buy_score * 100 if total_buy_score else 0.0
+    return result
+
+
+def analyze_stocks(df: pd.DataFrame, config: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """
+    Run the full pipeline: derived metrics, scoring and allocation
+
+    Args:
+        df: DataFrame of stock_data rows
+        config: Partial scoring config overrides
+
+    Returns:
+        Scored DataFrame sorted by normalized_score, highest first
+    """
+    config = build_config(config)
+    scored = score_stocks(add_derived_metrics(df.copy()), config)
+    result = allocate(scored, config)
+    return result.sort_values('normalized_score', ascending=False)
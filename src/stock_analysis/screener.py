@@ -0,0 +1,309 @@
+"""
+Stock screener
+Compiles a small filter/sort expression language into parameterized SQL on stock_data
+"""
+
+import logging
+import re
+from typing import Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Screenable fields: name -> (SQL expression, type)
+SCREENER_FIELDS = {
+    'trading_symbol': ('trading_symbol', 'text'),
+    'name': ('name', 'text'),
+    'sector': ('sector', 'text'),
+    'exchange': ('exchange', 'text'),
+    'last_price': ('last_price', 'number'),
+    'open_price': ('open_price', 'number'),
+    'high_price': ('high_price', 'number'),
+    'low_price': ('low_price', 'number'),
+    'close_price': ('close_price', 'number'),
+    'volume': ('volume', 'number'),
+    'week_high_52': ('week_high_52', 'number'),
+    'week_low_52': ('week_low_52', 'number'),
+    'market_cap': ('market_cap', 'number'),
+    'pe_ratio': ('pe_ratio', 'number'),
+    'dividend_yield': ('dividend_yield', 'number'),
+    # Derived metrics, generated columns maintained on each refresh
+    'position_52w': ('position_52w', 'number'),
+    'day_change_pct': ('day_change_pct', 'number'),
+    'market_cap_cr': ('market_cap_cr', 'number'),
+    'pct_from_52w_high': ('pct_from_52w_high', 'number'),
+    'pct_from_52w_low': ('pct_from_52w_low', 'number'),
+    'turnover': ('turnover', 'number'),
+}
+
+# Shorthand names accepted in expressions
+SCREENER_ALIASES = {
+    'symbol': 'trading_symbol',
+    'price': 'last_price',
+    'pe': 'pe_ratio',
+    'yield': 'dividend_yield',
+    'div_yield': 'dividend_yield',
+}
+
+# Columns always returned with screen results
+SCREENER_DEFAULT_COLUMNS = ['trading_symbol', 'name', 'sector', 'last_price', 'pe_ratio', 'dividend_yield']
+
+SCREENER_MAX_LIMIT = 500
+
+# Fields commonly filtered or sorted on without an index from the table schemas
+SCREENER_INDEXED_FIELDS = ['sector', 'market_cap', 'pe_ratio', 'dividend_yield']
+
+COMPARISON_OPERATORS = {'<': '<', '<=': '<=', '>': '>', '>=': '>=', '=': '=', '!=': '<>', '<>': '<>'}
+
+TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<number>-?\d+(?:\.\d+)?)%? |
+        (?P<string>'[^']*') |
+        (?P<op><=|>=|!=|<>|=|<|>) |
+        (?P<punct>[(),]) |
+        (?P<word>[A-Za-z_][A-Za-z0-9_]*)
+    )
+""", re.VERBOSE)
+
+KEYWORDS = {'and', 'or', 'not', 'between', 'in', 'is', 'null', 'like'}
+
+
+def resolve_field(name: str) -> str:
+    """Return the canonical field name, raising ValueError for unknown fields"""
+    field = SCREENER_ALIASES.get(name.lower(), name.lower())
+    if field not in SCREENER_FIELDS:
+        raise ValueError(
+            f"Unknown field '{name}'. Available fields: {', '.join(sorted(SCREENER_FIELDS))}"
+        )
+    return field
+
+
+def index_statements() -> List[str]:
+    """
+    CREATE INDEX statements backing the indexed screener fields
+    """
+    return [
+        f"CREATE INDEX IF NOT EXISTS idx_screen_{field} ON stock_data ({SCREENER_FIELDS[field][0]})"
+        for field in SCREENER_INDEXED_FIELDS
+    ]
+
+
+def tokenize(expression: str) -> List[Tuple[str, Any]]:
+    """
+    Split a filter expression into (kind, value) tokens
+
+    Kinds are number, string, op, punct, keyword and field.
+    """
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+
+    while position < len(expression):
+        match = TOKEN_PATTERN.match(expression, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Unexpected input at position {position}: '{expression[position:position + 20]}'")
+        position = match.end()
+
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == 'number':
+            tokens.append(('number', float(text)))
+        elif kind == 'string':
+            tokens.append(('string', text[1:-1]))
+        elif kind == 'word' and text.lower() in KEYWORDS:
+            tokens.append(('keyword', text.lower()))
+        elif kind == 'word':
+            tokens.append(('field', resolve_field(text)))
+        else:
+            tokens.append((kind, text))
+
+    return tokens
+
+
+class FilterCompiler:
+    """
+    Recursive descent compiler for filter expressions
+
+    Grammar:
+        expression := term ('or' term)*
+        term       := factor ('and' factor)*
+        factor     := 'not' factor | '(' expression ')' | condition
+        condition  := field op value
+                    | field ['not'] 'between' value 'and' value
+                    | field ['not'] 'in' '(' value (',' value)* ')'
+                    | field ['not'] 'like' string
+                    | field 'is' ['not'] 'null'
+    """
+
+    def __init__(self, expression: str):
+        self.tokens = tokenize(expression)
+        self.position = 0
+        self.params: List[Any] = []
+        self.fields: List[str] = []
+
+    def compile(self) -> str:
+        """Return the SQL condition; parameters are collected in self.params"""
+        sql = self._expression()
+        if self.position < len(self.tokens):
+            raise ValueError(f"Unexpected '{self.tokens[self.position][1]}' in filter")
+        return sql
+
+    def _peek(self) -> Optional[Tuple[str, Any]]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _accept(self, kind: str, value: Any = None) -> bool:
+        token = self._peek()
+        if token and token[0] == kind and (value is None or token[1] == value):
+            self.position += 1
+            return True
+        return False
+
+    def _expect(self, kind: str, value: Any = None) -> Any:
+        token = self._peek()
+        if not token or token[0] != kind or (value is not None and token[1] != value):
+            found = f"'{token[1]}'" if token else "end of filter"
+            raise ValueError(f"Expected {value or kind} but found {found}")
+        self.position += 1
+        return token[1]
+
+    def _expression(self) -> str:
+        parts = [self._term()]
+        while self._accept('keyword', 'or'):
+            parts.append(self._term())
+        return parts[0] if len(parts) == 1 else '(' + ' OR '.join(parts) + ')'
+
+    def _term(self) -> str:
+        parts = [self._factor()]
+        while self._accept('keyword', 'and'):
+            parts.append(self._factor())
+        return parts[0] if len(parts) == 1 else '(' + ' AND '.join(parts) + ')'
+
+    def _factor(self) -> str:
+        if self._accept('keyword', 'not'):
+            return f"NOT {self._factor()}"
+        if self._accept('punct', '('):
+            sql = self._expression()
+            self._expect('punct', ')')
+            return f"({sql})"
+        return self._condition()
+
+    def _value(self, field: str) -> Any:
+        token = self._peek()
+        field_type = SCREENER_FIELDS[field][1]
+        expected = 'number' if field_type == 'number' else 'string'
+        if not token or token[0] != expected:
+            found = f"'{token[1]}'" if token else "end of filter"
+            raise ValueError(f"Field '{field}' needs a {expected} value, found {found}")
+        self.position += 1
+        self.params.append(token[1])
+        return '%s'
+
+    def _condition(self) -> str:
+        field = self._expect('field')
+        self.fields.append(field)
+        column = SCREENER_FIELDS[field][0]
+
+        if self._accept('keyword', 'is'):
+            negate = self._accept('keyword', 'not')
+            self._expect('keyword', 'null')
+            return f"{column} IS {'NOT ' if negate else ''}NULL"
+
+        negate = 'NOT ' if self._accept('keyword', 'not') else ''
+
+        if self._accept('keyword', 'between'):
+            low = self._value(field)
+            self._expect('keyword', 'and')
+            high = self._value(field)
+            return f"{column} {negate}BETWEEN {low} AND {high}"
+
+        if self._accept('keyword', 'in'):
+            self._expect('punct', '(')
+            placeholders = [self._value(field)]
+            while self._accept('punct', ','):
+                placeholders.append(self._value(field))
+            self._expect('punct', ')')
+            return f"{column} {negate}IN ({', '.join(placeholders)})"
+
+        if self._accept('keyword', 'like'):
+            if SCREENER_FIELDS[field][1] != 'text':
+                raise ValueError(f"LIKE is only supported on text fields, not '{field}'")
+            return f"{column} {negate}ILIKE {self._value(field)}"
+
+        if negate:
+            raise ValueError("NOT must be followed by BETWEEN, IN or LIKE")
+
+        operator = COMPARISON_OPERATORS[self._expect('op')]
+        return f"{column} {operator} {self._value(field)}"
+
+
+def compile_sort(sort_by: str) -> Tuple[str, List[str]]:
+    """
+    Compile a sort expression such as 'dividend_yield desc, pe_ratio' or '-dividend_yield,pe'
+
+    Returns:
+        Tuple of (ORDER BY clause without the keyword, fields used)
+    """
+    clauses = []
+    fields = []
+    for part in sort_by.split(','):
+        words = part.strip().split()
+        if not words:
+            continue
+        name = words[0]
+        direction = 'ASC'
+        if name.startswith('-'):
+            name, direction = name[1:], 'DESC'
+        if len(words) > 2 or (len(words) == 2 and words[1].lower() not in ('asc', 'desc')):
+            raise ValueError(f"Invalid sort term '{part.strip()}'")
+        if len(words) == 2:
+            direction = words[1].upper()
+
+        field = resolve_field(name)
+        fields.append(field)
+        clauses.append(f"{SCREENER_FIELDS[field][0]} {direction} NULLS LAST")
+
+    return ', '.join(clauses), fields
+
+
+def compile_screen(filters: str = "", sort_by: str = "", columns: Optional[List[str]] = None,
+                   limit: int = 50) -> Tuple[str, List[Any]]:
+    """
+    Compile a screen into a parameterized SELECT on stock_data
+
+    Args:
+        filters: Filter expression, e.g. "pe < 15 and yield > 2% and pct_from_52w_low <= 10"
+        sort_by: Sort expression, e.g. "dividend_yield desc, pe_ratio"
+        columns: Extra fields to return besides SCREENER_DEFAULT_COLUMNS
+        limit: Maximum rows (capped at SCREENER_MAX_LIMIT)
+
+    Returns:
+        Tuple of (SQL query with %s placeholders, parameters)
+    """
+    if not 0 < limit <= SCREENER_MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {SCREENER_MAX_LIMIT}")
+
+    params: List[Any] = []
+    where = ''
+    used_fields: List[str] = []
+
+    if filters.strip():
+        compiler = FilterCompiler(filters)
+        where = f"WHERE {compiler.compile()}"
+        params.extend(compiler.params)
+        used_fields.extend(compiler.fields)
+
+    order = ''
+    if sort_by.strip():
+        order_clause, sort_fields = compile_sort(sort_by)
+        order = f"ORDER BY {order_clause}"
+        used_fields.extend(sort_fields)
+
+    selected = list(SCREENER_DEFAULT_COLUMNS)
+    for field in [resolve_field(column) for column in (columns or [])] + used_fields:
+        if field not in selected:
+            selected.append(field)
+
+    select_list = ', '.join(SCREENER_FIELDS[field][0] for field in selected)
+
+    query = f"SELECT {select_list} FROM stock_data {where} {order} LIMIT %s"
+    params.append(limit)
+    return ' '.join(query.split()), params
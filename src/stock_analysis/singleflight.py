@@ -0,0 +1,199 @@
+"""
+Single-flight request coalescing
+Concurrent identical calls share one execution instead of each doing the work
+
+When several clients ask for the same history at the same moment, only the
+first call (the leader) reaches the provider; the others wait for it and get
+its result, or its exception. Nothing is cached: a call that starts after the
+leader finished runs again. Provider data methods are coalesced per provider
+class and configuration, symbol and arguments; tools are coalesced per tool
+and arguments.
+"""
+
+import functools
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+import anyio
+
+from .metrics import PROVIDER_METHODS
+
+logger = logging.getLogger(__name__)
+
+
+def call_key(name: str, args: tuple, kwargs: Dict[str, Any]) -> str:
+    """Key identifying a call by name and arguments"""
+    return json.dumps([name, args, kwargs], sort_keys=True, default=str)
+
+
+def share(result: Any) -> Any:
+    """
+    Copy of a shared result for a waiting caller, so callers that modify
+    their result (e.g. add a DataFrame column) do not affect each other
+    """
+    if hasattr(result, 'copy') and hasattr(result, 'columns'):
+        # Shallow: pandas copy-on-write keeps the data shared until written
+        return result.copy(deep=False)
+    if isinstance(result, (dict, list)):
+        return type(result)(result)
+    return result
+
+
+class _Flight:
+    def __init__(self, done):
+        self.done = done
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.cancelled = False
+
+    def outcome(self) -> Any:
+        if self.error is not None:
+            raise self.error
+        return share(self.result)
+
+
+class SingleFlight:
+    """Coalesces identical calls made concurrently from different threads"""
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, name: str, field: str) -> None:
+        counts = self.stats.setdefault(name, {'executed': 0, 'coalesced': 0})
+        counts[field] += 1
+
+    def do(self, name: str, key: str, func: Callable[[], Any]) -> Any:
+        """
+        Run func, or wait for the identical call already running
+
+        Args:
+            name: Name the call is counted under in stats
+            key: Calls with the same key are coalesced (see call_key)
+            func: The work, called without arguments
+
+        Returns:
+            func's result (a shallow copy for waiting callers)
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight(threading.Event())
+                self._count(name, 'executed')
+                leader = True
+            else:
+                self._count(name, 'coalesced')
+                leader = False
+
+        if not leader:
+            flight.done.wait()
+            return flight.outcome()
+
+        try:
+            flight.result = func()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+
+class AsyncSingleFlight(SingleFlight):
+    """Coalesces identical calls made concurrently from tasks of one event loop"""
+
+    async def do(self, name: str, key: str, func: Callable[[], Any]) -> Any:
+        """
+        Await func, or wait for the identical call already running
+
+        If the leading call is cancelled (its client went away), the waiting
+        callers run the call again rather than fail.
+
+        Args:
+            name: Name the call is counted under in stats
+            key: Calls with the same key are coalesced (see call_key)
+            func: Coroutine function doing the work, called without arguments
+
+        Returns:
+            func's result (a shallow copy for waiting callers)
+        """
+        while True:
+            flight = self._flights.get(key)
+            if flight is None:
+                break
+            self._count(name, 'coalesced')
+            await flight.done.wait()
+            if not flight.cancelled:
+                return flight.outcome()
+
+        flight = self._flights[key] = _Flight(anyio.Event())
+        self._count(name, 'executed')
+        try:
+            flight.result = await func()
+            return flight.result
+        except anyio.get_cancelled_exc_class():
+            flight.cancelled = True
+            raise
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            del self._flights[key]
+            flight.done.set()
+
+
+# Shared by every provider instance and every tool call in the process
+provider_flights = SingleFlight()
+tool_flights = AsyncSingleFlight()
+
+
+def provider_config(provider: Any) -> Dict[str, Any]:
+    """
+    A provider instance's scalar settings (seed, archive path, API key, ...);
+    instances of one class with the same settings return the same data
+    """
+    return {name: value for name, value in vars(provider).items()
+            if isinstance(value, (str, int, float, bool, type(None)))}
+
+
+def coalesce_provider(provider: Any) -> Any:
+    """
+    Coalesce a provider instance's upstream calls with identical concurrent
+    calls on any instance of the same provider class and configuration
+    """
+    class_name = type(provider).__name__
+    config = provider_config(provider)
+    for method_name in PROVIDER_METHODS:
+        method = getattr(provider, method_name, None)
+        if method is None or getattr(method, '_coalesced', False):
+            continue
+
+        # Stats are named by class and method only, so settings such as API keys stay out of metrics
+        def coalesced(*args, _method=method, _name=f"{class_name}.{method_name}", **kwargs):
+            key = call_key(_name, (config, *args), kwargs)
+            return provider_flights.do(_name, key, lambda: _method(*args, **kwargs))
+
+        coalesced._coalesced = True
+        setattr(provider, method_name, coalesced)
+    return provider
+
+
+def coalesce_tool(func: Callable) -> Callable:
+    """Coalesce identical concurrent calls of an async tool (see executors.offload)"""
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await tool_flights.do(name, call_key(name, args, kwargs), lambda: func(*args, **kwargs))
+    return wrapper
+
+
+def coalescing_stats() -> Dict[str, Dict[str, Dict[str, int]]]:
+    """Executed and coalesced call counts for providers and tools"""
+    return {'providers': {name: dict(counts) for name, counts in provider_flights.stats.items()},
+            'tools': {name: dict(counts) for name, counts in tool_flights.stats.items()}}
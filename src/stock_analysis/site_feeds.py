@@ -0,0 +1,275 @@
+"""
+Website data feeds
+Compact precomputed JSON for the docs/ site: a universe snapshot, leaderboards and per-symbol yearly candle chunks
+
+Every feed file carries a content hash in its name, so browsers can cache it
+forever; only the small fixed-name manifest.json is revalidated on page load.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+from .api_providers import APIProviderFactory, StockAPIProvider
+from .candle_store import get_candles
+from .site_generator import SiteBuilder
+
+logger = logging.getLogger(__name__)
+
+FEEDS_DIR = 'data/feeds'
+FEED_MANIFEST = 'manifest.json'
+FEED_FORMAT_VERSION = 1
+
+# State of the last build, kept in the builder's state directory (not
+# published): its feed files (to prune old ones) and a digest per symbol's
+# candles (to skip re-encoding unchanged histories)
+FEED_STATE = 'site-feeds.json'
+
+# Daily candle history published per symbol, split into one file per calendar year
+FEED_CANDLE_PERIOD = '5y'
+FEED_FETCH_WORKERS = 8
+
+LEADERBOARD_SIZE = 20
+
+# Leaderboard name -> (column, ascending)
+LEADERBOARDS = {
+    'top_scores': ('normalized_score', False),
+    'highest_dividend': ('dividend_yield', False),
+    'lowest_pe': ('pe_ratio', True),
+    'top_gainers': ('day_change_pct', False),
+    'top_losers': ('day_change_pct', True),
+    'near_52w_high': ('position_52w', False),
+    'near_52w_low': ('position_52w', True),
+}
+
+UNIVERSE_COLUMNS = [
+    'symbol_token', 'trading_symbol', 'name', 'last_price', 'day_change_pct', 'pe_ratio', 'dividend_yield',
+    'market_cap_cr', 'position_52w', 'normalized_score', 'rating', 'buy_percentage',
+]
+
+# Site context values copied into the manifest for pages to refresh their headline numbers
+SUMMARY_FIELDS = ['stock_count', 'buy_count', 'etf_count', 'avg_pe', 'avg_dividend',
+                  'generated_date', 'generated_time']
+
+CANDLE_COLUMNS = ['t', 'o', 'h', 'l', 'c', 'v']
+
+FEED_HASH_LENGTH = 12
+
+
+def symbol_slug(symbol: str) -> str:
+    """File-system and URL safe form of a symbol (mirrored in main.js)"""
+    return re.sub(r'[^A-Za-z0-9.-]', '_', symbol)
+
+
+def encode_feed(payload: Any) -> bytes:
+    """Compact JSON encoding; NaN becomes null"""
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False, allow_nan=False).encode('utf-8')
+
+
+def hashed_path(stem: str, data: bytes) -> str:
+    """Feed path with the content hash in the file name, e.g. universe.3f2a9c0d1b7e.json"""
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:FEED_HASH_LENGTH]}.json"
+
+
+def _json_value(value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) or not isinstance(value, (int, bool)):
+        value = float(value)
+        return None if math.isnan(value) or math.isinf(value) else round(value, 2)
+    return value
+
+
+def table_payload(df: pd.DataFrame, columns: List[str]) -> Dict[str, Any]:
+    """Columnar rows: {'columns': [...], 'rows': [[...], ...]}"""
+    columns = [column for column in columns if column in df.columns]
+    rows = [[_json_value(value) for value in row] for row in df[columns].itertuples(index=False)]
+    return {'columns': columns, 'rows': rows}
+
+
+def candle_chunks(symbol: str, candles: pd.DataFrame) -> Dict[int, Dict[str, Any]]:
+    """
+    Split daily candles into one payload per calendar year
+
+    Rows are [epoch seconds, open, high, low, close, volume]; past years never
+    change, so their files keep the same hash between builds.
+    """
+    if candles.empty:
+        return {}
+    index = candles.index.tz_localize(None) if candles.index.tz is not None else candles.index
+    index = index.normalize()
+    times = index.as_unit('s').asi8.tolist()
+    prices = candles[['Open', 'High', 'Low', 'Close']].to_numpy(dtype=float).round(2)
+    has_gaps = bool(np.isnan(prices).any())
+    prices = prices.tolist()
+    volumes = candles['Volume'].fillna(0).to_numpy(dtype=float).astype('int64').tolist()
+    years = index.year.to_numpy()
+
+    chunks: Dict[int, Dict[str, Any]] = {}
+    for year in np.unique(years).tolist():
+        positions = np.flatnonzero(years == year).tolist()
+        rows = [[times[i], *prices[i], volumes[i]] for i in positions]
+        if has_gaps:
+            rows = [[None if isinstance(v, float) and math.isnan(v) else v for v in row] for row in rows]
+        chunks[year] = {'symbol': symbol, 'year': year, 'columns': CANDLE_COLUMNS, 'rows': rows}
+    return chunks
+
+
+def candle_digest(candles: pd.DataFrame) -> str:
+    """Cheap fingerprint of a candle frame, to skip re-encoding unchanged symbols"""
+    digest = hashlib.sha256(candles.index.asi8.tobytes())
+    for column in ('Open', 'High', 'Low', 'Close', 'Volume'):
+        digest.update(candles[column].to_numpy(dtype=float).tobytes())
+    return digest.hexdigest()
+
+
+def load_feed_candles(symbols: Dict[str, str], period: str = FEED_CANDLE_PERIOD,
+                      provider: Optional[StockAPIProvider] = None,
+                      max_workers: int = FEED_FETCH_WORKERS) -> Dict[str, pd.DataFrame]:
+    """
+    Daily candles from the candle store for every symbol
+
+    Args:
+        symbols: Feed symbol -> market data symbol (e.g., {'RELIANCE': 'RELIANCE.NS'})
+        period: History period to publish
+        provider: API provider (defaults to the configured provider)
+        max_workers: Concurrent fetches for symbols missing from the cache
+
+    Returns:
+        Dictionary keyed by feed symbol; symbols without data are left out
+    """
+    provider = provider or APIProviderFactory.get_provider()
+
+    def load(item):
+        symbol, market_symbol = item
+        try:
+            return symbol, get_candles(market_symbol, period=period, interval='1d', provider=provider)
+        except Exception as e:
+            logger.warning(f"No candles for {market_symbol}: {e}")
+            return symbol, pd.DataFrame()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(load, symbols.items())
+    return {symbol: candles for symbol, candles in results if not candles.empty}
+
+
+def _feed_files(output_dir: str) -> Set[str]:
+    root = os.path.join(output_dir, FEEDS_DIR)
+    files = set()
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.endswith('.json'):
+                files.add(os.path.relpath(os.path.join(directory, name), output_dir).replace(os.sep, '/'))
+    return files
+
+
+def build_feeds(scored: pd.DataFrame, candles: Dict[str, pd.DataFrame], as_of: datetime,
+                summary: Optional[Dict[str, str]] = None, builder: Optional[SiteBuilder] = None,
+                leaderboard_size: int = LEADERBOARD_SIZE) -> Dict[str, Any]:
+    """
+    Write the feeds and their manifest
+
+    Feed files written by neither this build nor the previous one are deleted;
+    the previous build's are kept so a page holding its manifest can finish loading.
+
+    Args:
+        scored: Output of scoring.analyze_stocks
+        candles: Daily candles keyed by symbol_token (see load_feed_candles)
+        as_of: Time of the data snapshot
+        summary: Site context values (SUMMARY_FIELDS) for headline numbers
+        builder: SiteBuilder to write through (finished by the caller)
+        leaderboard_size: Rows per leaderboard
+
+    Returns:
+        The manifest dictionary
+    """
+    builder = builder or SiteBuilder()
+    files: List[str] = []
+
+    state_path = os.path.join(builder.state_dir, FEED_STATE)
+    try:
+        with open(state_path) as f:
+            previous_state = json.load(f)
+    except (OSError, ValueError):
+        previous_state = {}
+    previous_candles = previous_state.get('candles', {})
+
+    def publish(stem: str, payload: Any) -> str:
+        data = encode_feed(payload)
+        path = hashed_path(stem, data)
+        builder.add_hashed(f"{FEEDS_DIR}/{path}", data)
+        files.append(path)
+        return path
+
+    # Per-symbol candle indexes ({year: chunk file}); the universe and
+    # leaderboard rows reference them by hash so a chart costs two small fetches
+    candle_state = {}
+    for symbol, symbol_candles in candles.items():
+        digest = candle_digest(symbol_candles)
+        entry = previous_candles.get(symbol)
+        if (entry and entry['digest'] == digest
+                and os.path.exists(os.path.join(builder.output_dir, FEEDS_DIR, entry['index']))):
+            files.extend(entry['files'])
+            builder.unchanged.extend(f"{FEEDS_DIR}/{path}" for path in entry['files'])
+            candle_state[symbol] = entry
+            continue
+
+        slug = symbol_slug(symbol)
+        first = len(files)
+        chunks = {year: publish(f"candles/{slug}/{year}", chunk)
+                  for year, chunk in candle_chunks(symbol, symbol_candles).items()}
+        if chunks:
+            index_path = publish(f"candles/{slug}/index", {'symbol': symbol, 'chunks': chunks})
+            candle_state[symbol] = {'digest': digest, 'index': index_path, 'files': files[first:]}
+
+    rows = scored.copy()
+    rows['candles'] = rows['symbol_token'].map(
+        {symbol: entry['index'].rsplit('.', 2)[1] for symbol, entry in candle_state.items()})
+    columns = UNIVERSE_COLUMNS + ['candles']
+
+    universe = publish('universe', table_payload(rows, columns))
+    leaderboards = {}
+    for name, (column, ascending) in LEADERBOARDS.items():
+        if column not in rows.columns:
+            continue
+        ranked = rows.dropna(subset=[column]).sort_values(column, ascending=ascending, kind='stable')
+        leaderboards[name] = publish(f"leaderboard-{name}", {
+            'name': name, 'column': column, 'ascending': ascending,
+            **table_payload(ranked.head(leaderboard_size), columns),
+        })
+
+    manifest = {
+        'version': FEED_FORMAT_VERSION,
+        'as_of': as_of.isoformat(),
+        'summary': {key: value for key, value in (summary or {}).items() if key in SUMMARY_FIELDS},
+        'universe': universe,
+        'leaderboards': leaderboards,
+    }
+
+    # Keep the previous build's files for pages that still hold its manifest
+    current = {f"{FEEDS_DIR}/{path}" for path in files}
+    keep = set(previous_state.get('files', [])) | current | {f"{FEEDS_DIR}/{FEED_MANIFEST}"}
+    for path in sorted(_feed_files(builder.output_dir) - keep):
+        builder.remove(path)
+    os.makedirs(builder.state_dir, exist_ok=True)
+    with open(state_path, 'w') as f:
+        json.dump({'files': sorted(current), 'candles': candle_state}, f, separators=(',', ':'))
+
+    manifest_data = encode_feed(manifest)
+    manifest_path = f"{FEEDS_DIR}/{FEED_MANIFEST}"
+    builder.add(manifest_path, hashlib.sha256(manifest_data).hexdigest(), lambda: manifest_data)
+    logger.info(f"Feeds: {len(files)} files for {len(candles)} symbols with candles")
+    return manifest
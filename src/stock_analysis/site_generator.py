@@ -0,0 +1,465 @@
+"""
+Static site generator
+Renders the docs/ GitHub Pages site from the database snapshot, rewriting only outputs whose inputs changed
+"""
+
+import gzip
+import hashlib
+import html
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+try:
+    import brotli
+except ImportError:  # Optional: .br variants are skipped without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+SITE_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'site_templates')
+
+# Output location; docs/ is the GitHub Pages source folder
+SITE_OUTPUT_DIR = os.getenv(
+    'SITE_OUTPUT_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'docs')
+)
+
+# Build state is kept outside the published directory, by default in
+# .<output dir name>-build next to it (e.g. .docs-build/)
+SITE_STATE_DIR = os.getenv('SITE_STATE_DIR')
+
+# Input hashes of the last build, used to skip unchanged outputs
+SITE_MANIFEST = 'site-manifest.json'
+
+# Bump when rendering or minification changes so every output is rebuilt once
+GENERATOR_VERSION = '2'
+
+SITE_PAGES = ['index.html', 'reports.html']
+SITE_ASSETS = ['css/style.css', 'js/main.js']
+
+# Analysis report text files linked from reports.html
+REPORT_FILES = {
+    'stock': 'data/stock_analysis_report.txt',
+    'etf': 'data/etf_analysis_report.txt',
+    'gold': 'data/gold_etf_report.txt',
+}
+
+# Extensions that get pre-compressed .gz (and .br) variants
+COMPRESSED_EXTENSIONS = ('.html', '.css', '.js', '.json', '.txt', '.svg')
+
+PREVIEW_LINES = 30
+TOP_PICKS = 4
+ETFS_PER_CATEGORY = 4
+
+ETF_CATEGORY_ICONS = {
+    'Large Cap': '🏢',
+    'Mid Cap': '📈',
+    'Gold': '🥇',
+    'Sectoral': '🏦',
+    'Liquid': '💵',
+    'International': '🌏',
+    'Shariah': '🕌',
+}
+
+PLACEHOLDER_PATTERN = re.compile(r'{{\s*(\w+)\s*}}')
+
+
+# ---- Minification ----
+
+def minify_css(css: str) -> str:
+    """Strip comments and redundant whitespace from CSS"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};:,>])\s*', r'\1', css)
+    css = css.replace(';}', '}')
+    return css.strip()
+
+
+def minify_html(markup: str) -> str:
+    """
+    Remove comments and collapse whitespace in HTML
+
+    Whitespace runs become a single space, which renders identically; <pre>,
+    <textarea> and inline <script> are left as is, inline <style> is minified.
+    """
+    preserved: List[str] = []
+
+    def keep(text: str) -> str:
+        preserved.append(text)
+        return f'\x00{len(preserved) - 1}\x00'
+
+    def block(match: 're.Match') -> str:
+        tag, body = match.group(1).lower(), match.group(3)
+        if tag == 'style':
+            body = minify_css(body)
+        return keep(f'{match.group(2)}{body}</{match.group(1)}>')
+
+    markup = re.sub(r'(?is)(?=<(pre|textarea|style|script)\b)(<\1\b[^>]*>)(.*?)</\1>',
+                    lambda m: block(m), markup)
+    markup = re.sub(r'(?s)<!--.*?-->', '', markup)
+    markup = re.sub(r'\s+', ' ', markup)
+    markup = re.sub(r'\s*(</?(?:html|head|body|meta|link|title|section|div|nav|header|footer|ul|li|h[1-6]|p)\b[^>]*>)\s*',
+                    r'\1', markup)
+    return re.sub(r'\x00(\d+)\x00', lambda m: preserved[int(m.group(1))], markup).strip()
+
+
+# JavaScript is published as written: telling regex literals from division
+# needs a real parser, and the .gz/.br variants recover most of the savings
+MINIFIERS = {
+    '.html': minify_html,
+    '.css': minify_css,
+}
+
+
+# ---- Rendering ----
+
+def render_template(template: str, context: Dict[str, str]) -> str:
+    """
+    Replace {{ name }} placeholders with context values
+
+    Values are inserted as is; context builders escape text and build
+    HTML fragments.
+    """
+    def replace(match: 're.Match') -> str:
+        name = match.group(1)
+        if name not in context:
+            raise ValueError(f"Template placeholder '{name}' has no value")
+        return str(context[name])
+
+    return PLACEHOLDER_PATTERN.sub(replace, template)
+
+
+def _price(value: Any) -> str:
+    return f"₹{float(value):,.2f}" if pd.notna(value) else 'n/a'
+
+
+def _percent(value: Any, signed: bool = False, decimals: int = 2) -> str:
+    if value is None or pd.isna(value):
+        return 'n/a'
+    return f"{float(value):{'+' if signed else ''}.{decimals}f}%"
+
+
+def _score(value: float) -> str:
+    return f"{value:.1f}".rstrip('0').rstrip('.')
+
+
+def _compact(value: float) -> str:
+    for divisor, suffix in ((1e9, 'B'), (1e6, 'M'), (1e3, 'K')):
+        if abs(value) >= divisor:
+            return f"{value / divisor:.0f}{suffix}"
+    return f"{value:.0f}"
+
+
+def render_pick_card(stock: pd.Series) -> str:
+    """Top pick card for a scored stock"""
+    strong = stock['rating'] == 'STRONG BUY'
+    card_class = 'strong-buy' if strong else 'buy'
+    badge_class = 'pick-badge' if strong else 'pick-badge buy-badge'
+    return f"""
+                    <div class="pick-card {card_class}">
+                        <div class="{badge_class}">{html.escape(stock['rating'])}</div>
+                        <h4>{html.escape(stock['trading_symbol'])}</h4>
+                        <p class="company-name">{html.escape(str(stock['name']))}</p>
+                        <div class="pick-details">
+                            <div class="detail"><span>Price:</span><strong>{_price(stock['last_price'])}</strong></div>
+                            <div class="detail"><span>P/E Ratio:</span><strong>{float(stock['pe_ratio']):.2f}x</strong></div>
+                            <div class="detail"><span>Dividend:</span><strong>{_percent(stock['dividend_yield'])}</strong></div>
+                            <div class="detail"><span>Score:</span><strong>{_score(stock['normalized_score'])}/100</strong></div>
+                            <div class="detail allocation"><span>Allocation:</span><strong class="highlight">{_percent(stock['buy_percentage'])}</strong></div>
+                        </div>
+                    </div>"""
+
+
+def render_etf_categories(etfs: pd.DataFrame) -> str:
+    """ETF category cards, ETFs near their 52-week high or low flagged"""
+    cards = []
+    for etf_type, group in etfs.groupby('etf_type', sort=False):
+        icon = next((icon for key, icon in ETF_CATEGORY_ICONS.items() if key in etf_type), '📊')
+        items = []
+        for _, etf in group.head(ETFS_PER_CATEGORY).iterrows():
+            if pd.notna(etf['pct_from_52w_high']) and etf['pct_from_52w_high'] <= 5:
+                tag = '<span class="etf-change positive">Near High</span>'
+            elif pd.notna(etf['pct_from_52w_low']) and etf['pct_from_52w_low'] <= 10:
+                tag = '<span class="etf-change">Value Pick</span>'
+            else:
+                tag = f'<span class="etf-expense">{html.escape(str(etf["expense_ratio"]))}</span>'
+            items.append(f"""
+                        <div class="etf-item">
+                            <span class="etf-name">{html.escape(etf['symbol'].replace('.NS', ''))}</span>
+                            <span class="etf-price">{_price(etf['last_price'])}</span>
+                            {tag}
+                        </div>""")
+        cards.append(f"""
+                <div class="category-card">
+                    <h3>{icon} {html.escape(etf_type)}</h3>
+                    <div class="etf-list">{''.join(items)}
+                    </div>
+                </div>""")
+    return ''.join(cards)
+
+
+def report_preview(text: str, lines: int = PREVIEW_LINES) -> str:
+    """Escaped first lines of a report, skipping anything logged before its first banner"""
+    report_lines = text.splitlines()
+    start = next((i for i, line in enumerate(report_lines) if line.startswith('====')), 0)
+    return html.escape('\n'.join(report_lines[start:start + lines]))
+
+
+def _report_context(name: str, text: Optional[str]) -> Dict[str, str]:
+    if not text:
+        return {f'{name}_report_lines': '0', f'{name}_report_size': '0 KB',
+                f'{name}_report_preview': 'Report not generated yet'}
+    return {
+        f'{name}_report_lines': str(text.count('\n') + 1),
+        f'{name}_report_size': f"{len(text.encode('utf-8')) / 1024:.1f} KB",
+        f'{name}_report_preview': report_preview(text),
+    }
+
+
+def build_context(stocks: pd.DataFrame, etfs: pd.DataFrame, as_of: datetime,
+                  gold_stats: Optional[Dict[str, Dict[str, Any]]] = None,
+                  reports: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Template values for every page
+
+    Args:
+        stocks: Output of scoring.analyze_stocks (sorted by score)
+        etfs: etf_data rows, including pct_from_52w_high/low
+        as_of: Time of the data snapshot (shown as the generation time)
+        gold_stats: returns.get_return_stats output for the gold ETFs
+        reports: Report texts keyed like REPORT_FILES
+
+    Returns:
+        Dictionary of placeholder values (escaped text or HTML fragments)
+    """
+    reports = reports or {}
+    gold_stats = gold_stats or {}
+    buy_stocks = stocks[stocks['buy_percentage'] > 0]
+    rating_counts = stocks['rating'].value_counts()
+    gold = etfs[etfs['etf_type'].str.contains('Gold', na=False)]
+
+    returns_1y = [s['returns']['1y'] for s in gold_stats.values() if '1y' in s['returns']]
+    cagr_3y = [s['cagr']['3y'] for s in gold_stats.values() if '3y' in s['cagr']]
+    volumes = [s['avg_volume_1m'] for s in gold_stats.values()]
+    expense_ratios = pd.to_numeric(etfs['expense_ratio'].str.rstrip('%'), errors='coerce')
+
+    context = {
+        'year': str(as_of.year),
+        'generated_date': as_of.strftime('%B %d, %Y'),
+        'generated_time': as_of.strftime('%I:%M %p'),
+        'stock_count': str(len(stocks)),
+        'buy_count': str(len(buy_stocks)),
+        'avg_pe': f"{pd.to_numeric(stocks['pe_ratio'], errors='coerce').mean():.2f}x",
+        'avg_dividend': _percent(pd.to_numeric(stocks['dividend_yield'], errors='coerce').mean()),
+        'strong_buy_count': str(rating_counts.get('STRONG BUY', 0)),
+        'rating_buy_count': str(rating_counts.get('BUY', 0)),
+        'moderate_buy_count': str(rating_counts.get('MODERATE BUY', 0)),
+        'top_picks': ''.join(render_pick_card(stock) for _, stock in buy_stocks.head(TOP_PICKS).iterrows()),
+        'etf_count': str(len(etfs)),
+        'etf_category_count': str(etfs['etf_type'].nunique()),
+        'etf_categories': render_etf_categories(etfs),
+        'etf_avg_price': f"₹{pd.to_numeric(etfs['last_price']).mean():,.0f}" if not etfs.empty else 'n/a',
+        'large_cap_etf_count': str(int(etfs['etf_type'].str.contains('Large Cap', na=False).sum())),
+        'gold_etf_count': str(len(gold)),
+        'lowest_expense': _percent(expense_ratios.min()),
+        'gold_return_1y': _percent(max(returns_1y), signed=True, decimals=0) if returns_1y else 'n/a',
+        'gold_cagr_3y': _percent(max(cagr_3y), signed=True, decimals=0) if cagr_3y else 'n/a',
+        'gold_volume': _compact(max(volumes)) if volumes else 'n/a',
+        'gold_best_price': f"₹{pd.to_numeric(gold['last_price']).min():,.0f}" if not gold.empty else 'n/a',
+    }
+    for name in REPORT_FILES:
+        context.update(_report_context(name, reports.get(name)))
+    return context
+
+
+# ---- Incremental build ----
+
+def content_hash(*parts: Any) -> str:
+    """SHA-256 over the given strings/bytes"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _read_bytes(path: str) -> Optional[bytes]:
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def compressed_variants(data: bytes) -> Dict[str, bytes]:
+    """Deterministic .gz (and .br when brotli is installed) encodings of an output"""
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data, quality=11)
+    return variants
+
+
+def default_state_dir(output_dir: str) -> str:
+    """Build state directory for an output directory: .<name>-build beside it"""
+    output_dir = os.path.abspath(output_dir)
+    return os.path.join(os.path.dirname(output_dir), f".{os.path.basename(output_dir)}-build")
+
+
+class SiteBuilder:
+    """
+    Writes generated outputs, skipping those whose input hash matches the manifest
+
+    Usage:
+        builder = SiteBuilder(output_dir)
+        builder.add('index.html', input_hash, lambda: rendered_bytes)
+        result = builder.finish()
+    """
+
+    def __init__(self, output_dir: str = SITE_OUTPUT_DIR, state_dir: Optional[str] = None):
+        self.output_dir = output_dir
+        self.state_dir = state_dir or SITE_STATE_DIR or default_state_dir(output_dir)
+        self.manifest_path = os.path.join(self.state_dir, SITE_MANIFEST)
+        try:
+            with open(self.manifest_path) as f:
+                self.manifest: Dict[str, Dict[str, str]] = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {}
+        self.written: List[str] = []
+        self.unchanged: List[str] = []
+        self.removed: List[str] = []
+
+    def is_current(self, path: str, input_hash: str) -> bool:
+        """True if the output exists and was built from the same inputs"""
+        entry = self.manifest.get(path, {})
+        return entry.get('input') == input_hash and os.path.exists(os.path.join(self.output_dir, path))
+
+    def add(self, path: str, input_hash: str, produce) -> bool:
+        """
+        Build one output unless it is current
+
+        Args:
+            path: Output path relative to the output directory
+            input_hash: Hash of everything the output is rendered from
+            produce: Callable returning the output bytes, only called when needed
+
+        Returns:
+            True if the file was written
+        """
+        if self.is_current(path, input_hash):
+            self.unchanged.append(path)
+            return False
+
+        data = produce()
+        self._write(path, data)
+        self.manifest[path] = {'input': input_hash, 'output': content_hash(data)}
+        return path in self.written
+
+    def add_hashed(self, path: str, data: bytes) -> bool:
+        """
+        Write a content-addressed output (its hash is part of the name) unless it exists
+
+        These are not recorded in the manifest, which keeps it small for
+        thousands of feed files.
+
+        Returns:
+            True if the file was written
+        """
+        if os.path.exists(os.path.join(self.output_dir, path)):
+            self.unchanged.append(path)
+            return False
+        return self._write(path, data)
+
+    def remove(self, path: str) -> None:
+        """Delete an output and its compressed variants"""
+        target = os.path.join(self.output_dir, path)
+        for suffix in ('', '.gz', '.br'):
+            if os.path.exists(target + suffix):
+                os.remove(target + suffix)
+        self.manifest.pop(path, None)
+        self.removed.append(path)
+
+    def _write(self, path: str, data: bytes) -> bool:
+        target = os.path.join(self.output_dir, path)
+        existing = _read_bytes(target)
+        if existing is not None and content_hash(existing) == content_hash(data):
+            self.unchanged.append(path)
+            return False
+
+        _write_atomic(target, data)
+        if os.path.splitext(path)[1] in COMPRESSED_EXTENSIONS:
+            for suffix, encoded in compressed_variants(data).items():
+                _write_atomic(target + suffix, encoded)
+        self.written.append(path)
+        return True
+
+    def finish(self) -> Dict[str, List[str]]:
+        """Save the manifest and return the written, unchanged and removed paths"""
+        _write_atomic(self.manifest_path, json.dumps(self.manifest, indent=1, sort_keys=True).encode('utf-8'))
+        logger.info(f"Site build: {len(self.written)} written, {len(self.unchanged)} unchanged, "
+                    f"{len(self.removed)} removed")
+        return {'written': self.written, 'unchanged': self.unchanged, 'removed': self.removed}
+
+
+def _template(path: str) -> str:
+    with open(os.path.join(SITE_TEMPLATE_DIR, path), encoding='utf-8') as f:
+        return f.read()
+
+
+def _minified(path: str, text: str) -> bytes:
+    minify = MINIFIERS.get(os.path.splitext(path)[1])
+    return (minify(text) if minify else text).encode('utf-8')
+
+
+def build_site(context: Dict[str, str], reports: Optional[Dict[str, str]] = None,
+               output_dir: str = SITE_OUTPUT_DIR, builder: Optional[SiteBuilder] = None) -> Dict[str, List[str]]:
+    """
+    Render pages and assets into the output directory
+
+    Each output is rebuilt only when its template (or asset source), the
+    context values it uses or the generator version changed, and is written
+    only when the rendered bytes differ from the file on disk.
+
+    Args:
+        context: Output of build_context
+        reports: New report texts keyed like REPORT_FILES, written to data/
+        output_dir: Site directory (default docs/)
+        builder: Existing SiteBuilder to add outputs to (finished by the caller)
+
+    Returns:
+        Dictionary with 'written' and 'unchanged' output paths
+    """
+    own_builder = builder is None
+    builder = builder or SiteBuilder(output_dir)
+
+    for page in SITE_PAGES:
+        template = _template(page)
+        used = sorted(set(PLACEHOLDER_PATTERN.findall(template)))
+        page_context = {name: context.get(name) for name in used}
+        input_hash = content_hash(GENERATOR_VERSION, template, json.dumps(page_context, sort_keys=True))
+        builder.add(page, input_hash, lambda: _minified(page, render_template(template, context)))
+
+    for asset in SITE_ASSETS:
+        source = _template(asset)
+        builder.add(asset, content_hash(GENERATOR_VERSION, source), lambda: _minified(asset, source))
+
+    for name, text in (reports or {}).items():
+        path = REPORT_FILES[name]
+        builder.add(path, content_hash(GENERATOR_VERSION, text), lambda: text.encode('utf-8'))
+
+    if own_builder:
+        return builder.finish()
+    return {'written': builder.written, 'unchanged': builder.unchanged, 'removed': builder.removed}
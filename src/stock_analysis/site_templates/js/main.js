@@ -0,0 +1,165 @@
+// Smooth scrolling for navigation links
+document.querySelectorAll('a[href^="#"]').forEach(anchor => {
+    anchor.addEventListener('click', function (e) {
+        e.preventDefault();
+        const target = document.querySelector(this.getAttribute('href'));
+        if (target) {
+            target.scrollIntoView({
+                behavior: 'smooth',
+                block: 'start'
+            });
+        }
+    });
+});
+
+// Add animation on scroll
+const observerOptions = {
+    threshold: 0.1,
+    rootMargin: '0px 0px -50px 0px'
+};
+
+const observer = new IntersectionObserver((entries) => {
+    entries.forEach(entry => {
+        if (entry.isIntersecting) {
+            entry.target.style.opacity = '1';
+            entry.target.style.transform = 'translateY(0)';
+        }
+    });
+}, observerOptions);
+
+// Observe all cards
+document.querySelectorAll('.feature-card, .pick-card, .category-card, .portfolio-card, .api-card').forEach(card => {
+    card.style.opacity = '0';
+    card.style.transform = 'translateY(20px)';
+    card.style.transition = 'opacity 0.6s ease-out, transform 0.6s ease-out';
+    observer.observe(card);
+});
+
+// Update last modified date if present
+const lastModified = document.querySelector('.last-modified');
+if (lastModified) {
+    lastModified.textContent = `Last updated: ${new Date().toLocaleDateString('en-IN')}`;
+}
+
+// Precomputed data feeds (written by generate_website.py into data/feeds/).
+// Feed files have content hashes in their names and are cached by the browser;
+// only manifest.json is revalidated.
+const StockData = (() => {
+    const base = 'data/feeds/';
+    const cache = new Map();
+    let manifest = null;
+
+    const fetchJSON = (path, options) => {
+        if (!cache.has(path)) {
+            cache.set(path, fetch(base + path, options).then(response => {
+                if (!response.ok) {
+                    throw new Error(`Failed to load ${path}: ${response.status}`);
+                }
+                return response.json();
+            }));
+        }
+        return cache.get(path);
+    };
+
+    // {columns, rows} -> array of objects
+    const toObjects = table => table.rows.map(row =>
+        Object.fromEntries(table.columns.map((column, i) => [column, row[i]])));
+
+    // Same as symbol_slug in site_feeds.py
+    const slug = symbol => symbol.replace(/[^A-Za-z0-9.-]/g, '_');
+
+    return {
+        manifest() {
+            if (!manifest) {
+                manifest = fetchJSON('manifest.json', { cache: 'no-cache' });
+            }
+            return manifest;
+        },
+
+        async universe() {
+            const m = await this.manifest();
+            return toObjects(await fetchJSON(m.universe));
+        },
+
+        async leaderboard(name) {
+            const m = await this.manifest();
+            if (!m.leaderboards[name]) {
+                throw new Error(`Unknown leaderboard ${name}`);
+            }
+            return toObjects(await fetchJSON(m.leaderboards[name]));
+        },
+
+        // Daily candles as {t, o, h, l, c, v} objects; only the years from fromYear on are fetched.
+        // `row` is a universe or leaderboard row (its candles field points at the symbol's index).
+        async candles(row, fromYear = 0) {
+            if (!row.candles) {
+                return [];
+            }
+            const index = await fetchJSON(`candles/${slug(row.symbol_token)}/index.${row.candles}.json`);
+            const years = Object.keys(index.chunks).filter(year => Number(year) >= fromYear).sort();
+            const chunks = await Promise.all(years.map(year => fetchJSON(index.chunks[year])));
+            return chunks.flatMap(toObjects);
+        }
+    };
+})();
+
+window.StockData = StockData;
+
+// Refresh headline numbers from the manifest (a few hundred bytes)
+const statElements = document.querySelectorAll('[data-stat]');
+if (statElements.length) {
+    StockData.manifest().then(m => {
+        statElements.forEach(element => {
+            const value = m.summary[element.dataset.stat];
+            if (value !== undefined) {
+                element.textContent = value;
+            }
+        });
+    }).catch(error => console.warn(error));
+}
+
+// Leaderboards load when scrolled into view
+const formatLeaderboardValue = (column, value) => {
+    if (value === null || value === undefined) {
+        return 'n/a';
+    }
+    return column.endsWith('_pct') || column === 'dividend_yield' ? `${value.toFixed(2)}%` : value.toFixed(2);
+};
+
+const renderLeaderboard = async element => {
+    const column = element.dataset.column;
+    const limit = Number(element.dataset.limit || 10);
+    try {
+        const rows = (await StockData.leaderboard(element.dataset.leaderboard)).slice(0, limit);
+        const title = document.createElement('h4');
+        title.textContent = element.dataset.title || element.dataset.leaderboard;
+        const table = document.createElement('table');
+        rows.forEach(row => {
+            const tr = table.insertRow();
+            tr.insertCell().textContent = row.trading_symbol;
+            const cell = tr.insertCell();
+            cell.textContent = formatLeaderboardValue(column, row[column]);
+            if (column.endsWith('_pct') && row[column] !== null) {
+                cell.className = row[column] >= 0 ? 'positive' : 'negative';
+            }
+        });
+        element.replaceChildren(title, table);
+    } catch (error) {
+        console.warn(error);
+    }
+};
+
+const leaderboardObserver = new IntersectionObserver((entries, self) => {
+    entries.forEach(entry => {
+        if (entry.isIntersecting) {
+            self.unobserve(entry.target);
+            renderLeaderboard(entry.target);
+        }
+    });
+}, { rootMargin: '200px' });
+
+document.querySelectorAll('[data-leaderboard]').forEach(element => leaderboardObserver.observe(element));
+
+// Mobile menu toggle (if needed in future)
+console.log('Stock Analysis Website Loaded');
+console.log('GitHub: https://github.com/dineshratn/angel-one-stock-analysis');
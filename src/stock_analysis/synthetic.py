@@ -0,0 +1,487 @@
+"""
+Synthetic market data
+Vectorized generation of symbol masters, OHLCV histories and fundamentals for scale testing
+
+Prices follow geometric Brownian motion with a shared market factor, GARCH(1,1)
+volatility clustering, fat-tailed shocks, overnight gaps and jumps. Symbols can
+list after the start, have trading halts (missing bars) and stock splits.
+One-minute bars cover the NSE session (09:15-15:30 IST) and add up to the
+daily bars. The candle store gets raw (as traded) candles and each symbol's
+split, like the provider data it stands in for.
+"""
+
+import io
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .candle_store import save_candles, save_corporate_actions
+from .corporate_actions import normalize_actions, unadjust_splits
+from .resample import MARKET_TIMEZONE, SESSION_MINUTES, SESSION_OPEN_MINUTES
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS_PER_YEAR = 252
+
+SYNTHETIC_INTERVALS = ['1d', '1m']
+SYNTHETIC_BATCH_SIZE = 100
+
+# stock_data columns produced for each symbol (TABLE_SCHEMA order)
+STOCK_DATA_COLUMNS = [
+    'symbol_token', 'trading_symbol', 'name', 'sector', 'exchange', 'instrument_type',
+    'last_price', 'open_price', 'high_price', 'low_price', 'close_price', 'volume',
+    'week_high_52', 'week_low_52', 'market_cap', 'pe_ratio', 'dividend_yield', 'last_updated',
+]
+
+SECTORS = {
+    'Financial Services': 'Finance',
+    'Information Technology': 'Technologies',
+    'Energy': 'Power',
+    'Healthcare': 'Pharma',
+    'Automobile': 'Motors',
+    'Chemicals': 'Chemicals',
+    'Consumer Goods': 'Consumer',
+    'Metals & Mining': 'Metals',
+    'Construction': 'Infra',
+    'Textiles': 'Textiles',
+}
+NAME_PREFIXES = ['Bharat', 'Indo', 'Surya', 'Ganga', 'Vikas', 'Shakti', 'Apex', 'Nova', 'Prime', 'Zenith',
+                 'Sagar', 'Himalaya', 'Deccan', 'Kaveri', 'Orient', 'Pioneer', 'Vijay', 'Tara', 'Unity', 'Everest']
+
+# GARCH(1,1) persistence: shock weight and decay
+GARCH_ALPHA = 0.08
+GARCH_BETA = 0.90
+
+# Share of the daily move that happens overnight, and the daily chance of an overnight jump
+OVERNIGHT_SHARE = 0.25
+JUMP_PROBABILITY = 0.004
+JUMP_SIZE = 0.06
+
+SPLIT_PROBABILITY = 0.35
+SPLIT_RATIOS = [2, 5, 10]
+HALTS_PER_YEAR = 0.2
+INTRADAY_HALT_PROBABILITY = 0.003
+
+
+def trading_days(years: float, end: Optional[datetime] = None) -> pd.DatetimeIndex:
+    """Weekdays covering `years` years up to `end` (default today), at midnight IST"""
+    end = np.datetime64((end or datetime.now()).date())
+    days = np.arange(end - int(years * 365.25), end + 1)
+    return pd.DatetimeIndex(days[np.is_busday(days)]).as_unit('ns').tz_localize(MARKET_TIMEZONE)
+
+
+def symbol_master(count: int, days: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Symbols with their generation parameters
+
+    Args:
+        count: Number of symbols
+        days: Number of trading days in the history
+        seed: Random seed
+
+    Returns:
+        DataFrame with one row per symbol: symbol_token, trading_symbol, name,
+        sector, listing_day, base_price, drift, volatility, beta, base_volume,
+        shares, eps, dividend_yield, split_day and split_ratio (0 when none)
+    """
+    rng = np.random.default_rng([seed, 0])
+    ids = np.arange(count)
+    sectors = np.array(list(SECTORS))[rng.integers(len(SECTORS), size=count)]
+    prefixes = np.array(NAME_PREFIXES)[rng.integers(len(NAME_PREFIXES), size=count)]
+
+    # A fifth of the symbols list part way through the history
+    listing_day = np.where(rng.random(count) < 0.2, rng.integers(0, max(1, days - 260), size=count), 0)
+
+    has_split = rng.random(count) < SPLIT_PROBABILITY
+    split_low = np.minimum(listing_day + 60, days - 1)
+    split_day = np.where(has_split, split_low + (rng.random(count) * (days - split_low)).astype(int), -1)
+    split_day = np.where(split_day >= days, -1, split_day)
+
+    base_price = np.exp(rng.normal(np.log(400), 1.0, count)).round(2)
+    trading_symbols = np.char.add('SYN', np.char.zfill(ids.astype(str), 5))
+    master = pd.DataFrame({
+        'trading_symbol': trading_symbols,
+        'symbol_token': np.char.add(trading_symbols, '.NS'),
+        'name': [f"{prefix} {SECTORS[sector]} {i} Ltd" for i, (prefix, sector) in enumerate(zip(prefixes, sectors))],
+        'sector': sectors,
+        'listing_day': listing_day,
+        'base_price': base_price,
+        'drift': rng.normal(0.10, 0.08, count),
+        'volatility': np.clip(rng.lognormal(np.log(0.28), 0.35, count), 0.1, 1.2),
+        'beta': np.clip(rng.normal(1.0, 0.3, count), 0.2, 2.0),
+        'base_volume': np.exp(rng.normal(np.log(400_000), 1.2, count)),
+        'shares': np.exp(rng.normal(np.log(5e8), 1.0, count)),
+        'eps': np.where(rng.random(count) < 0.1, -1.0, 1.0) * base_price / rng.lognormal(np.log(22), 0.5, count),
+        'dividend_yield': np.where(rng.random(count) < 0.25, np.nan, rng.gamma(2.0, 0.75, count)).round(2),
+        'split_day': split_day,
+        'split_ratio': np.where(split_day >= 0, np.array(SPLIT_RATIOS)[rng.integers(len(SPLIT_RATIOS), size=count)], 0),
+    })
+    return master
+
+
+def _garch(shocks: np.ndarray, daily_variance: np.ndarray) -> np.ndarray:
+    """
+    Volatility-clustered returns from standardized shocks
+
+    Args:
+        shocks: Array of shape (days, symbols)
+        daily_variance: Long-run daily variance per symbol
+
+    Returns:
+        Array of shape (days, symbols)
+    """
+    omega = daily_variance * (1 - GARCH_ALPHA - GARCH_BETA)
+    variance = daily_variance.copy()
+    returns = np.empty_like(shocks)
+    for t in range(len(shocks)):
+        returns[t] = np.sqrt(variance) * shocks[t]
+        variance = omega + GARCH_ALPHA * returns[t] ** 2 + GARCH_BETA * variance
+    return returns
+
+
+def market_returns(days: int, seed: int = 0, volatility: float = 0.16) -> np.ndarray:
+    """Daily log returns of the market factor shared by every symbol"""
+    rng = np.random.default_rng([seed, 1])
+    shocks = rng.standard_t(5, size=(days, 1)) * np.sqrt(3 / 5)
+    return _garch(shocks, np.array([volatility ** 2 / TRADING_DAYS_PER_YEAR]))[:, 0] + 0.11 / TRADING_DAYS_PER_YEAR
+
+
+def daily_bars(master: pd.DataFrame, dates: pd.DatetimeIndex, market: np.ndarray,
+               seed: int = 0, adjusted: bool = True) -> Dict[str, pd.DataFrame]:
+    """
+    Daily OHLCV bars for a batch of symbols, generated together
+
+    Each symbol draws from its own seeded stream, so its bars do not depend
+    on which batch it is generated in.
+
+    Args:
+        master: symbol_master rows
+        dates: Trading days
+        market: market_returns for the same days
+        seed: Random seed
+        adjusted: Split-adjusted prices (like Yahoo Finance); raw prices jump at the split otherwise
+
+    Returns:
+        Dictionary of symbol_token -> DataFrame indexed by date with Open/High/Low/Close/Volume
+    """
+    days, count = len(dates), len(master)
+    shocks, gap_noise, jumps, high_noise, low_noise, volume_noise = (np.empty((days, count)) for _ in range(6))
+    halted = np.zeros((days, count), dtype=bool)
+
+    for i, symbol_id in enumerate(master.index):
+        rng = np.random.default_rng([seed, 2, int(symbol_id)])
+        shocks[:, i] = rng.standard_t(5, size=days) * np.sqrt(3 / 5)
+        gap_noise[:, i] = rng.normal(0, 1, days)
+        jumps[:, i] = np.where(rng.random(days) < JUMP_PROBABILITY, rng.normal(0, JUMP_SIZE, days), 0.0)
+        high_noise[:, i] = np.abs(rng.normal(0, 1, days))
+        low_noise[:, i] = np.abs(rng.normal(0, 1, days))
+        volume_noise[:, i] = rng.normal(0, 0.5, days)
+        for _ in range(rng.poisson(HALTS_PER_YEAR * days / TRADING_DAYS_PER_YEAR)):
+            start = int(rng.integers(days))
+            halted[start:start + int(rng.integers(1, 6)), i] = True
+
+    daily_variance = master['volatility'].to_numpy() ** 2 / TRADING_DAYS_PER_YEAR
+    idiosyncratic = _garch(shocks, daily_variance)
+    drift = (master['drift'].to_numpy() - master['volatility'].to_numpy() ** 2 / 2) / TRADING_DAYS_PER_YEAR
+    returns = drift + master['beta'].to_numpy() * (market[:, None] - market.mean()) + idiosyncratic
+
+    overnight = OVERNIGHT_SHARE * returns + jumps
+    log_close = np.cumsum(returns + jumps, axis=0)
+    listing_day = master['listing_day'].to_numpy()
+    columns = np.arange(count)
+    log_close += np.log(master['base_price'].to_numpy()) - log_close[listing_day, columns]
+
+    close = np.exp(log_close)
+    open_ = np.exp(log_close - returns - jumps + overnight + gap_noise * np.sqrt(daily_variance) * 0.1)
+    high = np.maximum(open_, close) * np.exp(high_noise * np.sqrt(daily_variance) * 0.6)
+    low = np.minimum(open_, close) * np.exp(-low_noise * np.sqrt(daily_variance) * 0.6)
+    surprise = np.abs(returns) / np.sqrt(daily_variance)
+    volume = master['base_volume'].to_numpy() * np.exp(volume_noise) * (1 + 0.5 * surprise)
+
+    split_day = master['split_day'].to_numpy()
+    split_ratio = master['split_ratio'].to_numpy()
+    if not adjusted:
+        before_split = (np.arange(days)[:, None] < split_day) & (split_day >= 0)
+        factor = np.where(before_split, np.maximum(split_ratio, 1), 1)
+        open_, high, low, close, volume = open_ * factor, high * factor, low * factor, close * factor, volume / factor
+
+    present = (np.arange(days)[:, None] >= listing_day) & ~halted
+    bars = {}
+    for i, symbol in enumerate(master['symbol_token']):
+        rows = present[:, i]
+        bars[symbol] = pd.DataFrame({
+            'Open': open_[rows, i].round(2),
+            'High': high[rows, i].round(2),
+            'Low': low[rows, i].round(2),
+            'Close': close[rows, i].round(2),
+            'Volume': volume[rows, i].astype('int64'),
+        }, index=dates[rows])
+    return bars
+
+
+def minute_bars(daily: pd.DataFrame, rng: np.random.Generator) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    One-minute bars through each session, consistent with the daily bars
+
+    Each day's path is a Brownian bridge from its open to its close with a
+    U-shaped intraday volatility profile, scaled to the day's range; a few
+    sessions have a halt (missing minutes). Daily highs, lows and volumes are
+    recomputed from the minutes.
+
+    Returns:
+        Tuple of (minute bars, daily bars with High/Low/Volume from the minutes)
+    """
+    days = len(daily)
+    position = (np.arange(SESSION_MINUTES) - SESSION_MINUTES / 2) / (SESSION_MINUTES / 2)
+    profile = 1 + 1.5 * position ** 2
+    profile /= np.sqrt(np.sum(profile ** 2))
+
+    day_open = daily['Open'].to_numpy()
+    day_close = daily['Close'].to_numpy()
+    intraday_return = np.log(day_close / day_open)
+    day_volatility = np.maximum(np.abs(np.log(daily['High'].to_numpy() / daily['Low'].to_numpy())), 1e-4) / 2
+
+    steps = rng.normal(0, 1, (days, SESSION_MINUTES)) * profile * day_volatility[:, None]
+    path = np.cumsum(steps, axis=1)
+    path -= np.arange(1, SESSION_MINUTES + 1) / SESSION_MINUTES * (path[:, -1] - intraday_return)[:, None]
+
+    close = day_open[:, None] * np.exp(path)
+    open_ = np.concatenate([day_open[:, None], close[:, :-1]], axis=1)
+    wiggle = np.exp(np.abs(rng.normal(0, 1, (days, SESSION_MINUTES))) * profile * day_volatility[:, None] * 0.3)
+    high = np.maximum(open_, close) * wiggle
+    low = np.minimum(open_, close) / wiggle
+    weights = profile * rng.lognormal(0, 0.4, (days, SESSION_MINUTES))
+    volume = np.floor(daily['Volume'].to_numpy()[:, None] * weights / weights.sum(axis=1, keepdims=True))
+
+    keep = np.ones((days, SESSION_MINUTES), dtype=bool)
+    halt_days = np.flatnonzero(rng.random(days) < INTRADAY_HALT_PROBABILITY)
+    for day in halt_days:
+        start = int(rng.integers(30, SESSION_MINUTES - 100))
+        keep[day, start:start + int(rng.integers(15, 90))] = False
+
+    # Wall-clock session minutes (09:15-15:29) added to each day's local midnight
+    midnight = daily.index.tz_localize(None) if daily.index.tz is not None else daily.index
+    offsets = (SESSION_OPEN_MINUTES + np.arange(SESSION_MINUTES)) * 60 * 10 ** 9
+    stamps = midnight.normalize().as_unit('ns').asi8[:, None] + offsets
+    index = pd.DatetimeIndex(stamps[keep].astype('datetime64[ns]')).tz_localize(MARKET_TIMEZONE)
+
+    minutes = pd.DataFrame({
+        'Open': open_[keep].round(2),
+        'High': high[keep].round(2),
+        'Low': low[keep].round(2),
+        'Close': close[keep].round(2),
+        'Volume': volume[keep].astype('int64'),
+    }, index=index)
+
+    daily = daily.copy()
+    daily['High'] = np.where(keep, high, -np.inf).max(axis=1).round(2)
+    daily['Low'] = np.where(keep, low, np.inf).min(axis=1).round(2)
+    daily['Volume'] = np.where(keep, volume, 0).sum(axis=1).astype('int64')
+    return minutes, daily
+
+
+def fundamentals(master: pd.DataFrame, bars: Dict[str, pd.DataFrame],
+                 as_of: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    stock_data rows from the latest generated bars
+
+    Returns:
+        DataFrame with STOCK_DATA_COLUMNS; symbols without bars are left out
+    """
+    as_of = as_of or datetime.now()
+    rows = []
+    for symbol_id, symbol in master.iterrows():
+        candles = bars.get(symbol['symbol_token'])
+        if candles is None or candles.empty:
+            continue
+        latest = candles.iloc[-1]
+        year = candles.tail(TRADING_DAYS_PER_YEAR)
+        price = float(latest['Close'])
+        # EPS drifts with the price so P/E stays in a plausible range
+        eps = symbol['eps'] * price / symbol['base_price']
+        rows.append({
+            'symbol_token': symbol['symbol_token'],
+            'trading_symbol': symbol['trading_symbol'],
+            'name': symbol['name'],
+            'sector': symbol['sector'],
+            'exchange': 'NSE',
+            'instrument_type': 'EQ',
+            'last_price': price,
+            'open_price': float(latest['Open']),
+            'high_price': float(latest['High']),
+            'low_price': float(latest['Low']),
+            'close_price': price,
+            'volume': int(latest['Volume']),
+            'week_high_52': float(year['High'].max()),
+            'week_low_52': float(year['Low'].min()),
+            'market_cap': int(price * symbol['shares']),
+            'pe_ratio': round(price / eps, 2) if eps > 0 else None,
+            'dividend_yield': None if pd.isna(symbol['dividend_yield']) else float(symbol['dividend_yield']),
+            'last_updated': as_of,
+        })
+    return pd.DataFrame(rows, columns=STOCK_DATA_COLUMNS)
+
+
+def write_stock_data(conn, rows: pd.DataFrame) -> int:
+    """
+    Upsert stock_data rows with COPY through a temporary table
+
+    Args:
+        conn: psycopg2 connection (committed here)
+        rows: DataFrame with STOCK_DATA_COLUMNS
+
+    Returns:
+        Number of rows written
+    """
+    buffer = io.StringIO()
+    rows[STOCK_DATA_COLUMNS].to_csv(buffer, index=False, header=False, na_rep='\\N')
+    buffer.seek(0)
+
+    columns = ', '.join(STOCK_DATA_COLUMNS)
+    updates = ', '.join(f"{column} = EXCLUDED.{column}" for column in STOCK_DATA_COLUMNS[1:])
+    cursor = conn.cursor()
+    cursor.execute("CREATE TEMP TABLE synthetic_stock_data (LIKE stock_data INCLUDING DEFAULTS) ON COMMIT DROP")
+    cursor.copy_expert(f"COPY synthetic_stock_data ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+    cursor.execute(f"""
+        INSERT INTO stock_data ({columns})
+        SELECT {columns} FROM synthetic_stock_data
+        ON CONFLICT (symbol_token) DO UPDATE SET {updates}
+    """)
+    conn.commit()
+    cursor.close()
+    return len(rows)
+
+
+def write_parquet(dataset: Dict[str, Any], output_dir: str) -> List[str]:
+    """
+    Write a generated dataset's tables as Parquet files
+
+    Args:
+        dataset: Output of generate_dataset
+        output_dir: Directory for symbols.parquet, stock_data.parquet and splits.parquet
+
+    Returns:
+        Paths written
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    master = dataset['master']
+    splits = master.loc[master['split_day'] >= 0, ['symbol_token', 'split_day', 'split_ratio']]
+    tables = {
+        'symbols': master,
+        'stock_data': dataset['stock_data'],
+        'splits': pd.DataFrame({
+            'symbol_token': splits['symbol_token'].to_numpy(),
+            'date': dataset['dates'][splits['split_day'].to_numpy()].tz_localize(None),
+            'ratio': splits['split_ratio'].to_numpy(),
+        }),
+    }
+    paths = []
+    for name, table in tables.items():
+        path = os.path.join(output_dir, f"{name}.parquet")
+        table.to_parquet(path, index=False)
+        paths.append(path)
+    return paths
+
+
+_worker_config: Dict[str, Any] = {}
+
+
+def _init_worker(config: Dict[str, Any]) -> None:
+    global _worker_config
+    _worker_config = config
+
+
+def _generate_batch(master: pd.DataFrame) -> Dict[str, Any]:
+    """Generate one batch of symbols and write their candles to the candle store"""
+    config = _worker_config
+    bars = daily_bars(master, config['dates'], config['market'], config['seed'], config['adjusted'])
+    rows = {interval: 0 for interval in config['intervals']}
+
+    for symbol_id, symbol in zip(master.index, master['symbol_token']):
+        daily = bars[symbol]
+        if daily.empty:
+            continue
+        split_day = int(master.at[symbol_id, 'split_day'])
+        actions = normalize_actions(pd.DataFrame({
+            'date': [config['dates'][split_day]], 'action': ['split'],
+            'value': [float(master.at[symbol_id, 'split_ratio'])]}) if split_day >= 0 else None)
+        if config['write_candles']:
+            save_corporate_actions(symbol, actions)
+
+        def store(interval: str, candles: pd.DataFrame) -> None:
+            if config['write_candles']:
+                raw = unadjust_splits(candles, actions) if config['adjusted'] else candles
+                save_candles(symbol, interval, raw, covered_from='max')
+
+        if '1m' in config['intervals']:
+            minutes, daily = minute_bars(daily, np.random.default_rng([config['seed'], 3, int(symbol_id)]))
+            bars[symbol] = daily
+            store('1m', minutes)
+            rows['1m'] += len(minutes)
+        if '1d' in config['intervals']:
+            store('1d', daily)
+            rows['1d'] += len(daily)
+
+    return {'fundamentals': fundamentals(master, bars, config['as_of']), 'rows': rows}
+
+
+def generate_dataset(count: int, years: float = 20, intervals: Optional[List[str]] = None,
+                     seed: int = 0, adjusted: bool = True, write_candles: bool = True,
+                     batch_size: int = SYNTHETIC_BATCH_SIZE,
+                     max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Generate a synthetic universe and write its candles to the candle store
+
+    Symbol batches are generated in parallel worker processes, each writing
+    its symbols' Parquet files directly.
+
+    Args:
+        count: Number of symbols
+        years: Years of history
+        intervals: Any of SYNTHETIC_INTERVALS (default ['1d'])
+        seed: Random seed; the same seed gives the same data
+        adjusted: Split-adjusted prices in the returned tables (the candle store is always raw)
+        write_candles: Write the candle store (False to only build the tables)
+        batch_size: Symbols per worker task
+        max_workers: Worker processes (default: CPU count)
+
+    Returns:
+        Dictionary with master (symbol_master), dates (trading days),
+        stock_data (fundamentals rows), rows (row counts per interval) and seconds
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    intervals = intervals or ['1d']
+    unknown = set(intervals) - set(SYNTHETIC_INTERVALS)
+    if unknown:
+        raise ValueError(f"Unsupported intervals: {sorted(unknown)} (use {SYNTHETIC_INTERVALS})")
+
+    started = time.perf_counter()
+    dates = trading_days(years)
+    master = symbol_master(count, len(dates), seed)
+    config = {
+        'dates': dates,
+        'market': market_returns(len(dates), seed),
+        'seed': seed,
+        'adjusted': adjusted,
+        'intervals': intervals,
+        'write_candles': write_candles,
+        'as_of': datetime.now(),
+    }
+    batches = [master.iloc[i:i + batch_size] for i in range(0, count, batch_size)]
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(config,)) as executor:
+        results = list(executor.map(_generate_batch, batches))
+
+    rows = {interval: sum(result['rows'][interval] for result in results) for interval in intervals}
+    stock_data = pd.concat([result['fundamentals'] for result in results], ignore_index=True)
+    seconds = time.perf_counter() - started
+    logger.info(f"Generated {count} symbols x {len(dates)} days: "
+                f"{', '.join(f'{n:,} {interval} bars' for interval, n in rows.items())} in {seconds:.1f}s")
+    return {'master': master, 'dates': dates, 'stock_data': stock_data, 'rows': rows, 'seconds': seconds}
@@ -12,7 +12,7 @@ async def main():
     from stock_analysis.main import get_table_overview
 
     print("Fetching table overview...")
-    result = get_table_overview()
+    result = await get_table_overview()
     print(result)
 
 if __name__ == "__main__":
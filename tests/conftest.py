@@ -0,0 +1,49 @@
+"""
+Shared test setup
+
+Every test runs offline: the fake market data provider stands in for Yahoo
+Finance, and the on-disk caches point at a throwaway directory. The
+environment is set before stock_analysis is imported, since its modules read
+these settings at import time.
+"""
+
+import os
+import tempfile
+
+_cache_root = tempfile.mkdtemp(prefix='stock-analysis-tests-')
+os.environ.setdefault('STOCK_API_PROVIDER', 'fake')
+os.environ.setdefault('CANDLE_STORE_DIR', os.path.join(_cache_root, 'candles'))
+os.environ.setdefault('ANALYTICS_DIR', os.path.join(_cache_root, 'analytics'))
+os.environ.setdefault('PROFILE_DIR', os.path.join(_cache_root, 'profiles'))
+os.environ.setdefault('SITE_OUTPUT_DIR', os.path.join(_cache_root, 'docs'))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def candle_store_dir(tmp_path, monkeypatch):
+    """Empty candle cache for one test"""
+    from stock_analysis import candle_store
+
+    monkeypatch.setattr(candle_store, 'CANDLE_STORE_DIR', str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def random_walk():
+    """Daily OHLCV candles from a seeded random walk: random_walk(n, seed=0)"""
+    def make(n: int = 300, seed: int = 0, start: str = '2024-01-01') -> pd.DataFrame:
+        rng = np.random.default_rng(seed)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        open_ = close * (1 + rng.normal(0, 0.003, n))
+        spread = np.abs(rng.normal(0, 0.01, n)) * close
+        return pd.DataFrame({
+            'Open': open_,
+            'High': np.maximum(open_, close) + spread,
+            'Low': np.minimum(open_, close) - spread,
+            'Close': close,
+            'Volume': rng.integers(1_000, 100_000, n).astype(float),
+        }, index=pd.bdate_range(start, periods=n, tz='Asia/Kolkata'))
+    return make
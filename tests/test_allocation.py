@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_analysis.allocation import (
+    build_constraints,
+    optimize_allocation,
+    optimize_weights,
+    project_weights,
+    round_to_shares,
+)
+
+
+def random_problem(seed: int, n: int = 12, n_sectors: int = 4):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(0.1, 0.2, n)
+    upper = np.full(n, 0.2)
+    sector_ids = rng.integers(0, n_sectors, n)
+    sector_ids[:n_sectors] = np.arange(n_sectors)
+    sector_caps = np.full(n_sectors, 0.4)
+    return values, upper, sector_ids, sector_caps
+
+
+def assert_feasible(weights, upper, sector_ids, sector_caps, total=1.0):
+    assert weights.min() >= -1e-12
+    assert (weights <= upper + 1e-12).all()
+    assert (np.bincount(sector_ids, weights, len(sector_caps)) <= sector_caps + 1e-9).all()
+    assert weights.sum() == pytest.approx(total, abs=1e-9)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_projection_is_feasible_and_nearest(seed):
+    values, upper, sector_ids, sector_caps = random_problem(seed)
+    weights = project_weights(values, upper, sector_ids, sector_caps)
+    assert_feasible(weights, upper, sector_ids, sector_caps)
+
+    # Any other feasible point is at least as far away
+    rng = np.random.default_rng(100 + seed)
+    distance = np.linalg.norm(weights - values)
+    for _ in range(200):
+        other = project_weights(rng.normal(0.1, 0.3, len(values)), upper, sector_ids, sector_caps)
+        assert np.linalg.norm(other - values) >= distance - 1e-9
+
+
+def test_projection_keeps_feasible_point():
+    upper = np.full(4, 0.5)
+    weights = np.array([0.1, 0.2, 0.3, 0.4])
+    result = project_weights(weights, upper, np.array([0, 0, 1, 1]), np.array([1.0, 1.0]))
+    np.testing.assert_allclose(result, weights, atol=1e-12)
+
+
+def test_projection_with_unreachable_total_fills_every_cap():
+    upper = np.full(3, 0.2)
+    result = project_weights(np.array([0.5, 0.3, 0.2]), upper, np.zeros(3, dtype=int), np.array([1.0]))
+    np.testing.assert_allclose(result, upper)
+
+
+def test_optimize_without_covariance_is_projection():
+    values, upper, sector_ids, sector_caps = random_problem(1)
+    target = np.abs(values) / np.abs(values).sum()
+    np.testing.assert_allclose(optimize_weights(target, upper, sector_ids, sector_caps),
+                               project_weights(target, upper, sector_ids, sector_caps))
+
+
+def test_zero_iterations_returns_projected_target():
+    target = np.array([0.7, 0.3])
+    args = (np.ones(2), np.zeros(2, dtype=int), np.ones(1))
+    weights = optimize_weights(target, *args, covariance=np.eye(2), risk_aversion=1.0, max_iter=0)
+    np.testing.assert_allclose(weights, project_weights(target, *args))
+
+
+def test_risk_aversion_moves_weight_to_low_variance():
+    target = np.array([0.5, 0.5])
+    covariance = np.diag([0.09, 0.01])
+    args = (np.ones(2), np.zeros(2, dtype=int), np.ones(1))
+    weights = optimize_weights(target, *args, covariance=covariance, risk_aversion=5.0)
+    assert weights.sum() == pytest.approx(1.0)
+    assert weights[1] > weights[0]
+    assert weights @ covariance @ weights < target @ covariance @ target
+
+
+def test_round_to_shares_stays_within_budget_and_caps():
+    values, upper, sector_ids, sector_caps = random_problem(2)
+    weights = project_weights(values, upper, sector_ids, sector_caps)
+    prices = np.random.default_rng(2).uniform(50, 5000, len(weights))
+    budget = 1_000_000.0
+
+    shares, cash = round_to_shares(weights, prices, budget, upper, sector_ids, sector_caps)
+    value = shares * prices
+    assert cash == pytest.approx(budget - value.sum())
+    assert cash >= 0
+    assert (value <= upper * budget + 1e-6).all()
+    assert (np.bincount(sector_ids, value, len(sector_caps)) <= sector_caps * budget + 1e-6).all()
+    assert (shares[weights == 0] == 0).all()
+
+
+def test_build_constraints_rejects_bad_values():
+    with pytest.raises(ValueError):
+        build_constraints({'max_stock_weight': 1.5})
+    with pytest.raises(ValueError):
+        build_constraints({'leverage': 2})
+
+
+def scored_universe():
+    # Two listings share a trading symbol; rows are told apart by symbol_token
+    return pd.DataFrame({
+        'symbol_token': ['1', '2', '3', '4'],
+        'trading_symbol': ['AAA', 'AAA', 'BBB', 'CCC'],
+        'normalized_score': [90.0, 80.0, 70.0, 60.0],
+        'buy_percentage': [30.0, 27.0, 23.0, 20.0],
+        'last_price': [100.0, 250.0, 400.0, 1000.0],
+        'volume': [1e6] * 4,
+        'sector': ['Energy', 'Energy', 'Technology', 'Healthcare'],
+    })
+
+
+def test_allocation_respects_constraints():
+    constraints = {'budget': 100_000, 'max_stock_weight': 0.3, 'max_sector_weight': 0.5, 'risk_aversion': 0}
+    allocation, summary = optimize_allocation(scored_universe(), constraints=constraints)
+
+    assert summary['invested'] + summary['cash'] == pytest.approx(100_000)
+    assert (allocation['final_weight'] <= 0.3 + 1e-9).all()
+    assert max(summary['sector_weights'].values()) <= 0.5 + 1e-9
+    assert set(allocation['symbol_token']) <= {'1', '2', '3', '4'}
+
+
+def test_allocation_aligns_covariance_by_symbol_token():
+    tokens = ['1', '2', '3', '4']
+    covariance = pd.DataFrame(np.diag([0.01, 0.5, 0.01, 0.01]), index=tokens, columns=tokens)
+    constraints = {'budget': 100_000, 'max_stock_weight': 1.0, 'max_sector_weight': 1.0, 'risk_aversion': 10}
+    allocation, summary = optimize_allocation(scored_universe(), covariance, constraints)
+
+    weights = allocation.set_index('symbol_token')['optimal_weight']
+    # The high-variance listing of AAA is cut, not its namesake
+    assert weights.get('2', 0.0) < weights['1']
+    assert 'expected_volatility' in summary
+
+
+def test_allocation_without_any_return_history():
+    covariance = pd.DataFrame([[np.nan]], index=['9'], columns=['9'])
+    with np.errstate(all='raise'):
+        allocation, summary = optimize_allocation(scored_universe(), covariance, {'risk_aversion': 1.0})
+    assert summary['positions'] > 0
+    assert 'expected_volatility' not in summary
+    assert np.isfinite(allocation['optimal_weight']).all()
@@ -0,0 +1,82 @@
+import os
+
+import pandas as pd
+import pytest
+
+duckdb = pytest.importorskip('duckdb')
+
+from stock_analysis import candle_store
+from stock_analysis.analytics import AnalyticsEngine
+
+
+@pytest.fixture
+def engine(candle_store_dir, tmp_path_factory):
+    index = pd.DatetimeIndex(['2025-03-03 09:15', '2025-03-03 09:16'], tz='Asia/Kolkata')
+    minute = pd.DataFrame({'Open': [10.0, 11.0], 'High': [12.0, 12.5], 'Low': [9.5, 10.5],
+                           'Close': [11.0, 12.0], 'Volume': [100, 200]}, index=index)
+    candle_store.save_candles('AAA.NS', '1m', minute)
+    daily = minute.iloc[:1].copy()
+    daily.index = pd.DatetimeIndex(['2025-03-03'], tz='Asia/Kolkata')
+    candle_store.save_candles('AAA.NS', '1d', daily)
+    candle_store.save_candles('BBB.NS', '1d', daily * 2)
+    candle_store.save_corporate_actions('AAA.NS', pd.DataFrame(
+        {'date': [pd.Timestamp('2025-01-15')], 'action': ['split'], 'value': [2.0]}))
+
+    mirror_dir = tmp_path_factory.mktemp('mirrors')
+    pd.DataFrame({'trading_symbol': ['AAA', 'BBB'], 'pe_ratio': [12.5, 30.0]}).to_parquet(
+        mirror_dir / 'stock_data.parquet', index=False)
+    return AnalyticsEngine(tables=['stock_data'], store_dir=str(candle_store_dir), mirror_dir=str(mirror_dir))
+
+
+def test_candles_view_reads_every_interval_in_market_time(engine):
+    rows = engine.query("SELECT symbol, interval, ts, close, volume FROM candles ORDER BY interval, symbol, ts")
+    assert [(row['symbol'], row['interval']) for row in rows] == [
+        ('AAA.NS', '1d'), ('BBB.NS', '1d'), ('AAA.NS', '1m'), ('AAA.NS', '1m')]
+    assert rows[2]['ts'] == pd.Timestamp('2025-03-03 09:15').to_pydatetime()
+    assert rows[1]['close'] == 22.0
+    assert rows[3]['volume'] == 200
+
+
+def test_mirrors_and_corporate_actions(engine):
+    assert engine.query("SELECT trading_symbol FROM stock_data WHERE pe_ratio < 20") == [{'trading_symbol': 'AAA'}]
+    actions = engine.query("SELECT symbol, action, value FROM corporate_actions")
+    assert actions == [{'symbol': 'AAA.NS', 'action': 'split', 'value': 2.0}]
+
+
+def test_joins_and_aggregates(engine):
+    rows = engine.query("""
+        SELECT s.trading_symbol, max(c.high) AS high
+        FROM candles c JOIN stock_data s ON c.symbol = s.trading_symbol || '.NS'
+        WHERE c.interval = '1m' GROUP BY 1
+    """)
+    assert rows == [{'trading_symbol': 'AAA', 'high': 12.5}]
+
+
+@pytest.mark.parametrize('sql', [
+    "CREATE TABLE t AS SELECT 1",
+    "SELECT 1; SELECT 2",
+    "COPY (SELECT 1) TO 'out.csv'",
+    "SET enable_external_access = true",
+    "ATTACH 'other.db'",
+])
+def test_only_single_selects_are_allowed(engine, sql):
+    with pytest.raises(ValueError):
+        engine.query(sql)
+
+
+def test_files_outside_the_store_cannot_be_read(engine, tmp_path_factory):
+    outside = tmp_path_factory.mktemp('outside') / 'outside.parquet'
+    pd.DataFrame({'secret': [1]}).to_parquet(outside)
+    with pytest.raises(duckdb.Error):
+        engine.query(f"SELECT * FROM read_parquet('{outside}')")
+    with pytest.raises(duckdb.Error):
+        engine.query(f"SELECT * FROM read_text('{os.path.abspath(__file__)}')")
+
+
+def test_new_intervals_appear_after_refresh(engine, candle_store_dir):
+    weekly = pd.DataFrame({'Open': [1.0], 'High': [1.0], 'Low': [1.0], 'Close': [1.0], 'Volume': [1]},
+                          index=pd.DatetimeIndex(['2025-03-03'], tz='Asia/Kolkata'))
+    candle_store.save_candles('AAA.NS', '1wk', weekly)
+    engine.refresh_mirrors()
+    assert engine.query("SELECT count(*) AS n FROM candles WHERE interval = '1wk'") == [{'n': 1}]
+    assert '1wk' in engine.stats()['candle_intervals']
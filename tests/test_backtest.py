@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_analysis.backtest import (
+    POSITION_WINDOW,
+    rebalance_positions,
+    run_backtest,
+    simulate,
+    sweep_backtests,
+    weight_grid,
+)
+
+# Two stocks over five days, rebalanced on days 0 and 2
+PRICES = np.array([
+    [10.0, 20.0],
+    [11.0, 20.0],
+    [12.0, 18.0],
+    [12.0, 24.0],
+    [15.0, 24.0],
+])
+REBALANCES = np.array([0, 2])
+WEIGHTS = np.array([[0.5, 0.5], [1.0, 0.0]])
+
+
+def test_simulate_by_hand():
+    result = simulate(PRICES, REBALANCES, WEIGHTS)
+
+    # Half in each stock: 0.5 * 11/10 + 0.5 * 20/20 on day 1, 0.5 * 12/10 + 0.5 * 18/20 on day 2,
+    # then all in the first stock: 1.05 * 15/12 on day 4
+    np.testing.assert_allclose(result['equity'], [1.0, 1.05, 1.05, 1.05, 1.3125])
+    np.testing.assert_allclose(result['segment_growth'], [1.05, 1.25])
+    # Day 2 weights drifted to 0.6/1.05 and 0.45/1.05 before moving everything to the first stock
+    np.testing.assert_allclose(result['turnover'], [0.5, 0.45 / 1.05])
+
+
+def test_transaction_costs_apply_to_traded_value():
+    result = simulate(PRICES, REBALANCES, WEIGHTS, transaction_cost_bps=10)
+
+    first_cost = 1 - 0.001 * 1.0
+    second_cost = 1 - 0.001 * 0.9 / 1.05
+    np.testing.assert_allclose(result['equity'], [
+        1.0,
+        first_cost * 1.05,
+        first_cost * 1.05,
+        first_cost * 1.05 * second_cost,
+        first_cost * 1.05 * second_cost * 1.25,
+    ])
+
+
+def test_uninvested_weight_is_held_as_cash():
+    result = simulate(PRICES, np.array([0]), np.array([[0.5, 0.0]]))
+    np.testing.assert_allclose(result['equity'], [1.0, 1.05, 1.1, 1.1, 1.25])
+
+
+def test_rebalance_positions_are_period_ends():
+    dates = pd.bdate_range('2025-01-01', '2025-03-31')
+    positions = rebalance_positions(dates, 'monthly')
+    assert list(dates[positions]) == [pd.Timestamp('2025-01-31'), pd.Timestamp('2025-02-28')]
+    with pytest.raises(ValueError):
+        rebalance_positions(dates, 'daily')
+
+
+def test_weight_grid_sums_to_one():
+    grid = weight_grid(0.5)
+    assert len(grid) == 6
+    assert all(sum(override['weights'].values()) == pytest.approx(1.0) for override in grid)
+
+
+@pytest.fixture(scope='module')
+def backtest_data():
+    rng = np.random.default_rng(11)
+    dates = pd.bdate_range('2024-01-01', periods=POSITION_WINDOW + 120)
+    symbols = ['A.NS', 'B.NS', 'C.NS', 'D.NS']
+    close = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, (len(dates), 4)), axis=0)),
+                         index=dates, columns=symbols)
+    return {
+        'close': close,
+        'high': close * 1.01,
+        'low': close * 0.99,
+        'pe_ratio': pd.DataFrame([[12.0, 18.0, 30.0, 45.0]] * len(dates), index=dates, columns=symbols),
+        'dividend_yield': pd.DataFrame([[3.0, 1.5, 0.5, 0.0]] * len(dates), index=dates, columns=symbols),
+    }
+
+
+def test_run_backtest(backtest_data):
+    result = run_backtest(backtest_data, rebalance='monthly', transaction_cost_bps=10)
+
+    curve = result['equity_curve']
+    assert curve.index[0] >= backtest_data['close'].index[POSITION_WINDOW - 1]
+    assert curve.iloc[0].tolist() == [1.0, 1.0]
+    assert result['rebalances'] >= 5
+    assert result['symbols'] == 4
+    assert result['metrics']['total_return'] == pytest.approx((curve['strategy'].iloc[-1] - 1) * 100)
+    assert 0 < result['metrics']['average_positions'] <= 4
+
+
+def test_sweep_runs_in_worker_processes(backtest_data):
+    overrides = weight_grid(0.5)[:3]
+    results = sweep_backtests(backtest_data, overrides, transaction_cost_bps=10, max_workers=2)
+
+    assert len(results) == 3
+    assert results['sharpe'].is_monotonic_decreasing
+    for _, row in results.iterrows():
+        expected = run_backtest(backtest_data, row['config'], transaction_cost_bps=10)['metrics']
+        assert row['sharpe'] == pytest.approx(expected['sharpe'])
@@ -0,0 +1,123 @@
+import time
+
+import pandas as pd
+import pytest
+
+from stock_analysis import candle_store
+from stock_analysis.api_providers import FakeMarketDataProvider
+
+
+class CountingProvider(FakeMarketDataProvider):
+    """Fake provider that records history requests and can be told to return nothing"""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+        self.empty = False
+
+    def get_raw_historical_data(self, symbol, period="1mo", interval="1d"):
+        self.requests.append(period)
+        if self.empty:
+            return pd.DataFrame(columns=candle_store.CANDLE_COLUMNS)
+        return super().get_raw_historical_data(symbol, period, interval)
+
+
+def test_cached_period_is_served_without_fetching(candle_store_dir):
+    provider = CountingProvider()
+    first = candle_store.get_candles('CACHE.NS', '1y', provider=provider, adjust='none')
+    again = candle_store.get_candles('CACHE.NS', '6mo', provider=provider, adjust='none')
+
+    assert provider.requests == ['1y']
+    assert not first.empty
+    pd.testing.assert_frame_equal(again, first[first.index >= again.index[0]])
+
+
+def test_longer_period_fetches_the_whole_period(candle_store_dir):
+    provider = CountingProvider()
+    candle_store.get_candles('LONGER.NS', '6mo', provider=provider, adjust='none')
+    candle_store.get_candles('LONGER.NS', '2y', provider=provider, adjust='none')
+    assert provider.requests == ['6mo', '2y']
+
+
+def test_stale_cache_is_topped_up_with_the_tail(candle_store_dir):
+    provider = CountingProvider()
+    candle_store.get_candles('TAIL.NS', '1y', provider=provider, adjust='none')
+    time.sleep(0.01)
+    candle_store.get_candles('TAIL.NS', '1y', provider=provider, adjust='none', max_age=0)
+    assert provider.requests == ['1y', '5d']
+
+
+def test_empty_tail_still_refreshes_the_fetch_time(candle_store_dir):
+    provider = CountingProvider()
+    candle_store.get_candles('HOLIDAY.NS', '1y', provider=provider, adjust='none')
+    fetched_at = candle_store.load_metadata('HOLIDAY.NS')['fetched_at']
+
+    provider.empty = True
+    time.sleep(1.1)
+    candles = candle_store.get_candles('HOLIDAY.NS', '1y', provider=provider, adjust='none', max_age=1)
+    assert not candles.empty
+    assert candle_store.load_metadata('HOLIDAY.NS')['fetched_at'] > fetched_at
+
+    # Fresh again, so the next call does not go upstream
+    candle_store.get_candles('HOLIDAY.NS', '1y', provider=provider, adjust='none', max_age=1)
+    assert provider.requests == ['1y', '5d']
+
+
+class ActionColumnsProvider(CountingProvider):
+    """Returns actions with the candles, like Yahoo Finance with actions=True"""
+
+    def __init__(self):
+        super().__init__()
+        self.action_requests = 0
+
+    def get_raw_historical_data(self, symbol, period="1mo", interval="1d"):
+        candles = super().get_raw_historical_data(symbol, period, interval)
+        candles['Dividends'] = 0.0
+        candles['Stock Splits'] = 0.0
+        candles.loc[candles.index[-3], 'Dividends'] = 4.0
+        return candles
+
+    def get_corporate_actions(self, symbol):
+        self.action_requests += 1
+        return super().get_corporate_actions(symbol)
+
+
+def test_actions_returned_with_candles_are_recorded(candle_store_dir):
+    provider = ActionColumnsProvider()
+    candles = candle_store.get_candles('EVENTS.NS', '1mo', provider=provider)
+    raw = candle_store.load_candles('EVENTS.NS')
+
+    assert provider.action_requests == 0
+    assert list(raw.columns) == candle_store.CANDLE_COLUMNS
+    actions = candle_store.load_corporate_actions('EVENTS.NS')
+    assert actions['date'].tolist() == [raw.index[-3].tz_localize(None).normalize()]
+    raw = raw.loc[candles.index]
+    assert (candles['Close'].iloc[:-3] < raw['Close'].iloc[:-3]).all()
+    assert (candles['Close'].iloc[-3:] == raw['Close'].iloc[-3:]).all()
+
+
+def test_fetched_actions_are_merged_with_stored_ones(candle_store_dir):
+    candle_store.save_corporate_actions('MERGED.NS', pd.DataFrame(
+        {'date': [pd.Timestamp('2020-01-15'), pd.Timestamp('2024-06-03')],
+         'action': ['split', 'dividend'], 'value': [2.0, 1.0]}))
+    merged = candle_store.merge_corporate_actions('MERGED.NS', pd.DataFrame(
+        {'date': [pd.Timestamp('2024-06-03'), pd.Timestamp('2025-06-02')],
+         'action': ['dividend', 'dividend'], 'value': [1.25, 1.5]}))
+    assert merged['value'].tolist() == [2.0, 1.25, 1.5]
+    pd.testing.assert_frame_equal(candle_store.load_corporate_actions('MERGED.NS'), merged)
+
+
+def test_newer_rows_replace_cached_ones(candle_store_dir):
+    index = pd.date_range('2025-01-01', periods=3, freq='D', tz='Asia/Kolkata')
+    candles = pd.DataFrame({column: [1.0, 2.0, 3.0] for column in candle_store.CANDLE_COLUMNS}, index=index)
+    candle_store.save_candles('MERGE.NS', '1d', candles, covered_from='2025-01-01')
+
+    update = candles.iloc[2:] * 10
+    merged = candle_store.save_candles('MERGE.NS', '1d', update)
+    assert merged['Close'].tolist() == [1.0, 2.0, 30.0]
+    assert candle_store.load_metadata('MERGE.NS')['covered_from'] == '2025-01-01'
+
+
+def test_unknown_adjustment_is_rejected(candle_store_dir):
+    with pytest.raises(ValueError):
+        candle_store.get_candles('X.NS', adjust='dividends')
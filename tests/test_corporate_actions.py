@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_analysis.corporate_actions import (
+    actions_from_history,
+    actions_to_records,
+    adjust_candles,
+    adjustment_factors,
+    compute_factors,
+    normalize_actions,
+    unadjust_splits,
+)
+
+
+def actions(*rows):
+    return normalize_actions(pd.DataFrame(rows, columns=['date', 'action', 'value']))
+
+
+def flat_candles(days=10, price=100.0, start='2025-01-01', tz='Asia/Kolkata'):
+    index = pd.date_range(start, periods=days, freq='D', tz=tz)
+    return pd.DataFrame({'Open': price, 'High': price, 'Low': price, 'Close': price, 'Volume': 1000},
+                        index=index)
+
+
+def test_normalize_actions_cleans_and_sorts():
+    raw = pd.DataFrame({
+        'date': pd.to_datetime(['2025-03-01', '2025-01-15', '2025-01-15', '2025-02-01', '2025-02-02',
+                                '2025-02-03']).tz_localize('Asia/Kolkata'),
+        'action': ['dividend', 'split', 'split', 'split', 'bonus', 'dividend'],
+        'value': [5.0, 2.0, 2.0, 1.0, 3.0, -1.0],
+    })
+    cleaned = normalize_actions(raw)
+    assert cleaned['action'].tolist() == ['split', 'dividend']
+    assert cleaned['date'].tolist() == [pd.Timestamp('2025-01-15'), pd.Timestamp('2025-03-01')]
+    assert cleaned['date'].dt.tz is None
+
+
+def test_actions_from_history_columns():
+    history = flat_candles(days=4)
+    history['Dividends'] = [0.0, 1.5, 0.0, 0.0]
+    history['Stock Splits'] = [0.0, 0.0, 0.0, 2.0]
+    assert actions_to_records(actions_from_history(history)) == [
+        {'date': '2025-01-04', 'action': 'split', 'value': 2.0},
+        {'date': '2025-01-02', 'action': 'dividend', 'value': 1.5},
+    ]
+    assert actions_from_history(flat_candles()).empty
+
+
+def test_split_factors_apply_before_the_ex_date():
+    candles = flat_candles()
+    split, dividend = compute_factors(candles, actions(('2025-01-04', 'split', 2), ('2025-01-08', 'split', 5)))
+    assert split.tolist() == [10, 10, 10, 5, 5, 5, 5, 1, 1, 1]
+    assert (dividend == 1).all()
+
+
+def test_dividend_factor_uses_the_split_adjusted_close_before_the_ex_date():
+    candles = flat_candles()
+    candles['Close'] = np.arange(100.0, 110.0)
+    # A 2-for-1 split after the dividend: amounts are quoted on the post-split basis
+    split, dividend = compute_factors(candles, actions(('2025-01-05', 'dividend', 2.6),
+                                                       ('2025-01-08', 'split', 2)))
+    expected_ratio = 1 - 2.6 / (103.0 / 2)
+    np.testing.assert_allclose(dividend, [expected_ratio] * 4 + [1] * 6)
+    assert split.tolist() == [2] * 7 + [1] * 3
+
+
+def test_intraday_bars_on_the_ex_date_are_not_adjusted():
+    index = pd.date_range('2025-01-07 09:15', periods=3, freq='1D', tz='Asia/Kolkata')
+    candles = pd.DataFrame({'Close': [100.0, 100.0, 100.0]}, index=index)
+    split, _ = compute_factors(candles, actions(('2025-01-08', 'split', 2)))
+    assert split.tolist() == [2, 1, 1]
+
+
+def test_adjusted_views():
+    candles = flat_candles()
+    corporate = actions(('2025-01-04', 'split', 2), ('2025-01-06', 'dividend', 1.0))
+
+    assert adjust_candles(candles, corporate, 'none') is candles
+
+    split_adjusted = adjust_candles(candles, corporate, 'split')
+    assert split_adjusted['Close'].tolist() == [50.0] * 3 + [100.0] * 7
+    assert split_adjusted['Volume'].tolist() == [2000] * 3 + [1000] * 7
+
+    adjusted = adjust_candles(candles, corporate, 'all')
+    np.testing.assert_allclose(adjusted['Close'], [50 * 0.99] * 3 + [100 * 0.99] * 2 + [100.0] * 5)
+    # Returns across the split are continuous in both adjusted views
+    assert split_adjusted['Close'].pct_change().iloc[3] == pytest.approx(1.0)
+    assert (candles['Close'] == 100.0).all()
+
+
+def test_unadjust_splits_inverts_split_adjustment(random_walk):
+    raw = random_walk(100)
+    raw['Volume'] = raw['Volume'].astype(np.int64)
+    corporate = actions((raw.index[30].tz_localize(None), 'split', 5), (raw.index[70].tz_localize(None), 'split', 2))
+    round_trip = unadjust_splits(adjust_candles(raw, corporate, 'split'), corporate)
+    pd.testing.assert_frame_equal(round_trip, raw)
+
+
+def test_memoized_factors_follow_new_actions():
+    candles = flat_candles()
+    first = actions(('2025-01-04', 'split', 2))
+    second = actions(('2025-01-04', 'split', 2), ('2025-01-06', 'split', 3))
+
+    cached = adjustment_factors(candles, first, key=('TEST', '1d'))
+    assert cached[0].tolist() == compute_factors(candles, first)[0].tolist()
+    assert adjustment_factors(candles, second, key=('TEST', '1d'))[0][0] == 6
+
+
+def test_unknown_adjustment():
+    with pytest.raises(ValueError):
+        adjust_candles(flat_candles(), actions(('2025-01-04', 'split', 2)), 'dividend')
+
+
+def test_actions_to_records_newest_first():
+    records = actions_to_records(actions(('2025-01-04', 'split', 2), ('2025-02-01', 'dividend', 1.5)))
+    assert records == [{'date': '2025-02-01', 'action': 'dividend', 'value': 1.5},
+                       {'date': '2025-01-04', 'action': 'split', 'value': 2.0}]
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_analysis import correlation
+from stock_analysis.correlation import (
+    CorrelationService,
+    RollingCovariance,
+    aligned_returns,
+    covariance_to_correlation,
+)
+from stock_analysis.resample import MARKET_TIMEZONE
+
+SYMBOLS = ['A.NS', 'B.NS', 'C.NS']
+
+
+def random_returns(rows, columns=3, seed=0):
+    return np.random.default_rng(seed).normal(0, 0.01, (rows, columns))
+
+
+def ledoit_wolf_reference(data):
+    """Ledoit-Wolf (2004) shrinkage towards mu * I, written out from the definitions"""
+    n, p = data.shape
+    centered = data - data.mean(axis=0)
+    sample = centered.T @ centered / n
+    target = np.trace(sample) / p * np.eye(p)
+    distance = np.sum((sample - target) ** 2)
+    error = sum(np.sum((np.outer(row, row) - sample) ** 2) for row in centered) / n ** 2
+    intensity = min(error, distance) / distance
+    return (1 - intensity) * sample + intensity * target, intensity
+
+
+def test_rolling_covariance_matches_the_window():
+    returns = random_returns(50)
+    dates = list(pd.date_range('2025-01-01', periods=50))
+    rolling = RollingCovariance(SYMBOLS, window=20)
+    for start in range(0, 50, 7):
+        rolling.add(returns[start:start + 7], dates[start:start + 7])
+
+    np.testing.assert_allclose(rolling.covariance(), np.cov(returns[-20:], rowvar=False), atol=1e-15)
+    assert rolling.count == 20
+    assert rolling.dates == dates[-20:]
+
+
+def test_dropping_the_newest_row_before_replacing_it():
+    returns = random_returns(21)
+    dates = list(pd.date_range('2025-01-01', periods=21))
+    rolling = RollingCovariance(SYMBOLS, window=20)
+    rolling.add(returns[:20], dates[:20])
+
+    rolling.drop_last()
+    assert rolling.count == 19
+    rolling.add(returns[20:], dates[20:])
+    expected = np.vstack([returns[:19], returns[20:]])
+    np.testing.assert_allclose(rolling.covariance(), np.cov(expected, rowvar=False), atol=1e-15)
+
+
+def test_ledoit_wolf_shrinkage():
+    # Unequal volatilities and a common factor, so the sample covariance is worth keeping in part
+    returns = random_returns(30, columns=5, seed=3) * [1, 2, 3, 4, 5] + random_returns(30, columns=1, seed=4)
+    rolling = RollingCovariance([f'S{i}' for i in range(5)], window=30)
+    rolling.add(returns, list(pd.date_range('2025-01-01', periods=30)))
+
+    shrunk, intensity = rolling.shrunk_covariance()
+    expected, expected_intensity = ledoit_wolf_reference(returns)
+    assert 0 < intensity < 1
+    assert intensity == pytest.approx(expected_intensity)
+    np.testing.assert_allclose(shrunk, expected * 30 / 29)
+
+
+def test_perfectly_correlated_series():
+    base = random_returns(40, columns=1)
+    rolling = RollingCovariance(['A', 'B', 'C'], window=40)
+    rolling.add(np.hstack([base, 2 * base, np.zeros_like(base)]), list(pd.date_range('2025-01-01', periods=40)))
+    np.testing.assert_allclose(covariance_to_correlation(rolling.covariance()),
+                               [[1, 1, 0], [1, 1, 0], [0, 0, 0]], atol=1e-12)
+
+
+@pytest.fixture
+def close_history(monkeypatch):
+    """Closes served to the service, ending at `end` days from today"""
+    today = pd.Timestamp.now(tz=MARKET_TIMEZONE).tz_localize(None).normalize()
+    rng = np.random.default_rng(7)
+    history = {'closes': None}
+
+    def make(days, end=0):
+        dates = pd.date_range(end=today + pd.Timedelta(days=end), periods=days)
+        closes = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (days, len(SYMBOLS))), axis=0)),
+                              index=dates, columns=SYMBOLS)
+        history['closes'] = closes
+        return closes
+
+    def load(symbols, period, provider=None):
+        return history['closes'][[symbol for symbol in symbols if symbol in history['closes']]]
+
+    monkeypatch.setattr(correlation, 'load_close_matrix', load)
+    history['make'] = make
+    return history
+
+
+def expected_covariance(closes, window):
+    return np.cov(aligned_returns(closes).to_numpy()[-window:], rowvar=False)
+
+
+def test_service_applies_new_days_to_the_cached_window(close_history):
+    closes = close_history['make'](41, end=-1)
+    service = CorrelationService(max_age=0)
+    service.get(SYMBOLS, window=20)
+
+    close_history['closes'] = pd.concat([closes, close_history['make'](1, end=0)])
+    result = service.get(SYMBOLS, window=20)
+    np.testing.assert_allclose(result['covariance'], expected_covariance(close_history['closes'], 20), atol=1e-15)
+    assert result['as_of'] == close_history['closes'].index[-1].date().isoformat()
+    assert result['observations'] == 20
+
+
+def test_service_recomputes_the_forming_bar(close_history):
+    closes = close_history['make'](41, end=0)
+    service = CorrelationService(max_age=0)
+    first = service.get(SYMBOLS, window=20)
+    np.testing.assert_allclose(first['covariance'], expected_covariance(closes, 20), atol=1e-15)
+
+    # Today's bar moves on before the close
+    closes = closes.copy()
+    closes.iloc[-1] *= [1.02, 0.97, 1.0]
+    close_history['closes'] = closes
+    result = service.get(SYMBOLS, window=20)
+    np.testing.assert_allclose(result['covariance'], expected_covariance(closes, 20), atol=1e-15)
+    assert result['observations'] == 20
+
+
+def test_service_shrinkage_and_correlation(close_history):
+    close_history['make'](30)
+    result = CorrelationService().get(SYMBOLS, window=20, shrinkage=True)
+    assert 0 <= result['shrinkage_intensity'] <= 1
+    np.testing.assert_allclose(np.diag(result['correlation']), 1.0)
+    assert result['symbols'] == SYMBOLS
+
+
+def test_service_needs_enough_history(close_history):
+    close_history['make'](1)
+    with pytest.raises(ValueError, match="Not enough price history"):
+        CorrelationService().get(SYMBOLS)
+
+    close_history['make'](30)
+    with pytest.raises(ValueError, match="two symbols"):
+        CorrelationService().get(['A.NS', 'MISSING.NS'])
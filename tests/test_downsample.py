@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_analysis.downsample import candle_summary, downsample, lttb_indices, ohlc_buckets
+
+
+def reference_lttb(y, threshold):
+    """Plain loop version of LTTB with the same bucket edges"""
+    n = len(y)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected, previous = [0], 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = np.mean(range(stop, next_stop))
+        avg_y = np.mean(y[stop:next_stop])
+        best, best_area = start, -1.0
+        for i in range(start, stop):
+            area = abs((previous - avg_x) * (y[i] - y[previous]) - (previous - i) * (avg_y - y[previous]))
+            if area > best_area:
+                best, best_area = i, area
+        selected.append(best)
+        previous = best
+    return selected + [n - 1]
+
+
+@pytest.mark.parametrize('n, points', [(1000, 50), (101, 3), (257, 100), (10, 9)])
+def test_lttb_matches_reference(n, points):
+    y = np.cumsum(np.random.default_rng(n).normal(size=n))
+    assert lttb_indices(y, points).tolist() == reference_lttb(y, points)
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    y = np.zeros(1000)
+    y[437] = 50.0
+    kept = lttb_indices(y, 20)
+    assert len(kept) == 20
+    assert kept[0] == 0 and kept[-1] == 999
+    assert (np.diff(kept) > 0).all()
+    assert 437 in kept
+
+
+def test_lttb_returns_everything_within_budget():
+    assert lttb_indices(np.arange(5.0), 10).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_ohlc_buckets_preserve_extremes_and_volume(random_walk):
+    candles = random_walk(1003)
+    buckets = ohlc_buckets(candles, 100)
+
+    assert len(buckets) <= 100
+    assert buckets['Bars'].sum() == len(candles)
+    assert buckets['High'].max() == candles['High'].max()
+    assert buckets['Low'].min() == candles['Low'].min()
+    assert buckets['Volume'].sum() == candles['Volume'].sum()
+    assert buckets['Open'].iloc[0] == candles['Open'].iloc[0]
+    assert buckets['Close'].iloc[-1] == candles['Close'].iloc[-1]
+    assert buckets.index[0] == candles.index[0]
+
+
+def test_ohlc_buckets_carry_partial_from_the_last_bar(random_walk):
+    candles = random_walk(100)
+    candles['Partial'] = False
+    candles.iloc[-1, candles.columns.get_loc('Partial')] = True
+    buckets = ohlc_buckets(candles, 10)
+    assert buckets['Partial'].tolist() == [False] * 9 + [True]
+    assert 'Partial' not in ohlc_buckets(random_walk(100), 10)
+
+
+def test_lttb_downsampling_keeps_original_rows(random_walk):
+    candles = random_walk(500)
+    reduced = downsample(candles, 40, method='lttb')
+    assert len(reduced) == 40
+    pd.testing.assert_frame_equal(reduced, candles.loc[reduced.index])
+
+
+def test_downsample_validation(random_walk):
+    candles = random_walk(50)
+    assert downsample(candles, 50) is candles
+    with pytest.raises(ValueError):
+        downsample(candles, 2)
+    with pytest.raises(ValueError):
+        downsample(candles, 10, method='average')
+
+
+def test_candle_summary(random_walk):
+    candles = random_walk(250)
+    summary = candle_summary(candles)
+    assert summary['bars'] == 250
+    assert summary['high'] == candles['High'].max()
+    assert summary['high_at'] == candles['High'].idxmax().isoformat()
+    assert summary['total_volume'] == int(candles['Volume'].sum())
+    assert summary['max_drawdown_pct'] <= 0
+    assert summary['change_pct'] == pytest.approx((candles['Close'].iloc[-1] / candles['Close'].iloc[0] - 1) * 100,
+                                                  abs=1e-4)
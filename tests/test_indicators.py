@@ -0,0 +1,123 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_analysis.indicators import (
+    IncrementalIndicator,
+    IndicatorSet,
+    IndicatorStore,
+    RollingMax,
+    RollingMin,
+    RollingSum,
+    RunningEMA,
+    WilderRSI,
+)
+
+
+def feed(indicator, values):
+    return [indicator.update(value) for value in values]
+
+
+def reference_rsi(closes: pd.Series, period: int) -> pd.Series:
+    """Wilder RSI seeded with the simple average of the first `period` changes"""
+    change = closes.diff().dropna().to_numpy()
+    gains, losses = np.maximum(change, 0), np.maximum(-change, 0)
+    result = [np.nan] * period
+    avg_gain, avg_loss = gains[:period].mean(), losses[:period].mean()
+    for i in range(period, len(change) + 1):
+        if i > period:
+            avg_gain = (avg_gain * (period - 1) + gains[i - 1]) / period
+            avg_loss = (avg_loss * (period - 1) + losses[i - 1]) / period
+        result.append(100.0 if avg_loss == 0 else 100 - 100 / (1 + avg_gain / avg_loss))
+    return pd.Series(result, index=closes.index)
+
+
+def test_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        IncrementalIndicator()
+
+
+def test_ema_matches_pandas(random_walk):
+    closes = random_walk(200)['Close']
+    values = feed(RunningEMA(12), closes)
+    np.testing.assert_allclose(values, closes.ewm(span=12, adjust=False).mean())
+
+
+def test_rolling_mean_matches_pandas(random_walk):
+    closes = random_walk(200)['Close']
+    values = feed(RollingSum(20), closes)
+    expected = closes.rolling(20).mean()
+    assert values[:19] == [None] * 19
+    np.testing.assert_allclose(values[19:], expected.iloc[19:])
+
+
+@pytest.mark.parametrize('cls, method', [(RollingMax, 'max'), (RollingMin, 'min')])
+def test_rolling_extremes_match_pandas(random_walk, cls, method):
+    closes = random_walk(300)['Close']
+    values = feed(cls(50), closes)
+    expected = getattr(closes.rolling(50, min_periods=1), method)()
+    np.testing.assert_allclose(values, expected)
+
+
+def test_rsi_matches_reference(random_walk):
+    closes = random_walk(200)['Close']
+    values = feed(WilderRSI(14), closes)
+    expected = reference_rsi(closes, 14)
+    assert all(value is None for value in values[:14])
+    np.testing.assert_allclose(values[14:], expected.iloc[14:])
+
+
+def test_rsi_without_losses_is_100():
+    assert feed(WilderRSI(3), [1, 2, 3, 4])[-1] == 100.0
+
+
+@pytest.mark.parametrize('indicator', [RunningEMA(5), RollingSum(5), WilderRSI(5), RollingMax(5), RollingMin(5)])
+def test_peek_does_not_change_state(random_walk, indicator):
+    closes = random_walk(20)['Close'].tolist()
+    feed(indicator, closes[:-1])
+    before = indicator.snapshot()
+    peeked = indicator.peek(closes[-1])
+    assert indicator.snapshot() == before
+    assert indicator.update(closes[-1]) == pytest.approx(peeked)
+
+
+@pytest.mark.parametrize('indicator', [RunningEMA(5), RollingSum(5), WilderRSI(5), RollingMax(5), RollingMin(5)])
+def test_snapshot_round_trip(random_walk, indicator):
+    closes = random_walk(40)['Close'].tolist()
+    feed(indicator, closes[:30])
+    restored = type(indicator).restore(json.loads(json.dumps(indicator.snapshot())))
+    assert feed(restored, closes[30:]) == pytest.approx(feed(indicator, closes[30:]))
+
+
+def test_revised_pending_bar_is_counted_once(random_walk):
+    candles = random_walk(60)
+    bars = [{'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+            for o, h, l, c, v in candles[['Open', 'High', 'Low', 'Close', 'Volume']].itertuples(index=False)]
+
+    revised = IndicatorSet()
+    for timestamp, bar in zip(candles.index, bars):
+        # An intraday refresh sees the forming bar before its final values
+        revised.update_bar(timestamp, {**bar, 'close': bar['close'] * 0.9, 'high': bar['high'] * 2})
+        revised.update_bar(timestamp, bar)
+
+    clean = IndicatorSet()
+    for timestamp, bar in zip(candles.index, bars):
+        clean.update_bar(timestamp, bar)
+
+    assert revised.values() == pytest.approx(clean.values())
+    assert revised.bars_processed == len(bars) - 1
+
+
+def test_store_applies_only_new_bars(random_walk):
+    candles = random_walk(80)
+    store = IndicatorStore()
+    assert store.update('X', candles.iloc[:50]) == 50
+    # Overlapping refresh: the pending bar is revisited, older bars are skipped
+    assert store.update('X', candles.iloc[40:]) == 31
+
+    fresh = IndicatorStore()
+    fresh.update('X', candles)
+    assert store.get('X') == pytest.approx(fresh.get('X'))
+    assert store.get('X')['as_of'] == candles.index[-1].isoformat()
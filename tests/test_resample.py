@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_analysis.resample import (
+    MARKET_TIMEZONE,
+    SESSION_MINUTES,
+    base_interval,
+    get_resampled_candles,
+    resample_candles,
+)
+
+
+def minute_bars(days=('2025-03-03',), tz=MARKET_TIMEZONE, seed=0):
+    """Full NSE sessions of one-minute bars"""
+    index = pd.DatetimeIndex([]).tz_localize(MARKET_TIMEZONE)
+    for day in days:
+        index = index.append(pd.date_range(f"{day} 09:15", periods=SESSION_MINUTES, freq='min', tz=MARKET_TIMEZONE))
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.1, len(index)))
+    candles = pd.DataFrame({
+        'Open': close + rng.normal(0, 0.05, len(index)),
+        'High': close + 0.2,
+        'Low': close - 0.2,
+        'Close': close,
+        'Volume': rng.integers(1, 1000, len(index)),
+    }, index=index)
+    return candles.tz_convert(tz) if tz else candles.tz_localize(None)
+
+
+def expected_buckets(candles, starts):
+    """OHLCV by explicit bucket start labels"""
+    labels = pd.Series(starts, index=candles.index)
+    grouped = candles.groupby(labels.to_numpy())
+    return pd.DataFrame({
+        'Open': grouped['Open'].first(), 'High': grouped['High'].max(), 'Low': grouped['Low'].min(),
+        'Close': grouped['Close'].last(), 'Volume': grouped['Volume'].sum(),
+    })
+
+
+def test_hour_bars_are_anchored_to_the_session_open():
+    candles = minute_bars()
+    hours = resample_candles(candles, '1h', now=pd.Timestamp('2025-03-04 09:00', tz=MARKET_TIMEZONE))
+
+    assert [t.strftime('%H:%M') for t in hours.index] == [
+        '09:15', '10:15', '11:15', '12:15', '13:15', '14:15', '15:15']
+    # The last bar is the 15:15-15:30 remainder
+    minutes = (candles.index - candles.index[0]).total_seconds() // 60
+    starts = candles.index[0] + pd.to_timedelta(minutes // 60 * 60, unit='min')
+    expected = expected_buckets(candles, starts)
+    expected.index = expected.index.as_unit(hours.index.unit)
+    pd.testing.assert_frame_equal(hours[['Open', 'High', 'Low', 'Close', 'Volume']], expected,
+                                  check_names=False, check_dtype=False, check_freq=False)
+    assert not hours['Partial'].any()
+
+
+def test_buckets_never_span_sessions():
+    candles = minute_bars(days=('2025-03-03', '2025-03-04'))
+    bars = resample_candles(candles, '90m', now=pd.Timestamp('2025-03-05', tz=MARKET_TIMEZONE))
+    assert len(bars) == 2 * 5
+    assert bars.index[5] == pd.Timestamp('2025-03-04 09:15', tz=MARKET_TIMEZONE)
+    assert bars['Volume'].sum() == candles['Volume'].sum()
+
+
+@pytest.mark.parametrize('tz', ['UTC', None])
+def test_alignment_uses_market_time_for_any_index_timezone(tz):
+    candles = minute_bars(tz=tz)
+    bars = resample_candles(candles, '15m', now=pd.Timestamp('2025-03-04', tz=MARKET_TIMEZONE))
+    assert bars.index.tz == candles.index.tz
+    local = bars.index.tz_localize(MARKET_TIMEZONE) if tz is None else bars.index.tz_convert(MARKET_TIMEZONE)
+    assert local[0].strftime('%H:%M') == '09:15'
+    assert ((local.minute - 15) % 15 == 0).all()
+    assert len(bars) == SESSION_MINUTES // 15
+
+
+def test_forming_bar_is_partial():
+    candles = minute_bars()
+    now = pd.Timestamp('2025-03-03 10:40', tz=MARKET_TIMEZONE)
+    bars = resample_candles(candles[candles.index < now], '1h', now=now)
+    assert bars['Partial'].tolist() == [False, True]
+
+
+def test_weeks_start_on_monday_and_current_week_is_partial(random_walk):
+    daily = random_walk(15, start='2025-03-03')  # Monday 3 March to Friday 21 March
+    weeks = resample_candles(daily, '1wk', now=pd.Timestamp('2025-03-20 12:00', tz=MARKET_TIMEZONE))
+
+    assert [t.strftime('%a %d') for t in weeks.index] == ['Mon 03', 'Mon 10', 'Mon 17']
+    assert weeks['Partial'].tolist() == [False, False, True]
+    assert weeks['Open'].iloc[1] == daily['Open'].iloc[5]
+    assert weeks['Close'].iloc[1] == daily['Close'].iloc[9]
+    assert weeks['High'].iloc[1] == daily['High'].iloc[5:10].max()
+
+
+def test_months_and_trading_day_groups(random_walk):
+    daily = random_walk(60, start='2025-01-01')
+    now = pd.Timestamp('2025-12-31', tz=MARKET_TIMEZONE)
+
+    months = resample_candles(daily, '1mo', now=now)
+    assert [t.month for t in months.index] == [1, 2, 3]
+    assert months['Volume'].sum() == daily['Volume'].sum()
+
+    groups = resample_candles(daily, '5d', now=now)
+    assert len(groups) == 12
+    assert groups.index[1] == daily.index[5]
+    assert not groups['Partial'].any()
+
+
+@pytest.mark.parametrize('period, interval, base', [
+    ('5d', '15m', '1m'),
+    ('1mo', '15m', '5m'),
+    ('1mo', '90m', '5m'),
+    ('3mo', '90m', '90m'),
+    ('1y', '1h', '1h'),
+    ('1y', '1wk', '1d'),
+    ('max', '3mo', '1d'),
+    ('1y', '1d', '1d'),
+])
+def test_base_interval(period, interval, base):
+    assert base_interval(period, interval) == base
+
+
+def test_resampled_candles_from_the_store(candle_store_dir):
+    from stock_analysis.api_providers import FakeMarketDataProvider
+
+    provider = FakeMarketDataProvider()
+    bars = get_resampled_candles('RESAMPLE.NS', period='5d', interval='15m', provider=provider, adjust='none')
+    local = bars.index.tz_convert(MARKET_TIMEZONE)
+    assert 'Partial' in bars
+    assert ((local.hour * 60 + local.minute - (9 * 60 + 15)) % 15 == 0).all()
+    # Only the one-minute base series was stored
+    assert sorted(p.name for p in candle_store_dir.iterdir()) == ['1m']
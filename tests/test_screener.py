@@ -0,0 +1,109 @@
+import pytest
+
+from stock_analysis.screener import (
+    FilterCompiler,
+    SCREENER_DEFAULT_COLUMNS,
+    SCREENER_MAX_LIMIT,
+    compile_screen,
+    compile_sort,
+    tokenize,
+)
+
+
+def compile_filter(expression: str):
+    compiler = FilterCompiler(expression)
+    return compiler.compile(), compiler.params
+
+
+def test_tokenize_resolves_aliases_and_percentages():
+    assert tokenize("pe < 15 AND yield >= 2.5%") == [
+        ('field', 'pe_ratio'), ('op', '<'), ('number', 15.0), ('keyword', 'and'),
+        ('field', 'dividend_yield'), ('op', '>='), ('number', 2.5),
+    ]
+
+
+def test_precedence_and_grouping():
+    sql, params = compile_filter("pe < 15 or yield > 2 and sector = 'Energy'")
+    assert sql == "(pe_ratio < %s OR (dividend_yield > %s AND sector = %s))"
+    assert params == [15.0, 2.0, 'Energy']
+
+    sql, _ = compile_filter("(pe < 15 or yield > 2) and not sector = 'Energy'")
+    assert sql == "(((pe_ratio < %s OR dividend_yield > %s)) AND NOT sector = %s)"
+
+
+@pytest.mark.parametrize('expression, expected_sql, expected_params', [
+    ("price between 100 and 500", "last_price BETWEEN %s AND %s", [100.0, 500.0]),
+    ("price not between 100 and 500", "last_price NOT BETWEEN %s AND %s", [100.0, 500.0]),
+    ("sector in ('Energy', 'Technology')", "sector IN (%s, %s)", ['Energy', 'Technology']),
+    ("sector not in ('Energy')", "sector NOT IN (%s)", ['Energy']),
+    ("name like '%bank%'", "name ILIKE %s", ['%bank%']),
+    ("pe is null", "pe_ratio IS NULL", []),
+    ("pe is not null", "pe_ratio IS NOT NULL", []),
+    ("pe != 0", "pe_ratio <> %s", [0.0]),
+    ("pct_from_52w_low <= 10", "pct_from_52w_low <= %s", [10.0]),
+])
+def test_conditions(expression, expected_sql, expected_params):
+    assert compile_filter(expression) == (expected_sql, expected_params)
+
+
+def test_values_are_parameters_not_sql():
+    sql, params = compile_filter("name = 'x; DROP TABLE stock_data; --'")
+    assert sql == "name = %s"
+    assert params == ['x; DROP TABLE stock_data; --']
+
+
+@pytest.mark.parametrize('expression', [
+    "password < 1",             # unknown field
+    "pe < 'cheap'",             # string for a number field
+    "sector = 5",               # number for a text field
+    "pe like '1%'",             # LIKE on a number field
+    "pe < 15 and",              # dangling operator
+    "(pe < 15",                 # unbalanced parenthesis
+    "pe < 15 pe > 1",           # missing connective
+    "pe not < 15",              # NOT before a comparison
+    "pe < 15; select 1",        # stray characters
+])
+def test_invalid_filters_raise_value_error(expression):
+    with pytest.raises(ValueError):
+        compile_filter(expression)
+
+
+def test_compile_sort():
+    assert compile_sort("dividend_yield desc, pe") == (
+        "dividend_yield DESC NULLS LAST, pe_ratio ASC NULLS LAST", ['dividend_yield', 'pe_ratio'])
+    assert compile_sort("-yield") == ("dividend_yield DESC NULLS LAST", ['dividend_yield'])
+    with pytest.raises(ValueError):
+        compile_sort("pe sideways")
+
+
+def test_compile_screen_selects_used_fields():
+    query, params = compile_screen("pct_from_52w_low <= 10", sort_by="-turnover", columns=['volume'], limit=20)
+    select_list = query[len('SELECT '):query.index(' FROM ')].split(', ')
+    assert select_list == SCREENER_DEFAULT_COLUMNS + ['volume', 'pct_from_52w_low', 'turnover']
+    assert query.endswith("WHERE pct_from_52w_low <= %s ORDER BY turnover DESC NULLS LAST LIMIT %s")
+    assert params == [10.0, 20]
+
+
+@pytest.mark.parametrize('limit', [0, SCREENER_MAX_LIMIT + 1])
+def test_compile_screen_limits(limit):
+    with pytest.raises(ValueError):
+        compile_screen(limit=limit)
+
+
+def test_compiled_screen_runs():
+    duckdb = pytest.importorskip('duckdb')
+    conn = duckdb.connect()
+    conn.execute("""
+        CREATE TABLE stock_data (trading_symbol TEXT, name TEXT, sector TEXT, last_price DOUBLE,
+                                 pe_ratio DOUBLE, dividend_yield DOUBLE)
+    """)
+    conn.execute("""
+        INSERT INTO stock_data VALUES
+            ('AAA', 'Alpha Bank', 'Financial Services', 100, 12, 3.0),
+            ('BBB', 'Beta Power', 'Energy', 200, 9, 4.5),
+            ('CCC', 'Gamma Tech', 'Technology', 300, 40, 0.5),
+            ('DDD', 'Delta Bank', 'Financial Services', 50, NULL, 2.0)
+    """)
+    query, params = compile_screen("(pe < 15 or pe is null) and name not like '%power%'", sort_by="-yield")
+    rows = conn.execute(query.replace('%s', '?'), params).fetchall()
+    assert [row[0] for row in rows] == ['AAA', 'DDD']
@@ -0,0 +1,41 @@
+"""
+Command-line scripts at the repository root, run offline against the fake provider
+"""
+
+import sys
+
+import pandas as pd
+
+import indian_etfs
+
+
+def test_indian_etfs_report(candle_store_dir, monkeypatch, capsys):
+    monkeypatch.setattr(sys, 'argv', ['indian_etfs.py'])
+    indian_etfs.main()
+    output = capsys.readouterr().out
+
+    assert 'ETF ANALYSIS REPORT' in output
+    assert 'TOP PERFORMERS (Near 52-Week High)' in output
+    assert 'VALUE OPPORTUNITIES (Near 52-Week Low)' in output
+    assert 'ETF tracking complete' in output
+
+
+def test_indian_etfs_prices_have_report_columns(candle_store_dir, capsys):
+    df = indian_etfs.get_etf_prices()
+    assert not df.empty
+    assert {'symbol', 'name', 'type', 'price', 'volume', 'week_52_high', 'week_52_low', 'aum',
+            'expense_ratio', 'pct_from_52w_high', 'pct_from_52w_low'} <= set(df.columns)
+    assert (df['week_52_low'] <= df['price']).all() and (df['price'] <= df['week_52_high']).all()
+    assert (df['pct_from_52w_high'] >= 0).all() and (df['pct_from_52w_low'] >= 0).all()
+
+
+def test_indian_etfs_report_reads_the_range_distances(capsys):
+    df = pd.DataFrame({
+        'symbol': ['A.NS', 'B.NS'], 'name': ['Alpha', 'Beta'], 'type': ['Equity', 'Gold'],
+        'price': [100.0, 50.0], 'volume': [10, 20], 'aum': ['1', '2'], 'expense_ratio': ['0.1', '0.2'],
+        'week_52_high': [0.0, 0.0], 'week_52_low': [0.0, 0.0],
+        'pct_from_52w_high': [1.5, 2.5], 'pct_from_52w_low': [30.0, 40.0],
+    })
+    indian_etfs.display_etf_report(df)
+    output = capsys.readouterr().out
+    assert '1.50% below' in output and '40.00% above' in output
@@ -0,0 +1,171 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import anyio
+import pytest
+
+from stock_analysis.singleflight import AsyncSingleFlight, SingleFlight, call_key, coalesce_provider, provider_flights
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("condition not reached")
+        time.sleep(0.001)
+
+
+def coalesced_count(flights, name):
+    return flights.stats.get(name, {}).get('coalesced', 0)
+
+
+def test_concurrent_identical_calls_run_once():
+    flights = SingleFlight()
+    gate = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        gate.wait()
+        return [1, 2, 3]
+
+    with ThreadPoolExecutor(5) as pool:
+        futures = [pool.submit(flights.do, 'work', 'key', work) for _ in range(5)]
+        wait_for(lambda: coalesced_count(flights, 'work') == 4)
+        gate.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert results == [[1, 2, 3]] * 5
+    # Waiting callers get their own copy
+    results[1].append(4)
+    assert results[2] == [1, 2, 3]
+    assert flights.stats['work'] == {'executed': 1, 'coalesced': 4}
+
+
+def test_errors_reach_every_waiting_caller():
+    flights = SingleFlight()
+    gate = threading.Event()
+
+    def fail():
+        gate.wait()
+        raise RuntimeError("upstream down")
+
+    with ThreadPoolExecutor(3) as pool:
+        futures = [pool.submit(flights.do, 'fail', 'key', fail) for _ in range(3)]
+        wait_for(lambda: coalesced_count(flights, 'fail') == 2)
+        gate.set()
+        for future in futures:
+            with pytest.raises(RuntimeError, match="upstream down"):
+                future.result()
+
+
+def test_nothing_is_cached_after_the_call():
+    flights = SingleFlight()
+    counter = iter(range(10))
+    assert flights.do('n', 'key', lambda: next(counter)) == 0
+    assert flights.do('n', 'key', lambda: next(counter)) == 1
+    assert flights.do('n', 'other', lambda: next(counter)) == 2
+
+
+def test_call_key_distinguishes_arguments():
+    assert call_key('f', ('A.NS',), {'period': '1y'}) == call_key('f', ('A.NS',), {'period': '1y'})
+    assert call_key('f', ('A.NS',), {'period': '1y'}) != call_key('f', ('A.NS',), {'period': '5y'})
+    assert call_key('f', ('A.NS',), {}) != call_key('g', ('A.NS',), {})
+
+
+def test_async_calls_are_coalesced():
+    flights = AsyncSingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await anyio.sleep(0.05)
+        return {'value': 42}
+
+    async def main():
+        results = []
+
+        async def call():
+            results.append(await flights.do('work', 'key', work))
+
+        async with anyio.create_task_group() as tg:
+            for _ in range(4):
+                tg.start_soon(call)
+        return results
+
+    assert anyio.run(main) == [{'value': 42}] * 4
+    assert len(calls) == 1
+
+
+def test_cancelled_async_leader_hands_over_to_a_waiter():
+    flights = AsyncSingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await anyio.sleep(0.05)
+        return 'done'
+
+    async def main():
+        result = {}
+        async with anyio.create_task_group() as tg:
+            leader_scope = anyio.CancelScope()
+
+            async def leader():
+                with leader_scope:
+                    await flights.do('work', 'key', work)
+
+            async def waiter():
+                result['waiter'] = await flights.do('work', 'key', work)
+
+            tg.start_soon(leader)
+            await anyio.sleep(0.01)
+            tg.start_soon(waiter)
+            await anyio.sleep(0.01)
+            leader_scope.cancel()
+        return result
+
+    assert anyio.run(main) == {'waiter': 'done'}
+    assert len(calls) == 2
+
+
+class BlockingProvider:
+    """Provider stand-in whose get_quote blocks until released"""
+
+    gate = threading.Event()
+    calls = []
+
+    def __init__(self, seed):
+        self.seed = seed
+
+    def get_quote(self, symbol):
+        BlockingProvider.calls.append((self.seed, symbol))
+        BlockingProvider.gate.wait()
+        return {'symbol': symbol, 'seed': self.seed}
+
+
+@pytest.fixture
+def blocking_provider():
+    BlockingProvider.gate = threading.Event()
+    BlockingProvider.calls = []
+    yield BlockingProvider
+    BlockingProvider.gate.set()
+
+
+def test_providers_are_coalesced_per_configuration(blocking_provider):
+    same = [coalesce_provider(blocking_provider(seed=1)) for _ in range(2)]
+    other = coalesce_provider(blocking_provider(seed=2))
+
+    name = 'BlockingProvider.get_quote'
+    coalesced = coalesced_count(provider_flights, name)
+    with ThreadPoolExecutor(3) as pool:
+        futures = [pool.submit(provider.get_quote, 'A.NS') for provider in (*same, other)]
+        wait_for(lambda: len(blocking_provider.calls) == 2
+                 and coalesced_count(provider_flights, name) == coalesced + 1)
+        blocking_provider.gate.set()
+        results = [future.result() for future in futures]
+
+    assert sorted(blocking_provider.calls) == [(1, 'A.NS'), (2, 'A.NS')]
+    assert [result['seed'] for result in results] == [1, 1, 2]
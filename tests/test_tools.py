@@ -0,0 +1,71 @@
+"""
+MCP tools, called the way clients and scripts call them
+
+Only tools that work without PostgreSQL are exercised; market data comes from
+the fake provider (see conftest.py).
+"""
+
+import inspect
+import json
+
+import anyio
+import pytest
+
+from stock_analysis import main
+from stock_analysis.metrics import instrumented_tools
+
+
+def call_tool(name, arguments):
+    """Call a tool through FastMCP and decode its JSON text content"""
+    async def call():
+        return await main.mcp.call_tool(name, arguments)
+
+    result = anyio.run(call)
+    # Newer mcp versions return (content, structured output)
+    content = result[0] if isinstance(result, tuple) else result
+    decoded = [json.loads(block.text) for block in content]
+    return decoded[0] if len(decoded) == 1 else decoded
+
+
+def test_offloaded_tools_are_coroutines_with_sync_bodies():
+    for name, body in instrumented_tools.items():
+        assert inspect.iscoroutinefunction(getattr(main, name)), name
+        assert not inspect.iscoroutinefunction(body), name
+
+
+def test_every_tool_is_registered():
+    tools = anyio.run(main.mcp.list_tools)
+    assert set(instrumented_tools) <= {tool.name for tool in tools}
+
+
+def test_historical_data_through_mcp(candle_store_dir):
+    candles = call_tool('get_historical_data', {'symbol': 'TOOL.NS', 'period': '1mo'})
+    if isinstance(candles, dict):
+        candles = [candles]
+    assert len(candles) >= 15
+    assert set(candles[0]) >= {'timestamp', 'open', 'high', 'low', 'close', 'volume'}
+
+
+def test_historical_data_downsampled(candle_store_dir):
+    result = call_tool('get_historical_data', {'symbol': 'TOOL.NS', 'period': '2y', 'max_points': 20})
+    assert result['downsampling']['returned_candles'] <= 20
+    assert result['summary']['bars'] == result['downsampling']['source_candles']
+    assert sum(candle['bars'] for candle in result['candles']) == result['summary']['bars']
+
+
+def test_sync_body_matches_the_tool(candle_store_dir):
+    body = instrumented_tools['get_historical_data']
+    from_body = body('TOOL.NS', period='1mo')
+    from_tool = anyio.run(lambda: main.get_historical_data('TOOL.NS', period='1mo'))
+    assert from_body == from_tool
+
+
+def test_invalid_arguments_are_reported(candle_store_dir):
+    with pytest.raises(main.StockDataError, match="Unknown downsampling method"):
+        instrumented_tools['get_historical_data']('TOOL.NS', max_points=10, downsample='average')
+
+
+def test_tool_calls_are_recorded_in_metrics(candle_store_dir):
+    instrumented_tools['get_historical_data']('TOOL.NS', period='5d')
+    metrics = main.get_server_metrics(kind='tool', tool='get_historical_data')
+    assert metrics['series'] and metrics['series'][0]['count'] >= 1